@@ -0,0 +1,57 @@
+"""
+Render time per dashboard chart: plotly graph_objs validation vs. the plain dict fast path vs. a figure cache hit.
+
+Each measurement includes serializing the figure with plotly's JSON encoder, as Dash does for every response.
+
+    $ python -m benchmarks.chart_rendering --repeat 50
+"""
+import argparse
+import json
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from plotly.utils import PlotlyJSONEncoder
+
+from monitor import charts
+from monitor.charts import FigureCache
+
+
+def _time_render(render, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        json.dumps(render(), cls=PlotlyJSONEncoder)
+    return (time.perf_counter() - start) * 1000 / repeat
+
+
+def run(repeat: int, days: int):
+    start = datetime(year=2020, month=1, day=1)
+    historical_days = [start + timedelta(days=day) for day in range(days)]
+    historical_locked_tokens = [500000.0 + day * 1000 for day in range(days)]
+    historical_num_stakers = [100 + day for day in range(days)]
+    future = OrderedDict((period, (1000000.0 - period * 100, 100 - period // 10)) for period in range(1, 366))
+    breakdown = dict(Active=25, Pending=5, Inactive=10)
+
+    chart_builders = {
+        'historical_known_nodes': (charts._historical_known_nodes_figure, (historical_days, historical_num_stakers)),
+        'historical_locked_tokens': (charts._historical_locked_tokens_figure,
+                                     (historical_days, historical_locked_tokens)),
+        'stakers_breakdown': (charts._stakers_breakdown_figure, (breakdown,)),
+        'future_locked_tokens': (charts._future_locked_tokens_figure, (future,)),
+    }
+
+    print(f"{'chart':<28}{'graph_objs (ms)':>18}{'dict (ms)':>12}{'cached (ms)':>14}")
+    for chart, (build, args) in chart_builders.items():
+        figure_cache = FigureCache()
+        validated = _time_render(lambda: build(*args, validate=True), repeat)
+        fast_path = _time_render(lambda: build(*args), repeat)
+        cached = _time_render(lambda: figure_cache.get(chart=chart, version=1, build=lambda: build(*args)), repeat)
+        print(f"{chart:<28}{validated:>18.3f}{fast_path:>12.3f}{cached:>14.3f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--days', type=int, default=30)
+    args = parser.parse_args()
+    run(repeat=args.repeat, days=args.days)
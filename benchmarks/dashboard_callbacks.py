@@ -0,0 +1,111 @@
+"""
+Server cost of keeping one dashboard client up to date.
+
+Replays the dashboard's interval-driven callbacks against the Flask test client (chain and DB access mocked) and
+reports the number of HTTP requests and the server CPU time spent per client-minute. Refreshes pushed on data
+changes are not included; they scale with the change rate rather than with time.
+
+    $ python -m benchmarks.dashboard_callbacks --minutes 60
+"""
+import argparse
+import os
+import tempfile
+import time
+from unittest.mock import MagicMock, patch
+
+from flask import Flask
+from nucypher.blockchain.eth.agents import StakingEscrowAgent
+from nucypher.blockchain.eth.token import NU
+
+import monitor.dashboard
+from monitor.crawler import CrawlerNodeStorage
+from tests.utilities import MockContractAgency, create_random_mock_node
+
+# interval id -> minutes between firings
+INTERVAL_PERIODS = {'minute-interval': 1, 'half-minute-interval': 0.5, 'fallback-interval': 10}
+
+
+def _create_staking_agent(num_stakers: int = 100):
+    staking_agent = MagicMock(spec=StakingEscrowAgent)
+    stakers = [f'0x{i:040x}' for i in range(num_stakers)]
+    staking_agent.partition_stakers_by_activity.return_value = (stakers[:60], stakers[60:80], stakers[80:])
+    staking_agent.get_current_period.return_value = 18622
+    staking_agent.get_global_locked_tokens.return_value = NU(1000000, 'NU').to_nunits()
+    staking_agent.get_last_active_period.return_value = 18622
+    staking_agent.get_worker_from_staker.return_value = '0x987654321'
+    return staking_agent
+
+
+def _interval_callbacks(dash_app):
+    """Server-side callbacks triggered by each interval"""
+    triggered = dict()
+    for output, callback in dash_app.callback_map.items():
+        if 'callback' not in callback:
+            continue  # clientside
+        for dependency in callback['inputs']:
+            if dependency['id'] in INTERVAL_PERIODS:
+                triggered.setdefault(dependency['id'], []).append((output, callback['inputs'], callback['state']))
+    return triggered
+
+
+def _request_body(output, inputs, state, interval_id, n_intervals):
+    values = [dict(dependency, value=n_intervals if dependency['id'] == interval_id else None)
+              for dependency in inputs]
+    return {'output': output,
+            'inputs': values,
+            'state': [dict(dependency, value=None) for dependency in state],
+            'changedPropIds': [f'{interval_id}.n_intervals']}
+
+
+def run(minutes: int, num_nodes: int):
+    fd, db_filepath = tempfile.mkstemp()
+    staking_agent = _create_staking_agent()
+    try:
+        node_storage = CrawlerNodeStorage(storage_filepath=db_filepath)
+        for _ in range(num_nodes):
+            node_storage.store_node_metadata(node=create_random_mock_node())
+
+        with patch.object(monitor.dashboard.ContractAgency, 'get_agent', autospec=True) as get_agent, \
+                patch('monitor.dashboard.CrawlerBlockchainDBClient', autospec=True):
+            get_agent.side_effect = MockContractAgency(staking_agent=staking_agent).get_agent
+            server = Flask("monitor-dashboard-benchmark")
+            dashboard = monitor.dashboard.Dashboard(flask_server=server,
+                                                    route_url='/',
+                                                    registry=None,
+                                                    domain='goerli',
+                                                    blockchain_db_host='localhost',
+                                                    blockchain_db_port=8086,
+                                                    node_storage_filepath=db_filepath)
+            client = server.test_client()
+            triggered = _interval_callbacks(dashboard.dash_app)
+
+            requests = 0
+            cpu_start = time.process_time()
+            for interval_id, period in INTERVAL_PERIODS.items():
+                for n_intervals in range(1, int(minutes / period) + 1):
+                    for output, inputs, state in triggered.get(interval_id, []):
+                        body = _request_body(output, inputs, state, interval_id, n_intervals)
+                        response = client.post('/_dash-update-component', json=body)
+                        assert response.status_code in (200, 204), response.status_code
+                        requests += 1
+            cpu_seconds = time.process_time() - cpu_start
+    finally:
+        os.close(fd)
+        if os.path.exists(db_filepath):
+            os.remove(db_filepath)
+
+    chain_reads = sum(len(method.call_args_list) for method in (staking_agent.get_current_period,
+                                                                staking_agent.partition_stakers_by_activity,
+                                                                staking_agent.get_global_locked_tokens))
+    print(f"Simulated {minutes} client-minute(s) with {num_nodes} known nodes")
+    print(f"  requests per client-minute:          {requests / minutes:.2f}")
+    print(f"  stat panel chain reads per minute:   {chain_reads / minutes:.2f}")
+    print(f"  server CPU ms per client-minute:     {cpu_seconds * 1000 / minutes:.2f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--minutes', type=int, default=60)
+    parser.add_argument('--nodes', type=int, default=25)
+    args = parser.parse_args()
+    run(minutes=args.minutes, num_nodes=args.nodes)
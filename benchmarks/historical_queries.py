@@ -0,0 +1,130 @@
+"""
+Latency of the historical chart queries: aggregating the per-staker data vs. reading the crawler's network summaries,
+with and without the closed-day cache.
+
+Requires a local InfluxDB; a month of synthetic crawler data is loaded into a scratch database first.
+
+    $ python -m benchmarks.historical_queries --stakers 100 --repeat 10
+"""
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from influxdb import InfluxDBClient
+
+from monitor.crawler import Crawler
+from monitor.db import CrawlerBlockchainDBClient
+
+
+def load_synthetic_data(client: InfluxDBClient, database: str, days: int, stakers: int, sample_interval: int):
+    """One point per staker, and a network summary, every `sample_interval` seconds as written by the crawler"""
+    client.drop_database(database)
+    client.create_database(database)
+
+    now = int(datetime.utcnow().timestamp())
+    begin = now - days * 24 * 60 * 60
+    staker_addresses = [f'0x{i:040x}' for i in range(stakers)]
+    base_stakes = {staker_address: random.uniform(15000, 1000000) for staker_address in staker_addresses}
+
+    points = 0
+    batch = []
+    for timestamp in range(begin, now, sample_interval):
+        current_period = timestamp // (24 * 60 * 60)
+        total_locked = 0.0
+        for staker_address in staker_addresses:
+            stake = base_stakes[staker_address]
+            locked_stake = stake * random.uniform(0.9, 1.0)
+            total_locked += locked_stake
+            batch.append(Crawler.BLOCKCHAIN_DB_LINE_PROTOCOL.format(
+                measurement=Crawler.BLOCKCHAIN_DB_MEASUREMENT,
+                staker_address=staker_address,
+                worker_address=staker_address,
+                start_date=float(begin),
+                end_date=float(now + 365 * 24 * 60 * 60),
+                stake=stake,
+                locked_stake=locked_stake,
+                current_period=current_period,
+                last_confirmed_period=current_period,
+                timestamp=timestamp))
+        batch.append(Crawler.NETWORK_SUMMARY_LINE_PROTOCOL.format(
+            measurement=Crawler.NETWORK_SUMMARY_MEASUREMENT,
+            total_locked=total_locked,
+            total_staked=sum(base_stakes.values()),
+            num_stakers=stakers,
+            confirmed=stakers,
+            pending=0,
+            inactive=0,
+            headless=0,
+            current_period=current_period,
+            timestamp=timestamp))
+        if len(batch) >= 10000:
+            client.write_points(batch, database=database, time_precision='s', batch_size=10000, protocol='line')
+            points += len(batch)
+            batch = []
+    if batch:
+        client.write_points(batch, database=database, time_precision='s', batch_size=10000, protocol='line')
+        points += len(batch)
+    return points
+
+
+def _time_ms(function, repeat: int, setup=None) -> float:
+    timings = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def run(host: str, port: int, database: str, days: int, stakers: int, sample_interval: int, repeat: int, load: bool):
+    if load:
+        client = InfluxDBClient(host=host, port=port)
+        started = time.perf_counter()
+        points = load_synthetic_data(client, database, days=days, stakers=stakers, sample_interval=sample_interval)
+        print(f"Loaded {points} points ({stakers} stakers, {days} days) in {time.perf_counter() - started:.1f}s")
+        client.close()
+
+    db_client = CrawlerBlockchainDBClient(host=host, port=port, database=database)
+
+    def per_staker():
+        now = datetime.utcnow()
+        db_client._fetch_staker_totals(now - timedelta(days=days), now, '1d')
+
+    def summaries():
+        db_client.get_historical_network_data(range_length=f'{days}d', granularity='1d')
+
+    results = {
+        'per-staker aggregation (uncached)': _time_ms(per_staker, repeat),
+        'network summary (uncached)': _time_ms(summaries, repeat, setup=db_client.clear_cache),
+        'network summary (closed days cached)': _time_ms(summaries, repeat),
+    }
+    db_client.close()
+
+    print(f"{'historical chart data over ' + str(days) + ' days':<40}{'median (ms)':>12}")
+    for name, latency in results.items():
+        print(f"{name:<40}{latency:>12.1f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=8086)
+    parser.add_argument('--database', default='monitor_benchmark')
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--stakers', type=int, default=100)
+    parser.add_argument('--sample-interval', type=int, default=600, help='seconds between synthetic crawler writes')
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--skip-load', action='store_true', help='reuse previously loaded synthetic data')
+    args = parser.parse_args()
+    run(host=args.host,
+        port=args.port,
+        database=args.database,
+        days=args.days,
+        stakers=args.stakers,
+        sample_interval=args.sample_interval,
+        repeat=args.repeat,
+        load=not args.skip_load)
@@ -0,0 +1,106 @@
+"""
+Throughput of verifying new nodes: one after the other in a thread, as the crawler does by default, vs. in the pool of
+worker processes of a `NodeVerifier` (`--verification-workers`).
+
+Verifying a real node requires the network and a blockchain provider, so each synthetic node stands in for one: its
+verification burns `--cpu-ms` of CPU, as the checks of its metadata signatures do, then blocks for `--latency-ms`,
+as the requests for its staking info and its own metadata do. The pool is the crawler's: same process start method,
+chunking and worker initialization hook, only the function run per node differs.
+
+    $ python -m benchmarks.node_verification --nodes 1000 5000 --workers 4 --cpu-ms 2 --latency-ms 20
+
+Last run with the defaults, on a single CPU - so the pool only overlaps the blocking requests; with a CPU per
+worker the checks of the signatures run in parallel too:
+
+    nodes  inline (nodes/s)  pool of 4 (nodes/s)  speedup
+     1000              44.3                168.4     3.8x
+     5000              44.2                170.8     3.9x
+
+Starting the workers took 0.6s, paid by the first round of learning only.
+"""
+import argparse
+import hashlib
+import os
+import struct
+import time
+from typing import Callable, List, Optional, Tuple
+
+from nucypher.blockchain.eth.registry import InMemoryContractRegistry
+
+from monitor.verifier import NodeVerifier
+
+METADATA_SIZE = 4096  # stands in for the keys, certificate and signatures of a node
+_WORKLOAD = struct.Struct('<II')  # pbkdf2 iterations, latency (ms) - the metadata header of a synthetic node
+
+
+def _init_synthetic_worker(provider_uri: str, registry_data: list):
+    pass  # no blockchain interface to connect to
+
+
+def verify_synthetic_node(node_metadata: bytes, certificate_filepath: str) -> Optional[str]:
+    """Stands in for `check_node`: CPU bound checks of the node's metadata, then blocking requests"""
+    iterations, latency_ms = _WORKLOAD.unpack_from(node_metadata)
+    hashlib.pbkdf2_hmac('sha256', node_metadata, b'signature', iterations)
+    time.sleep(latency_ms / 1000)
+    return None
+
+
+class SyntheticNodeVerifier(NodeVerifier):
+    def _worker_functions(self) -> Tuple[Callable, Callable]:
+        return _init_synthetic_worker, verify_synthetic_node
+
+
+def calibrate_iterations(cpu_ms: float) -> int:
+    """Iterations of pbkdf2 taking about `cpu_ms` of CPU"""
+    iterations = 10000
+    start = time.process_time()
+    hashlib.pbkdf2_hmac('sha256', os.urandom(METADATA_SIZE), b'signature', iterations)
+    elapsed_ms = (time.process_time() - start) * 1000
+    return max(1, int(iterations * cpu_ms / elapsed_ms))
+
+
+def synthetic_nodes(number_of_nodes: int, iterations: int, latency_ms: int) -> List[Tuple[bytes, str]]:
+    return [(_WORKLOAD.pack(iterations, latency_ms) + os.urandom(METADATA_SIZE), f'/certificates/{index}.pem')
+            for index in range(number_of_nodes)]
+
+
+def time_inline(nodes: List[Tuple[bytes, str]]) -> float:
+    start = time.perf_counter()
+    failure_reasons = [verify_synthetic_node(node_metadata, certificate_filepath)
+                       for node_metadata, certificate_filepath in nodes]
+    assert failure_reasons == [None] * len(nodes)
+    return time.perf_counter() - start
+
+
+def time_pool(verifier: NodeVerifier, nodes: List[Tuple[bytes, str]]) -> float:
+    start = time.perf_counter()
+    assert verifier.run(nodes) == [None] * len(nodes)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--nodes', type=int, nargs='+', default=[1000, 5000], help="new nodes per round")
+    parser.add_argument('--workers', type=int, default=NodeVerifier.DEFAULT_WORKERS)
+    parser.add_argument('--cpu-ms', type=float, default=2, help="CPU time of verifying a node")
+    parser.add_argument('--latency-ms', type=int, default=20, help="blocking time of verifying a node")
+    args = parser.parse_args()
+
+    iterations = calibrate_iterations(args.cpu_ms)
+    verifier = SyntheticNodeVerifier(provider_uri='', registry=InMemoryContractRegistry(), workers=args.workers)
+    try:
+        startup = time_pool(verifier, synthetic_nodes(args.workers, iterations, latency_ms=0))
+        print(f"{'nodes':>5}  {'inline (nodes/s)':>16}  {f'pool of {args.workers} (nodes/s)':>19}  {'speedup':>7}")
+        for number_of_nodes in args.nodes:
+            nodes = synthetic_nodes(number_of_nodes, iterations, args.latency_ms)
+            inline = time_inline(nodes)
+            pool = time_pool(verifier, nodes)
+            print(f"{number_of_nodes:>5}  {number_of_nodes / inline:>16.1f}  {number_of_nodes / pool:>19.1f}  "
+                  f"{inline / pool:>6.1f}x")
+        print(f"\nStarting the workers took {startup:.1f}s")
+    finally:
+        verifier.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,169 @@
+"""
+Ingest and query throughput of the time-series storage backends: InfluxDB vs. embedded SQLite.
+
+Synthetic crawler cycles (one point per staker plus a network summary) are written one batch per cycle, as the
+crawler does, then the dashboard's historical aggregates are queried. InfluxDB is skipped if it isn't reachable.
+
+    $ python -m benchmarks.timeseries_storage --days 30 --stakers 100
+
+Last run with the defaults (88.5 MiB of SQLite data). No InfluxDB service was reachable there, so its column is
+missing - run the benchmark next to a local `influxd` to compare both backends:
+
+                                              SQLite
+    ingest (points/s)                        23591.9
+    per-staker totals, daily (ms)              350.8
+    per-staker totals, hourly (ms)             341.3
+    network summaries, daily (ms)                1.5
+    network summaries, hourly (ms)               4.3
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from influxdb import InfluxDBClient
+
+from monitor.crawler import Crawler
+from monitor.timeseries import InfluxDBTimeSeriesStorage, SQLiteTimeSeriesStorage, TimeSeriesStorage
+
+
+def synthetic_cycles(days: int, stakers: int, sample_interval: int):
+    """Batches of points written by each crawler cycle, every `sample_interval` seconds over the last `days`"""
+    now = int(datetime.utcnow().timestamp())
+    begin = now - days * 24 * 60 * 60
+    staker_addresses = [f'0x{i:040x}' for i in range(stakers)]
+    base_stakes = {staker_address: random.uniform(15000, 1000000) for staker_address in staker_addresses}
+
+    for timestamp in range(begin, now, sample_interval):
+        current_period = timestamp // (24 * 60 * 60)
+        batch = []
+        total_locked = 0.0
+        for staker_address in staker_addresses:
+            stake = base_stakes[staker_address]
+            locked_stake = stake * random.uniform(0.9, 1.0)
+            total_locked += locked_stake
+            batch.append(Crawler.BLOCKCHAIN_DB_LINE_PROTOCOL.format(
+                measurement=Crawler.BLOCKCHAIN_DB_MEASUREMENT,
+                staker_address=staker_address,
+                worker_address=staker_address,
+                start_date=float(begin),
+                end_date=float(now + 365 * 24 * 60 * 60),
+                stake=stake,
+                locked_stake=locked_stake,
+                current_period=current_period,
+                last_confirmed_period=current_period,
+                timestamp=timestamp))
+        batch.append(Crawler.NETWORK_SUMMARY_LINE_PROTOCOL.format(
+            measurement=Crawler.NETWORK_SUMMARY_MEASUREMENT,
+            total_locked=total_locked,
+            total_staked=sum(base_stakes.values()),
+            num_stakers=stakers,
+            confirmed=stakers,
+            pending=0,
+            inactive=0,
+            headless=0,
+            current_period=current_period,
+            timestamp=timestamp))
+        yield batch
+
+
+def _time_ms(function, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def benchmark(storage: TimeSeriesStorage, cycles: list, days: int, repeat: int) -> dict:
+    storage.ensure_exists()
+
+    points = 0
+    started = time.perf_counter()
+    for batch in cycles:
+        if not storage.write_points(batch):
+            raise RuntimeError(f'Unable to write to {storage.__class__.__name__}')
+        points += len(batch)
+    ingest_seconds = time.perf_counter() - started
+
+    now = datetime.utcnow()
+    range_begin = now - timedelta(days=days)
+
+    def staker_totals(granularity: str):
+        return lambda: storage.get_tag_totals(measurement=Crawler.BLOCKCHAIN_DB_MEASUREMENT,
+                                              field='locked_stake',
+                                              tag='staker_address',
+                                              range_begin=range_begin,
+                                              range_end=now,
+                                              granularity=granularity)
+
+    def network_summaries(granularity: str):
+        return lambda: storage.get_last_values(measurement=Crawler.NETWORK_SUMMARY_MEASUREMENT,
+                                               fields={'locked_stake': 'total_locked', 'num_stakers': 'num_stakers'},
+                                               range_begin=range_begin,
+                                               range_end=now,
+                                               granularity=granularity)
+
+    results = {
+        'ingest (points/s)': points / ingest_seconds,
+        'per-staker totals, daily (ms)': _time_ms(staker_totals('1d'), repeat),
+        'per-staker totals, hourly (ms)': _time_ms(staker_totals('1h'), repeat),
+        'network summaries, daily (ms)': _time_ms(network_summaries('1d'), repeat),
+        'network summaries, hourly (ms)': _time_ms(network_summaries('1h'), repeat),
+    }
+    storage.close()
+    return results
+
+
+def run(host: str, port: int, database: str, days: int, stakers: int, sample_interval: int, repeat: int):
+    cycles = list(synthetic_cycles(days=days, stakers=stakers, sample_interval=sample_interval))
+    print(f"{len(cycles)} crawler cycles of {stakers + 1} points ({stakers} stakers, {days} days)")
+
+    backends = dict()
+    fd, sqlite_filepath = tempfile.mkstemp(suffix='.sqlite')
+    os.close(fd)
+    try:
+        backends['SQLite'] = benchmark(SQLiteTimeSeriesStorage(db_filepath=sqlite_filepath), cycles, days, repeat)
+        print(f"SQLite database size: {os.path.getsize(sqlite_filepath) / 2**20:.1f} MiB")
+    finally:
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(sqlite_filepath + suffix):
+                os.remove(sqlite_filepath + suffix)
+
+    client = InfluxDBClient(host=host, port=port)
+    try:
+        client.drop_database(database)
+        storage = InfluxDBTimeSeriesStorage(host=host, port=port, database=database)
+        backends['InfluxDB'] = benchmark(storage, cycles, days, repeat)
+        client.drop_database(database)
+    except (ConnectionError, OSError) as e:
+        print(f"Skipping InfluxDB at {host}:{port}: {e}")
+    finally:
+        client.close()
+
+    print(f"{'':<36}" + ''.join(f"{backend:>12}" for backend in backends))
+    for metric in next(iter(backends.values())):
+        print(f"{metric:<36}" + ''.join(f"{results[metric]:>12.1f}" for results in backends.values()))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=8086)
+    parser.add_argument('--database', default='monitor_benchmark')
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--stakers', type=int, default=100)
+    parser.add_argument('--sample-interval', type=int, default=600, help='seconds between synthetic crawler writes')
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+    run(host=args.host,
+        port=args.port,
+        database=args.database,
+        days=args.days,
+        stakers=args.stakers,
+        sample_interval=args.sample_interval,
+        repeat=args.repeat)
@@ -0,0 +1,16 @@
+/* Dash clientside callbacks - widgets derived purely from the browser clock */
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    clientside: {
+        /* time until the next period i.e. next UTC midnight, e.g. "in 5 hours" */
+        time_remaining: function(n_intervals) {
+            var now = new Date();
+            var midnight = Date.UTC(now.getUTCFullYear(), now.getUTCMonth(), now.getUTCDate() + 1);
+            var minutes = Math.max(Math.floor((midnight - now.getTime()) / (60 * 1000)), 1);
+            var hours = Math.floor(minutes / 60);
+            if (hours > 0) {
+                return 'in ' + hours + (hours === 1 ? ' hour' : ' hours');
+            }
+            return 'in ' + minutes + (minutes === 1 ? ' minute' : ' minutes');
+        }
+    }
+});
@@ -0,0 +1,17 @@
+/* Server-pushed data change notifications - refresh only the components affected by each update topic */
+(function() {
+    if (!window.EventSource) {
+        return;  // interval polling only
+    }
+
+    var config = JSON.parse(document.getElementById('_dash-config').textContent);
+    var updates = new EventSource(config.requests_pathname_prefix + 'updates');
+
+    updates.onmessage = function(event) {
+        var update = JSON.parse(event.data);
+        var button = document.getElementById(update.button);
+        if (button) {
+            button.click();  // same path as a manual refresh
+        }
+    };
+})();
@@ -0,0 +1,206 @@
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+
+from nucypher.blockchain.economics import TokenEconomicsFactory
+from nucypher.blockchain.eth.agents import ContractAgency, StakingEscrowAgent
+from nucypher.blockchain.eth.interfaces import BlockchainInterfaceFactory
+from nucypher.blockchain.eth.registry import InMemoryContractRegistry
+from nucypher.blockchain.eth.token import NU
+from nucypher.blockchain.eth.utils import epoch_to_period, period_to_epoch
+from twisted.logger import Logger
+from web3.exceptions import BlockNotFound
+
+from monitor.crawler import Crawler
+from monitor.db import HistoricalAggregateCache
+from monitor.timeseries import EPOCH, TimeSeriesStorage
+
+# StakingEscrow agent of each backfill worker process
+_worker_staking_agent = None
+
+
+def _init_worker(provider_uri: str, registry_data: list):
+    global _worker_staking_agent
+    BlockchainInterfaceFactory.initialize_interface(provider_uri=provider_uri)
+    registry = InMemoryContractRegistry()
+    registry.write(registry_data)
+    _worker_staking_agent = ContractAgency.get_agent(StakingEscrowAgent, registry=registry)
+
+
+def get_activity_confirmations(staking_agent: StakingEscrowAgent,
+                               from_block: int,
+                               to_block: int) -> List[Tuple[str, int, int]]:
+    """(staker, period, locked tokens) of each confirmation of activity within the blocks (inclusive)"""
+    events = staking_agent.contract.events.ActivityConfirmed.getLogs(fromBlock=from_block, toBlock=to_block)
+    return [(event['args']['staker'], event['args']['period'], event['args']['value']) for event in events]
+
+
+def _get_worker_activity_confirmations(block_range: Tuple[int, int]) -> List[Tuple[str, int, int]]:
+    from_block, to_block = block_range
+    return get_activity_confirmations(_worker_staking_agent, from_block=from_block, to_block=to_block)
+
+
+def split_block_range(from_block: int, to_block: int, batch_size: int) -> List[Tuple[int, int]]:
+    """Consecutive (inclusive) ranges of at most `batch_size` blocks covering from_block..to_block"""
+    return [(begin, min(begin + batch_size - 1, to_block)) for begin in range(from_block, to_block + 1, batch_size)]
+
+
+class CrawlerBackfill:
+    """
+    Reconstructs the crawler's history over a range of blocks from StakingEscrow events,
+    to fill the gaps in the data from when the crawler wasn't running.
+
+    Each confirmation of activity by a staker records the tokens it has locked for the confirmed period, so
+    every period yields a point per active staker and a network summary of the active stakers - stakers that
+    didn't confirm activity for a period aren't counted, and fields not derivable from the events are omitted.
+    Events are fetched for batches of blocks in parallel by a pool of worker processes. Only periods that end within
+    the blocks are backfilled, since stakers confirm activity for the next period any time during a period.
+
+    Points are timestamped at the beginning of their period, so rerunning a backfill rewrites
+    the same points (both storages replace a point of the same series and time) instead of duplicating them.
+    With a cache filepath, the periods written are marked as stale in the dashboard's cache of historical aggregates.
+    """
+
+    DEFAULT_BATCH_SIZE = 5000  # blocks per request for events
+
+    STAKER_LINE_PROTOCOL = '{measurement},staker_address={staker_address} ' \
+                               'locked_stake={locked_stake},' \
+                               'current_period={current_period}i,' \
+                               'last_confirmed_period={last_confirmed_period}i ' \
+                           '{timestamp}'
+
+    NETWORK_SUMMARY_LINE_PROTOCOL = '{measurement} ' \
+                                        'total_locked={total_locked},' \
+                                        'num_stakers={num_stakers}i,' \
+                                        'confirmed={confirmed}i,' \
+                                        'pending={pending}i,' \
+                                        'current_period={current_period}i ' \
+                                    '{timestamp}'
+
+    def __init__(self,
+                 registry,
+                 provider_uri: str,
+                 storage: TimeSeriesStorage,
+                 workers: int = None,
+                 batch_size: int = DEFAULT_BATCH_SIZE,
+                 cache_filepath: str = None):
+        self.log = Logger(self.__class__.__name__)
+        self.registry = registry
+        self._provider_uri = provider_uri
+        self._storage = storage
+        self._workers = workers  # defaults to the number of processors
+        self._batch_size = batch_size
+        self._cache_filepath = cache_filepath
+
+        self.staking_agent = ContractAgency.get_agent(StakingEscrowAgent, registry=self.registry)
+        economics = TokenEconomicsFactory.get_economics(registry=self.registry)
+        self._seconds_per_period = economics.seconds_per_period
+
+    def _get_block_time(self, block_number) -> int:
+        return self.staking_agent.blockchain.client.w3.eth.getBlock(block_number).timestamp
+
+    def _is_last_block_of_period(self, block_number: int, block_time: int) -> bool:
+        """Whether the next block is of a later period; the latest block is of the current period, still open"""
+        try:
+            next_block_time = self._get_block_time(block_number + 1)
+        except BlockNotFound:
+            return False
+        return epoch_to_period(next_block_time, seconds_per_period=self._seconds_per_period) > \
+            epoch_to_period(block_time, seconds_per_period=self._seconds_per_period)
+
+    def get_activity_confirmations(self, from_block: int, to_block: int) -> List[Tuple[str, int, int]]:
+        block_ranges = split_block_range(from_block, to_block, batch_size=self._batch_size)
+        self.log.info(f'Fetching activity confirmations of blocks {from_block}-{to_block} '
+                      f'in {len(block_ranges)} batches')
+        confirmations = []
+        with ProcessPoolExecutor(max_workers=self._workers,
+                                 initializer=_init_worker,
+                                 initargs=(self._provider_uri, self.registry.read())) as executor:
+            for batch_confirmations in executor.map(_get_worker_activity_confirmations, block_ranges):
+                confirmations.extend(batch_confirmations)
+        return confirmations
+
+    def get_period_points(self,
+                          confirmations: List[Tuple[str, int, int]],
+                          first_period: int,
+                          last_period: int) -> Dict[int, List[str]]:
+        """Points of each period from `first_period` to `last_period`, as period -> points in line protocol"""
+        locked_tokens = defaultdict(dict)  # period -> staker -> locked tokens
+        for staker_address, period, value in confirmations:
+            locked_tokens[period][staker_address] = value
+
+        period_points = dict()
+        for period in range(first_period, last_period + 1):
+            if not locked_tokens[period]:
+                continue
+
+            timestamp = period_to_epoch(period, seconds_per_period=self._seconds_per_period)
+            data = []
+            summary = dict(total_locked=0.0, num_stakers=0, confirmed=0, pending=0)
+            for staker_address, value in locked_tokens[period].items():
+                locked_nu_tokens = float(NU.from_nunits(value).to_tokens())
+                # activity for the next period is confirmed during this one
+                last_confirmed_period = period + 1 if staker_address in locked_tokens[period + 1] else period
+
+                summary['total_locked'] += locked_nu_tokens
+                summary['num_stakers'] += 1
+                if last_confirmed_period == period + 1:
+                    summary['confirmed'] += 1
+                else:
+                    summary['pending'] += 1
+
+                data.append(self.STAKER_LINE_PROTOCOL.format(measurement=Crawler.BLOCKCHAIN_DB_MEASUREMENT,
+                                                             staker_address=staker_address,
+                                                             locked_stake=locked_nu_tokens,
+                                                             current_period=period,
+                                                             last_confirmed_period=last_confirmed_period,
+                                                             timestamp=timestamp))
+
+            data.append(self.NETWORK_SUMMARY_LINE_PROTOCOL.format(measurement=Crawler.NETWORK_SUMMARY_MEASUREMENT,
+                                                                  current_period=period,
+                                                                  timestamp=timestamp,
+                                                                  **summary))
+            period_points[period] = data
+        return period_points
+
+    def backfill(self, from_block: int, to_block: int) -> int:
+        """Write the points of the periods covered by the blocks; returns the number of periods written"""
+        # activity for a period is confirmed during the preceding period, which must be entirely within the range
+        from_time, to_time = self._get_block_time(from_block), self._get_block_time(to_block)
+        first_period = epoch_to_period(from_time - 1, seconds_per_period=self._seconds_per_period) + 2
+        last_period = epoch_to_period(to_time, seconds_per_period=self._seconds_per_period)
+        if not self._is_last_block_of_period(to_block, block_time=to_time):
+            # the rest of the period isn't covered (eg. the current period): its stakers would be recorded as pending
+            # for good, although they may still confirm activity for the next period during it
+            last_period -= 1
+
+        retention = self._storage.get_retention()
+        if retention is not None:
+            # points older than the storage's retention would be rejected, or immediately dropped
+            expiry = int((datetime.utcnow() - retention - EPOCH).total_seconds())
+            first_retained_period = epoch_to_period(expiry, seconds_per_period=self._seconds_per_period) + 1
+            if first_retained_period > first_period:
+                self.log.warn(f'Periods before {first_retained_period} are not retained by the storage; skipping them')
+                first_period = first_retained_period
+        if first_period > last_period:
+            self.log.warn(f'Blocks {from_block}-{to_block} do not cover any complete period')
+            return 0
+
+        confirmations = self.get_activity_confirmations(from_block, to_block)
+        period_points = self.get_period_points(confirmations, first_period=first_period, last_period=last_period)
+        for period, data in period_points.items():
+            if not self._storage.write_points(data):
+                raise RuntimeError(f'Unable to write to database {Crawler.BLOCKCHAIN_DB_NAME} | Period {period}')
+
+        if period_points:
+            range_begin = EPOCH + timedelta(seconds=period_to_epoch(min(period_points), self._seconds_per_period))
+            range_end = EPOCH + timedelta(seconds=period_to_epoch(max(period_points) + 1, self._seconds_per_period))
+            self._storage.refresh_rollups(Crawler.BLOCKCHAIN_DB_ROLLUPS, range_begin=range_begin, range_end=range_end)
+            if self._cache_filepath:
+                HistoricalAggregateCache.invalidate_range(self._cache_filepath,
+                                                          range_begin=range_begin,
+                                                          range_end=range_end)
+
+        self.log.info(f'Backfilled {len(period_points)} periods ({first_period}-{last_period})')
+        return len(period_points)
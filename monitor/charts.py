@@ -1,6 +1,13 @@
+import json
+from collections import OrderedDict
+from threading import Lock
+
 import dash_core_components as dcc
 import plotly.graph_objs as go
 from nucypher.blockchain.eth.token import NU
+from plotly.utils import PlotlyJSONEncoder
+
+from monitor.downsampling import largest_triangle_three_buckets
 
 GRAPH_CONFIG = {'displaylogo': False,
                 'autosizable': True,
@@ -10,83 +17,282 @@ GRAPH_CONFIG = {'displaylogo': False,
 
 LINE_CHART_MARKER_COLOR = 'rgb(0, 163, 239)'
 
+# confirmation status -> marker color (as the node status indicators)
+CONFIRMATION_STATUS_COLORS = OrderedDict([('Confirmed', 'green'), ('Pending', '#e0b32d'), ('Missed', 'red')])
+
+TRANSPARENT_BACKGROUND = {'paper_bgcolor': 'rgba(0,0,0,0)', 'plot_bgcolor': 'rgba(0,0,0,0)'}
+AUTOSIZE = {'autosize': True, 'width': None, 'height': None}
+
+# historical series are downsampled so payload and render time don't grow with the selected range
+MAX_CHART_POINTS = 250
+MAX_DATE_TICKS = 30
+
+
+class FigureCache:
+    """
+    Built figures keyed by (chart, data version), where the version is a cheap fingerprint of the charted data
+    (see `_history_fingerprint`) rather than the data itself.
+
+    Figures are stored in their final JSON form, so a cache hit skips figure construction, plotly validation,
+    and the conversion of non-JSON types (datetimes etc.) when Dash serializes the figure again.
+    """
+
+    def __init__(self, max_size: int = 32):
+        self._max_size = max_size
+        self._figures = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, chart: str, version, build) -> dict:
+        key = (chart, version)
+        with self._lock:
+            try:
+                self._figures.move_to_end(key)
+                return self._figures[key]
+            except KeyError:
+                pass
+
+        figure = json.loads(json.dumps(build(), cls=PlotlyJSONEncoder))
+        with self._lock:
+            self._figures[key] = figure
+            while len(self._figures) > self._max_size:
+                self._figures.popitem(last=False)
+        return figure
+
+    def clear(self):
+        with self._lock:
+            self._figures.clear()
+
+    def __len__(self):
+        return len(self._figures)
+
+
+# a cache per family of charts, so that browsing stakers doesn't evict the network charts
+HISTORICAL_FIGURES = FigureCache(max_size=32)  # both network history charts, for every range and granularity
+STAKER_FIGURES = FigureCache(max_size=64)  # charts of the stakers viewed most recently
+NETWORK_FIGURES = FigureCache(max_size=4)  # current network charts, only the latest version of which is used
+FIGURE_CACHES = (HISTORICAL_FIGURES, STAKER_FIGURES, NETWORK_FIGURES)
 
-def historical_known_nodes_line_chart(data: dict):
-    fig = go.Figure(data=[
-        go.Scatter(
-            mode='lines+markers',
-            x=list(data.keys()),
-            y=list(data.values()),
-            name='Num Stakers',
-            marker={'color': LINE_CHART_MARKER_COLOR}
-        )
-    ],
-        layout=go.Layout(
-            title=f'Num Stakers over the previous {len(data)} days.',
-            xaxis={'title': 'Date', 'nticks': len(data) + 1, 'showgrid': False},
-            yaxis={'title': 'Stakers', 'zeroline': False, 'showgrid': False, 'rangemode': 'tozero'},
-            showlegend=False,
-            paper_bgcolor='rgba(0,0,0,0)',
-            plot_bgcolor='rgba(0,0,0,0)'
-        ))
-
-    fig['layout'].update(autosize=True, width=None, height=None)
-    return dcc.Graph(figure=fig, id='prev-stakers-graph', config=GRAPH_CONFIG)
-
-
-def historical_locked_tokens_bar_chart(locked_tokens: dict):
-    prior_periods = len(locked_tokens)
-    token_values = list(locked_tokens.values())
-    fig = go.Figure(data=[
-        go.Bar(
-            textposition='auto',
-            x=list(locked_tokens.keys()),
-            y=token_values,
-            name='Locked Stake',
-            marker=go.bar.Marker(color=token_values, colorscale='Viridis')
-        )
-    ],
-        layout=go.Layout(
-            title=f'Staked NU over the previous {prior_periods} days.',
-            xaxis={'title': 'Date', 'nticks': len(locked_tokens) + 1},
-            yaxis={'title': 'NU Tokens', 'zeroline': False, 'rangemode': 'tozero'},
-            showlegend=False,
-            paper_bgcolor='rgba(0,0,0,0)',
-            plot_bgcolor='rgba(0,0,0,0)'
-        ))
-
-    fig['layout'].update(autosize=True, width=None, height=None)
-    return dcc.Graph(figure=fig, id='prev-locked-graph', config=GRAPH_CONFIG)
-
-
-def stakers_breakdown_pie_chart(staking_agent):
-    confirmed, pending, inactive = staking_agent.partition_stakers_by_activity()
-    stakers = dict()
-    stakers['Active'] = len(confirmed)
-    stakers['Pending'] = len(pending)
-    stakers['Inactive'] = len(inactive)
-    staker_breakdown = list(stakers.values())
+
+def _history_fingerprint(times: list, *columns: list) -> tuple:
+    """
+    Version of the figure of a history: the number of its buckets, and a digest of the buckets and of each column -
+    any revised bucket eg. by a backfill changes it, without the cache keeping the data itself
+    """
+    return (len(times), hash(tuple(times)), *(hash(tuple(column)) for column in columns))
+
+
+def _finalize(figure: dict, validate: bool):
+    """
+    Figures are built as plain dicts (the fast path) since their layouts are known to be good;
+    `validate` passes them through plotly's graph_objs validation instead.
+    """
+    if validate:
+        return go.Figure(figure).to_plotly_json()
+    return figure
+
+
+def _downsample(times: list, values: list, max_points: int = MAX_CHART_POINTS) -> tuple:
+    if len(times) <= max_points:
+        return times, values
+    indices = largest_triangle_three_buckets(x=[time.timestamp() for time in times], y=values, threshold=max_points)
+    return [times[index] for index in indices], [values[index] for index in indices]
+
+
+def _historical_known_nodes_figure(days: list,
+                                   num_stakers: list,
+                                   range_label: str = None,
+                                   validate: bool = False) -> dict:
+    figure = {
+        'data': [{
+            'type': 'scatter',
+            'mode': 'lines+markers',
+            'x': days,
+            'y': num_stakers,
+            'name': 'Num Stakers',
+            'marker': {'color': LINE_CHART_MARKER_COLOR}
+        }],
+        'layout': {
+            'title': f'Num Stakers over the previous {range_label or f"{len(days)} days"}.',
+            'xaxis': {'title': 'Date', 'nticks': min(len(days), MAX_DATE_TICKS) + 1, 'showgrid': False},
+            'yaxis': {'title': 'Stakers', 'zeroline': False, 'showgrid': False, 'rangemode': 'tozero'},
+            'showlegend': False,
+            **TRANSPARENT_BACKGROUND,
+            **AUTOSIZE
+        }
+    }
+    return _finalize(figure, validate)
+
+
+def _historical_locked_tokens_figure(days: list,
+                                     locked_tokens: list,
+                                     range_label: str = None,
+                                     validate: bool = False) -> dict:
+    prior_periods = len(days)
+    figure = {
+        'data': [{
+            'type': 'bar',
+            'textposition': 'auto',
+            'x': days,
+            'y': locked_tokens,
+            'name': 'Locked Stake',
+            'marker': {'color': locked_tokens, 'colorscale': 'Viridis'}
+        }],
+        'layout': {
+            'title': f'Staked NU over the previous {range_label or f"{prior_periods} days"}.',
+            'xaxis': {'title': 'Date', 'nticks': min(prior_periods, MAX_DATE_TICKS) + 1},
+            'yaxis': {'title': 'NU Tokens', 'zeroline': False, 'rangemode': 'tozero'},
+            'showlegend': False,
+            **TRANSPARENT_BACKGROUND,
+            **AUTOSIZE
+        }
+    }
+    return _finalize(figure, validate)
+
+
+def _stakers_breakdown_figure(data: dict, validate: bool = False) -> dict:
     colors = ['#FAE755', '#74C371', '#3E0751']  # colors from Viridis colorscale
-    fig = go.Figure(
-        data=[
-            go.Pie(
-                labels=list(stakers.keys()),
-                values=staker_breakdown,
-                textinfo='value',
-                name='Stakers',
-                marker=dict(colors=colors,
-                            line=dict(width=2))
-            )
+    figure = {
+        'data': [{
+            'type': 'pie',
+            'labels': list(data.keys()),
+            'values': list(data.values()),
+            'textinfo': 'value',
+            'name': 'Stakers',
+            'marker': {'colors': colors, 'line': {'width': 2}}
+        }],
+        'layout': {
+            'title': f'Breakdown of Network Stakers',
+            'showlegend': True,
+            **TRANSPARENT_BACKGROUND,
+            **AUTOSIZE
+        }
+    }
+    return _finalize(figure, validate)
+
+
+def _future_locked_tokens_figure(token_counter: dict, validate: bool = False) -> dict:
+    periods = len(token_counter)
+    period_range = list(range(1, periods + 1))
+    future_locked_tokens, future_num_stakers = map(list, zip(*token_counter.values()))
+    figure = {
+        'data': [
+            {
+                'type': 'bar',
+                'textposition': 'auto',
+                'x': period_range,
+                'y': future_locked_tokens,
+                'name': 'Stake (NU)',
+                'marker': {'color': future_locked_tokens, 'colorscale': 'Viridis'}
+            },
+            {
+                'type': 'scatter',
+                'mode': 'lines+markers',
+                'x': period_range,
+                'y': future_num_stakers,
+                'name': 'Stakers',
+                'yaxis': 'y2',
+                'xaxis': 'x',
+                'marker': {'color': LINE_CHART_MARKER_COLOR}
+            }
         ],
-        layout=go.Layout(
-            title=f'Breakdown of Network Stakers',
-            showlegend=True,
-            paper_bgcolor='rgba(0,0,0,0)',
-            plot_bgcolor='rgba(0,0,0,0)'
-        ))
+        'layout': {
+            'title': f'Staked NU and Stakers over the next {periods} days.',
+            'xaxis': {'title': 'Days'},
+            'yaxis': {'title': 'NU Tokens', 'rangemode': 'tozero', 'showgrid': False},
+            'yaxis2': {'title': f'Stakers', 'overlaying': 'y', 'side': 'right', 'rangemode': 'tozero',
+                       'showgrid': False},
+            'showlegend': False,
+            'legend': {'x': 0, 'y': 1.0},
+            **TRANSPARENT_BACKGROUND,
+            **AUTOSIZE
+        }
+    }
+    return _finalize(figure, validate)
+
+
+def _staker_locked_stake_figure(days: list, locked_stake: list, validate: bool = False) -> dict:
+    figure = {
+        'data': [{
+            'type': 'scatter',
+            'mode': 'lines+markers',
+            'x': days,
+            'y': locked_stake,
+            'name': 'Locked Stake',
+            'marker': {'color': LINE_CHART_MARKER_COLOR}
+        }],
+        'layout': {
+            'title': 'Locked Stake',
+            'xaxis': {'title': 'Date', 'nticks': min(len(days), MAX_DATE_TICKS) + 1, 'showgrid': False},
+            'yaxis': {'title': 'NU Tokens', 'zeroline': False, 'showgrid': False, 'rangemode': 'tozero'},
+            'showlegend': False,
+            **TRANSPARENT_BACKGROUND,
+            **AUTOSIZE
+        }
+    }
+    return _finalize(figure, validate)
+
+
+def _staker_confirmations_figure(days: list, statuses: list, validate: bool = False) -> dict:
+    figure = {
+        'data': [{
+            'type': 'scatter',
+            'mode': 'markers',
+            'x': [day for day, status in zip(days, statuses) if status == label],
+            'y': [label] * statuses.count(label),
+            'name': label,
+            'marker': {'color': color, 'size': 10, 'symbol': 'square'}
+        } for label, color in CONFIRMATION_STATUS_COLORS.items()],
+        'layout': {
+            'title': 'Confirmation History',
+            'xaxis': {'title': 'Date', 'nticks': min(len(days), MAX_DATE_TICKS) + 1, 'showgrid': False},
+            'yaxis': {'type': 'category', 'categoryorder': 'array',
+                      'categoryarray': list(reversed(CONFIRMATION_STATUS_COLORS)), 'showgrid': False},
+            'showlegend': False,
+            **TRANSPARENT_BACKGROUND,
+            **AUTOSIZE
+        }
+    }
+    return _finalize(figure, validate)
+
+
+def confirmation_status(current_period: int, last_confirmed_period: int) -> str:
+    """Whether activity was confirmed for the period following `current_period`"""
+    if last_confirmed_period == current_period + 1:
+        return 'Confirmed'
+    if last_confirmed_period == current_period:
+        return 'Pending'
+    return 'Missed'
+
+
+def historical_known_nodes_line_chart(data: dict, range_label: str = None):
+    """`data` is the columnar result of `CrawlerBlockchainDBClient.get_historical_network_data`"""
+    def build():
+        days, num_stakers = _downsample(data['time'], data['num_stakers'])
+        return _historical_known_nodes_figure(days, num_stakers, range_label)
+
+    figure = HISTORICAL_FIGURES.get(chart='historical_known_nodes',
+                                    version=(range_label, _history_fingerprint(data['time'], data['num_stakers'])),
+                                    build=build)
+    return dcc.Graph(figure=figure, id='prev-stakers-graph', config=GRAPH_CONFIG)
+
 
-    fig['layout'].update(autosize=True, width=None, height=None)
-    return dcc.Graph(figure=fig, id='staker-breakdown-graph', config=GRAPH_CONFIG)
+def historical_locked_tokens_bar_chart(data: dict, range_label: str = None):
+    """`data` is the columnar result of `CrawlerBlockchainDBClient.get_historical_network_data`"""
+    def build():
+        days, locked_tokens = _downsample(data['time'], data['locked_stake'])
+        return _historical_locked_tokens_figure(days, locked_tokens, range_label)
+
+    figure = HISTORICAL_FIGURES.get(chart='historical_locked_tokens',
+                                    version=(range_label, _history_fingerprint(data['time'], data['locked_stake'])),
+                                    build=build)
+    return dcc.Graph(figure=figure, id='prev-locked-graph', config=GRAPH_CONFIG)
+
+
+def stakers_breakdown_pie_chart(data: dict):
+    figure = NETWORK_FIGURES.get(chart='stakers_breakdown',
+                                 version=tuple(data.items()),
+                                 build=lambda: _stakers_breakdown_figure(data))
+    return dcc.Graph(figure=figure, id='staker-breakdown-graph', config=GRAPH_CONFIG)
 
 
 def future_locked_tokens_bar_chart(staking_agent):
@@ -100,38 +306,37 @@ def future_locked_tokens_bar_chart(staking_agent):
                                   len(stakers))
         return token_counter
 
-    token_counter = _snapshot_future_locked_tokens()
-    periods = len(token_counter)
-    period_range = list(range(1, periods + 1))
-    future_locked_tokens, future_num_stakers = map(list, zip(*token_counter.values()))
-    fig = go.Figure(data=[
-            go.Bar(
-                textposition='auto',
-                x=period_range,
-                y=future_locked_tokens,
-                name='Stake (NU)',
-                marker=go.bar.Marker(color=future_locked_tokens, colorscale='Viridis')
-            ),
-            go.Scatter(
-                mode='lines+markers',
-                x=period_range,
-                y=future_num_stakers,
-                name='Stakers',
-                yaxis='y2',
-                xaxis='x',
-                marker={'color': LINE_CHART_MARKER_COLOR}
-            )
-        ],
-        layout=go.Layout(
-            title=f'Staked NU and Stakers over the next {periods} days.',
-            xaxis={'title': 'Days'},
-            yaxis={'title': 'NU Tokens', 'rangemode': 'tozero', 'showgrid': False},
-            yaxis2={'title': f'Stakers', 'overlaying': 'y', 'side': 'right', 'rangemode': 'tozero', 'showgrid': False},
-            showlegend=False,
-            legend=go.layout.Legend(x=0, y=1.0),
-            paper_bgcolor='rgba(0,0,0,0)',
-            plot_bgcolor='rgba(0,0,0,0)'
-        ))
-
-    fig['layout'].update(autosize=True, width=None, height=None)
-    return dcc.Graph(figure=fig, id='locked-graph', config=GRAPH_CONFIG)
+    # the projection is rebuilt (365 chain calls) at most once per period
+    figure = NETWORK_FIGURES.get(chart='future_locked_tokens',
+                                 version=staking_agent.get_current_period(),
+                                 build=lambda: _future_locked_tokens_figure(_snapshot_future_locked_tokens()))
+    return dcc.Graph(figure=figure, id='locked-graph', config=GRAPH_CONFIG)
+
+
+def staker_locked_stake_line_chart(staker_address: str, history: dict):
+    """`history` is the columnar result of `CrawlerBlockchainDBClient.get_staker_history` for the staker"""
+    def build():
+        days, locked_stake = _downsample(history['time'], history['locked_stake'])
+        return _staker_locked_stake_figure(days, locked_stake)
+
+    figure = STAKER_FIGURES.get(chart='staker_locked_stake',
+                                version=(staker_address,
+                                         _history_fingerprint(history['time'], history['locked_stake'])),
+                                build=build)
+    return dcc.Graph(figure=figure, id='staker-locked-stake-graph', config=GRAPH_CONFIG)
+
+
+def staker_confirmations_chart(staker_address: str, history: dict):
+    """`history` is the columnar result of `CrawlerBlockchainDBClient.get_staker_history` for the staker"""
+    def build():
+        statuses = [confirmation_status(current_period, last_confirmed_period)
+                    for current_period, last_confirmed_period in zip(history['current_period'],
+                                                                     history['last_confirmed_period'])]
+        return _staker_confirmations_figure(history['time'], statuses)
+
+    figure = STAKER_FIGURES.get(chart='staker_confirmations',
+                                version=(staker_address, _history_fingerprint(history['time'],
+                                                                              history['current_period'],
+                                                                              history['last_confirmed_period'])),
+                                build=build)
+    return dcc.Graph(figure=figure, id='staker-confirmations-graph', config=GRAPH_CONFIG)
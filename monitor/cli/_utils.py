@@ -1,3 +1,5 @@
+import os
+
 from cryptography.hazmat.primitives.asymmetric import ec
 from nucypher.blockchain.eth.interfaces import BlockchainInterfaceFactory
 from nucypher.blockchain.eth.registry import InMemoryContractRegistry, LocalContractRegistry
@@ -5,6 +7,25 @@ from nucypher.keystore.keypairs import HostingKeypair
 from nucypher.network.server import TLSHostingPower
 from umbral.keys import UmbralPrivateKey
 
+CRAWLER = "Crawler"
+DASHBOARD = "Dashboard"
+EXPORT = "Export"
+BACKFILL = "Backfill"
+
+MONITOR_BANNER = r"""
+ _____         _ _           
+|     |___ ___|_| |_ ___ ___ 
+| | | | . |   | |  _| . |  _|
+|_|_|_|___|_|_|_|_| |___|_|  
+
+========= {} =========
+"""
+
+
+DEFAULT_PROVIDER = f'file://{os.path.expanduser("~")}/.ethereum/goerli/geth.ipc'
+DEFAULT_TEACHER = 'https://discover.nucypher.network:9151'
+DEFAULT_NETWORK = 'goerli'
+
 
 def _get_registry(provider_uri, registry_filepath):
     BlockchainInterfaceFactory.initialize_interface(provider_uri=provider_uri)
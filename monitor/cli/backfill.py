@@ -0,0 +1,62 @@
+import click
+from nucypher.cli.config import nucypher_click_config
+from nucypher.cli.types import EXISTING_READABLE_FILE
+
+from monitor.backfill import CrawlerBackfill
+from monitor.cli._utils import BACKFILL, DEFAULT_PROVIDER, MONITOR_BANNER, _get_registry
+from monitor.crawler import Crawler
+from monitor.db import CrawlerBlockchainDBClient
+from monitor.timeseries import get_time_series_storage
+
+
+@click.command()
+@click.option('--from-block', help="First block to reconstruct history from", type=click.INT, required=True)
+@click.option('--to-block', help="Last block to reconstruct history from (defaults to the latest block)", type=click.INT)
+@click.option('--registry-filepath', help="Custom contract registry filepath", type=EXISTING_READABLE_FILE)
+@click.option('--provider', 'provider_uri', help="Blockchain provider's URI", type=click.STRING, default=DEFAULT_PROVIDER)
+@click.option('--workers', help="Number of processes fetching events (defaults to the number of processors)", type=click.INT)
+@click.option('--batch-size', help="Number of blocks per request for events", type=click.INT, default=CrawlerBackfill.DEFAULT_BATCH_SIZE)
+@click.option('--influx-host', help="InfluxDB host URI", type=click.STRING, default='0.0.0.0')
+@click.option('--influx-port', help="InfluxDB network port", type=click.INT, default=8086)
+@click.option('--sqlite-filepath', help="Embedded SQLite database filepath for blockchain data, instead of InfluxDB", type=click.Path(dir_okay=False))
+@nucypher_click_config
+def backfill(click_config,
+             from_block,
+             to_block,
+             registry_filepath,
+             provider_uri,
+             workers,
+             batch_size,
+             influx_host,
+             influx_port,
+             sqlite_filepath,
+             ):
+    """
+    Reconstruct historical network information from StakingEscrow events.
+    """
+
+    # Banner
+    emitter = click_config.emitter
+    emitter.clear()
+    emitter.banner(MONITOR_BANNER.format(BACKFILL))
+
+    registry = _get_registry(provider_uri, registry_filepath)
+
+    storage = get_time_series_storage(database=Crawler.BLOCKCHAIN_DB_NAME,
+                                      host=influx_host,
+                                      port=influx_port,
+                                      db_filepath=sqlite_filepath)
+    try:
+        storage.ensure_exists(rollups=Crawler.BLOCKCHAIN_DB_ROLLUPS)
+        crawler_backfill = CrawlerBackfill(registry=registry,
+                                           provider_uri=provider_uri,
+                                           storage=storage,
+                                           workers=workers,
+                                           batch_size=batch_size,
+                                           cache_filepath=CrawlerBlockchainDBClient.DEFAULT_CACHE_FILEPATH)
+        if to_block is None:
+            to_block = crawler_backfill.staking_agent.blockchain.client.w3.eth.blockNumber
+        periods = crawler_backfill.backfill(from_block=from_block, to_block=to_block)
+        emitter.message(f"Backfilled {periods} periods from blocks {from_block}-{to_block}")
+    finally:
+        storage.close()
@@ -0,0 +1,115 @@
+import click
+from nucypher.cli import actions
+from nucypher.cli.config import nucypher_click_config
+from nucypher.cli.types import EXISTING_READABLE_FILE
+from nucypher.network.middleware import RestMiddleware
+from twisted.internet import reactor
+
+from monitor.cli._utils import (
+    CRAWLER,
+    DEFAULT_NETWORK,
+    DEFAULT_PROVIDER,
+    DEFAULT_TEACHER,
+    MONITOR_BANNER,
+    _get_registry
+)
+from monitor.crawler import Crawler
+from monitor.prober import NodeProber
+from monitor.snapshot import DashboardSnapshot
+from monitor.teachers import TeacherScheduler
+from monitor.verifier import NodeVerifier
+
+
+@click.command()
+@click.option('--teacher', 'teacher_uri', help="An Ursula URI to start learning from (seednode)", type=click.STRING, default=DEFAULT_TEACHER)
+@click.option('--registry-filepath', help="Custom contract registry filepath", type=EXISTING_READABLE_FILE)
+@click.option('--min-stake', help="The minimum stake the teacher must have to be a teacher", type=click.INT, default=0)
+@click.option('--network', help="Network Domain Name", type=click.STRING, default=DEFAULT_NETWORK)
+@click.option('--learn-on-launch', help="Conduct first learning loop on main thread at launch.", is_flag=True)
+@click.option('--provider', 'provider_uri', help="Blockchain provider's URI", type=click.STRING, default=DEFAULT_PROVIDER)
+@click.option('--influx-host', help="InfluxDB host URI", type=click.STRING, default='0.0.0.0')
+@click.option('--influx-port', help="InfluxDB network port", type=click.INT, default=8086)
+@click.option('--sqlite-filepath', help="Embedded SQLite database filepath for blockchain data, instead of InfluxDB", type=click.Path(dir_okay=False))
+@click.option('--probe-rate', help="Seconds between probes of the reachability of nodes (0 to disable)", type=click.INT, default=Crawler.DEFAULT_PROBE_RATE)
+@click.option('--probe-connections', help="Maximum number of concurrent connections when probing nodes", type=click.INT, default=NodeProber.DEFAULT_MAX_CONNECTIONS)
+@click.option('--probe-timeout', help="Seconds before a node probe times out", type=click.FLOAT, default=NodeProber.DEFAULT_TIMEOUT)
+@click.option('--learning-teachers', help="Number of teachers to learn from at once in each round of learning", type=click.INT, default=1)
+@click.option('--verification-workers', help="Number of worker processes verifying nodes learnt about (0 to verify them on the main thread)", type=click.INT, default=0)
+@click.option('--max-hydrated-nodes', help="Maximum number of full known nodes kept in memory, others only summarised and spilled to the node storage (0 for no maximum)", type=click.INT, default=0)
+@click.option('--snapshot-filepath', help="Filepath of the snapshot of the known nodes published for the dashboard", type=click.Path(dir_okay=False), default=DashboardSnapshot.DEFAULT_FILEPATH)
+@click.option('--warm-start', help="Resume from the nodes, states and teacher stored by the previous run", is_flag=True)
+@click.option('--dry-run', '-x', help="Execute normally without actually starting the crawler", is_flag=True)
+@nucypher_click_config
+def crawl(click_config,
+          teacher_uri,
+          registry_filepath,
+          min_stake,
+          network,
+          learn_on_launch,
+          provider_uri,
+          influx_host,
+          influx_port,
+          sqlite_filepath,
+          probe_rate,
+          probe_connections,
+          probe_timeout,
+          learning_teachers,
+          verification_workers,
+          max_hydrated_nodes,
+          snapshot_filepath,
+          warm_start,
+          dry_run
+          ):
+    """
+    Gather NuCypher network information.
+    """
+
+    # Banner
+    emitter = click_config.emitter
+    emitter.clear()
+    emitter.banner(MONITOR_BANNER.format(CRAWLER))
+
+    registry = _get_registry(provider_uri, registry_filepath)
+
+    # Teacher Ursula
+    teacher_uris = [teacher_uri] if teacher_uri else None
+    teacher_nodes = actions.load_seednodes(emitter,
+                                           teacher_uris=teacher_uris,
+                                           min_stake=min_stake,
+                                           federated_only=False,
+                                           network_domains={network} if network else None,
+                                           network_middleware=click_config.middleware)
+
+    # Node verification in worker processes
+    node_verifier = None
+    if verification_workers:
+        node_verifier = NodeVerifier(provider_uri=provider_uri, registry=registry, workers=verification_workers)
+
+    # Learning from several teachers at once, the best scored ones
+    teacher_scheduler = None
+    if learning_teachers > 1:
+        teacher_scheduler = TeacherScheduler(teachers_per_round=learning_teachers)
+
+    # Configure Storage
+    crawler = Crawler(domains={network} if network else None,
+                      network_middleware=RestMiddleware(),
+                      known_nodes=teacher_nodes,
+                      registry=registry,
+                      start_learning_now=True,
+                      learn_on_same_thread=learn_on_launch,
+                      blockchain_db_host=influx_host,
+                      blockchain_db_port=influx_port,
+                      blockchain_db_filepath=sqlite_filepath,
+                      probe_rate=probe_rate,
+                      prober=NodeProber(max_connections=probe_connections,
+                                        timeout=probe_timeout,
+                                        spread=probe_rate / 2),
+                      node_verifier=node_verifier,
+                      teacher_scheduler=teacher_scheduler,
+                      max_hydrated_nodes=max_hydrated_nodes or None,
+                      snapshot_filepath=snapshot_filepath,
+                      warm_start=warm_start
+                      )
+    if not dry_run:
+        crawler.start()
+        reactor.run()
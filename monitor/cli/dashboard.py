@@ -0,0 +1,79 @@
+import click
+from flask import Flask
+from nucypher.cli.config import nucypher_click_config
+from nucypher.cli.types import NETWORK_PORT, EXISTING_READABLE_FILE
+
+from monitor.cli._utils import (
+    DASHBOARD,
+    DEFAULT_NETWORK,
+    DEFAULT_PROVIDER,
+    MONITOR_BANNER,
+    _get_registry,
+    _get_tls_hosting_power
+)
+from monitor.dashboard import Dashboard
+from monitor.snapshot import DashboardSnapshot
+
+
+@click.command()
+@click.option('--host', help="The host to run monitor dashboard on", type=click.STRING, default='127.0.0.1')
+@click.option('--http-port', help="The network port to run monitor dashboard on", type=NETWORK_PORT, default=12500)
+@click.option('--registry-filepath', help="Custom contract registry filepath", type=EXISTING_READABLE_FILE)
+@click.option('--certificate-filepath', help="Pre-signed TLS certificate filepath")
+@click.option('--tls-key-filepath', help="TLS private key filepath")
+@click.option('--provider', 'provider_uri', help="Blockchain provider's URI", type=click.STRING, default=DEFAULT_PROVIDER)
+@click.option('--network', help="Network Domain Name", type=click.STRING, default=DEFAULT_NETWORK)
+@click.option('--influx-host', help="InfluxDB host URI", type=click.STRING, default='0.0.0.0')
+@click.option('--influx-port', help="InfluxDB network port", type=click.INT, default=8086)
+@click.option('--sqlite-filepath', help="Embedded SQLite database filepath for blockchain data, instead of InfluxDB", type=click.Path(dir_okay=False))
+@click.option('--snapshot-filepath', help="Filepath of the snapshot published by the crawler", type=click.Path(dir_okay=False), default=DashboardSnapshot.DEFAULT_FILEPATH)
+@click.option('--dry-run', '-x', help="Execute normally without actually starting the dashboard", is_flag=True)
+@nucypher_click_config
+def dashboard(click_config,
+              host,
+              http_port,
+              registry_filepath,
+              certificate_filepath,
+              tls_key_filepath,
+              provider_uri,
+              network,
+              influx_host,
+              influx_port,
+              sqlite_filepath,
+              snapshot_filepath,
+              dry_run,
+              ):
+    """
+    Run UI dashboard of NuCypher network.
+    """
+
+    # Banner
+    emitter = click_config.emitter
+    emitter.clear()
+    emitter.banner(MONITOR_BANNER.format(DASHBOARD))
+
+    registry = _get_registry(provider_uri, registry_filepath)
+
+    #
+    # WSGI Service
+    #
+    rest_app = Flask("monitor-dashboard")
+    Dashboard(flask_server=rest_app,
+              route_url='/',
+              registry=registry,
+              domain=network,
+              blockchain_db_host=influx_host,
+              blockchain_db_port=influx_port,
+              blockchain_db_filepath=sqlite_filepath,
+              snapshot_filepath=snapshot_filepath)
+
+    #
+    # Server
+    #
+    tls_hosting_power = _get_tls_hosting_power(host=host,
+                                               tls_certificate_filepath=certificate_filepath,
+                                               tls_private_key_filepath=tls_key_filepath)
+    emitter.message(f"Running Monitor Dashboard - https://{host}:{http_port}")
+    deployer = tls_hosting_power.get_deployer(rest_app=rest_app, port=http_port)
+    if not dry_run:
+        deployer.run()
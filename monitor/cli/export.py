@@ -0,0 +1,59 @@
+import os
+
+import click
+from nucypher.cli.config import nucypher_click_config
+
+from monitor.cli._utils import EXPORT, MONITOR_BANNER
+from monitor.crawler import Crawler, CrawlerNodeStorage
+from monitor.export import HistoryExporter
+from monitor.timeseries import get_time_series_storage
+
+
+@click.command()
+@click.option('--output-dir', help="Directory to export files to", type=click.Path(file_okay=False), required=True)
+@click.option('--format', 'file_format', help="Exported file format", type=click.Choice(HistoryExporter.FORMATS), default='parquet')
+@click.option('--chunk', help="Time covered by each exported file eg. 1d, 6h", type=click.STRING, default=HistoryExporter.DEFAULT_CHUNK)
+@click.option('--influx-host', help="InfluxDB host URI", type=click.STRING, default='0.0.0.0')
+@click.option('--influx-port', help="InfluxDB network port", type=click.INT, default=8086)
+@click.option('--sqlite-filepath', help="Embedded SQLite database filepath for blockchain data, instead of InfluxDB", type=click.Path(dir_okay=False))
+@click.option('--node-storage-filepath', help="Crawler node storage filepath", type=click.Path(dir_okay=False), default=CrawlerNodeStorage.DEFAULT_DB_FILEPATH)
+@nucypher_click_config
+def export(click_config,
+           output_dir,
+           file_format,
+           chunk,
+           influx_host,
+           influx_port,
+           sqlite_filepath,
+           node_storage_filepath,
+           ):
+    """
+    Export crawler history to Parquet or Arrow IPC files, resuming from the last export.
+    """
+
+    # Banner
+    emitter = click_config.emitter
+    emitter.clear()
+    emitter.banner(MONITOR_BANNER.format(EXPORT))
+
+    storage = get_time_series_storage(database=Crawler.BLOCKCHAIN_DB_NAME,
+                                      host=influx_host,
+                                      port=influx_port,
+                                      db_filepath=sqlite_filepath)
+    try:
+        try:
+            exporter = HistoryExporter(storage=storage, output_dir=output_dir, file_format=file_format, chunk=chunk)
+        except HistoryExporter.MissingDependency as e:
+            raise click.ClickException(str(e))
+
+        for measurement in (Crawler.BLOCKCHAIN_DB_MEASUREMENT, Crawler.NETWORK_SUMMARY_MEASUREMENT):
+            exported = exporter.export_measurement(measurement)
+            emitter.message(f"Exported {exported} {measurement} points "
+                            f"(until {exporter.get_exported_until(measurement) or '-'})")
+
+        if os.path.exists(node_storage_filepath):
+            for table in (CrawlerNodeStorage.NODE_DB_NAME, CrawlerNodeStorage.STATE_DB_NAME):
+                exported = exporter.export_table(db_filepath=node_storage_filepath, table=table)
+                emitter.message(f"Exported {exported} {table} rows")
+    finally:
+        storage.close()
@@ -1,3 +1,6 @@
+from urllib.parse import quote
+
+import dash_core_components as dcc
 import dash_daq as daq
 import dash_html_components as html
 import nucypher
@@ -7,13 +10,36 @@ from nucypher.blockchain.eth.agents import StakingEscrowAgent, ContractAgency
 from nucypher.blockchain.eth.interfaces import BlockchainInterface
 from pendulum.parsing import ParserError
 
-NODE_TABLE_COLUMNS = ['Status', 'Checksum', 'Nickname', 'Launched', 'Last Seen', 'Fleet State']
+from monitor.charts import CONFIRMATION_STATUS_COLORS, LINE_CHART_MARKER_COLOR, confirmation_status
+from monitor.stakers import StakerTable
+from monitor.uptime import NodeStatistics
+
+NODE_TABLE_COLUMNS = ['Status', 'Checksum', 'Nickname', 'Launched', 'Last Seen', 'Fleet State',
+                      'Uptime', 'Latency', 'History']
+
+LATENCY_WINDOW = '24h'  # window of the latency percentiles displayed in the nodes table
+
+SPARKLINE_WIDTH = 90  # pixels
+SPARKLINE_HEIGHT = 16
+SVG_URI_SAFE_CHARACTERS = ' =":,./'  # left unescaped in svg data URIs, for smaller pages
 
 
 def header() -> html.Div:
     return html.Div([html.Div(f'v{nucypher.__version__}', id='version')], className="logo-widget")
 
 
+def current_period(period: int) -> html.Div:
+    return html.Div([html.H4("Current Period"), html.H5(period, id='current-period-value')])
+
+
+def active_stakers(confirmed: int, total: int) -> html.Div:
+    return html.Div([html.H4("Active Ursulas"), html.H5(f"{confirmed}/{total}", id='active-ursulas-value')])
+
+
+def staked_tokens(nu) -> html.Div:
+    return html.Div([html.H4('Staked Tokens'), html.H5(f"{nu}", id='staked-tokens-value')])
+
+
 def state_detail(state_dict) -> html.Div:
     detail = html.Div([
         html.Div([
@@ -41,9 +67,8 @@ def previous_states(states_dict_list) -> html.Div:
     ], className='row')
 
 
-def get_node_status(agent, staker_address, current_period, last_confirmed_period) -> html.Td:
+def get_node_status(current_period, last_confirmed_period, worker) -> html.Td:
     missing_confirmations = current_period - last_confirmed_period
-    worker = agent.get_worker_from_staker(staker_address)
     if worker == BlockchainInterface.NULL_ADDRESS:
         missing_confirmations = BlockchainInterface.NULL_ADDRESS
 
@@ -66,7 +91,110 @@ def get_node_status(agent, staker_address, current_period, last_confirmed_period
     return status
 
 
-def generate_node_table_components(node_info: dict, registry) -> dict:
+def staker_url(route_url: str, staker_address: str) -> str:
+    """Path of the staker's detail page"""
+    return f'{route_url}staker/{staker_address}'
+
+
+def etherscan_url(address: str) -> str:
+    return f'https://goerli.etherscan.io/address/{address}'
+
+
+def _svg_image(svg_elements: str, title: str, class_name: str) -> html.Img:
+    # inline svg image - no figure (or plotly.js) for each row of the table
+    svg = (f'<svg xmlns="http://www.w3.org/2000/svg" width="{SPARKLINE_WIDTH}" height="{SPARKLINE_HEIGHT}" '
+           f'viewBox="0 0 {SPARKLINE_WIDTH} {SPARKLINE_HEIGHT}">{svg_elements}</svg>')
+    return html.Img(src=f'data:image/svg+xml,{quote(svg, safe=SVG_URI_SAFE_CHARACTERS)}',
+                    title=title,
+                    className=class_name)
+
+
+def locked_stake_sparkline(history: dict) -> html.Img:
+    """Line of the locked stake in a staker's history"""
+    locked_stake = [value or 0 for value in history['locked_stake']]
+    low, high = min(locked_stake), max(locked_stake)
+    x_step = SPARKLINE_WIDTH / max(len(locked_stake) - 1, 1)
+    points = ' '.join(f'{index * x_step:.1f},'
+                      f'{(SPARKLINE_HEIGHT - 1) - (value - low) / ((high - low) or 1) * (SPARKLINE_HEIGHT - 2):.1f}'
+                      for index, value in enumerate(locked_stake))
+    return _svg_image(f'<polyline points="{points}" fill="none" stroke="{LINE_CHART_MARKER_COLOR}" '
+                      f'stroke-width="1.5"/>',
+                      title=f'Locked stake: {locked_stake[-1]:,.0f} NU (range {low:,.0f} - {high:,.0f} NU)',
+                      class_name='sparkline')
+
+
+def confirmation_streak(statuses: list) -> int:
+    """Number of consecutive confirmed periods up to the latest"""
+    streak = 0
+    for status in reversed(statuses):
+        if status != 'Confirmed':
+            break
+        streak += 1
+    return streak
+
+
+def confirmations_sparkline(history: dict) -> html.Img:
+    """A bar per period of a staker's history, colored by its confirmation status"""
+    statuses = [confirmation_status(current_period, last_confirmed_period)
+                for current_period, last_confirmed_period in zip(history['current_period'],
+                                                                 history['last_confirmed_period'])]
+    bar_width = SPARKLINE_WIDTH / len(statuses)
+    # a single rect for each run of periods with the same status
+    bars = []
+    run_begin = 0
+    for index, status in enumerate(statuses):
+        if index + 1 == len(statuses) or statuses[index + 1] != status:
+            bars.append(f'<rect x="{run_begin * bar_width:.1f}" width="{(index + 1 - run_begin) * bar_width:.1f}" '
+                        f'height="{SPARKLINE_HEIGHT}" fill="{CONFIRMATION_STATUS_COLORS[status]}"/>')
+            run_begin = index + 1
+    return _svg_image(''.join(bars),
+                      title=f'Confirmation streak: {confirmation_streak(statuses)} periods',
+                      class_name='sparkline')
+
+
+def history_sparklines(history: dict = None) -> list:
+    """Sparklines of a staker's recent history; none without any history"""
+    if not history or not history['time']:
+        return []
+    return [locked_stake_sparkline(history), confirmations_sparkline(history)]
+
+
+def _format_uptime(uptime: float = None) -> str:
+    return '-' if uptime is None else f'{uptime:.1f}%'
+
+
+def _format_latency(latency: float = None) -> str:
+    return '-' if latency is None else f'{latency * 1000:,.0f} ms'
+
+
+def uptime_cell(statistics: dict = None) -> html.Td:
+    """Uptime of a node over each rolling window"""
+    statistics = statistics or dict()
+    return html.Td([html.Div(f'{window}: {_format_uptime(statistics.get(window, dict()).get("uptime"))}')
+                    for window in NodeStatistics.WINDOWS],
+                   className='node-statistics')
+
+
+def latency_cell(statistics: dict = None) -> html.Td:
+    """Latency percentiles of a node over the LATENCY_WINDOW; those of every window on hover"""
+    statistics = statistics or dict()
+    percentiles = [f'p{percentile}' for percentile in NodeStatistics.PERCENTILES]
+    title = '\n'.join(f'{window}: ' + ', '.join(f'{percentile} {_format_latency(window_statistics[percentile])}'
+                                                for percentile in percentiles)
+                      for window, window_statistics in statistics.items())
+    window_statistics = statistics.get(LATENCY_WINDOW, dict())
+    return html.Td([html.Div(f'{percentile}: {_format_latency(window_statistics.get(percentile))}')
+                    for percentile in percentiles],
+                   title=title or None,
+                   className='node-statistics')
+
+
+def generate_node_table_components(node_info: dict,
+                                   registry,
+                                   route_url: str = '/',
+                                   history: dict = None,
+                                   statistics: dict = None,
+                                   staker_table: StakerTable = None) -> dict:
     identity = html.Td(children=html.Div([
         html.A(node_info['nickname'],
                href=f'https://{node_info["rest_url"]}/status',
@@ -83,13 +211,19 @@ def generate_node_table_components(node_info: dict, registry) -> dict:
 
     staker_address = node_info['staker_address']
 
-    # Blockchainy (TODO)
-    staking_agent = ContractAgency.get_agent(StakingEscrowAgent, registry=registry)
-    current_period = staking_agent.get_current_period()
-    last_confirmed_period = staking_agent.get_last_active_period(staker_address)
-    status = get_node_status(staking_agent, staker_address, current_period, last_confirmed_period)
+    # Blockchainy - as of the crawler's last cycle, if the staker was part of it
+    staker_id = staker_table.get_id(staker_address) if staker_table is not None else None
+    if staker_id is not None:
+        current_period = staker_table.current_period
+        last_confirmed_period = staker_table.last_confirmed_period[staker_id]
+        worker = staker_table.worker_address[staker_id]
+    else:
+        staking_agent = ContractAgency.get_agent(StakingEscrowAgent, registry=registry)
+        current_period = staking_agent.get_current_period()
+        last_confirmed_period = staking_agent.get_last_active_period(staker_address)
+        worker = staking_agent.get_worker_from_staker(staker_address)
+    status = get_node_status(current_period, last_confirmed_period, worker)
 
-    etherscan_url = f'https://goerli.etherscan.io/address/{node_info["staker_address"]}'
     try:
         slang_last_seen = MayaDT.from_rfc3339(node_info['last_seen']).slang_time()
     except ParserError:
@@ -97,24 +231,38 @@ def generate_node_table_components(node_info: dict, registry) -> dict:
 
     components = {
         'Status': status,
-        'Checksum': html.Td(html.A(f'{node_info["staker_address"][:10]}...',
-                                   href=etherscan_url,
-                                   target='_blank')),
+        'Checksum': html.Td(dcc.Link(f'{staker_address[:10]}...', href=staker_url(route_url, staker_address))),
         'Nickname': identity,
         'Launched': html.Td(node_info['timestamp']),
         'Last Seen': html.Td([slang_last_seen, f" | Period {last_confirmed_period}"]),
-        'Fleet State': fleet_state
+        'Fleet State': fleet_state,
+        'Uptime': uptime_cell(statistics),
+        'Latency': latency_cell(statistics),
+        'History': html.Td(history_sparklines(history))
     }
 
     return components
 
 
-def nodes_table(nodes, teacher_index, registry) -> html.Table:
+def nodes_table(nodes,
+                teacher_index,
+                registry,
+                route_url: str = '/',
+                stakers_history: dict = None,
+                nodes_statistics: dict = None,
+                staker_table: StakerTable = None) -> html.Table:
         rows = []
         for index, node_info in enumerate(nodes):
             row = []
             # TODO: could return list (skip column for-loop); however, dict is good in case of re-ordering of columns
-            components = generate_node_table_components(node_info=node_info, registry=registry)
+            components = generate_node_table_components(node_info=node_info,
+                                                        registry=registry,
+                                                        route_url=route_url,
+                                                        history=(stakers_history or dict()).get(
+                                                            node_info['staker_address']),
+                                                        statistics=(nodes_statistics or dict()).get(
+                                                            node_info['staker_address']),
+                                                        staker_table=staker_table)
             for col in NODE_TABLE_COLUMNS:
                 cell = components[col]
                 if cell:
@@ -137,7 +285,13 @@ def nodes_table(nodes, teacher_index, registry) -> html.Table:
         return table
 
 
-def known_nodes(nodes_dict: dict, registry, teacher_checksum: str = None) -> html.Div:
+def known_nodes(nodes_dict: dict,
+                registry,
+                teacher_checksum: str = None,
+                route_url: str = '/',
+                stakers_history: dict = None,
+                nodes_statistics: dict = None,
+                staker_table: StakerTable = None) -> html.Div:
     nodes = list()
     teacher_index = None
     for checksum in nodes_dict:
@@ -156,7 +310,65 @@ def known_nodes(nodes_dict: dict, registry, teacher_checksum: str = None) -> htm
         ]),
         html.Br(),
         html.H6(f'Known Nodes: {len(nodes_dict)}'),
-        html.Div([nodes_table(nodes, teacher_index, registry)])
+        html.Div([nodes_table(nodes,
+                              teacher_index,
+                              registry,
+                              route_url=route_url,
+                              stakers_history=stakers_history,
+                              nodes_statistics=nodes_statistics,
+                              staker_table=staker_table)])
     ])
 
     return component
+
+
+def worker_changes(history: dict) -> list:
+    """(time, worker address) of each change of worker in a staker's history, oldest first"""
+    changes = []
+    for time, worker_address in zip(history['time'], history['worker_address']):
+        if worker_address and (not changes or changes[-1][1] != worker_address):
+            changes.append((time, worker_address))
+    return changes
+
+
+def _worker_changes_table(history: dict) -> html.Table:
+    rows = []
+    for time, worker_address in reversed(worker_changes(history)):
+        if worker_address == BlockchainInterface.NULL_ADDRESS:
+            worker = 'Headless'
+        else:
+            worker = html.A(worker_address, href=etherscan_url(worker_address), target='_blank')
+        rows.append(html.Tr([html.Td(time.strftime('%Y-%m-%d')), html.Td(worker)]))
+    return html.Table([html.Tr([html.Th('Since'), html.Th('Worker')], className='table-header')] + rows,
+                      id='worker-changes-table')
+
+
+def _sightings_table(sightings: list) -> html.Table:
+    rows = []
+    for sighting in sightings:
+        first_seen, last_seen = (MayaDT.from_rfc3339(sighting[column]).rfc2822()
+                                 for column in ('first_seen', 'last_seen'))
+        rows.append(html.Tr([html.Td(first_seen),
+                             html.Td(last_seen),
+                             html.Td(sighting['fleet_state_icon']),
+                             html.Td(sighting['sightings'])]))
+    return html.Table([html.Tr([html.Th(col) for col in ('First Seen', 'Last Seen', 'Fleet State', 'Sightings')],
+                               className='table-header')] + rows,
+                      id='sightings-table')
+
+
+def staker_detail(staker_address: str, route_url: str, history: dict, sightings: list, charts: list) -> html.Div:
+    """Detail page of a single staker; `charts` are the graphs of its `history`"""
+    return html.Div([
+        dcc.Link('< Network', href=route_url, id='staker-back-link'),
+        html.H4(['Staker ', html.A(staker_address, href=etherscan_url(staker_address), target='_blank')]),
+        html.Div(charts, id='staker-charts'),
+        html.Div([
+            html.H4('Worker Changes'),
+            _worker_changes_table(history),
+        ], className='row'),
+        html.Div([
+            html.H4('Fleet State Sightings'),
+            _sightings_table(sightings),
+        ], className='row'),
+    ])
@@ -1,22 +1,39 @@
 import os
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
 
-import requests
-from influxdb import InfluxDBClient
+import maya
+from bytestring_splitter import BytestringSplittingError
+from constant_sorrow import constant_or_bytes
+from constant_sorrow.constants import FLEET_STATES_MATCH, NO_KNOWN_NODES
 from maya import MayaDT
 from nucypher.blockchain.economics import TokenEconomicsFactory
 from nucypher.blockchain.eth.agents import (
     ContractAgency,
     StakingEscrowAgent,
 )
+from nucypher.blockchain.eth.interfaces import BlockchainInterface
 from nucypher.blockchain.eth.token import NU, StakeList
 from nucypher.blockchain.eth.utils import datetime_at_period
 from nucypher.config.constants import DEFAULT_CONFIG_ROOT
-from nucypher.config.storages import SQLiteForgetfulNodeStorage
+from nucypher.config.storages import ForgetfulNodeStorage, SQLiteForgetfulNodeStorage
+from nucypher.crypto.signing import signature_splitter
+from nucypher.network.exceptions import NodeSeemsToBeDown
 from nucypher.network.nodes import FleetStateTracker
 from nucypher.network.nodes import Learner
-from twisted.internet import task
+from twisted.internet import defer, task, threads
 from twisted.logger import Logger
 
+from monitor.known_nodes import BoundedFleetStateTracker, full_node
+from monitor.prober import NodeProber, split_rest_url
+from monitor.snapshot import DashboardSnapshot, publish_snapshot
+from monitor.stakers import StakerTable
+from monitor.teachers import TeacherScheduler
+from monitor.timeseries import get_time_series_storage
+from monitor.verifier import NodeVerifier, check_node, is_unreachable
+
 
 class CrawlerNodeStorage(SQLiteForgetfulNodeStorage):
     _name = 'crawler'
@@ -32,33 +49,323 @@ class CrawlerNodeStorage(SQLiteForgetfulNodeStorage):
     TEACHER_ID = 'current_teacher'
     TEACHER_DB_SCHEMA = [('id', 'text primary key'), ('checksum_address', 'text')]
 
-    def __init__(self, storage_filepath: str = DEFAULT_DB_FILEPATH, *args, **kwargs):
+    # consecutive sightings of a node with the same fleet state are recorded as a single row
+    SIGHTINGS_DB_NAME = 'node_sightings'
+    SIGHTINGS_DB_SCHEMA = [('staker_address', 'text'), ('fleet_state_icon', 'text'), ('first_seen', 'text'),
+                           ('last_seen', 'text'), ('sightings', 'integer')]
+    SIGHTINGS_TIME_FORMAT = '%Y-%m-%dT%H:%M:%SZ'  # fixed width rfc3339 for supported sqlite3 sorting
+    # further sightings of a run are counted in memory, and written at most this often
+    DEFAULT_SIGHTINGS_FLUSH_INTERVAL = timedelta(minutes=5)
+
+    # append-only log of changes to the known nodes; the id of the last event read is the cursor of consumers
+    NODE_EVENTS_DB_NAME = 'node_events'
+    NODE_EVENTS_DB_SCHEMA = [('id', 'integer primary key'), ('staker_address', 'text'), ('event', 'text'),
+                             ('old_value', 'text'), ('new_value', 'text'), ('time', 'text')]
+    NEW_NODE_EVENT = 'new'
+    LOST_NODE_EVENT = 'lost'
+    # changes of these node columns are recorded as events named after the column
+    NODE_EVENT_COLUMNS = ('rest_url', 'nickname', 'timestamp', 'fleet_state_icon', 'last_seen')
+
+    DEFAULT_LAST_SEEN_THRESHOLD = timedelta(minutes=5)  # smaller advances of last_seen are not stored
+
+    # full (signed) metadata of the known nodes, to restore them on a warm start
+    NODE_METADATA_DB_NAME = 'node_metadata'
+    NODE_METADATA_DB_SCHEMA = [('staker_address', 'text primary key'), ('metadata', 'blob')]
+
+    LAST_BLOCK_DB_NAME = 'last_block'
+    LAST_BLOCK_ID = 'last_processed_block'
+    LAST_BLOCK_DB_SCHEMA = [('id', 'text primary key'), ('block_number', 'integer'), ('block_time', 'integer')]
+
+    # staker table of the last crawl cycle, as the bytes of its columns (see `StakerTable.to_bytes`)
+    STAKER_TABLE_DB_NAME = 'staker_table'
+    STAKER_TABLE_ID = 'last_cycle'
+    STAKER_TABLE_DB_SCHEMA = [('id', 'text primary key'), ('data', 'blob')]
+
+    def __init__(self,
+                 storage_filepath: str = DEFAULT_DB_FILEPATH,
+                 last_seen_threshold: timedelta = DEFAULT_LAST_SEEN_THRESHOLD,
+                 warm_start: bool = False,
+                 keep_nodes_in_memory: bool = True,
+                 sightings_flush_interval: timedelta = DEFAULT_SIGHTINGS_FLUSH_INTERVAL,
+                 *args, **kwargs):
+        self._last_seen_threshold = last_seen_threshold
+        self._sightings_flush_interval = sightings_flush_interval.total_seconds()
+        self._sighting_runs = dict()  # staker address -> latest run of sightings [rowid, icon, last_seen, sightings]
+        self._unflushed_sighting_runs = set()  # staker addresses of runs updated in memory only
+        self._sightings_flushed = time.monotonic()
+        self._warm_start = warm_start  # keep the data of the previous run, and the db file for the next one
+        self._keep_nodes_in_memory = keep_nodes_in_memory  # otherwise nodes and certificates are only stored in the db
         super().__init__(db_filepath=storage_filepath, federated_only=False, *args, **kwargs)
 
+    def __del__(self):
+        self.flush_sightings()
+        if self._warm_start:
+            ForgetfulNodeStorage.__del__(self)
+            self.db_conn.close()
+        else:
+            super().__del__()
+
     def init_db_tables(self):
+        create_table = 'CREATE TABLE IF NOT EXISTS' if self._warm_start else 'CREATE TABLE'
+        create_index = 'CREATE INDEX IF NOT EXISTS' if self._warm_start else 'CREATE INDEX'
         with self.db_conn:
-            # ensure table is empty
-            for table in [self.STATE_DB_NAME, self.TEACHER_DB_NAME]:
-                self.db_conn.execute(f"DROP TABLE IF EXISTS {table}")
+            if not self._warm_start:
+                # ensure table is empty
+                for table in [self.STATE_DB_NAME, self.TEACHER_DB_NAME, self.SIGHTINGS_DB_NAME,
+                              self.NODE_EVENTS_DB_NAME, self.NODE_METADATA_DB_NAME, self.LAST_BLOCK_DB_NAME,
+                              self.STAKER_TABLE_DB_NAME]:
+                    self.db_conn.execute(f"DROP TABLE IF EXISTS {table}")
 
             # create fresh new state table (same column names as FleetStateTracker.abridged_state_details)
             state_schema = ", ".join(f"{schema[0]} {schema[1]}" for schema in self.STATE_DB_SCHEMA)
-            self.db_conn.execute(f"CREATE TABLE {self.STATE_DB_NAME} ({state_schema})")
+            self.db_conn.execute(f"{create_table} {self.STATE_DB_NAME} ({state_schema})")
 
             # create new teacher table
             teacher_schema = ", ".join(f"{schema[0]} {schema[1]}" for schema in self.TEACHER_DB_SCHEMA)
-            self.db_conn.execute(f"CREATE TABLE {self.TEACHER_DB_NAME} ({teacher_schema})")
-        super().init_db_tables()
+            self.db_conn.execute(f"{create_table} {self.TEACHER_DB_NAME} ({teacher_schema})")
+
+            # create new sightings table, indexed for the history of a single staker
+            sightings_schema = ", ".join(f"{schema[0]} {schema[1]}" for schema in self.SIGHTINGS_DB_SCHEMA)
+            self.db_conn.execute(f"{create_table} {self.SIGHTINGS_DB_NAME} ({sightings_schema})")
+            self.db_conn.execute(f"{create_index} {self.SIGHTINGS_DB_NAME}_staker "
+                                 f"ON {self.SIGHTINGS_DB_NAME} (staker_address, first_seen)")
+
+            # create new node events table, indexed for the events of a single staker
+            events_schema = ", ".join(f"{schema[0]} {schema[1]}" for schema in self.NODE_EVENTS_DB_SCHEMA)
+            self.db_conn.execute(f"{create_table} {self.NODE_EVENTS_DB_NAME} ({events_schema})")
+            self.db_conn.execute(f"{create_index} {self.NODE_EVENTS_DB_NAME}_staker "
+                                 f"ON {self.NODE_EVENTS_DB_NAME} (staker_address, id)")
+
+            # create new node metadata, last block and staker tables
+            metadata_schema = ", ".join(f"{schema[0]} {schema[1]}" for schema in self.NODE_METADATA_DB_SCHEMA)
+            self.db_conn.execute(f"{create_table} {self.NODE_METADATA_DB_NAME} ({metadata_schema})")
+            last_block_schema = ", ".join(f"{schema[0]} {schema[1]}" for schema in self.LAST_BLOCK_DB_SCHEMA)
+            self.db_conn.execute(f"{create_table} {self.LAST_BLOCK_DB_NAME} ({last_block_schema})")
+            staker_table_schema = ", ".join(f"{schema[0]} {schema[1]}" for schema in self.STAKER_TABLE_DB_SCHEMA)
+            self.db_conn.execute(f"{create_table} {self.STAKER_TABLE_DB_NAME} ({staker_table_schema})")
+
+            if self._warm_start:
+                # node table of the sqlite storage, which would otherwise be dropped
+                node_schema = ", ".join(f"{schema[0]} {schema[1]}" for schema in self.NODE_DB_SCHEMA)
+                self.db_conn.execute(f"{create_table} {self.NODE_DB_NAME} ({node_schema})")
+
+        self._lost_nodes = set(self.__read_lost_nodes()) if self._warm_start else set()
+        if not self._warm_start:
+            super().init_db_tables()
 
     def clear(self, metadata: bool = True, certificates: bool = True) -> None:
         if metadata is True:
             with self.db_conn:
                 # TODO: do we need to clear the states table here?
-                for table in [self.STATE_DB_NAME, self.TEACHER_DB_NAME]:
+                for table in [self.STATE_DB_NAME, self.TEACHER_DB_NAME, self.SIGHTINGS_DB_NAME,
+                              self.NODE_EVENTS_DB_NAME, self.NODE_METADATA_DB_NAME, self.LAST_BLOCK_DB_NAME,
+                              self.STAKER_TABLE_DB_NAME]:
                     self.db_conn.execute(f"DELETE FROM {table}")
+                self._lost_nodes = set()
+                self._sighting_runs = dict()
+                self._unflushed_sighting_runs = set()
 
         super().clear(metadata=metadata, certificates=certificates)
 
+    def restore_nodes(self) -> Iterator:
+        """
+        Nodes stored by a previous run (on a warm start), from their full metadata - streamed from the db, one at
+        a time; they are also kept in memory (unless only stored in the db), as if newly stored. Nodes that can't be
+        restored are skipped.
+        """
+        result = self.db_conn.execute(f"SELECT staker_address, metadata FROM {self.NODE_METADATA_DB_NAME}")
+        for staker_address, metadata in result:
+            try:
+                node = self.__node_from_metadata(metadata)
+            except (ValueError, TypeError) as e:
+                self.log.warn(f"Unable to restore node {staker_address}: {e}")
+                continue
+            if self._keep_nodes_in_memory:
+                ForgetfulNodeStorage.store_node_metadata(self, node=node)
+            yield node
+
+    def load_node(self, checksum_address: str):
+        """A stored node, from its full metadata; None if not stored"""
+        stored = self.db_conn.execute(f"SELECT metadata FROM {self.NODE_METADATA_DB_NAME} WHERE staker_address = ?",
+                                      (checksum_address, )).fetchone()
+        return self.__node_from_metadata(stored[0]) if stored is not None else None
+
+    def spill_node(self, node):
+        """Store the full metadata of a node no longer kept in memory, unless already stored"""
+        stored = self.db_conn.execute(f"SELECT 1 FROM {self.NODE_METADATA_DB_NAME} WHERE staker_address = ?",
+                                      (node.checksum_address, )).fetchone()
+        if stored is None:
+            with self.db_conn:
+                self.db_conn.execute(f"INSERT INTO {self.NODE_METADATA_DB_NAME} VALUES (?,?)",
+                                     (node.checksum_address, bytes(node)))
+
+    def iter_node_metadata(self) -> Iterator[Tuple[str, bytes]]:
+        """Staker address and full metadata of the stored nodes, in order of staker address"""
+        yield from self.db_conn.execute(f"SELECT staker_address, metadata FROM {self.NODE_METADATA_DB_NAME} "
+                                        f"ORDER BY staker_address")
+
+    def __node_from_metadata(self, metadata: bytes):
+        from nucypher.characters.lawful import Ursula
+        node = Ursula.from_bytes(metadata, federated_only=self.federated_only)
+        node.certificate_filepath = self.store_node_certificate(certificate=node.certificate)
+        return node
+
+    def get(self,
+            federated_only: bool,
+            host: str = None,
+            checksum_address: str = None,
+            certificate_only: bool = False):
+        if self._keep_nodes_in_memory or certificate_only or not checksum_address:
+            return super().get(federated_only=federated_only,
+                               host=host,
+                               checksum_address=checksum_address,
+                               certificate_only=certificate_only)
+        node = self.load_node(checksum_address)
+        if node is None:
+            raise self.UnknownNode
+        return node
+
+    def store_node_certificate(self, certificate) -> str:
+        if self._keep_nodes_in_memory:
+            return super().store_node_certificate(certificate=certificate)
+        return self._write_tls_certificate(certificate=certificate)  # only to file
+
+    def store_node_metadata(self, node, filepath: str = None):
+        self.__write_node_sighting(node)
+        self.__write_node_changes(node)
+        if not self._keep_nodes_in_memory:
+            return node
+        # the node's row is only rewritten when it changed, so skip the unconditional write of the sqlite storage
+        return ForgetfulNodeStorage.store_node_metadata(self, node=node, filepath=filepath)
+
+    def remove(self, checksum_address: str, metadata: bool = True, certificate: bool = True) -> Tuple[bool, str]:
+        if metadata is True:
+            if checksum_address in self._unflushed_sighting_runs:
+                self.flush_sightings()
+            self._sighting_runs.pop(checksum_address, None)
+            with self.db_conn:
+                stored = self.db_conn.execute(f"SELECT last_seen FROM {self.NODE_DB_NAME} WHERE staker_address = ?",
+                                              (checksum_address, )).fetchone()
+                if stored is not None and checksum_address not in self._lost_nodes:
+                    self.__write_node_events([(checksum_address, self.LOST_NODE_EVENT, stored[0], None)])
+                self.db_conn.execute(f"DELETE FROM {self.NODE_METADATA_DB_NAME} WHERE staker_address = ?",
+                                     (checksum_address, ))
+                if not self._keep_nodes_in_memory:
+                    self.db_conn.execute(f"DELETE FROM {self.NODE_DB_NAME} WHERE staker_address = ?",
+                                         (checksum_address, ))
+            self._lost_nodes.discard(checksum_address)
+        if not self._keep_nodes_in_memory:
+            return True, checksum_address  # nothing in memory to remove
+        return super().remove(checksum_address=checksum_address, metadata=metadata, certificate=certificate)
+
+    def _last_seen_advanced(self, stored_last_seen: str, node) -> bool:
+        try:
+            stored = MayaDT.from_iso8601(stored_last_seen)
+            advance = node.last_seen.datetime() - stored.datetime()
+        except (AttributeError, ValueError):
+            return True  # from or to never seen
+        return advance >= self._last_seen_threshold
+
+    def __write_node_events(self, events: List[Tuple[str, str, str, str]]):
+        now = datetime.utcnow().strftime(self.SIGHTINGS_TIME_FORMAT)
+        self.db_conn.executemany(f"INSERT INTO {self.NODE_EVENTS_DB_NAME} "
+                                 f"(staker_address, event, old_value, new_value, time) VALUES (?,?,?,?,?)",
+                                 [event + (now, ) for event in events])
+
+    def __write_node_changes(self, node):
+        node_dict = FleetStateTracker.abridged_node_details(node)
+        staker_address = node_dict['staker_address']
+        columns = [column for column, _type in self.NODE_DB_SCHEMA]
+        with self.db_conn:
+            stored = self.db_conn.execute(f"SELECT * FROM {self.NODE_DB_NAME} WHERE staker_address = ?",
+                                          (staker_address, )).fetchone()
+            if stored is None:
+                events = [(staker_address, self.NEW_NODE_EVENT, None, node_dict['rest_url'])]
+            else:
+                stored_dict = dict(zip(columns, stored))
+                events = []
+                for column in self.NODE_EVENT_COLUMNS:
+                    if stored_dict[column] == node_dict[column]:
+                        continue
+                    if column == 'last_seen' and not self._last_seen_advanced(stored_dict[column], node):
+                        continue
+                    events.append((staker_address, column, stored_dict[column], node_dict[column]))
+                if not events:
+                    return  # nothing worth storing
+
+            self.db_conn.execute(f"REPLACE INTO {self.NODE_DB_NAME} VALUES (?,?,?,?,?,?)",
+                                 tuple(node_dict[column] for column in columns))
+            self.db_conn.execute(f"REPLACE INTO {self.NODE_METADATA_DB_NAME} VALUES (?,?)",
+                                 (staker_address, bytes(node)))
+            self.__write_node_events(events)
+        self._lost_nodes.discard(staker_address)
+
+    def record_lost_nodes(self, seen_before: datetime) -> List[str]:
+        """Record nodes last seen before the given time as lost, unless already recorded; returns them"""
+        # stored iso8601 times compare as strings, to within the second
+        cutoff = seen_before.strftime('%Y-%m-%dT%H:%M:%S')
+        with self.db_conn:
+            stale = self.db_conn.execute(f"SELECT staker_address, last_seen FROM {self.NODE_DB_NAME} "
+                                         f"WHERE last_seen < ?", (cutoff, )).fetchall()
+            lost = [(staker_address, last_seen) for staker_address, last_seen in stale
+                    if staker_address not in self._lost_nodes]
+            self.__write_node_events([(staker_address, self.LOST_NODE_EVENT, last_seen, None)
+                                      for staker_address, last_seen in lost])
+        self._lost_nodes.update(staker_address for staker_address, _last_seen in lost)
+        return [staker_address for staker_address, _last_seen in lost]
+
+    def __read_lost_nodes(self) -> List[str]:
+        # stored nodes whose latest event is that they were lost
+        result = self.db_conn.execute(f"SELECT staker_address FROM {self.NODE_EVENTS_DB_NAME} AS events "
+                                      f"WHERE event = ? AND id = (SELECT MAX(id) FROM {self.NODE_EVENTS_DB_NAME} "
+                                      f"WHERE staker_address = events.staker_address)", (self.LOST_NODE_EVENT, ))
+        return [row[0] for row in result]
+
+    def __write_node_sighting(self, node):
+        from nucypher.network.nodes import FleetStateTracker
+        node_dict = FleetStateTracker.abridged_node_details(node)
+        staker_address, fleet_state_icon = node_dict['staker_address'], node_dict['fleet_state_icon']
+        try:
+            last_seen = node.last_seen.datetime().strftime(self.SIGHTINGS_TIME_FORMAT)
+        except AttributeError:
+            return  # never seen
+
+        run = self._sighting_runs.get(staker_address)
+        if run is None:
+            latest = self.db_conn.execute(f"SELECT rowid, fleet_state_icon, last_seen, sightings "
+                                          f"FROM {self.SIGHTINGS_DB_NAME} "
+                                          f"WHERE staker_address = ? ORDER BY first_seen DESC LIMIT 1",
+                                          (staker_address, )).fetchone()
+            run = list(latest) if latest is not None else None
+
+        if run is not None and run[1] == fleet_state_icon:
+            # another sighting of the latest run, written by the next flush
+            run[2] = max(run[2], last_seen)
+            run[3] += 1
+            self._unflushed_sighting_runs.add(staker_address)
+        else:
+            if staker_address in self._unflushed_sighting_runs:
+                self.flush_sightings()  # the previous run is complete
+            with self.db_conn:
+                cursor = self.db_conn.execute(f"INSERT INTO {self.SIGHTINGS_DB_NAME} VALUES (?,?,?,?,?)",
+                                              (staker_address, fleet_state_icon, last_seen, last_seen, 1))
+            run = [cursor.lastrowid, fleet_state_icon, last_seen, 1]
+        self._sighting_runs[staker_address] = run
+
+        if time.monotonic() - self._sightings_flushed >= self._sightings_flush_interval:
+            self.flush_sightings()
+
+    def flush_sightings(self):
+        """Write the runs of sightings updated in memory since the last flush"""
+        runs = [self._sighting_runs[staker_address] for staker_address in self._unflushed_sighting_runs]
+        if runs:
+            with self.db_conn:
+                self.db_conn.executemany(f"UPDATE {self.SIGHTINGS_DB_NAME} "
+                                         f"SET last_seen = ?, sightings = ? WHERE rowid = ?",
+                                         [(last_seen, sightings, rowid) for rowid, _icon, last_seen, sightings in runs])
+        self._unflushed_sighting_runs = set()
+        self._sightings_flushed = time.monotonic()
+
     def store_state_metadata(self, state):
         self.__write_state_metadata(state)
 
@@ -78,6 +385,35 @@ class CrawlerNodeStorage(SQLiteForgetfulNodeStorage):
             self.db_conn.execute(f'REPLACE INTO {self.TEACHER_DB_NAME} VALUES (?,?)',
                                  (self.TEACHER_ID, teacher_checksum))
 
+    def store_last_processed_block(self, block_number: int, block_time: int):
+        with self.db_conn:
+            self.db_conn.execute(f'REPLACE INTO {self.LAST_BLOCK_DB_NAME} VALUES (?,?,?)',
+                                 (self.LAST_BLOCK_ID, block_number, block_time))
+
+    def get_last_processed_block(self) -> Optional[Tuple[int, int]]:
+        """Number and time of the block last processed by the crawler, if any"""
+        return self.db_conn.execute(f"SELECT block_number, block_time FROM {self.LAST_BLOCK_DB_NAME} "
+                                    f"WHERE id = ?", (self.LAST_BLOCK_ID, )).fetchone()
+
+    def get_last_node_event_id(self) -> Optional[int]:
+        """Id of the last change to the known nodes, as every change is logged as an event"""
+        return self.db_conn.execute(f"SELECT MAX(id) FROM {self.NODE_EVENTS_DB_NAME}").fetchone()[0]
+
+    def get_current_teacher(self) -> Optional[str]:
+        teacher = self.db_conn.execute(f"SELECT checksum_address FROM {self.TEACHER_DB_NAME} "
+                                       f"WHERE id = ?", (self.TEACHER_ID, )).fetchone()
+        return teacher[0] if teacher else None
+
+    def read_known_nodes(self) -> Tuple[List[str], List[tuple]]:
+        """Column names and rows of the node table, sorted by staker address"""
+        result = self.db_conn.execute(f"SELECT * FROM {self.NODE_DB_NAME} ORDER BY staker_address")
+        return [description[0] for description in result.description], result.fetchall()
+
+    def store_staker_table(self, staker_table: StakerTable):
+        with self.db_conn:
+            self.db_conn.execute(f'REPLACE INTO {self.STAKER_TABLE_DB_NAME} VALUES (?,?)',
+                                 (self.STAKER_TABLE_ID, staker_table.to_bytes()))
+
 
 class Crawler(Learner):
     """
@@ -90,6 +426,8 @@ class Crawler(Learner):
     _ROUNDS_WITHOUT_NODES_AFTER_WHICH_TO_SLOW_DOWN = 25
 
     DEFAULT_REFRESH_RATE = 60  # seconds
+    DEFAULT_PROBE_RATE = 60  # seconds
+    LOST_NODE_AGE = timedelta(days=1)  # nodes not seen for longer are recorded as lost
 
     # InfluxDB Line Protocol Format (note the spaces, commas):
     # +-----------+--------+-+---------+-+---------+
@@ -105,24 +443,65 @@ class Crawler(Learner):
                                       'current_period={current_period}i,' \
                                       'last_confirmed_period={last_confirmed_period}i ' \
                                   '{timestamp}'
+
+    # network wide aggregates of each cycle - one point instead of one per staker
+    NETWORK_SUMMARY_MEASUREMENT = 'network_summary'
+    NETWORK_SUMMARY_LINE_PROTOCOL = '{measurement} ' \
+                                        'total_locked={total_locked},' \
+                                        'total_staked={total_staked},' \
+                                        'num_stakers={num_stakers}i,' \
+                                        'confirmed={confirmed}i,' \
+                                        'pending={pending}i,' \
+                                        'inactive={inactive}i,' \
+                                        'headless={headless}i,' \
+                                        'current_period={current_period}i ' \
+                                    '{timestamp}'
+    NETWORK_SUMMARY_FIELDS = ('total_locked', 'total_staked', 'num_stakers', 'confirmed',
+                              'pending', 'inactive', 'headless', 'current_period')
+
+    # learning rounds from several teachers at once
+    NODE_DISCOVERY_MEASUREMENT = 'node_discovery'
+    NODE_DISCOVERY_LINE_PROTOCOL = '{measurement} ' \
+                                       'teachers={teachers}i,' \
+                                       'responses={responses}i,' \
+                                       'new_nodes={new_nodes}i,' \
+                                       'known_nodes={known_nodes}i,' \
+                                       'duration={duration},' \
+                                       'discovery_rate={discovery_rate} ' \
+                                   '{timestamp}'
+
     BLOCKCHAIN_DB_NAME = 'network'
 
-    BLOCKCHAIN_DB_RETENTION_POLICY_NAME = 'network_info_retention'
-    BLOCKCHAIN_DB_RETENTION_POLICY_PERIOD = '5w'  # 5 weeks of data
-    BLOCKCHAIN_DB_RETENTION_POLICY_REPLICATION = '1'
+    # Measurements kept at coarser resolutions once the raw data expires (where supported by the storage):
+    # (rollup name suffix, measurement, fields, tag to group by)
+    BLOCKCHAIN_DB_ROLLUP_FIELDS = ('worker_address', 'start_date', 'end_date', 'stake',
+                                   'locked_stake', 'current_period', 'last_confirmed_period')
+    BLOCKCHAIN_DB_ROLLUPS = (('', BLOCKCHAIN_DB_MEASUREMENT, BLOCKCHAIN_DB_ROLLUP_FIELDS, 'staker_address'),
+                             ('_summary', NETWORK_SUMMARY_MEASUREMENT, NETWORK_SUMMARY_FIELDS, None))
 
     def __init__(self,
                  registry,
                  blockchain_db_host: str,
                  blockchain_db_port: int,
                  node_storage_filepath: str = CrawlerNodeStorage.DEFAULT_DB_FILEPATH,
+                 blockchain_db_filepath: str = None,
                  refresh_rate=DEFAULT_REFRESH_RATE,
+                 probe_rate=DEFAULT_PROBE_RATE,
+                 prober: NodeProber = None,
+                 node_verifier: NodeVerifier = None,
+                 teacher_scheduler: TeacherScheduler = None,
+                 max_hydrated_nodes: int = None,
+                 snapshot_filepath: str = None,
                  restart_on_error=True,
+                 warm_start=False,
                  *args, **kwargs):
 
         self.registry = registry
         self.federated_only = False
-        node_storage = CrawlerNodeStorage(storage_filepath=node_storage_filepath)
+        # with a maximum of full nodes kept in memory, other known nodes are only stored in the db
+        node_storage = CrawlerNodeStorage(storage_filepath=node_storage_filepath,
+                                          warm_start=warm_start,
+                                          keep_nodes_in_memory=max_hydrated_nodes is None)
 
         class MonitoringTracker(FleetStateTracker):
             def record_fleet_state(self, *args, **kwargs):
@@ -131,14 +510,26 @@ class Crawler(Learner):
                     _, new_state = new_state_or_none
                     node_storage.store_state_metadata(new_state)
 
-        self.tracker_class = MonitoringTracker
+            def forget(self, checksum_address: str):
+                self._nodes.pop(checksum_address, None)
+
+        class BoundedMonitoringTracker(MonitoringTracker, BoundedFleetStateTracker):
+            def __init__(self):
+                super().__init__(node_storage=node_storage, max_hydrated_nodes=max_hydrated_nodes)
+
+            def forget(self, checksum_address: str):
+                BoundedFleetStateTracker.forget(self, checksum_address)
+
+        self.tracker_class = MonitoringTracker if max_hydrated_nodes is None else BoundedMonitoringTracker
 
         super().__init__(save_metadata=True, node_storage=node_storage, *args, **kwargs)
         self.log = Logger(self.__class__.__name__)
         self.log.info(f"Storing node metadata in DB: {node_storage.db_filepath}")
-        self.log.info(f"Storing blockchain metadata in DB: {blockchain_db_host}:{blockchain_db_port}")
+        self.log.info(f"Storing blockchain metadata in DB: "
+                      f"{blockchain_db_filepath or f'{blockchain_db_host}:{blockchain_db_port}'}")
 
         self._refresh_rate = refresh_rate
+        self._probe_rate = probe_rate  # falsy to disable probing
         self._restart_on_error = restart_on_error
 
         # Agency
@@ -146,57 +537,379 @@ class Crawler(Learner):
 
         # Crawler Tasks
         self._nodes_contract_info_learning_task = task.LoopingCall(self._learn_about_nodes_contract_info)
+        self._nodes_probing_task = task.LoopingCall(self._probe_nodes)
+
+        # probes of a round are spread over half the interval between rounds
+        self._prober = prober or NodeProber(spread=probe_rate / 2 if probe_rate else 0)
+
+        # nodes learnt about are verified on the reactor thread, unless by the pool of a node verifier
+        self._node_verifier = node_verifier
+
+        # each round learns from the current teacher, unless from the teachers chosen by a teacher scheduler
+        self._teacher_scheduler = teacher_scheduler
 
-        # initialize InfluxDB
+        # initialize time-series storage (InfluxDB, or embedded SQLite if a filepath is provided)
         self._db_host = blockchain_db_host
         self._db_port = blockchain_db_port
+        self._db_filepath = blockchain_db_filepath
         self._blockchain_db_client = None
 
-    def _ensure_blockchain_db_exists(self):
-        try:
-            db_list = self._blockchain_db_client.get_list_database()
-        except requests.exceptions.ConnectionError:
-            raise ConnectionError(f"No connection to InfluxDB at {self._db_host}:{self._db_port}")
-        found_db = (list(filter(lambda db: db['name'] == self.BLOCKCHAIN_DB_NAME, db_list)))
-        if len(found_db) == 0:
-            # db not previously created
-            self.log.info(f'Database {self.BLOCKCHAIN_DB_NAME} not found, creating it')
-            self._blockchain_db_client.create_database(self.BLOCKCHAIN_DB_NAME)
-            # TODO: review defaults for retention policy
-            self._blockchain_db_client.create_retention_policy(name=self.BLOCKCHAIN_DB_RETENTION_POLICY_NAME,
-                                                               duration=self.BLOCKCHAIN_DB_RETENTION_POLICY_PERIOD,
-                                                               replication=self.BLOCKCHAIN_DB_RETENTION_POLICY_REPLICATION,
-                                                               database=self.BLOCKCHAIN_DB_NAME,
-                                                               default=True)
+        # blockchain information of the known stakers, kept in columns from one cycle to the next
+        self._staker_table = StakerTable()
+
+        # snapshot of the known nodes, teacher and stakers for the dashboard, published when they change
+        self._snapshot_filepath = snapshot_filepath
+        self._published_snapshot_fingerprint = None
+        self._snapshot_published = None  # time.monotonic() of the last publication
+        if snapshot_filepath is not None and not warm_start and os.path.exists(snapshot_filepath):
+            os.remove(snapshot_filepath)  # of the previous run, as the rest of its data
+
+        # on a warm start, nodes known by the previous run are known right away, and verified in the background
+        # a batch at a time - at most as many nodes as kept in memory by the known nodes, if bounded
+        self._restored_nodes_batch_size = max_hydrated_nodes or BoundedFleetStateTracker.DEFAULT_MAX_HYDRATED_NODES
+        self._verifying_restored_nodes = False
+        self._unverified_nodes = self._restore_known_nodes() if warm_start else []
+
+    def _restore_known_nodes(self) -> List[str]:
+        """
+        Remember the nodes stored by the previous run, as streamed from the node storage (so only the full nodes
+        kept by the known nodes are in memory); returns the checksum addresses of the restored nodes
+        """
+        restored_addresses = []
+        for node in self.node_storage.restore_nodes():
+            if node.checksum_address not in self.known_nodes:
+                self.known_nodes[node.checksum_address] = node
+                restored_addresses.append(node.checksum_address)
+        if restored_addresses:
+            self.known_nodes.record_fleet_state()
+        last_block = self.node_storage.get_last_processed_block()
+        self.log.info(f"Restored {len(restored_addresses)} known nodes"
+                      f"{f'; last processed block {last_block[0]}' if last_block else ''}")
+        return restored_addresses
+
+    def _forget_nodes(self, nodes: List):
+        forgotten = set()
+        for node in nodes:
+            if node.checksum_address not in self.known_nodes or \
+                    self.known_nodes[node.checksum_address].timestamp > node.timestamp:
+                continue  # since replaced by a newer version of the node
+            self.log.warn(f"Forgetting invalid node {node.checksum_address}")
+            self.known_nodes.forget(node.checksum_address)
+            self.node_storage.remove(checksum_address=node.checksum_address)
+            if self._teacher_scheduler is not None:
+                self._teacher_scheduler.forget(node.checksum_address)
+            forgotten.add(node.checksum_address)
+        if forgotten:
+            # not learnt from either
+            self.teacher_nodes = deque(teacher for teacher in self.teacher_nodes
+                                       if teacher.checksum_address not in forgotten)
+            if self._current_teacher_node is not None and self._current_teacher_node.checksum_address in forgotten:
+                self._current_teacher_node = None
+        if nodes:
+            self.known_nodes.record_fleet_state()
+
+    def _verify_restored_nodes(self, *args):
+        """Verify the next batch of restored nodes, then the batch after it - until all of them are verified"""
+        batch_size = self._restored_nodes_batch_size
+        batch, self._unverified_nodes = self._unverified_nodes[:batch_size], self._unverified_nodes[batch_size:]
+        if not batch:
+            self._verifying_restored_nodes = False
+            return
+        self._verifying_restored_nodes = True
+
+        # full nodes of the batch, hydrated again if evicted since restored - unless forgotten meanwhile
+        nodes = [full_node(self.known_nodes[checksum_address]) for checksum_address in batch
+                 if checksum_address in self.known_nodes]
+
+        # as new nodes are - in the background, by the pool of the node verifier if any
+        verifying_deferred = self._verify_new_nodes(nodes)
+        verifying_deferred.addCallback(self._forget_invalid_nodes, nodes=nodes)
+        verifying_deferred.addErrback(self._handle_verification_errors)
+        verifying_deferred.addCallback(self._verify_restored_nodes)
+
+    def _forget_invalid_nodes(self, failure_reasons: List[Optional[str]], nodes: List):
+        # nodes that can't be reached right now are verified when learnt about again
+        self._forget_nodes([node for node, failure_reason in zip(nodes, failure_reasons)
+                            if failure_reason is not None and not is_unreachable(failure_reason)])
+
+    def keep_learning_about_nodes(self):
+        # rounds verifying nodes in the background return a deferred, so the next round waits for them
+        if self._teacher_scheduler is not None:
+            round_result = self._learn_from_teachers()
         else:
-            self.log.info(f'Database {self.BLOCKCHAIN_DB_NAME} already exists, no need to create it')
+            round_result = self.learn_from_teacher_node(eager=False)
+
+        # the snapshot is published once the nodes of the round are remembered
+        if isinstance(round_result, defer.Deferred):
+            return round_result.addCallback(self._publish_snapshot)
+        return self._publish_snapshot(round_result)
 
-    def learn_from_teacher_node(self, *args, **kwargs):
+    def _publish_snapshot(self, round_result=None):
+        """
+        Publish the snapshot for the dashboard if the known nodes, teacher or stakers changed since the last one,
+        or if it is due to be republished (see `DashboardSnapshot.REPUBLISH_INTERVAL`)
+        """
+        if self._snapshot_filepath is None:
+            return round_result
+
+        teacher_checksum = self.node_storage.get_current_teacher()
+        fingerprint = (self.node_storage.get_last_node_event_id(), teacher_checksum, self._staker_table.block_time)
+        republish_due = self._snapshot_published is None or \
+            time.monotonic() - self._snapshot_published >= DashboardSnapshot.REPUBLISH_INTERVAL.total_seconds()
+        if fingerprint != self._published_snapshot_fingerprint or republish_due:
+            node_columns, node_rows = self.node_storage.read_known_nodes()
+            snapshot = DashboardSnapshot.serialize(node_columns=node_columns,
+                                                   node_rows=node_rows,
+                                                   teacher_checksum=teacher_checksum,
+                                                   staker_table=self._staker_table)
+            publish_snapshot(self._snapshot_filepath, snapshot)
+            self._published_snapshot_fingerprint = fingerprint
+            self._snapshot_published = time.monotonic()
+        return round_result
+
+    def learn_from_teacher_node(self, eager=True):
         try:
             current_teacher = self.current_teacher_node(cycle=False)
         except self.NotEnoughTeachers as e:
             self.log.warn("Can't learn right now: {}".format(e.args[0]))
             return
 
-        new_nodes = super().learn_from_teacher_node(*args, **kwargs)
+        if self._node_verifier is not None and not eager:
+            new_nodes = self._learn_from_teacher_node_in_pool()
+        else:
+            new_nodes = super().learn_from_teacher_node(eager=eager)
 
         # update metadata of teacher - not just in memory but in the underlying storage system (db in this case)
         self.node_storage.store_node_metadata(current_teacher)
         self.node_storage.store_current_teacher(current_teacher.checksum_address)
+        self.node_storage.record_lost_nodes(seen_before=datetime.utcnow() - self.LOST_NODE_AGE)
 
         return new_nodes
 
+    def _fetch_teacher_nodes(self, teacher, fleet_checksum: str, nodes_i_need: Set[str]) -> Optional[Tuple]:
+        """
+        Request the nodes known by the teacher, as `Learner.learn_from_teacher_node` does (blocking): the checksum and
+        update time of the teacher's fleet state, and its nodes (None if its fleet state matches ours); None if the
+        teacher knows no nodes
+        """
+        response = self.network_middleware.get_nodes_via_rest(node=teacher,
+                                                              nodes_i_need=nodes_i_need,
+                                                              announce_nodes=None,
+                                                              fleet_checksum=fleet_checksum)
+        if response.status_code == 204 and response.content == b"":
+            return None
+        elif response.status_code not in (200, 204):
+            raise self.UnresponsiveTeacher(f"Bad response from teacher {teacher}: {response} - {response.content}")
+
+        try:
+            signature, node_payload = signature_splitter(response.content, return_remainder=True)
+        except BytestringSplittingError:
+            raise self.UnresponsiveTeacher(f"No signature prepended to Teacher {teacher} payload: {response.content}")
+        self.verify_from(teacher, node_payload, signature=signature)
+
+        fleet_state_checksum_bytes, fleet_state_updated_bytes, node_payload = FleetStateTracker.snapshot_splitter(
+            node_payload,
+            return_remainder=True)
+        checksum = fleet_state_checksum_bytes.hex()
+        updated = MayaDT(int.from_bytes(fleet_state_updated_bytes, byteorder="big"))
+        if constant_or_bytes(node_payload) is FLEET_STATES_MATCH:
+            return checksum, updated, None
+
+        from nucypher.characters.lawful import Ursula
+        node_list = Ursula.batch_from_bytes(node_payload, registry=self.registry, federated_only=self.federated_only)
+        return checksum, updated, node_list
+
+    def _update_teacher(self, teacher, fleet_state: Tuple) -> List:
+        """Update the snapshot of the teacher's fleet state, returning the nodes it knows about"""
+        teacher.last_seen = maya.now()
+        checksum, updated, node_list = fleet_state
+        teacher.update_snapshot(checksum=checksum,
+                                updated=updated,
+                                number_of_known_nodes=len(self.known_nodes) if node_list is None else len(node_list))
+        if isinstance(self.known_nodes, BoundedFleetStateTracker) and self.known_nodes.update_node(teacher):
+            # evicted while requested, so written through to the node storage right away
+            self.node_storage.store_node_metadata(teacher)
+        return node_list or []
+
+    def _learn_from_teacher_node_in_pool(self):
+        """
+        Learn from the teacher as `Learner.learn_from_teacher_node` (not eager) does, but verify the new nodes
+        in the pool of the node verifier; returns a deferred of the new nodes, remembered once verified
+        """
+        self._learning_round += 1
+        current_teacher = self.current_teacher_node()
+        try:
+            fleet_state = self._fetch_teacher_nodes(current_teacher,
+                                                    fleet_checksum=self.known_nodes.checksum,
+                                                    nodes_i_need=self._node_ids_to_learn_about_immediately)
+        except (*NodeSeemsToBeDown, self.UnresponsiveTeacher) as e:
+            self.log.info(f"Bad Response from teacher: {current_teacher}:{e}.")
+            return
+        finally:
+            self.cycle_teacher_node()
+
+        if fleet_state is None:
+            return NO_KNOWN_NODES
+        node_list = self._update_teacher(current_teacher, fleet_state)
+        if fleet_state[2] is None:
+            return FLEET_STATES_MATCH
+
+        nodes = [node for node in node_list if self._is_new_node(node)]
+        verifying_deferred = self._verify_new_nodes(nodes)
+        verifying_deferred.addCallback(self._remember_verified_nodes, nodes=nodes, verification_start=time.time())
+        verifying_deferred.addCallback(self._log_learning_round,
+                                       teacher=current_teacher,
+                                       num_teacher_nodes=len(node_list))
+        return verifying_deferred
+
+    def _learn_from_teachers(self):
+        """
+        A round of learning from several teachers, chosen by the teacher scheduler: the teachers are requested
+        concurrently (in threads), and the new nodes they know about are verified and remembered together;
+        returns a deferred of the new nodes
+        """
+        self._learning_round += 1
+        teachers = {node.checksum_address: node for node in self.known_nodes}
+        hosts = {checksum_address: split_rest_url(node.rest_url())[0] for checksum_address, node in teachers.items()}
+        # full nodes, requested in threads
+        selected_teachers = [full_node(teachers[checksum_address])
+                             for checksum_address in self._teacher_scheduler.select(hosts)]
+        if not selected_teachers:
+            self.log.info("No teachers to learn from right now")
+            return
+
+        fleet_checksum = self.known_nodes.checksum
+        nodes_i_need = set(self._node_ids_to_learn_about_immediately)
+
+        def fetch_teacher_nodes(teacher) -> Tuple[float, Optional[Tuple]]:
+            request_start = time.time()
+            fleet_state = self._fetch_teacher_nodes(teacher, fleet_checksum=fleet_checksum, nodes_i_need=nodes_i_need)
+            return time.time() - request_start, fleet_state
+
+        round_start = time.time()
+        requests = [threads.deferToThread(fetch_teacher_nodes, teacher) for teacher in selected_teachers]
+        round_deferred = defer.DeferredList(requests, consumeErrors=True)
+        round_deferred.addCallback(self._verify_teacher_nodes, teachers=selected_teachers, hosts=hosts)
+        round_deferred.addCallback(self._record_learning_round, num_teachers=len(selected_teachers),
+                                   round_start=round_start)
+        return round_deferred
+
+    def _verify_teacher_nodes(self, results: List[Tuple[bool, Any]], teachers: List, hosts: Dict[str, str]):
+        """Score the teachers by their responses, then verify and remember the new nodes they know about"""
+        new_nodes = dict()
+        responding_teachers = []
+        for teacher, (success, result) in zip(teachers, results):
+            host = hosts[teacher.checksum_address]
+            if not success:
+                self._teacher_scheduler.record_failure(teacher.checksum_address, host)
+                self.log.info(f"Bad Response from teacher: {teacher}:{result.getErrorMessage()}.")
+                continue
+
+            latency, fleet_state = result
+            node_list = self._update_teacher(teacher, fleet_state) if fleet_state is not None else []
+            teacher_new_nodes = [node for node in node_list if self._is_new_node(node)]
+            self._teacher_scheduler.record_response(teacher.checksum_address, host,
+                                                    latency=latency, new_nodes=len(teacher_new_nodes))
+            for node in teacher_new_nodes:
+                # the most recent version of nodes known by several teachers
+                other_version = new_nodes.get(node.checksum_address)
+                if other_version is None or node.timestamp > other_version.timestamp:
+                    new_nodes[node.checksum_address] = node
+            self.node_storage.store_node_metadata(teacher)
+            responding_teachers.append(teacher)
+
+        if responding_teachers:
+            self.node_storage.store_current_teacher(responding_teachers[0].checksum_address)  # the best scored
+        self.node_storage.record_lost_nodes(seen_before=datetime.utcnow() - self.LOST_NODE_AGE)
+
+        nodes = list(new_nodes.values())
+        verifying_deferred = self._verify_new_nodes(nodes)
+        verifying_deferred.addCallback(self._remember_verified_nodes, nodes=nodes, verification_start=time.time())
+        verifying_deferred.addCallback(lambda remembered_nodes: (remembered_nodes, len(responding_teachers)))
+        return verifying_deferred
+
+    def _is_new_node(self, node) -> bool:
+        if not set(self.learning_domains).intersection(set(node.serving_domains)):
+            return False  # not serving any of our domains
+        try:
+            already_known_node = self.known_nodes[node.checksum_address]
+        except KeyError:
+            return True
+        return node.timestamp > already_known_node.timestamp  # newer version of a known node
+
+    def _verify_new_nodes(self, nodes: List):
+        """Verify the nodes in the background; returns a deferred of why each node wasn't verified (None if it was)"""
+        for node in nodes:
+            node.certificate_filepath = self.node_storage.store_node_certificate(certificate=node.certificate)
+        if self._node_verifier is not None:
+            return threads.deferToThread(self._node_verifier.run,
+                                         [(bytes(node), node.certificate_filepath) for node in nodes])
+        return threads.deferToThread(lambda: [check_node(node, self.network_middleware, self.registry,
+                                                         certificate_filepath=node.certificate_filepath)
+                                              for node in nodes])
+
+    def _remember_verified_nodes(self,
+                                 failure_reasons: List[Optional[str]],
+                                 nodes: List,
+                                 verification_start: float) -> List:
+        duration = max(time.time() - verification_start, 0.001)
+        if nodes:
+            self.log.info(f"Verified {len(nodes)} nodes in {duration:.2f}s ({len(nodes) / duration:.0f} nodes/s)")
+
+        new_nodes = []
+        for node, failure_reason in zip(nodes, failure_reasons):
+            if failure_reason is not None:
+                self.log.warn(f"Verification Failed - {node}: {failure_reason}")
+                continue
+            # verified in the background, so not verified again on the reactor thread when remembered
+            node.verified_interface = node.verified_stamp = node.verified_node = True
+            if self.remember_node(node, record_fleet_state=False):
+                new_nodes.append(node)
+
+        self._adjust_learning(new_nodes)
+        if new_nodes:
+            self.known_nodes.record_fleet_state()
+        return new_nodes
+
+    def _log_learning_round(self, new_nodes: List, teacher, num_teacher_nodes: int) -> List:
+        self.log.info(f"Learning round {self._learning_round}.  Teacher: {teacher} knew about {num_teacher_nodes} "
+                      f"nodes, {len(new_nodes)} were new.")
+        return new_nodes
+
+    def _record_learning_round(self, result: Tuple[List, int], num_teachers: int, round_start: float) -> List:
+        new_nodes, num_responses = result
+        duration = max(time.time() - round_start, 0.001)
+        discovery_rate = len(new_nodes) / duration
+        self.log.info(f"Learning round {self._learning_round}.  {num_responses}/{num_teachers} teachers responded, "
+                      f"{len(new_nodes)} new nodes ({discovery_rate:.1f} nodes/s).")
+        if self._blockchain_db_client is not None:
+            timestamp = int(time.time())
+            point = self.NODE_DISCOVERY_LINE_PROTOCOL.format(measurement=self.NODE_DISCOVERY_MEASUREMENT,
+                                                             teachers=num_teachers,
+                                                             responses=num_responses,
+                                                             new_nodes=len(new_nodes),
+                                                             known_nodes=len(self.known_nodes),
+                                                             duration=float(duration),
+                                                             discovery_rate=float(discovery_rate),
+                                                             timestamp=timestamp)
+            if not self._blockchain_db_client.write_points([point]):
+                self.log.warn(f'Unable to write node discovery to database {self.BLOCKCHAIN_DB_NAME} at '
+                              f'{MayaDT(epoch=timestamp)}')
+        return new_nodes
+
     def _learn_about_nodes_contract_info(self):
         agent = self.staking_agent
 
-        block_time = agent.blockchain.client.w3.eth.getBlock('latest').timestamp  # precision in seconds
+        block = agent.blockchain.client.w3.eth.getBlock('latest')
+        block_time = block.timestamp  # precision in seconds
         current_period = agent.get_current_period()
 
-        nodes_dict = self.known_nodes.abridged_nodes_dict()
-        self.log.info(f'Processing {len(nodes_dict)} nodes at '
+        staker_addresses = list(self.known_nodes.addresses())
+        self.log.info(f'Processing {len(staker_addresses)} nodes at '
                       f'{MayaDT(epoch=block_time)} | Period {current_period}')
-        data = []
-        for staker_address in nodes_dict:
+        stakers = self._staker_table
+        stakers.start_cycle(current_period=current_period, block_time=block_time, staker_addresses=staker_addresses)
+        for staker_address in staker_addresses:
             worker = agent.get_worker_from_staker(staker_address)
 
             stake = agent.owned_tokens(staker_address)
@@ -216,29 +929,52 @@ class Crawler(Learner):
 
             last_confirmed_period = agent.get_last_active_period(staker_address)
 
-            # TODO: do we need to worry about how much information is in memory if number of nodes is
-            #  large i.e. should I check for size of data and write within loop if too big
-            data.append(self.BLOCKCHAIN_DB_LINE_PROTOCOL.format(
-                measurement=self.BLOCKCHAIN_DB_MEASUREMENT,
-                staker_address=staker_address,
-                worker_address=worker,
-                start_date=start_date,
-                end_date=end_date,
-                stake=staked_nu_tokens,
-                locked_stake=locked_nu_tokens,
-                current_period=current_period,
-                last_confirmed_period=last_confirmed_period,
-                timestamp=block_time
-            ))
-
-        if not self._blockchain_db_client.write_points(data,
-                                                       database=self.BLOCKCHAIN_DB_NAME,
-                                                       time_precision='s',
-                                                       batch_size=10000,
-                                                       protocol='line'):
+            stakers.update(staker_address=staker_address,
+                           worker_address=worker,
+                           start_date=start_date,
+                           end_date=end_date,
+                           stake=staked_nu_tokens,
+                           locked_stake=locked_nu_tokens,
+                           last_confirmed_period=last_confirmed_period)
+
+        # points of the stakers and their network aggregates, from the columns of the staker table
+        data = stakers.to_line_protocol(self.BLOCKCHAIN_DB_LINE_PROTOCOL,
+                                        measurement=self.BLOCKCHAIN_DB_MEASUREMENT,
+                                        current_period=current_period,
+                                        timestamp=block_time)
+        data.append(self.NETWORK_SUMMARY_LINE_PROTOCOL.format(measurement=self.NETWORK_SUMMARY_MEASUREMENT,
+                                                              current_period=current_period,
+                                                              timestamp=block_time,
+                                                              **stakers.summary()))
+
+        if not self._blockchain_db_client.write_points(data):
             # TODO: what do we do here
             self.log.warn(f'Unable to write to database {self.BLOCKCHAIN_DB_NAME} at '
                           f'{MayaDT(epoch=block_time)} | Period {current_period}')
+        else:
+            self.node_storage.store_last_processed_block(block_number=block.number, block_time=block_time)
+            self.node_storage.store_staker_table(stakers)
+            self._publish_snapshot()
+
+    def _probe_nodes(self):
+        nodes = {staker_address: node_details['rest_url']
+                 for staker_address, node_details in self.known_nodes.abridged_nodes_dict().items()}
+        self.log.info(f'Probing {len(nodes)} nodes')
+        timestamp = int(time.time())
+
+        # the prober runs its own event loop, in a thread so as not to block the reactor
+        probing_deferred = threads.deferToThread(self._prober.run, nodes)
+        probing_deferred.addCallback(self._write_probe_results, timestamp=timestamp)
+        return probing_deferred  # the next round waits for the completion of this one
+
+    def _write_probe_results(self, results: dict, timestamp: int):
+        if self._blockchain_db_client is None:
+            return  # stopped while probing
+        reachable = len([result for result in results.values() if result['reachable']])
+        self.log.info(f'{reachable}/{len(results)} nodes reachable')
+        if results and not self._blockchain_db_client.write_points(NodeProber.to_line_protocol(results, timestamp)):
+            self.log.warn(f'Unable to write node reachability to database {self.BLOCKCHAIN_DB_NAME} at '
+                          f'{MayaDT(epoch=timestamp)}')
 
     def _handle_errors(self, *args, **kwargs):
         failure = args[0]
@@ -250,23 +986,50 @@ class Crawler(Learner):
         else:
             self.log.critical(f'Unhandled error: {cleaned_traceback}')
 
+    def _handle_probing_errors(self, *args, **kwargs):
+        failure = args[0]
+        cleaned_traceback = failure.getTraceback().replace('{', '').replace('}', '')
+        if self._restart_on_error and self.is_running:
+            self.log.warn(f'Unhandled error while probing nodes: {cleaned_traceback}. Attempting to restart probing')
+            self._start_probing()
+        else:
+            self.log.critical(f'Unhandled error while probing nodes: {cleaned_traceback}')
+
+    def _handle_verification_errors(self, *args, **kwargs):
+        failure = args[0]
+        cleaned_traceback = failure.getTraceback().replace('{', '').replace('}', '')
+        self.log.warn(f'Unhandled error while verifying restored nodes: {cleaned_traceback}')
+
+    def _start_probing(self):
+        probing_deferred = self._nodes_probing_task.start(interval=self._probe_rate, now=False)
+        probing_deferred.addErrback(self._handle_probing_errors)
+
     def start(self):
         """Start the crawler if not already running"""
         if not self.is_running:
             self.log.info('Starting Monitor Crawler')
             if self._blockchain_db_client is None:
-                self._blockchain_db_client = InfluxDBClient(host=self._db_host,
-                                                            port=self._db_port,
-                                                            database=self.BLOCKCHAIN_DB_NAME)
-                self._ensure_blockchain_db_exists()
+                self._blockchain_db_client = get_time_series_storage(database=self.BLOCKCHAIN_DB_NAME,
+                                                                     host=self._db_host,
+                                                                     port=self._db_port,
+                                                                     db_filepath=self._db_filepath)
+                self._blockchain_db_client.ensure_exists(rollups=self.BLOCKCHAIN_DB_ROLLUPS)
 
-            # start tasks
+            # start tasks - right away if the last processed block is older than a refresh (i.e. on a warm start)
+            last_block = self.node_storage.get_last_processed_block()
+            overdue = last_block is not None and time.time() - last_block[1] >= self._refresh_rate
             node_learner_deferred = self._nodes_contract_info_learning_task.start(interval=self._refresh_rate,
-                                                                                  now=False)
+                                                                                  now=overdue)
 
             # hookup error callbacks
             node_learner_deferred.addErrback(self._handle_errors)
 
+            if self._probe_rate:
+                self._start_probing()
+
+            if self._unverified_nodes and not self._verifying_restored_nodes:
+                self._verify_restored_nodes()
+
             self.start_learning_loop(now=False)
 
     def stop(self):
@@ -276,11 +1039,16 @@ class Crawler(Learner):
 
             # stop tasks
             self._nodes_contract_info_learning_task.stop()
+            if self._nodes_probing_task.running:
+                self._nodes_probing_task.stop()
 
             if self._blockchain_db_client is not None:
                 self._blockchain_db_client.close()
                 self._blockchain_db_client = None
 
+            if self._node_verifier is not None:
+                self._node_verifier.close()
+
             # TODO: should I delete the NodeStorage to close the sqlite db connection here?
 
     @property
@@ -1,10 +1,15 @@
+import json
+import queue
+import time
 from datetime import datetime, timedelta
+from threading import Lock, Thread
+from typing import Dict
 
-import dash_html_components as html
-from dash import Dash
-from dash.dependencies import Output, Input
-from flask import Flask
-from maya import MayaDT
+from dash import Dash, callback_context
+from dash.dependencies import ClientsideFunction, Output, Input, State
+from dash.exceptions import PreventUpdate
+from eth_utils import is_address, to_checksum_address
+from flask import Flask, Response, jsonify, request, stream_with_context
 from twisted.logger import Logger
 
 from monitor import layout, components, settings
@@ -12,10 +17,15 @@ from monitor.charts import (
     future_locked_tokens_bar_chart,
     historical_locked_tokens_bar_chart,
     stakers_breakdown_pie_chart,
-    historical_known_nodes_line_chart
+    historical_known_nodes_line_chart,
+    staker_confirmations_chart,
+    staker_locked_stake_line_chart
 )
 from monitor.crawler import Crawler, CrawlerNodeStorage
 from monitor.db import CrawlerBlockchainDBClient, CrawlerNodeMetadataDBClient
+from monitor.events import ChangeDetector, UpdateBroker
+from monitor.timeseries import EPOCH
+from monitor.uptime import NodeStatistics
 from nucypher.blockchain.eth.agents import StakingEscrowAgent, ContractAgency
 from nucypher.blockchain.eth.token import NU
 
@@ -25,6 +35,9 @@ class Dashboard:
     Dash Status application for monitoring a swarm of nucypher Ursula nodes.
     """
 
+    UPDATES_HEARTBEAT = 15  # seconds
+    NODE_EVENTS_PAGE_SIZE = 500  # maximum number of node events per request
+
     def __init__(self,
                  registry,
                  flask_server: Flask,
@@ -32,23 +45,185 @@ class Dashboard:
                  domain: str,
                  blockchain_db_host: str,
                  blockchain_db_port: int,
-                 node_storage_filepath: str = CrawlerNodeStorage.DEFAULT_DB_FILEPATH):
+                 node_storage_filepath: str = CrawlerNodeStorage.DEFAULT_DB_FILEPATH,
+                 blockchain_db_filepath: str = None,
+                 snapshot_filepath: str = None):
 
         self.log = Logger(self.__class__.__name__)
 
         # Database
-        self.node_metadata_db_client = CrawlerNodeMetadataDBClient(db_filepath=node_storage_filepath)
-        self.network_crawler_db_client = CrawlerBlockchainDBClient(host=blockchain_db_host,
-                                                                   port=blockchain_db_port,
-                                                                   database=Crawler.BLOCKCHAIN_DB_NAME)
+        # known nodes, teacher and stakers are read from the crawler's snapshot, if published there
+        self.node_metadata_db_client = CrawlerNodeMetadataDBClient(db_filepath=node_storage_filepath,
+                                                                   snapshot_filepath=snapshot_filepath)
+        self.network_crawler_db_client = CrawlerBlockchainDBClient(
+            host=blockchain_db_host,
+            port=blockchain_db_port,
+            database=Crawler.BLOCKCHAIN_DB_NAME,
+            cache_filepath=CrawlerBlockchainDBClient.DEFAULT_CACHE_FILEPATH,
+            db_filepath=blockchain_db_filepath)
 
         # Blockchain & Contracts
         self.registry = registry
         self.staking_agent = ContractAgency.get_agent(StakingEscrowAgent, registry=self.registry)
 
+        # Rolling uptime and latency of nodes, fed incrementally with the crawler's probe results - seeded with
+        # their history in the background, so that rendering doesn't wait for it
+        self.node_statistics = NodeStatistics()
+        self._node_statistics_lock = Lock()
+        self._node_statistics_lock.acquire()  # released once seeded
+        self._node_statistics_seeding = Thread(target=self._seed_node_statistics,
+                                               name=NodeStatistics.__name__,
+                                               daemon=True)
+        self._node_statistics_seeding.start()
+
+        # Most recently rendered content of each component: component id -> (render time, children)
+        self._rendered_components = dict()
+
+        # Push notifications of data changes to clients
+        self.update_broker = UpdateBroker()
+        update_sources = {'states': self.node_metadata_db_client.get_states_fingerprint,
+                          'nodes': self.node_metadata_db_client.get_nodes_fingerprint,
+                          'network': self._network_fingerprint,
+                          'period': self.staking_agent.get_current_period}
+        self.change_detector = ChangeDetector(sources=update_sources,
+                                              listeners=[self._invalidate_cached_components,
+                                                         self.update_broker.publish])
+        # started right away, so that rendered components are invalidated even before any client subscribes
+        self.change_detector.start()
+
         # Dash
         self.dash_app = self.make_dash_app(flask_server=flask_server, route_url=route_url, domain=domain)
 
+    def _network_fingerprint(self) -> tuple:
+        # stakers confirming activity within a period change the partition of the stakers - read from the crawler's
+        # staker table rather than by chain calls per staker, unless there is none yet
+        staker_table = self.node_metadata_db_client.get_staker_table()
+        if staker_table is not None:
+            partition = staker_table.partition()
+        else:
+            partition = tuple(len(stakers) for stakers in self.staking_agent.partition_stakers_by_activity())
+        return self.staking_agent.get_current_period(), self.staking_agent.get_global_locked_tokens(), partition
+
+    def _invalidate_cached_components(self, topic: str):
+        _button_id, component_ids = layout.UPDATE_TOPICS[topic]
+        for component_id in component_ids:
+            self._rendered_components.pop(component_id, None)
+
+    def stream_updates(self) -> Response:
+        """Server-sent event stream of update topics - the page refreshes only the components affected by a topic"""
+        try:
+            subscription = self.update_broker.subscribe()
+        except UpdateBroker.TooManySubscribers:
+            # client falls back to interval polling
+            return Response(status=503)
+        self.change_detector.start()  # unless running already
+
+        def event_stream():
+            try:
+                while True:
+                    try:
+                        topic = subscription.get(timeout=self.UPDATES_HEARTBEAT)
+                    except queue.Empty:
+                        yield ': heartbeat\n\n'  # keeps proxies from closing the connection; detects closed clients
+                        continue
+                    button_id, _component_ids = layout.UPDATE_TOPICS[topic]
+                    yield f'data: {json.dumps(dict(topic=topic, button=button_id))}\n\n'
+            finally:
+                self.update_broker.unsubscribe(subscription)
+
+        return Response(stream_with_context(event_stream()),
+                        mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+    def _seed_node_statistics(self):
+        try:
+            self._read_probe_results()
+        except Exception as e:
+            self.log.warn(f"Unable to seed node statistics: {e}")
+        finally:
+            self._node_statistics_lock.release()
+
+    def _read_probe_results(self):
+        # all of their history the first time, then from where observations may still be recorded late
+        range_end = datetime.utcnow()
+        resume_time = self.node_statistics.resume_time()
+        if resume_time is None:
+            range_begin = range_end - timedelta(seconds=NodeStatistics.longest_window())
+        else:
+            range_begin = EPOCH + timedelta(seconds=resume_time)
+        points = self.network_crawler_db_client.get_node_reachability(range_begin=range_begin, range_end=range_end)
+        self.node_statistics.add_probe_results(points)
+
+    def update_node_statistics(self) -> Dict[str, Dict]:
+        """
+        Feed probe results recorded since the previous update into the node statistics, and return them - as they are
+        while being seeded or updated already, rather than waiting
+        """
+        if self._node_statistics_lock.acquire(blocking=False):
+            try:
+                self._read_probe_results()
+            finally:
+                self._node_statistics_lock.release()
+        return self.node_statistics.get_statistics()
+
+    def node_statistics_json(self) -> Response:
+        """Rolling uptime (%) and latency percentiles (seconds) of each node"""
+        return jsonify(windows=list(NodeStatistics.WINDOWS), nodes=self.update_node_statistics())
+
+    def node_events_json(self) -> Response:
+        """Changes to the known nodes after the `cursor` query parameter, and the cursor to continue from"""
+        try:
+            cursor = int(request.args.get('cursor', 0))
+            limit = min(int(request.args.get('limit', self.NODE_EVENTS_PAGE_SIZE)), self.NODE_EVENTS_PAGE_SIZE)
+        except ValueError:
+            return Response(status=400)
+        events, next_cursor = self.node_metadata_db_client.get_node_events(cursor=cursor,
+                                                                           limit=limit,
+                                                                           staker_address=request.args.get('staker'))
+        return jsonify(events=events, cursor=next_cursor)
+
+    def cache_components(self, rendered: dict):
+        """
+        Remember rendered content for pre-filling the page of new visitors.
+        Returns the content itself - a single component, or a tuple for multi-output callbacks.
+        """
+        now = time.time()
+        for component_id, children in rendered.items():
+            self._rendered_components[component_id] = (now, children)
+
+        values = tuple(rendered.values())
+        return values[0] if len(values) == 1 else values
+
+    def get_cached_components(self) -> dict:
+        """Cached content of each component that is no older than the interval that refreshes it"""
+        now = time.time()
+        cached = dict()
+        for component_id, (rendered, children) in list(self._rendered_components.items()):
+            if now - rendered < layout.COMPONENT_REFRESH_RATES[component_id] / 1000:
+                cached[component_id] = children
+        return cached
+
+    @staticmethod
+    def get_route_staker(route_url: str, pathname: str):
+        """Staker address of a staker detail route; None for any other route"""
+        prefix = components.staker_url(route_url, staker_address='')
+        if not pathname or not pathname.startswith(prefix):
+            return None
+        staker_address = pathname[len(prefix):].strip('/')
+        return to_checksum_address(staker_address) if is_address(staker_address) else None
+
+    @staticmethod
+    def skip_if_prefilled(component_ids: list, prefilled: list):
+        """
+        Dash fires every callback when the page loads; a component that was already
+        rendered into the page doesn't need updating until one of its inputs changes.
+        """
+        # no input changed, i.e. nothing (or the placeholder '.') triggered the callback
+        triggered = callback_context.triggered
+        initial_load = not triggered or all(trigger['prop_id'] == '.' for trigger in triggered)
+        if initial_load and prefilled and all(component_id in prefilled for component_id in component_ids):
+            raise PreventUpdate
+
     def make_dash_app(monitor, flask_server: Flask, route_url: str, domain: str):
         dash_app = Dash(name=__name__,
                         server=flask_server,
@@ -56,76 +231,135 @@ class Dashboard:
                         url_base_pathname=route_url,
                         suppress_callback_exceptions=False)  # TODO: Set to True by default or make configurable
 
-        # Initial State
-        dash_app.title = settings.TITLE
-        dash_app.layout = layout.BODY
+        flask_server.add_url_rule(f'{route_url}updates', 'updates', monitor.stream_updates)
+        flask_server.add_url_rule(f'{route_url}node-statistics', 'node-statistics', monitor.node_statistics_json)
+        flask_server.add_url_rule(f'{route_url}node-events', 'node-events', monitor.node_events_json)
 
-        @dash_app.callback(Output('header', 'children'), [Input('url', 'pathname')])  # on page-load
-        def header(pathname):
-            return components.header()
+        # Initial State - built per request, pre-filled with the most recently rendered content
+        dash_app.title = settings.TITLE
+        dash_app.layout = lambda: layout.body(domain=domain, prefilled=monitor.get_cached_components())
 
         @dash_app.callback(Output('prev-states', 'children'),
-                           [Input('state-update-button', 'n_clicks'), Input('minute-interval', 'n_intervals')])
-        def state(n_clicks, n_intervals):
+                           [Input('state-update-button', 'n_clicks'), Input('fallback-interval', 'n_intervals')],
+                           [State('prefilled-components', 'data')])
+        def state(n_clicks, n_intervals, prefilled):
+            monitor.skip_if_prefilled(['prev-states'], prefilled)
             states_dict_list = monitor.node_metadata_db_client.get_previous_states_metadata()
-            return components.previous_states(states_dict_list=states_dict_list)
+            return monitor.cache_components({
+                'prev-states': components.previous_states(states_dict_list=states_dict_list)
+            })
 
         @dash_app.callback(Output('known-nodes', 'children'),
-                           [Input('node-update-button', 'n_clicks'), Input('half-minute-interval', 'n_intervals')])
-        def known_nodes(n_clicks, n_intervals):
+                           [Input('node-update-button', 'n_clicks'), Input('fallback-interval', 'n_intervals')],
+                           [State('prefilled-components', 'data')])
+        def known_nodes(n_clicks, n_intervals, prefilled):
+            monitor.skip_if_prefilled(['known-nodes'], prefilled)
             known_nodes_dict = monitor.node_metadata_db_client.get_known_nodes_metadata()
             teacher_checksum = monitor.node_metadata_db_client.get_current_teacher_checksum()
-            return components.known_nodes(nodes_dict=known_nodes_dict,
-                                          registry=monitor.registry,
-                                          teacher_checksum=teacher_checksum)
+            # recent history of all stakers in the table is read by a single query
+            stakers_history = monitor.network_crawler_db_client.get_stakers_history(
+                staker_addresses=list(known_nodes_dict),
+                range_length=f'{layout.NODE_HISTORY_PERIODS}d')
+            nodes_statistics = monitor.update_node_statistics()
+            # status of the stakers from the crawler's staker table, rather than chain calls per staker
+            staker_table = monitor.node_metadata_db_client.get_staker_table()
+            return monitor.cache_components({
+                'known-nodes': components.known_nodes(nodes_dict=known_nodes_dict,
+                                                      registry=monitor.registry,
+                                                      teacher_checksum=teacher_checksum,
+                                                      route_url=route_url,
+                                                      stakers_history=stakers_history,
+                                                      nodes_statistics=nodes_statistics,
+                                                      staker_table=staker_table)
+            })
 
-        @dash_app.callback(Output('active-stakers', 'children'), [Input('minute-interval', 'n_intervals')])
-        def active_stakers(n):
+        @dash_app.callback([Output('current-period', 'children'),
+                            Output('active-stakers', 'children'),
+                            Output('staked-tokens', 'children'),
+                            Output('staker-breakdown', 'children')],
+                           [Input('network-update-button', 'n_clicks'), Input('fallback-interval', 'n_intervals')],
+                           [State('prefilled-components', 'data')])
+        def network_stats(n_clicks, n_intervals, prefilled):
+            monitor.skip_if_prefilled(['current-period', 'active-stakers', 'staked-tokens', 'staker-breakdown'],
+                                      prefilled)
+
+            # single consistent snapshot of chain data for all stat panels
+            current_period = monitor.staking_agent.get_current_period()
             confirmed, pending, inactive = monitor.staking_agent.partition_stakers_by_activity()
-            total_stakers = len(confirmed) + len(pending) + len(inactive)
-            return html.Div([html.H4("Active Ursulas"), html.H5(f"{len(confirmed)}/{total_stakers}",
-                                                                id='active-ursulas-value')])
-
-        @dash_app.callback(Output('staker-breakdown', 'children'), [Input('minute-interval', 'n_intervals')])
-        def stakers_breakdown(n):
-            return stakers_breakdown_pie_chart(staking_agent=monitor.staking_agent)
-
-        @dash_app.callback(Output('current-period', 'children'), [Input('minute-interval', 'n_intervals')])
-        def current_period(pathname):
-            return html.Div([html.H4("Current Period"), html.H5(monitor.staking_agent.get_current_period(),
-                                                                id='current-period-value')])
-
-        @dash_app.callback(Output('time-remaining', 'children'), [Input('minute-interval', 'n_intervals')])
-        def time_remaining(n):
-            tomorrow = datetime.utcnow() + timedelta(days=1)
-            midnight = datetime(year=tomorrow.year, month=tomorrow.month,
-                                day=tomorrow.day, hour=0, minute=0, second=0, microsecond=0)
-            seconds_remaining = MayaDT.from_datetime(midnight).slang_time()
-            return html.Div([html.H4("Next Period"), html.H5(seconds_remaining)])
-
-        @dash_app.callback(Output('domains', 'children'), [Input('url', 'pathname')])  # on page-load
-        def domains(pathname):
-            return html.Div([html.H4('Domain'), html.H5(domain, id="domain-value")])
-
-        @dash_app.callback(Output('staked-tokens', 'children'), [Input('minute-interval', 'n_intervals')])
-        def staked_tokens(n):
-            nu = NU.from_nunits(monitor.staking_agent.get_global_locked_tokens())
-            return html.Div([html.H4('Staked Tokens'), html.H5(f"{nu}", id='staked-tokens-value')])
-
-        @dash_app.callback(Output('prev-locked-stake-graph', 'children'), [Input('daily-interval', 'n_intervals')])
-        def prev_locked_tokens(n):
-            prior_periods = 30
-            locked_tokens_data = monitor.network_crawler_db_client.get_historical_locked_tokens_over_range(prior_periods)
-            return historical_locked_tokens_bar_chart(locked_tokens=locked_tokens_data)
-
-        @dash_app.callback(Output('prev-num-stakers-graph', 'children'), [Input('daily-interval', 'n_intervals')])
-        def historical_known_nodes(n):
-            prior_periods = 30
-            num_stakers_data = monitor.network_crawler_db_client.get_historical_num_stakers_over_range(prior_periods)
-            return historical_known_nodes_line_chart(data=num_stakers_data)
-
-        @dash_app.callback(Output('locked-stake-graph', 'children'), [Input('daily-interval', 'n_intervals')])
-        def future_locked_tokens(n):
-            return future_locked_tokens_bar_chart(staking_agent=monitor.staking_agent)
+            global_locked_tokens = monitor.staking_agent.get_global_locked_tokens()
+            stakers = dict(Active=len(confirmed), Pending=len(pending), Inactive=len(inactive))
+
+            return monitor.cache_components({
+                'current-period': components.current_period(current_period),
+                'active-stakers': components.active_stakers(confirmed=stakers['Active'], total=sum(stakers.values())),
+                'staked-tokens': components.staked_tokens(NU.from_nunits(global_locked_tokens)),
+                'staker-breakdown': stakers_breakdown_pie_chart(data=stakers)
+            })
+
+        # purely derived widgets are computed in the browser (see assets/clientside.js)
+        dash_app.clientside_callback(ClientsideFunction(namespace='clientside', function_name='time_remaining'),
+                                     Output('time-remaining-value', 'children'),
+                                     [Input('minute-interval', 'n_intervals')])
+
+        @dash_app.callback([Output('prev-locked-stake-graph', 'children'),
+                            Output('prev-num-stakers-graph', 'children')],
+                           [Input('period-update-button', 'n_clicks'),
+                            Input('daily-interval', 'n_intervals'),
+                            Input('historical-range', 'value'),
+                            Input('historical-granularity', 'value')],
+                           [State('prefilled-components', 'data')])
+        def historical_network_data(n_clicks, n_intervals, range_length, granularity, prefilled):
+            if range_length not in layout.HISTORICAL_RANGES or granularity not in layout.HISTORICAL_GRANULARITIES:
+                raise PreventUpdate
+
+            # only the default selection is pre-filled into (and cached for) new visitors' pages
+            default_selection = (range_length == layout.DEFAULT_HISTORICAL_RANGE and
+                                 granularity == layout.DEFAULT_HISTORICAL_GRANULARITY)
+            if default_selection:
+                monitor.skip_if_prefilled(['prev-locked-stake-graph', 'prev-num-stakers-graph'], prefilled)
+
+            # both historical charts are drawn from a single query
+            network_data = monitor.network_crawler_db_client.get_historical_network_data(range_length=range_length,
+                                                                                         granularity=granularity)
+            range_label = layout.HISTORICAL_RANGES[range_length]
+            graphs = {
+                'prev-locked-stake-graph': historical_locked_tokens_bar_chart(data=network_data,
+                                                                              range_label=range_label),
+                'prev-num-stakers-graph': historical_known_nodes_line_chart(data=network_data,
+                                                                            range_label=range_label)
+            }
+            if not default_selection:
+                return tuple(graphs.values())
+            return monitor.cache_components(graphs)
+
+        @dash_app.callback(Output('locked-stake-graph', 'children'),
+                           [Input('period-update-button', 'n_clicks'), Input('daily-interval', 'n_intervals')],
+                           [State('prefilled-components', 'data')])
+        def future_locked_tokens(n_clicks, n_intervals, prefilled):
+            monitor.skip_if_prefilled(['locked-stake-graph'], prefilled)
+            return monitor.cache_components({
+                'locked-stake-graph': future_locked_tokens_bar_chart(staking_agent=monitor.staking_agent)
+            })
+
+        @dash_app.callback([Output('staker-detail', 'children'), Output('main', 'style')],
+                           [Input('url', 'pathname')])
+        def staker_detail(pathname):
+            staker_address = monitor.get_route_staker(route_url, pathname)
+            if staker_address is None:
+                return None, None  # main page
+
+            # history of the single staker, cached per staker
+            history = monitor.network_crawler_db_client.get_staker_history(
+                staker_address=staker_address,
+                range_length=layout.STAKER_HISTORY_RANGE,
+                granularity=layout.STAKER_HISTORY_GRANULARITY)
+            sightings = monitor.node_metadata_db_client.get_node_sightings(staker_address=staker_address)
+            detail = components.staker_detail(staker_address=staker_address,
+                                              route_url=route_url,
+                                              history=history,
+                                              sightings=sightings,
+                                              charts=[staker_locked_stake_line_chart(staker_address, history),
+                                                      staker_confirmations_chart(staker_address, history)])
+            return detail, {'display': 'none'}
 
         return dash_app
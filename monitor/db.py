@@ -1,19 +1,50 @@
+import json
+import os
 import sqlite3
+import time
 from collections import OrderedDict
-from datetime import datetime, timedelta
-from typing import Dict, List
+from datetime import datetime, timedelta, timezone
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
 
-from influxdb import InfluxDBClient
 from maya import MayaDT
+from nucypher.config.constants import DEFAULT_CONFIG_ROOT
 
-from monitor.crawler import CrawlerNodeStorage
+from monitor.crawler import Crawler, CrawlerNodeStorage
+from monitor.prober import NodeProber
+from monitor.snapshot import SnapshotReader
+from monitor.stakers import StakerTable
+from monitor.timeseries import EPOCH, get_time_series_storage, parse_duration
+
+BUCKET_KEY_FORMAT = '%Y-%m-%dT%H:%M'
+
+# the crawler writes the last points of a bucket up to a refresh (with some slack) after it closes - closed buckets
+# then settle once the storage's rollups of them are updated too (see `TimeSeriesStorage.get_rollup_delay`)
+CLOSED_BUCKET_SETTLE_TIME = timedelta(seconds=2 * Crawler.DEFAULT_REFRESH_RATE)
+
+# recorded values of a single staker
+STAKER_HISTORY_COLUMNS = ('locked_stake', 'worker_address', 'current_period', 'last_confirmed_period')
 
 
 class CrawlerNodeMetadataDBClient:
-    def __init__(self, db_filepath: str):
+    """
+    Reads the crawler's node storage db. With a snapshot filepath, the known nodes, teacher and staker table are
+    instead read from the snapshot published there by the crawler (once published) - parsed once per snapshot,
+    and without contending with the crawler's writes to its db.
+    """
+
+    def __init__(self, db_filepath: str, snapshot_filepath: str = None):
         self._db_filepath = db_filepath
+        self._snapshot_reader = SnapshotReader(snapshot_filepath) if snapshot_filepath else None
+
+    def _get_snapshot(self):
+        return self._snapshot_reader.get() if self._snapshot_reader is not None else None
 
     def get_known_nodes_metadata(self) -> Dict:
+        snapshot = self._get_snapshot()
+        if snapshot is not None:
+            return snapshot.known_nodes  # shared by all readers of the snapshot, not to be modified
+
         # dash threading means that connection needs to be established in same thread as use
         db_conn = sqlite3.connect(self._db_filepath)
         try:
@@ -59,7 +90,57 @@ class CrawlerNodeMetadataDBClient:
         finally:
             db_conn.close()
 
+    def get_node_sightings(self, staker_address: str, limit: int = 50) -> List[Dict]:
+        """Most recent runs of sightings of the staker's node with the same fleet state, latest first"""
+        db_conn = sqlite3.connect(self._db_filepath)
+        try:
+            result = db_conn.execute(f"SELECT * FROM {CrawlerNodeStorage.SIGHTINGS_DB_NAME} "
+                                     f"WHERE staker_address = ? ORDER BY first_seen DESC LIMIT {limit}",
+                                     (staker_address, ))
+            column_names = [description[0] for description in result.description]
+            return [dict(zip(column_names, row)) for row in result]
+        finally:
+            db_conn.close()
+
+    def get_node_events(self,
+                        cursor: int = 0,
+                        limit: int = 100,
+                        staker_address: str = None) -> Tuple[List[Dict], int]:
+        """
+        Node events recorded after the cursor, oldest first, and the cursor to continue from;
+        the cursor of an event is its id, and 0 is the beginning of the log.
+        """
+        db_conn = sqlite3.connect(self._db_filepath)
+        try:
+            condition = 'AND staker_address = ?' if staker_address else ''
+            parameters = (cursor, staker_address) if staker_address else (cursor, )
+            result = db_conn.execute(f"SELECT * FROM {CrawlerNodeStorage.NODE_EVENTS_DB_NAME} "
+                                     f"WHERE id > ? {condition} ORDER BY id LIMIT {int(limit)}", parameters)
+            column_names = [description[0] for description in result.description]
+            events = [dict(zip(column_names, row)) for row in result]
+            return events, events[-1]['id'] if events else cursor
+        finally:
+            db_conn.close()
+
+    def get_staker_table(self) -> Optional[StakerTable]:
+        """Blockchain information of the known stakers as of the crawler's last cycle, if any"""
+        snapshot = self._get_snapshot()
+        if snapshot is not None:
+            return snapshot.staker_table
+
+        db_conn = sqlite3.connect(self._db_filepath)
+        try:
+            row = db_conn.execute(f"SELECT data FROM {CrawlerNodeStorage.STAKER_TABLE_DB_NAME} WHERE id = ?",
+                                  (CrawlerNodeStorage.STAKER_TABLE_ID, )).fetchone()
+            return StakerTable.from_bytes(row[0]) if row else None
+        finally:
+            db_conn.close()
+
     def get_current_teacher_checksum(self):
+        snapshot = self._get_snapshot()
+        if snapshot is not None:
+            return snapshot.teacher_checksum
+
         db_conn = sqlite3.connect(self._db_filepath)
         try:
             result = db_conn.execute(f"SELECT checksum_address from {CrawlerNodeStorage.TEACHER_DB_NAME} LIMIT 1")
@@ -70,6 +151,222 @@ class CrawlerNodeMetadataDBClient:
         finally:
             db_conn.close()
 
+    def get_nodes_fingerprint(self) -> tuple:
+        """Cheap summary of the known nodes and teacher that changes whenever they are updated"""
+        if self._snapshot_reader is not None:
+            snapshot_fingerprint = self._snapshot_reader.fingerprint()
+            if snapshot_fingerprint is not None:
+                return snapshot_fingerprint
+
+        db_conn = sqlite3.connect(self._db_filepath)
+        try:
+            # every change to the known nodes is logged as an event
+            nodes_summary = db_conn.execute(f"SELECT MAX(id) "
+                                            f"FROM {CrawlerNodeStorage.NODE_EVENTS_DB_NAME}").fetchone()
+            teacher = db_conn.execute(f"SELECT checksum_address "
+                                      f"FROM {CrawlerNodeStorage.TEACHER_DB_NAME} LIMIT 1").fetchone()
+            return tuple(nodes_summary) + tuple(teacher or ())
+        finally:
+            db_conn.close()
+
+    def get_states_fingerprint(self) -> tuple:
+        """Cheap summary of the fleet states that changes whenever a new state is recorded"""
+        db_conn = sqlite3.connect(self._db_filepath)
+        try:
+            result = db_conn.execute(f"SELECT COUNT(*), MAX(updated) FROM {CrawlerNodeStorage.STATE_DB_NAME}")
+            return tuple(result.fetchone())
+        finally:
+            db_conn.close()
+
+
+class HistoricalAggregateCache:
+    """
+    Aggregates of closed (and therefore immutable) time buckets for each metric, i.e. metric -> {bucket -> values}.
+
+    Kept in memory, and persisted to a local JSON file if a filepath is provided: updates are appended to a journal
+    next to it, which is folded into the file once it holds `JOURNAL_COMPACTION_SIZE` updates.
+    A value of None records a closed bucket without any data. Metrics are named after the granularity of their
+    buckets eg. 'network_1d'.
+
+    The cache is bounded: only the `max_metrics` most recently used metrics are kept - of the history of each staker
+    (metrics prefixed with `STAKER_METRIC_PREFIX`), and separately of the others eg. network data, so that many
+    stakers don't evict them - and buckets older than `max_age` are dropped.
+
+    Buckets are only immutable as long as no data is written into the past eg. by a backfill, which marks the time
+    range it wrote with `invalidate_range`; the cache drops the buckets overlapping marked ranges before its next
+    update, and before its next read once `INVALIDATIONS_CHECK_INTERVAL` has passed since it last checked for marks.
+    """
+    INVALIDATIONS_SUFFIX = '.invalidated'
+    INVALIDATIONS_CHECK_INTERVAL = 10  # seconds
+    JOURNAL_SUFFIX = '.journal'
+    JOURNAL_COMPACTION_SIZE = 1000  # updates
+    STAKER_METRIC_PREFIX = 'staker_'
+
+    DEFAULT_MAX_METRICS = 1000  # eg. the history of each staker
+    DEFAULT_MAX_AGE = timedelta(weeks=53)  # longer than the longest range charted by the dashboard (a year)
+
+    def __init__(self,
+                 filepath: str = None,
+                 max_metrics: int = DEFAULT_MAX_METRICS,
+                 max_age: timedelta = DEFAULT_MAX_AGE):
+        self._filepath = filepath
+        self._journal_filepath = f'{filepath}{self.JOURNAL_SUFFIX}' if filepath else None
+        self._max_metrics = max_metrics
+        self._max_age = max_age
+        self._lock = Lock()
+        self._journal_size = 0
+        self._invalidations_checked = None  # time.monotonic() of the last check for marked ranges
+        self._aggregates = self._load()
+        self._drop_expired(self._aggregates)
+        self._evict()
+
+    def _load(self) -> OrderedDict:
+        if not self._filepath or not os.path.exists(self._filepath):
+            aggregates = OrderedDict()
+        else:
+            try:
+                with open(self._filepath, 'r') as file:
+                    aggregates = OrderedDict(json.load(file))
+            except (OSError, ValueError):
+                aggregates = OrderedDict()  # unreadable cache is simply rebuilt
+
+        if self._journal_filepath and os.path.exists(self._journal_filepath):
+            with open(self._journal_filepath, 'r') as file:
+                for line in file:
+                    try:
+                        metrics = json.loads(line)
+                    except ValueError:
+                        break  # update interrupted while being appended
+                    for metric, values in metrics.items():
+                        aggregates.setdefault(metric, dict()).update(values)
+                        aggregates.move_to_end(metric)
+                    self._journal_size += 1
+        return aggregates
+
+    def _persist(self):
+        """Rewrite the file with all aggregates, and start a new journal"""
+        if not self._filepath:
+            return
+        self._drop_expired(self._aggregates)
+        temp_filepath = f'{self._filepath}.tmp'
+        with open(temp_filepath, 'w') as file:
+            json.dump(self._aggregates, file)
+        os.replace(temp_filepath, self._filepath)
+        if os.path.exists(self._journal_filepath):
+            os.remove(self._journal_filepath)
+        self._journal_size = 0
+
+    def _journal(self, metrics: Dict[str, Dict]):
+        """Persist an update of `metrics` only, by appending it to the journal"""
+        if not self._filepath:
+            return
+        if self._journal_size >= self.JOURNAL_COMPACTION_SIZE or not os.path.exists(self._filepath):
+            self._persist()
+            return
+        with open(self._journal_filepath, 'a') as file:
+            file.write(json.dumps(metrics) + '\n')
+        self._journal_size += 1
+
+    def _drop_expired(self, metrics: Dict[str, Dict]):
+        """Drop the buckets of `metrics` older than the max age"""
+        oldest_bucket = self._bucket_key(datetime.utcnow() - self._max_age)
+        for values in metrics.values():
+            expired_buckets = [bucket for bucket in values if bucket < oldest_bucket]  # keys sort chronologically
+            for bucket in expired_buckets:
+                del values[bucket]
+
+    def _evict(self):
+        """Drop the least recently used metrics over the max - of stakers, and of the others"""
+        for staker_metrics in (True, False):
+            metrics = [metric for metric in self._aggregates
+                       if metric.startswith(self.STAKER_METRIC_PREFIX) == staker_metrics]
+            for metric in metrics[:max(len(metrics) - self._max_metrics, 0)]:
+                del self._aggregates[metric]
+
+    @staticmethod
+    def _bucket_key(bucket: datetime) -> str:
+        return bucket.strftime(BUCKET_KEY_FORMAT)
+
+    @classmethod
+    def invalidate_range(cls, filepath: str, range_begin: datetime, range_end: datetime):
+        """
+        Mark the buckets overlapping range_begin..range_end as stale, for the cache persisted to `filepath`
+        by any process; nothing to mark if the cache has not been persisted yet.
+        """
+        if not os.path.exists(filepath):
+            return
+        with open(f'{filepath}{cls.INVALIDATIONS_SUFFIX}', 'a') as file:
+            file.write(f'{cls._bucket_key(range_begin)} {cls._bucket_key(range_end)}\n')
+
+    def invalidate(self, range_begin: datetime, range_end: datetime):
+        """Drop the buckets of every metric overlapping range_begin..range_end"""
+        with self._lock:
+            self._invalidate(range_begin, range_end)
+            self._persist()
+
+    def _invalidate(self, range_begin: datetime, range_end: datetime):
+        range_begin, range_end = range_begin.replace(tzinfo=None), range_end.replace(tzinfo=None)
+        for metric, values in self._aggregates.items():
+            resolution = parse_duration(metric.rsplit('_', 1)[-1])
+            stale_buckets = [bucket for bucket in values
+                             if range_begin - resolution < datetime.strptime(bucket, BUCKET_KEY_FORMAT) < range_end]
+            for bucket in stale_buckets:
+                del values[bucket]
+
+    def _apply_invalidations(self):
+        """Drop the buckets of the ranges marked by `invalidate_range` since the last check"""
+        if not self._filepath:
+            return
+        self._invalidations_checked = time.monotonic()
+        invalidations_filepath = f'{self._filepath}{self.INVALIDATIONS_SUFFIX}'
+        if not os.path.exists(invalidations_filepath):
+            return
+        applied_filepath = f'{invalidations_filepath}.{os.getpid()}'
+        try:
+            os.replace(invalidations_filepath, applied_filepath)  # ranges marked from now on go to a new file
+        except FileNotFoundError:
+            return
+        with open(applied_filepath, 'r') as file:
+            for line in file:
+                if line.strip():
+                    range_begin, range_end = (datetime.strptime(bucket, BUCKET_KEY_FORMAT) for bucket in line.split())
+                    self._invalidate(range_begin, range_end)
+        self._persist()
+        os.remove(applied_filepath)
+
+    def get(self, metric: str) -> Dict:
+        with self._lock:
+            if self._invalidations_checked is None or \
+                    time.monotonic() - self._invalidations_checked >= self.INVALIDATIONS_CHECK_INTERVAL:
+                self._apply_invalidations()
+            if metric not in self._aggregates:
+                return dict()
+            self._aggregates.move_to_end(metric)  # most recently used
+            return dict(self._aggregates[metric])
+
+    def update(self, metric: str, values: Dict):
+        self.update_many({metric: values})
+
+    def update_many(self, metrics: Dict[str, Dict]):
+        """Update the values of several metrics at once i.e. metric -> {bucket -> values}"""
+        metrics = {metric: values for metric, values in metrics.items() if values}
+        if not metrics:
+            return
+        with self._lock:
+            for metric, values in metrics.items():
+                self._aggregates.setdefault(metric, dict()).update(values)
+                self._aggregates.move_to_end(metric)
+            self._drop_expired({metric: self._aggregates[metric] for metric in metrics})
+            self._evict()
+            self._journal(metrics)  # expired buckets and evicted metrics are dropped again when loaded
+            # values may have been queried before a range was marked, so marks are applied after updating
+            self._apply_invalidations()
+
+    def clear(self):
+        with self._lock:
+            self._aggregates = OrderedDict()
+            self._persist()
+
 
 class CrawlerBlockchainDBClient:
     """
@@ -77,63 +374,224 @@ class CrawlerBlockchainDBClient:
 
     Helpful for data intensive long-running graphing calculations on historical data.
     """
-    def __init__(self, host, port, database):
-        self._client = InfluxDBClient(host=host, port=port, database=database)
-
-    def get_historical_locked_tokens_over_range(self, days: int):
-        today = datetime.utcnow()
-        range_end = datetime(year=today.year, month=today.month, day=today.day,
-                             hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)  # include today
-        range_begin = range_end - timedelta(days=days)
-        results = list(self._client.query(f"SELECT SUM(locked_stake) "
-                                          f"FROM ("
-                                          f"SELECT staker_address, current_period, "
-                                          f"LAST(locked_stake) "
-                                          f"AS locked_stake "
-                                          f"FROM moe_network_info "
-                                          f"WHERE time >= '{MayaDT.from_datetime(range_begin).rfc3339()}' "
-                                          f"AND "
-                                          f"time < '{MayaDT.from_datetime(range_end).rfc3339()}' "
-                                          f"GROUP BY staker_address, time(1d)"
-                                          f") "
-                                          f"GROUP BY time(1d)").get_points())
-
-        # Note: all days may not have values eg. days before DB started getting populated
-        # As time progresses this should be less of an issue
-        locked_tokens_dict = OrderedDict()
-        for r in results:
-            locked_stake = r['sum']
-            if locked_stake:
-                # Dash accepts datetime objects for graphs
-                locked_tokens_dict[MayaDT.from_rfc3339(r['time']).datetime()] = locked_stake
-
-        return locked_tokens_dict
-
-    def get_historical_num_stakers_over_range(self, days: int):
-        today = datetime.utcnow()
-        range_end = datetime(year=today.year, month=today.month, day=today.day,
-                             hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)  # include today
-        range_begin = range_end - timedelta(days=days)
-        results = list(self._client.query(f"SELECT COUNT(staker_address) FROM "
-                                          f"("
-                                            f"SELECT staker_address, LAST(locked_stake)"
-                                            f"FROM moe_network_info WHERE "
-                                            f"time >= '{MayaDT.from_datetime(range_begin).rfc3339()}' AND "
-                                            f"time < '{MayaDT.from_datetime(range_end).rfc3339()}' "
-                                            f"GROUP BY staker_address, time(1d)"
-                                          f") "
-                                          "GROUP BY time(1d)").get_points())   # 1 day measurements
-
-        # Note: all days may not have values eg. days before DB started getting populated
-        # As time progresses this should be less of an issue
-        num_stakers_dict = OrderedDict()
-        for r in results:
-            locked_stake = r['count']
-            if locked_stake:
+    DEFAULT_CACHE_FILEPATH = os.path.join(DEFAULT_CONFIG_ROOT, 'crawler-historical-cache.json')
+
+    def __init__(self, host, port, database, cache_filepath: str = None, db_filepath: str = None):
+        self._storage = get_time_series_storage(database=database, host=host, port=port, db_filepath=db_filepath)
+        self._historical_cache = HistoricalAggregateCache(filepath=cache_filepath)
+        self._settle_time = CLOSED_BUCKET_SETTLE_TIME + self._storage.get_rollup_delay()
+
+    def get_historical_network_data(self, range_length: str, granularity: str = '1d') -> Dict[str, List]:
+        """
+        Locked stake and number of stakers per `granularity` bucket over the last `range_length`,
+        read from the network summaries recorded by the crawler.
+        Both are InfluxDB duration literals eg. range_length='90d', granularity='1h'.
+
+        Returns columns of equal length: {'time': [...], 'locked_stake': [...], 'num_stakers': [...]}
+        """
+        aggregates = self._get_aggregates_over_range(metric='network',
+                                                     range_length=range_length,
+                                                     granularity=granularity,
+                                                     fetch=self._fetch_historical_network_data,
+                                                     result_columns=('locked_stake', 'num_stakers'))
+        columns = dict(time=list(), locked_stake=list(), num_stakers=list())
+        for bucket, (locked_stake, num_stakers) in aggregates.items():
+            columns['time'].append(bucket)
+            columns['locked_stake'].append(locked_stake)
+            columns['num_stakers'].append(num_stakers)
+        return columns
+
+    def get_staker_history(self,
+                           staker_address: str,
+                           range_length: str,
+                           granularity: str = '1d') -> Dict[str, List]:
+        """
+        Last recorded values of a single staker per `granularity` bucket over the last `range_length`.
+        The staker's points are selected by their (indexed) tag, and closed buckets are cached per staker.
+
+        Returns columns of equal length:
+        {'time': [...], 'locked_stake': [...], 'worker_address': [...],
+         'current_period': [...], 'last_confirmed_period': [...]}
+        """
+        def fetch(range_begin: datetime, range_end: datetime, bucket_granularity: str) -> List[Dict]:
+            return self._storage.get_last_values(measurement=Crawler.BLOCKCHAIN_DB_MEASUREMENT,
+                                                 fields={column: column for column in STAKER_HISTORY_COLUMNS},
+                                                 range_begin=range_begin,
+                                                 range_end=range_end,
+                                                 granularity=bucket_granularity,
+                                                 tags={'staker_address': staker_address})
+
+        aggregates = self._get_aggregates_over_range(metric=f'staker_{staker_address}',
+                                                     range_length=range_length,
+                                                     granularity=granularity,
+                                                     fetch=fetch,
+                                                     result_columns=STAKER_HISTORY_COLUMNS)
+        return self._staker_history_columns(aggregates)
+
+    def get_stakers_history(self,
+                            staker_addresses: List[str],
+                            range_length: str,
+                            granularity: str = '1d') -> Dict[str, Dict[str, List]]:
+        """
+        Histories of several stakers (as `get_staker_history`), as staker address -> columns.
+        All stakers are read by a single query grouped by staker, from the earliest bucket missing from
+        any of their caches.
+        """
+        def fetch(range_begin: datetime, range_end: datetime, bucket_granularity: str) -> Dict[str, List[Dict]]:
+            return self._storage.get_last_values_by_tag(measurement=Crawler.BLOCKCHAIN_DB_MEASUREMENT,
+                                                        fields={column: column for column in STAKER_HISTORY_COLUMNS},
+                                                        tag='staker_address',
+                                                        tag_values=staker_addresses,
+                                                        range_begin=range_begin,
+                                                        range_end=range_end,
+                                                        granularity=bucket_granularity)
+
+        aggregates = self._get_grouped_aggregates_over_range(
+            metrics={staker_address: f'staker_{staker_address}' for staker_address in staker_addresses},
+            range_length=range_length,
+            granularity=granularity,
+            fetch=fetch,
+            result_columns=STAKER_HISTORY_COLUMNS)
+        return {staker_address: self._staker_history_columns(staker_aggregates)
+                for staker_address, staker_aggregates in aggregates.items()}
+
+    @staticmethod
+    def _staker_history_columns(aggregates: OrderedDict) -> Dict[str, List]:
+        columns = dict(time=list(aggregates))
+        for index, column in enumerate(STAKER_HISTORY_COLUMNS):
+            columns[column] = [values[index] for values in aggregates.values()]
+        return columns
+
+    def get_node_reachability(self, range_begin: datetime, range_end: datetime) -> List[Dict]:
+        """Probe results of nodes recorded within the range, oldest first"""
+        return self._storage.get_points(measurement=NodeProber.MEASUREMENT,
+                                        range_begin=range_begin,
+                                        range_end=range_end)
+
+    def _fetch_staker_totals(self, range_begin: datetime, range_end: datetime, granularity: str) -> List[Dict]:
+        # total locked stake, and number, of stakers with data in each bucket
+        return self._storage.get_tag_totals(measurement=Crawler.BLOCKCHAIN_DB_MEASUREMENT,
+                                            field='locked_stake',
+                                            tag='staker_address',
+                                            range_begin=range_begin,
+                                            range_end=range_end,
+                                            granularity=granularity)
+
+    def _fetch_historical_network_data(self, range_begin: datetime, range_end: datetime, granularity: str):
+        # a single point per crawler cycle
+        summaries = self._storage.get_last_values(measurement=Crawler.NETWORK_SUMMARY_MEASUREMENT,
+                                                  fields={'locked_stake': 'total_locked',
+                                                          'num_stakers': 'num_stakers'},
+                                                  range_begin=range_begin,
+                                                  range_end=range_end,
+                                                  granularity=granularity)
+        summaries = [point for point in summaries if point['locked_stake'] is not None]  # empty buckets are null
+        if summaries:
+            summarized_begin = MayaDT.from_rfc3339(summaries[0]['time']).datetime().replace(tzinfo=None)
+        else:
+            summarized_begin = range_end
+        if summarized_begin <= range_begin:
+            return summaries
+
+        # buckets before the crawler started recording network summaries are aggregated from the per-staker data
+        aggregated = [dict(time=point['time'], locked_stake=point['sum'], num_stakers=point['count'])
+                      for point in self._fetch_staker_totals(range_begin, summarized_begin, granularity)]
+        return aggregated + summaries
+
+    @staticmethod
+    def _bucket_key(bucket: datetime) -> str:
+        return bucket.strftime(BUCKET_KEY_FORMAT)
+
+    @staticmethod
+    def _bucket_begin(time: datetime, resolution: timedelta) -> datetime:
+        return EPOCH + ((time - EPOCH) // resolution) * resolution
+
+    def _get_aggregates_over_range(self,
+                                   metric: str,
+                                   range_length: str,
+                                   granularity: str,
+                                   fetch,
+                                   result_columns: tuple):
+        """
+        Aggregates per `granularity` bucket over the last `range_length` (including the current bucket),
+        as bucket -> values of `result_columns`.
+
+        Closed buckets are immutable, so their aggregates are cached; the storage is only queried from the
+        earliest bucket missing from the cache, which is usually just the current (open) bucket.
+        """
+        aggregates = self._get_grouped_aggregates_over_range(
+            metrics={metric: metric},
+            range_length=range_length,
+            granularity=granularity,
+            fetch=lambda range_begin, range_end, bucket_granularity: {
+                metric: fetch(range_begin, range_end, bucket_granularity)},
+            result_columns=result_columns)
+        return aggregates[metric]
+
+    def _get_grouped_aggregates_over_range(self,
+                                           metrics: Dict[str, str],
+                                           range_length: str,
+                                           granularity: str,
+                                           fetch,
+                                           result_columns: tuple) -> Dict[str, OrderedDict]:
+        """
+        Aggregates of several groups (eg. stakers) as group -> bucket -> values of `result_columns`,
+        for `metrics` of group -> cached metric.
+
+        A single `fetch` returns the results of all groups, as group -> results; it queries from the earliest
+        bucket missing from any group's cache.
+        """
+        if not metrics:
+            return dict()
+        resolution = parse_duration(granularity)
+        now = datetime.utcnow()
+        range_end = self._bucket_begin(now, resolution) + resolution  # include the current bucket
+        range_begin = self._bucket_begin(range_end - parse_duration(range_length), resolution)
+        buckets = [range_begin + resolution * bucket for bucket in range((range_end - range_begin) // resolution)]
+
+        settled = now - self._settle_time
+        closed_buckets = [bucket for bucket in buckets if bucket + resolution <= settled]
+        cache_metrics = {group: f'{metric}_{granularity}' for group, metric in metrics.items()}
+        cached = {group: self._historical_cache.get(cache_metric) for group, cache_metric in cache_metrics.items()}
+        missing_buckets = {group: [bucket for bucket in closed_buckets if self._bucket_key(bucket) not in cached[group]]
+                           for group in metrics}
+        query_begin = min((missing[0] for missing in missing_buckets.values() if missing),
+                          default=buckets[len(closed_buckets)])
+
+        group_results = fetch(query_begin, range_end, granularity)
+
+        aggregates = dict()
+        newly_closed_metrics = dict()
+        for group, cache_metric in cache_metrics.items():
+            # Note: all buckets may not have values eg. buckets before DB started getting populated
+            # As time progresses this should be less of an issue
+            newly_closed = {self._bucket_key(bucket): None for bucket in missing_buckets[group]}
+            queried = OrderedDict()
+            for r in group_results.get(group, ()):
                 # Dash accepts datetime objects for graphs
-                num_stakers_dict[MayaDT.from_rfc3339(r['time']).datetime()] = locked_stake
+                bucket = MayaDT.from_rfc3339(r['time']).datetime()
+                values = [r[column] for column in result_columns]
+                if bucket.replace(tzinfo=None) + resolution <= settled:
+                    newly_closed[self._bucket_key(bucket)] = values if any(values) else None
+                if any(values):
+                    queried[bucket] = values
+            newly_closed_metrics[cache_metric] = newly_closed
+
+            group_aggregates = OrderedDict()
+            for bucket in closed_buckets:
+                if bucket >= query_begin:
+                    break
+                values = cached[group][self._bucket_key(bucket)]
+                if values:
+                    group_aggregates[bucket.replace(tzinfo=timezone.utc)] = values
+            group_aggregates.update(queried)
+            aggregates[group] = group_aggregates
+        self._historical_cache.update_many(newly_closed_metrics)
+
+        return aggregates
 
-        return num_stakers_dict
+    def clear_cache(self):
+        self._historical_cache.clear()
 
     def close(self):
-        self._client.close()
+        self._storage.close()
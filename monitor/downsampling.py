@@ -0,0 +1,48 @@
+from typing import List, Sequence
+
+
+def largest_triangle_three_buckets(x: Sequence[float], y: Sequence[float], threshold: int) -> List[int]:
+    """
+    Indices of at most `threshold` points of the series (x, y) chosen to preserve its visual shape,
+    using Largest-Triangle-Three-Buckets (Steinarsson, 2013). `x` must be numeric and increasing.
+
+    The first and last points are always kept; every bucket in between contributes the point forming the
+    largest triangle with the previously kept point and the average of the next bucket.
+    """
+    if threshold < 3:
+        raise ValueError(f'At least 3 points are needed to downsample a series; got {threshold}')
+    length = len(x)
+    if threshold >= length:
+        return list(range(length))
+
+    y = [value or 0 for value in y]  # missing values plotted as gaps count as 0
+    bucket_size = (length - 2) / (threshold - 2)
+
+    indices = [0]
+    kept = 0
+    for bucket in range(threshold - 2):
+        bucket_begin = int(bucket * bucket_size) + 1
+        bucket_end = int((bucket + 1) * bucket_size) + 1
+
+        # average of the next bucket (the last point for the final bucket)
+        next_begin = bucket_end
+        next_end = min(int((bucket + 2) * bucket_size) + 1, length)
+        if next_begin >= next_end:
+            next_begin, next_end = length - 1, length
+        next_count = next_end - next_begin
+        average_x = sum(x[next_begin:next_end]) / next_count
+        average_y = sum(y[next_begin:next_end]) / next_count
+
+        # point with the largest triangle area
+        largest_area, selected = -1, bucket_begin
+        kept_x, kept_y = x[kept], y[kept]
+        for index in range(bucket_begin, bucket_end):
+            area = abs((kept_x - average_x) * (y[index] - kept_y) - (kept_x - x[index]) * (average_y - kept_y))
+            if area > largest_area:
+                largest_area, selected = area, index
+
+        indices.append(selected)
+        kept = selected
+
+    indices.append(length - 1)
+    return indices
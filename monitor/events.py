@@ -0,0 +1,112 @@
+import queue
+from threading import Event, Lock, Thread
+from typing import Callable, Dict, Iterable
+
+from twisted.logger import Logger
+
+
+class UpdateBroker:
+    """
+    Fan-out of data change notifications (topics) to subscribed clients, e.g. server-sent event streams.
+    """
+
+    class TooManySubscribers(RuntimeError):
+        pass
+
+    DEFAULT_MAX_SUBSCRIBERS = 256
+    SUBSCRIPTION_QUEUE_SIZE = 32
+
+    def __init__(self, max_subscribers: int = DEFAULT_MAX_SUBSCRIBERS):
+        self._max_subscribers = max_subscribers
+        self._subscriptions = set()
+        self._lock = Lock()
+
+    def subscribe(self) -> queue.Queue:
+        subscription = queue.Queue(maxsize=self.SUBSCRIPTION_QUEUE_SIZE)
+        with self._lock:
+            if len(self._subscriptions) >= self._max_subscribers:
+                raise self.TooManySubscribers(f"Limit of {self._max_subscribers} subscribers reached")
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: queue.Queue):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def publish(self, topic: str):
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            try:
+                subscription.put_nowait(topic)
+            except queue.Full:
+                pass  # slow consumer; it already has pending refreshes queued
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscriptions)
+
+
+class ChangeDetector:
+    """
+    Periodically fingerprints data sources (topic -> callable returning a comparable value)
+    and notifies listeners of the topics whose fingerprint changed.
+
+    Runs once per server, so the cost of checking for changes is independent of the number of viewers.
+    """
+
+    DEFAULT_POLL_INTERVAL = 15  # seconds
+
+    def __init__(self,
+                 sources: Dict[str, Callable],
+                 listeners: Iterable[Callable[[str], None]],
+                 poll_interval: float = DEFAULT_POLL_INTERVAL):
+        self.log = Logger(self.__class__.__name__)
+        self._sources = sources
+        self._listeners = list(listeners)
+        self._poll_interval = poll_interval
+        self._fingerprints = dict()
+        self._stopped = Event()
+        self._thread = None
+        self._lock = Lock()
+
+    def check(self) -> list:
+        """Fingerprint all sources; returns (and notifies listeners of) the topics that changed since last check"""
+        changed = list()
+        for topic, source in self._sources.items():
+            try:
+                fingerprint = source()
+            except Exception as e:
+                self.log.warn(f"Unable to check {topic} for changes: {e}")
+                continue
+
+            if topic in self._fingerprints and self._fingerprints[topic] != fingerprint:
+                changed.append(topic)
+            self._fingerprints[topic] = fingerprint
+
+        for topic in changed:
+            for listener in self._listeners:
+                listener(topic)
+        return changed
+
+    def start(self):
+        """Poll the sources in a background thread, from a baseline taken there too - returns right away"""
+        with self._lock:
+            if self.is_running:
+                return
+            self._stopped.clear()
+            self._thread = Thread(target=self._run, name=self.__class__.__name__, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive() and not self._stopped.is_set()
+
+    def _run(self):
+        if not self._fingerprints:
+            self.check()  # baseline to detect changes against
+        while not self._stopped.wait(self._poll_interval):
+            self.check()
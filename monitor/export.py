@@ -0,0 +1,207 @@
+import json
+import os
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List
+
+from monitor.timeseries import EPOCH, TimeSeriesStorage, parse_duration
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None  # exporting is optional
+
+EXPORT_TIME_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+
+
+def _arrow_type(column_type: str):
+    """Arrow type of a time-series tag/field type"""
+    return {'string': pyarrow.string(),
+            'float': pyarrow.float64(),
+            'integer': pyarrow.int64(),
+            'boolean': pyarrow.bool_()}[column_type]
+
+
+def _sqlite_arrow_type(declared_type: str):
+    """Arrow type of a SQLite column, following SQLite's type affinity rules"""
+    declared_type = declared_type.upper()
+    if 'INT' in declared_type:
+        return pyarrow.int64()
+    if any(text in declared_type for text in ('CHAR', 'CLOB', 'TEXT')):
+        return pyarrow.string()
+    if 'BLOB' in declared_type or not declared_type:
+        return pyarrow.binary()
+    return pyarrow.float64()
+
+
+class HistoryExporter:
+    """
+    Exports the crawler's data to columnar (Parquet or Arrow IPC) files for offline analysis.
+
+    Time-series measurements are read one chunk of time at a time and each chunk is written to its own file,
+    so memory use is bounded by the data in a chunk. Only closed chunks are exported, and the end of the
+    last exported chunk of each measurement is recorded in the output directory - subsequent exports
+    resume from there. Node storage tables are snapshots; they are re-exported in full, a page at a time.
+    """
+
+    FORMATS = ('parquet', 'arrow')
+    DEFAULT_CHUNK = '1d'
+    STATE_FILENAME = 'export-state.json'
+    TABLE_PAGE_SIZE = 10000  # rows
+
+    class MissingDependency(ImportError):
+        pass
+
+    def __init__(self,
+                 storage: TimeSeriesStorage,
+                 output_dir: str,
+                 file_format: str = 'parquet',
+                 chunk: str = DEFAULT_CHUNK):
+        if pyarrow is None:
+            raise self.MissingDependency('Exporting requires pyarrow - install it with `pip install pyarrow`')
+        if file_format not in self.FORMATS:
+            raise ValueError(f'Unsupported export format {file_format}; expected one of {self.FORMATS}')
+
+        self._storage = storage
+        self._output_dir = output_dir
+        self._file_format = file_format
+        self._chunk = parse_duration(chunk)
+        self._state_filepath = os.path.join(output_dir, self.STATE_FILENAME)
+
+        os.makedirs(output_dir, exist_ok=True)
+        self._state = self._load_state()
+
+    #
+    # Export State
+    #
+
+    def _load_state(self) -> Dict:
+        if not os.path.exists(self._state_filepath):
+            return dict()
+        with open(self._state_filepath, 'r') as file:
+            return json.load(file)
+
+    def _persist_state(self):
+        temp_filepath = f'{self._state_filepath}.tmp'
+        with open(temp_filepath, 'w') as file:
+            json.dump(self._state, file)
+        os.replace(temp_filepath, self._state_filepath)
+
+    def get_exported_until(self, measurement: str):
+        """End of the last exported chunk of the measurement; None if it hasn't been exported"""
+        exported_until = self._state.get(measurement)
+        if exported_until is None:
+            return None
+        return datetime.strptime(exported_until, EXPORT_TIME_FORMAT)
+
+    #
+    # Files
+    #
+
+    @property
+    def extension(self) -> str:
+        return f'.{self._file_format}'
+
+    @contextmanager
+    def _open_writer(self, filepath: str, schema):
+        """Writer of tables to the file; the file only appears once completely written"""
+        temp_filepath = f'{filepath}.tmp'
+        sink = None
+        if self._file_format == 'parquet':
+            writer = pyarrow.parquet.ParquetWriter(temp_filepath, schema)
+        else:
+            sink = pyarrow.OSFile(temp_filepath, 'wb')
+            writer = pyarrow.ipc.new_file(sink, schema)
+        try:
+            yield writer
+        except BaseException:
+            writer.close()
+            if sink is not None:
+                sink.close()
+            os.remove(temp_filepath)
+            raise
+
+        writer.close()
+        if sink is not None:
+            sink.close()
+        os.replace(temp_filepath, filepath)
+
+    #
+    # Export
+    #
+
+    def _chunk_begin(self, time: datetime) -> datetime:
+        return EPOCH + ((time - EPOCH) // self._chunk) * self._chunk
+
+    def export_measurement(self, measurement: str) -> int:
+        """
+        Export the closed chunks of the measurement that haven't already been exported,
+        to <output dir>/<measurement>/<measurement>-<chunk begin>.<format>; returns the number of points exported.
+        """
+        range_end = self._chunk_begin(datetime.utcnow())
+        range_begin = self.get_exported_until(measurement)
+        if range_begin is None:
+            first_time = self._storage.get_first_time(measurement)
+            if first_time is None:
+                return 0  # nothing recorded yet
+            range_begin = self._chunk_begin(first_time)
+
+        schema = pyarrow.schema([('time', pyarrow.timestamp('s', tz='UTC'))] +
+                                [(column, _arrow_type(column_type))
+                                 for column, column_type in self._storage.get_schema(measurement).items()])
+        measurement_dir = os.path.join(self._output_dir, measurement)
+        os.makedirs(measurement_dir, exist_ok=True)
+
+        exported = 0
+        chunk_begin = range_begin
+        while chunk_begin < range_end:
+            chunk_end = chunk_begin + self._chunk
+            points = self._storage.get_points(measurement, range_begin=chunk_begin, range_end=chunk_end)
+            if points:
+                filepath = os.path.join(measurement_dir,
+                                        f'{measurement}-{chunk_begin.strftime("%Y%m%dT%H%M%S")}{self.extension}')
+                with self._open_writer(filepath, schema) as writer:
+                    writer.write_table(self._points_table(points, schema))
+                exported += len(points)
+
+            self._state[measurement] = chunk_end.strftime(EXPORT_TIME_FORMAT)
+            self._persist_state()
+            chunk_begin = chunk_end
+
+        return exported
+
+    @staticmethod
+    def _points_table(points: List[Dict], schema):
+        columns = {column: [point.get(column) for point in points] for column in schema.names}
+        return pyarrow.Table.from_pydict(columns, schema=schema)
+
+    def export_table(self, db_filepath: str, table: str) -> int:
+        """Export a SQLite table to <output dir>/<table>.<format>; returns the number of rows exported"""
+        db_conn = sqlite3.connect(db_filepath)
+        try:
+            table_info = db_conn.execute(f'PRAGMA table_info("{table}")').fetchall()
+            if not table_info:
+                return 0  # table not created yet
+            schema = pyarrow.schema([(column, _sqlite_arrow_type(declared_type))
+                                     for _, column, declared_type, *_ in table_info])
+
+            exported = 0
+            filepath = os.path.join(self._output_dir, f'{table}{self.extension}')
+            with self._open_writer(filepath, schema) as writer:
+                last_rowid = -1
+                while True:
+                    # keyset pagination - each page is a single query regardless of how far into the table it is
+                    rows = db_conn.execute(f'SELECT rowid, * FROM "{table}" WHERE rowid > ? ORDER BY rowid LIMIT ?',
+                                           (last_rowid, self.TABLE_PAGE_SIZE)).fetchall()
+                    if not rows:
+                        break
+                    last_rowid = rows[-1][0]
+                    columns = {column: [row[index + 1] for row in rows] for index, column in enumerate(schema.names)}
+                    writer.write_table(pyarrow.Table.from_pydict(columns, schema=schema))
+                    exported += len(rows)
+            return exported
+        finally:
+            db_conn.close()
@@ -0,0 +1,219 @@
+import heapq
+from collections import OrderedDict
+from operator import itemgetter
+
+import maya
+import sha3
+from nucypher.network.nicknames import nickname_from_seed
+from nucypher.network.nodes import FleetStateTracker
+
+
+def full_node(node):
+    """The full node of a node summary (hydrated if need be), otherwise the node itself"""
+    if isinstance(node, NodeSummary):
+        return node._tracker.hydrate(node.checksum_address)
+    return node
+
+
+class NodeSummary:
+    """
+    What is kept in memory of a known node by a `BoundedFleetStateTracker`: the attributes of the node recorded
+    by the crawler (see `FleetStateTracker.abridged_node_details`). Any other attribute is that of the full node,
+    hydrated from the node storage when used.
+
+    The last seen time and fleet state of a node are those of its full node while hydrated, and are kept by the summary
+    when the full node is evicted; other attributes set on the full node are lost then.
+    """
+
+    __slots__ = ('checksum_address', 'worker_address', 'nickname', 'timestamp', '_rest_url',
+                 '_last_seen', '_fleet_state_nickname_metadata', '_node_class', '_tracker')
+
+    def __init__(self, node, tracker: 'BoundedFleetStateTracker'):
+        self.checksum_address = node.checksum_address
+        self.worker_address = node.worker_address
+        self.nickname = node.nickname
+        self.timestamp = node.timestamp
+        self._rest_url = node.rest_url()
+        self._last_seen = node.last_seen
+        self._fleet_state_nickname_metadata = node.fleet_state_nickname_metadata
+        self._node_class = node.__class__
+        self._tracker = tracker
+
+    def __getattr__(self, name):
+        if name in NodeSummary.__slots__:
+            raise AttributeError(name)  # not set yet
+        return getattr(self._tracker.hydrate(self.checksum_address), name)
+
+    def __setattr__(self, name, value):
+        if hasattr(NodeSummary, name):
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self._tracker.hydrate(self.checksum_address), name, value)
+
+    def __bytes__(self):
+        return bytes(self._tracker.hydrate(self.checksum_address))
+
+    def __repr__(self):
+        return f"({self._node_class.__name__})⇀{self.nickname}↽ ({self.checksum_address})"
+
+    def _hydrated_node(self):
+        return self._tracker._hydrated.get(self.checksum_address)
+
+    @property
+    def last_seen(self):
+        node = self._hydrated_node()
+        return self._last_seen if node is None else node.last_seen
+
+    @last_seen.setter
+    def last_seen(self, last_seen):
+        node = self._hydrated_node()
+        if node is not None:
+            node.last_seen = last_seen
+        self._last_seen = last_seen
+
+    @property
+    def fleet_state_nickname_metadata(self):
+        node = self._hydrated_node()
+        return self._fleet_state_nickname_metadata if node is None else node.fleet_state_nickname_metadata
+
+    @fleet_state_nickname_metadata.setter
+    def fleet_state_nickname_metadata(self, fleet_state_nickname_metadata):
+        node = self._hydrated_node()
+        if node is not None:
+            node.fleet_state_nickname_metadata = fleet_state_nickname_metadata
+        self._fleet_state_nickname_metadata = fleet_state_nickname_metadata
+
+    def rest_url(self) -> str:
+        return self._rest_url
+
+    def nickname_icon_details(self) -> dict:
+        node = self._hydrated_node()
+        if node is not None:
+            return node.nickname_icon_details()
+
+        # as `Teacher.nickname_icon_details`, with the nickname metadata derived from the checksum address again
+        _nickname, nickname_metadata = nickname_from_seed(self.checksum_address)
+        return dict(node_class=self._node_class.__name__,
+                    version=self._node_class.TEACHER_VERSION,
+                    first_color=nickname_metadata[0][0]['hex'],
+                    first_symbol=nickname_metadata[0][1],
+                    second_color=nickname_metadata[1][0]['hex'],
+                    second_symbol=nickname_metadata[1][1],
+                    address_first6=self.checksum_address[2:8])
+
+
+class BoundedFleetStateTracker(FleetStateTracker):
+    """
+    Fleet state tracker keeping bounded memory of the known nodes: a compact summary of every known node (see
+    `NodeSummary`), and the full nodes used most recently - at most `max_hydrated_nodes` of them. Other full nodes
+    are spilled to the node storage (a `CrawlerNodeStorage`), and hydrated from it again when used.
+
+    Known nodes are their summaries. Fleet state checksums are those of `FleetStateTracker`, but with the metadata of
+    spilled nodes streamed from the node storage; only the most recent fleet states are kept, without their nodes.
+    """
+
+    DEFAULT_MAX_HYDRATED_NODES = 1000
+    MAX_STATES = 10
+
+    def __init__(self, node_storage, max_hydrated_nodes: int = DEFAULT_MAX_HYDRATED_NODES):
+        super().__init__()
+        self._node_storage = node_storage
+        self._max_hydrated_nodes = max(max_hydrated_nodes, 1)
+        self._hydrated = OrderedDict()  # checksum address -> full node, least recently used first
+
+    def __setitem__(self, checksum_address, node):
+        node = full_node(node)
+        self._cache(checksum_address, node)
+        super().__setitem__(checksum_address, NodeSummary(node, tracker=self))
+
+    def __contains__(self, item):
+        if isinstance(item, str):
+            return item in self._nodes
+        return super().__contains__(item)
+
+    def hydrate(self, checksum_address: str):
+        """The full known node, as used most recently"""
+        node = self._hydrated.get(checksum_address)
+        if node is not None:
+            self._hydrated.move_to_end(checksum_address)
+            return node
+
+        summary = self._nodes[checksum_address]
+        node = self._node_storage.load_node(checksum_address)
+        if node is None:
+            raise KeyError(f"Known node {checksum_address} not stored")
+        node.last_seen = summary._last_seen
+        node.fleet_state_nickname_metadata = summary._fleet_state_nickname_metadata
+        self._cache(checksum_address, node)
+        return node
+
+    def forget(self, checksum_address: str):
+        self._nodes.pop(checksum_address, None)
+        self._hydrated.pop(checksum_address, None)
+
+    def update_node(self, node):
+        """
+        Keep the last seen time and fleet state of a full node used outside of the tracker eg. a teacher requested
+        in a thread, which may have been evicted meanwhile: they are written through to its summary, and to its
+        full node if hydrated again; returns whether the node was evicted.
+        """
+        if isinstance(node, NodeSummary):
+            return False  # updates of summaries are kept already
+        summary = self._nodes.get(node.checksum_address)
+        hydrated_node = self._hydrated.get(node.checksum_address)
+        if summary is None or hydrated_node is node:
+            return False  # forgotten, or still in memory
+        summary._last_seen = node.last_seen
+        summary._fleet_state_nickname_metadata = node.fleet_state_nickname_metadata
+        if hydrated_node is not None:
+            hydrated_node.last_seen = node.last_seen
+            hydrated_node.fleet_state_nickname_metadata = node.fleet_state_nickname_metadata
+        return True
+
+    def _cache(self, checksum_address: str, node):
+        self._hydrated[checksum_address] = node
+        self._hydrated.move_to_end(checksum_address)
+        while len(self._hydrated) > self._max_hydrated_nodes:
+            evicted_address, evicted_node = self._hydrated.popitem(last=False)
+            summary = self._nodes.get(evicted_address)
+            if summary is None:
+                continue  # forgotten
+            summary._last_seen = evicted_node.last_seen
+            summary._fleet_state_nickname_metadata = evicted_node.fleet_state_nickname_metadata
+            self._node_storage.spill_node(evicted_node)
+
+    def record_fleet_state(self, additional_nodes_to_track=None):
+        if additional_nodes_to_track:
+            self.additional_nodes_to_track.extend(additional_nodes_to_track)
+        if not self._nodes:
+            # No news here.
+            return
+
+        checksum = self._fleet_checksum()
+        if checksum not in self.states:
+            self.checksum = checksum
+            self.updated = maya.now()
+            new_state = self.state_template(nickname=self.nickname,
+                                            metadata=self.nickname_metadata,
+                                            nodes=None,
+                                            icon=self.icon,
+                                            updated=self.updated)
+            self.states[checksum] = new_state
+            while len(self.states) > self.MAX_STATES:
+                self.states.popitem(last=False)
+            return checksum, new_state
+
+    def _fleet_checksum(self) -> str:
+        """Keccak digest of the metadata of the nodes sorted by checksum address, as `FleetStateTracker`"""
+        in_memory = [(checksum_address, node) for checksum_address, node in self._hydrated.items()
+                     if checksum_address in self._nodes]
+        in_memory.extend((node.checksum_address, node) for node in self.additional_nodes_to_track)
+        in_memory.sort(key=itemgetter(0))
+        spilled = ((checksum_address, metadata)
+                   for checksum_address, metadata in self._node_storage.iter_node_metadata()
+                   if checksum_address in self._nodes and checksum_address not in self._hydrated)
+
+        keccak = sha3.keccak_256()
+        for _checksum_address, node_or_metadata in heapq.merge(spilled, in_memory, key=itemgetter(0)):
+            keccak.update(bytes(node_or_metadata))
+        return keccak.hexdigest()
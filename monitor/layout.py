@@ -1,21 +1,80 @@
+from collections import OrderedDict
+
 import dash_core_components as dcc
 import dash_html_components as html
 
+from monitor import components
+
 MINUTE_REFRESH_RATE = 60 * 1000
 DAILY_REFRESH_RATE = MINUTE_REFRESH_RATE * 60 * 24
 
-BODY = html.Div([
+# Data changes are pushed to the page (see assets/updates.js) - polling is only a fallback
+FALLBACK_REFRESH_RATE = MINUTE_REFRESH_RATE * 10
+
+# update topic -> (update button clicked when the topic is notified, components refreshed by it)
+UPDATE_TOPICS = {
+    'states': ('state-update-button', ['prev-states']),
+    'nodes': ('node-update-button', ['known-nodes']),
+    'network': ('network-update-button', ['current-period', 'active-stakers', 'staked-tokens', 'staker-breakdown']),
+    'period': ('period-update-button', ['prev-num-stakers-graph', 'prev-locked-stake-graph', 'locked-stake-graph']),
+}
+
+# historical chart selections (InfluxDB durations) -> labels
+HISTORICAL_RANGES = OrderedDict([('24h', '24 hours'),
+                                 ('7d', '7 days'),
+                                 ('30d', '30 days'),
+                                 ('90d', '90 days'),
+                                 ('365d', 'year')])
+HISTORICAL_GRANULARITIES = OrderedDict([('1h', 'Hourly'), ('1d', 'Daily'), ('1w', 'Weekly')])
+DEFAULT_HISTORICAL_RANGE = '30d'
+DEFAULT_HISTORICAL_GRANULARITY = '1d'
+
+# history shown on the detail page of a staker
+STAKER_HISTORY_RANGE = '90d'
+STAKER_HISTORY_GRANULARITY = '1d'
+
+# recent history of each staker in the known nodes table, in (daily) periods
+NODE_HISTORY_PERIODS = 30
+
+# refresh rate (ms) of each server-rendered component i.e. the interval that drives its callback
+COMPONENT_REFRESH_RATES = {
+    'current-period': FALLBACK_REFRESH_RATE,
+    'active-stakers': FALLBACK_REFRESH_RATE,
+    'staked-tokens': FALLBACK_REFRESH_RATE,
+    'staker-breakdown': FALLBACK_REFRESH_RATE,
+    'prev-states': FALLBACK_REFRESH_RATE,
+    'known-nodes': FALLBACK_REFRESH_RATE,
+    'prev-num-stakers-graph': DAILY_REFRESH_RATE,
+    'prev-locked-stake-graph': DAILY_REFRESH_RATE,
+    'locked-stake-graph': DAILY_REFRESH_RATE,
+}
+
+
+def body(domain: str, prefilled: dict = None) -> html.Div:
+    """
+    Page layout; static widgets are rendered in place and need no callbacks.
+    Components with content in `prefilled` (component id -> children) are rendered with it on first paint.
+    """
+    prefilled = prefilled or dict()
+
+    def panel(component_id: str) -> html.Div:
+        return html.Div(prefilled.get(component_id), id=component_id)
+
+    return html.Div([
         dcc.Location(id='url', refresh=False),
+        dcc.Store(id='prefilled-components', data=list(prefilled.keys())),
 
-        # Update buttons also used for WS topic notifications
+        # Update buttons also used for topic notifications pushed by the server (see UPDATE_TOPICS)
         html.Div([
             html.Img(src='/assets/nucypher_logo.svg', className='banner'),  # TODO: Configure assets path
-            html.Div(id='header'),
+            html.Div(components.header(), id='header'),
             html.Div([
                 html.Button("Refresh States", id='state-update-button', type='submit',
                             className='nucypher-button button-primary'),
                 html.Button("Refresh Known Nodes", id='node-update-button', type='submit',
                             className='nucypher-button button-primary'),
+                html.Button(id='network-update-button', style={'display': 'none'}),
+                html.Button(id='period-update-button', style={'display': 'none'}),
             ])
         ], id="controls"),
 
@@ -27,30 +86,47 @@ BODY = html.Div([
 
                 # Stats
                 html.Div([
-                    html.Div(id='current-period'),
-                    html.Div(id='time-remaining'),
-                    html.Div(id='domains'),
-                    html.Div(id='active-stakers'),
-                    html.Div(id='staked-tokens'),
+                    panel('current-period'),
+                    html.Div([html.H4("Next Period"), html.H5(id='time-remaining-value')], id='time-remaining'),
+                    html.Div([html.H4('Domain'), html.H5(domain, id='domain-value')], id='domains'),
+                    panel('active-stakers'),
+                    panel('staked-tokens'),
                 ], id='stats'),
 
                 # Charts
                 html.Div([
-                    html.Div(id='staker-breakdown'),
-                    html.Div(id='prev-num-stakers-graph'),
-                    html.Div(id='prev-locked-stake-graph'),
-                    html.Div(id='locked-stake-graph'),
-                    html.Div(id='prev-states'),
+                    panel('staker-breakdown'),
+                    html.Div([
+                        dcc.Dropdown(id='historical-range',
+                                     options=[{'label': f'Previous {label}', 'value': value}
+                                              for value, label in HISTORICAL_RANGES.items()],
+                                     value=DEFAULT_HISTORICAL_RANGE,
+                                     clearable=False,
+                                     searchable=False),
+                        dcc.Dropdown(id='historical-granularity',
+                                     options=[{'label': label, 'value': value}
+                                              for value, label in HISTORICAL_GRANULARITIES.items()],
+                                     value=DEFAULT_HISTORICAL_GRANULARITY,
+                                     clearable=False,
+                                     searchable=False),
+                    ], id='historical-selection'),
+                    panel('prev-num-stakers-graph'),
+                    panel('prev-locked-stake-graph'),
+                    panel('locked-stake-graph'),
+                    panel('prev-states'),
                 ], id='widgets'),
 
                 # Known Nodes Table
                 html.Div([
-                    html.Div(id='known-nodes'),
+                    panel('known-nodes'),
                 ])
             ]),
 
         ], id='main'),
 
+        # Staker detail page - shown instead of the main page for staker routes
+        html.Div(id='staker-detail'),
+
         dcc.Interval(
             id='minute-interval',
             interval=MINUTE_REFRESH_RATE,
@@ -58,8 +134,8 @@ BODY = html.Div([
         ),
 
         dcc.Interval(
-            id='half-minute-interval',
-            interval=(MINUTE_REFRESH_RATE / 2),
+            id='fallback-interval',
+            interval=FALLBACK_REFRESH_RATE,
             n_intervals=0,
         ),
 
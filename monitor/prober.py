@@ -0,0 +1,134 @@
+import asyncio
+import random
+import ssl
+from typing import Dict, List, Tuple
+from urllib.parse import urlsplit
+
+
+def split_rest_url(rest_url: str) -> Tuple[str, int]:
+    """(host, port) of a node's rest url i.e. 'host:port', with or without a scheme"""
+    parsed = urlsplit(rest_url if '//' in rest_url else f'//{rest_url}')
+    if not parsed.hostname or not parsed.port:
+        raise ValueError(f'Invalid rest url {rest_url}')
+    return parsed.hostname, parsed.port
+
+
+class NodeProber:
+    """
+    Checks that the REST endpoints of nodes are reachable, and how fast they respond.
+
+    Each probe opens a new connection to the node and requests its status page, measuring the TCP connect time,
+    the TLS handshake time and the total latency up to the status line of the response; a node is reachable
+    if it responds at all. Probes run concurrently on an asyncio event loop, with at most `max_connections` open
+    at a time and each probe bounded by `timeout`. Probes are started at a random offset within `spread` seconds,
+    so that nodes aren't all hit at the same instant and consecutive rounds don't probe nodes in the same order.
+    """
+
+    DEFAULT_MAX_CONNECTIONS = 500
+    DEFAULT_TIMEOUT = 5  # seconds, per node
+    DEFAULT_SPREAD = 0  # seconds
+
+    STATUS_PATH = '/status'
+    STATUS_REQUEST = 'GET {path} HTTP/1.1\r\nHost: {host}:{port}\r\nUser-Agent: nucypher-monitor\r\n' \
+                     'Accept: */*\r\nConnection: close\r\n\r\n'
+
+    MEASUREMENT = 'node_reachability'
+    LINE_PROTOCOL = '{measurement},staker_address={staker_address} {fields} {timestamp}'
+    FIELDS = ('reachable', 'status', 'latency', 'connect_time', 'tls_handshake_time', 'error')
+
+    def __init__(self,
+                 max_connections: int = DEFAULT_MAX_CONNECTIONS,
+                 timeout: float = DEFAULT_TIMEOUT,
+                 spread: float = DEFAULT_SPREAD,
+                 use_tls: bool = True):
+        self._max_connections = max_connections
+        self._timeout = timeout
+        self._spread = spread
+
+        self._ssl_context = None
+        if use_tls:
+            # nodes use self-signed certificates; only the handshake itself is of interest
+            self._ssl_context = ssl.create_default_context()
+            self._ssl_context.check_hostname = False
+            self._ssl_context.verify_mode = ssl.CERT_NONE
+
+    async def probe(self, rest_url: str) -> Dict:
+        """Result of probing the node at the rest url; latencies are in seconds"""
+        result = dict(reachable=False, status=None, latency=None,
+                      connect_time=None, tls_handshake_time=None, error=None)
+        try:
+            host, port = split_rest_url(rest_url)
+            await asyncio.wait_for(self._probe(host, port, result), timeout=self._timeout)
+        except asyncio.TimeoutError:
+            result['error'] = 'timeout'
+        except (OSError, ssl.SSLError, ValueError, asyncio.IncompleteReadError) as e:
+            result['error'] = e.__class__.__name__
+        return result
+
+    async def _probe(self, host: str, port: int, result: Dict):
+        loop = asyncio.get_event_loop()
+        begin = loop.time()
+
+        reader = asyncio.StreamReader()
+        protocol = asyncio.StreamReaderProtocol(reader)
+        transport, _ = await loop.create_connection(lambda: protocol, host, port)
+        try:
+            connected = loop.time()
+            result['connect_time'] = connected - begin
+            if self._ssl_context is not None:
+                transport = await loop.start_tls(transport, protocol, self._ssl_context, server_hostname=host)
+                result['tls_handshake_time'] = loop.time() - connected
+
+            transport.write(self.STATUS_REQUEST.format(path=self.STATUS_PATH, host=host, port=port).encode())
+            status_line = await reader.readuntil(b'\r\n')
+            result['latency'] = loop.time() - begin
+        finally:
+            transport.close()
+
+        try:
+            # e.g. HTTP/1.1 200 OK
+            version, status = status_line.split()[:2]
+            result['status'] = int(status)
+        except ValueError:
+            raise ValueError(f'Invalid status line {status_line}')
+        result['reachable'] = True
+
+    async def probe_all(self, nodes: Dict[str, str]) -> Dict[str, Dict]:
+        """Probe the nodes (staker address -> rest url) concurrently; returns staker address -> probe result"""
+        connections = asyncio.Semaphore(self._max_connections)
+
+        async def probe_node(rest_url: str) -> Dict:
+            if self._spread:
+                await asyncio.sleep(random.uniform(0, self._spread))
+            async with connections:
+                return await self.probe(rest_url)
+
+        results = await asyncio.gather(*[probe_node(rest_url) for rest_url in nodes.values()])
+        return dict(zip(nodes, results))
+
+    def run(self, nodes: Dict[str, str]) -> Dict[str, Dict]:
+        """Blocking probe of the nodes on a dedicated event loop i.e. for use in a thread"""
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(self.probe_all(nodes))
+        finally:
+            loop.close()
+
+    @classmethod
+    def to_line_protocol(cls, results: Dict[str, Dict], timestamp: int) -> List[str]:
+        """Points of the probe results, omitting the fields not measured"""
+        data = []
+        for staker_address, result in results.items():
+            fields = [f'reachable={str(result["reachable"]).lower()}']
+            if result['status'] is not None:
+                fields.append(f'status={result["status"]}i')
+            for field in ('latency', 'connect_time', 'tls_handshake_time'):
+                if result[field] is not None:
+                    fields.append(f'{field}={float(result[field])}')
+            if result['error'] is not None:
+                fields.append(f'error="{result["error"]}"')
+            data.append(cls.LINE_PROTOCOL.format(measurement=cls.MEASUREMENT,
+                                                 staker_address=staker_address,
+                                                 fields=','.join(fields),
+                                                 timestamp=timestamp))
+        return data
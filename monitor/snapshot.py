@@ -0,0 +1,155 @@
+import mmap
+import os
+import struct
+import tempfile
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from threading import Lock
+from typing import List, Optional, Sequence
+
+from nucypher.config.constants import DEFAULT_CONFIG_ROOT
+
+from monitor.stakers import StakerTable
+
+
+class DashboardSnapshot:
+    """
+    Immutable view of the crawler's data read by the dashboard: the known nodes (rows of the node table of the
+    crawler's db), the current teacher and the staker table of the last crawl cycle. The crawler publishes it as a file
+    replaced atomically (see `publish_snapshot`), so the dashboard reads it without touching the crawler's db.
+
+    The file is a header (magic, version, number of nodes), followed by length prefixed sections: the names of
+    the node columns, the teacher, the values of each node column, and the staker table (see `StakerTable.to_bytes`).
+    Names and values of a section are utf-8 text separated by NUL.
+    """
+
+    class InvalidSnapshot(ValueError):
+        pass
+
+    FILE_NAME = 'crawler-snapshot.bin'
+    DEFAULT_FILEPATH = os.path.join(DEFAULT_CONFIG_ROOT, FILE_NAME)
+
+    # the crawler publishes the snapshot again at least this often, even if unchanged; snapshots older than the max
+    # age are of a crawler no longer running, and are not read
+    REPUBLISH_INTERVAL = timedelta(minutes=5)
+    DEFAULT_MAX_AGE = 3 * REPUBLISH_INTERVAL
+
+    MAGIC = b'NCMS'
+    VERSION = 1
+    SEPARATOR = '\x00'
+
+    _HEADER = struct.Struct('<4sHI')  # magic, version, number of nodes
+    _SECTION_LENGTH = struct.Struct('<Q')
+
+    def __init__(self, known_nodes: OrderedDict, teacher_checksum: Optional[str], staker_table: Optional[StakerTable]):
+        self.known_nodes = known_nodes  # staker address -> node info, as `CrawlerNodeMetadataDBClient`
+        self.teacher_checksum = teacher_checksum
+        self.staker_table = staker_table
+
+    @classmethod
+    def serialize(cls,
+                  node_columns: Sequence[str],
+                  node_rows: List[tuple],
+                  teacher_checksum: Optional[str],
+                  staker_table: Optional[StakerTable]) -> bytes:
+        """Snapshot of the rows of the node table (first column the staker address), teacher and staker table"""
+        sections = [cls.SEPARATOR.join(node_columns).encode(), (teacher_checksum or '').encode()]
+        columns = zip(*node_rows) if node_rows else [()] * len(node_columns)
+        for column in columns:
+            sections.append(cls.SEPARATOR.join('' if value is None else str(value) for value in column).encode())
+        sections.append(staker_table.to_bytes() if staker_table is not None else b'')
+
+        data = [cls._HEADER.pack(cls.MAGIC, cls.VERSION, len(node_rows))]
+        for section in sections:
+            data.append(cls._SECTION_LENGTH.pack(len(section)))
+            data.append(section)
+        return b''.join(data)
+
+    @classmethod
+    def from_buffer(cls, buffer) -> 'DashboardSnapshot':
+        """Parse a serialized snapshot from a buffer eg. a memory map of its file"""
+        magic, version, num_nodes = cls._HEADER.unpack_from(buffer)
+        if magic != cls.MAGIC or version != cls.VERSION:
+            raise cls.InvalidSnapshot(f"Unsupported snapshot (magic {magic}, version {version})")
+
+        sections = []
+        offset = cls._HEADER.size
+        while offset < len(buffer):
+            section_length, = cls._SECTION_LENGTH.unpack_from(buffer, offset)
+            offset += cls._SECTION_LENGTH.size
+            sections.append(buffer[offset:offset + section_length])
+            offset += section_length
+        node_columns, teacher_checksum, *columns, staker_table = sections
+
+        node_columns = node_columns.decode().split(cls.SEPARATOR)
+        if len(columns) != len(node_columns):
+            raise cls.InvalidSnapshot(f"Expected {len(node_columns)} node columns, found {len(columns)}")
+        columns = [column.decode().split(cls.SEPARATOR) if num_nodes else [] for column in columns]
+        known_nodes = OrderedDict((row[0], dict(zip(node_columns, row))) for row in zip(*columns))
+        return cls(known_nodes=known_nodes,
+                   teacher_checksum=teacher_checksum.decode() or None,
+                   staker_table=StakerTable.from_bytes(staker_table) if staker_table else None)
+
+
+def publish_snapshot(filepath: str, data: bytes):
+    """Write a snapshot to a temporary file next to `filepath`, then rename it to `filepath` - readers either see
+    the previous snapshot or this one, never a partial write"""
+    directory = os.path.dirname(os.path.abspath(filepath))
+    fd, temp_filepath = tempfile.mkstemp(dir=directory, prefix=f'.{os.path.basename(filepath)}.')
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        os.chmod(temp_filepath, 0o644)  # readable by the dashboard
+        os.replace(temp_filepath, filepath)
+    except BaseException:
+        if os.path.exists(temp_filepath):
+            os.remove(temp_filepath)
+        raise
+
+
+class SnapshotReader:
+    """
+    The snapshot last published at a filepath. A published snapshot is memory-mapped and parsed once, then cached
+    until it is replaced by the next one; None until a snapshot is published, and once it is older than `max_age`
+    (by its modification time) i.e. the crawler stopped publishing.
+    """
+
+    def __init__(self, filepath: str, max_age: timedelta = DashboardSnapshot.DEFAULT_MAX_AGE):
+        self.filepath = filepath
+        self._max_age = max_age.total_seconds()
+        self._file_id = None  # identifies the file of the cached snapshot
+        self._snapshot = None
+        self._lock = Lock()  # dash callbacks run in threads
+
+    def get(self) -> Optional[DashboardSnapshot]:
+        try:
+            file = open(self.filepath, 'rb')
+        except FileNotFoundError:
+            return None
+        with file, self._lock:
+            # identity of the opened file, which stays the same even if replaced in the meantime
+            stat = os.fstat(file.fileno())
+            if self._is_stale(stat):
+                return None
+            file_id = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+            if file_id != self._file_id:
+                with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                    self._snapshot = DashboardSnapshot.from_buffer(buffer)
+                self._file_id = file_id
+            return self._snapshot
+
+    def fingerprint(self) -> Optional[tuple]:
+        """Changes whenever a snapshot is published; None whenever `get` is"""
+        try:
+            stat = os.stat(self.filepath)
+        except FileNotFoundError:
+            return None
+        if self._is_stale(stat):
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _is_stale(self, stat: os.stat_result) -> bool:
+        return time.time() - stat.st_mtime > self._max_age
@@ -0,0 +1,142 @@
+import struct
+from array import array
+from typing import Iterable, List, Optional, Tuple
+
+from nucypher.blockchain.eth.interfaces import BlockchainInterface
+
+
+class StakerTable:
+    """
+    Blockchain information of the known stakers as of a crawl cycle, held in columns - a list of addresses or an
+    array of numbers per field - rather than in a dict per staker. Rows are indexed by a staker id which is stable
+    across cycles for as long as the staker is known.
+
+    Network aggregates are computed over whole columns by builtins (`sum`, `list.count`, `array.count`),
+    and the table is serialized as the raw bytes of its columns for other processes i.e. the dashboard.
+    """
+
+    ADDRESS_LENGTH = 42  # checksum addresses
+    ADDRESS_COLUMNS = ('staker_address', 'worker_address')
+    # (name, array typecode) - names are those of the fields of `Crawler.BLOCKCHAIN_DB_LINE_PROTOCOL`
+    NUMERIC_COLUMNS = (('start_date', 'd'), ('end_date', 'd'), ('stake', 'd'), ('locked_stake', 'd'),
+                       ('last_confirmed_period', 'q'))
+
+    _HEADER = struct.Struct('<qqq')  # current period, block time, number of stakers
+
+    def __init__(self, current_period: int = 0, block_time: int = 0):
+        self.current_period = current_period
+        self.block_time = block_time
+        self._ids = dict()  # staker address -> staker id, in order of staker id
+        for name in self.ADDRESS_COLUMNS:
+            setattr(self, name, list())
+        for name, typecode in self.NUMERIC_COLUMNS:
+            setattr(self, name, array(typecode))
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __contains__(self, staker_address: str):
+        return staker_address in self._ids
+
+    def get_id(self, staker_address: str) -> Optional[int]:
+        return self._ids.get(staker_address)
+
+    def columns(self) -> Tuple:
+        return tuple(getattr(self, name) for name in self.column_names())
+
+    @classmethod
+    def column_names(cls) -> Tuple[str, ...]:
+        return cls.ADDRESS_COLUMNS + tuple(name for name, _typecode in cls.NUMERIC_COLUMNS)
+
+    def start_cycle(self, current_period: int, block_time: int, staker_addresses: Iterable[str]):
+        """Begin a crawl cycle of the stakers; rows of other stakers are dropped, and the remaining rows renumbered"""
+        self.current_period = current_period
+        self.block_time = block_time
+        staker_addresses = set(staker_addresses)
+        if staker_addresses.issuperset(self._ids):
+            return  # staker ids unchanged
+
+        kept_ids = [staker_id for staker_address, staker_id in self._ids.items() if staker_address in staker_addresses]
+        for name in self.ADDRESS_COLUMNS:
+            column = getattr(self, name)
+            setattr(self, name, [column[staker_id] for staker_id in kept_ids])
+        for name, typecode in self.NUMERIC_COLUMNS:
+            column = getattr(self, name)
+            setattr(self, name, array(typecode, (column[staker_id] for staker_id in kept_ids)))
+        self._ids = {staker_address: staker_id for staker_id, staker_address in enumerate(self.staker_address)}
+
+    def update(self,
+               staker_address: str,
+               worker_address: str,
+               start_date: float,
+               end_date: float,
+               stake: float,
+               locked_stake: float,
+               last_confirmed_period: int) -> int:
+        """Set the row of the staker, added if new; returns its staker id"""
+        values = (worker_address, start_date, end_date, stake, locked_stake, last_confirmed_period)
+        columns = self.columns()[1:]
+        staker_id = self._ids.get(staker_address)
+        if staker_id is None:
+            staker_id = self._ids[staker_address] = len(self.staker_address)
+            self.staker_address.append(staker_address)
+            for column, value in zip(columns, values):
+                column.append(value)
+        else:
+            for column, value in zip(columns, values):
+                column[staker_id] = value
+        return staker_id
+
+    def partition(self) -> Tuple[int, int, int]:
+        """Number of confirmed (next period), pending (current period) and inactive stakers"""
+        confirmed = self.last_confirmed_period.count(self.current_period + 1)
+        pending = self.last_confirmed_period.count(self.current_period)
+        return confirmed, pending, len(self) - confirmed - pending
+
+    def summary(self) -> dict:
+        """Network aggregates of the stakers i.e. the fields of `Crawler.NETWORK_SUMMARY_LINE_PROTOCOL`"""
+        confirmed, pending, inactive = self.partition()
+        return dict(total_locked=sum(self.locked_stake, 0.0),
+                    total_staked=sum(self.stake, 0.0),
+                    num_stakers=len(self),
+                    confirmed=confirmed,
+                    pending=pending,
+                    inactive=inactive,
+                    headless=self.worker_address.count(BlockchainInterface.NULL_ADDRESS))
+
+    def to_line_protocol(self, template: str, **constants) -> List[str]:
+        """
+        A line of the line protocol `template` per staker, with the fields that aren't columns set to `constants`.
+        The template is formatted with the constants once, and then with the values of each row by position.
+        """
+        positions = {name: f'{{{index}}}' for index, name in enumerate(self.column_names())}
+        row_template = template.format(**constants, **positions)
+        return [row_template.format(*row) for row in zip(*self.columns())]
+
+    def to_bytes(self) -> bytes:
+        """Header, then the addresses of each address column, then the (native) bytes of each numeric column"""
+        data = [self._HEADER.pack(self.current_period, self.block_time, len(self))]
+        for name in self.ADDRESS_COLUMNS:
+            data.append(''.join(getattr(self, name)).encode())
+        for name, _typecode in self.NUMERIC_COLUMNS:
+            data.append(getattr(self, name).tobytes())
+        return b''.join(data)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'StakerTable':
+        current_period, block_time, num_stakers = cls._HEADER.unpack_from(data)
+        table = cls(current_period=current_period, block_time=block_time)
+        offset = cls._HEADER.size
+        for name in cls.ADDRESS_COLUMNS:
+            end = offset + num_stakers * cls.ADDRESS_LENGTH
+            addresses = data[offset:end].decode()
+            setattr(table, name, [addresses[index:index + cls.ADDRESS_LENGTH]
+                                  for index in range(0, len(addresses), cls.ADDRESS_LENGTH)])
+            offset = end
+        for name, typecode in cls.NUMERIC_COLUMNS:
+            column = getattr(table, name)
+            end = offset + num_stakers * column.itemsize
+            column.frombytes(data[offset:end])
+            offset = end
+        table._ids = {staker_address: staker_id for staker_id, staker_address in enumerate(table.staker_address)}
+        return table
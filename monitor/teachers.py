@@ -0,0 +1,70 @@
+import random
+import time
+from typing import Dict, List
+
+
+class TeacherScheduler:
+    """
+    Chooses the teachers to learn from in each round of learning, preferring teachers that respond fast and teach
+    many new nodes.
+
+    A teacher's score is the number of new nodes it teaches per second of response latency, from exponentially
+    weighted moving averages of both (so that a teacher teaching nothing new is still scored by its latency).
+    Each round learns from the best scored teachers, and from a teacher not scored yet (or a random one) so that
+    other teachers get a chance. A teacher failing to respond backs off its host, for exponentially longer with every
+    consecutive failure of the host.
+    """
+
+    DEFAULT_TEACHERS_PER_ROUND = 3
+    SMOOTHING = 0.3  # weight of the latest response in the moving averages
+    BASE_BACKOFF = 30  # seconds
+    MAX_BACKOFF = 60 * 60
+
+    def __init__(self, teachers_per_round: int = DEFAULT_TEACHERS_PER_ROUND):
+        self.teachers_per_round = teachers_per_round
+        self._latencies = dict()  # teacher checksum address -> moving average of response latency
+        self._new_nodes = dict()  # teacher checksum address -> moving average of new nodes taught
+        self._failures = dict()  # host -> (consecutive failures, backed off until)
+
+    def score(self, checksum_address: str) -> float:
+        """New nodes taught per second of latency; 0 for teachers not scored yet"""
+        if checksum_address not in self._latencies:
+            return 0
+        return (1 + self._new_nodes[checksum_address]) / max(self._latencies[checksum_address], 0.001)
+
+    def is_backed_off(self, host: str, now: float = None) -> bool:
+        now = time.time() if now is None else now
+        return host in self._failures and self._failures[host][1] > now
+
+    def select(self, teachers: Dict[str, str], now: float = None) -> List[str]:
+        """The teachers (checksum address -> host) to learn from in a round, best first; backed off hosts excluded"""
+        available = [checksum_address for checksum_address, host in teachers.items()
+                     if not self.is_backed_off(host, now=now)]
+        scored = sorted((checksum_address for checksum_address in available if checksum_address in self._latencies),
+                        key=self.score, reverse=True)
+        unscored = [checksum_address for checksum_address in available if checksum_address not in self._latencies]
+
+        # best scored teachers, with a place left for trying out another teacher (unless learning from only one)
+        selected = scored[:max(self.teachers_per_round - 1, 1)]
+        others = unscored or scored[len(selected):]
+        selected.extend(random.sample(others, min(len(others), self.teachers_per_round - len(selected))))
+        return selected
+
+    def record_response(self, checksum_address: str, host: str, latency: float, new_nodes: int):
+        if checksum_address in self._latencies:
+            self._latencies[checksum_address] += self.SMOOTHING * (latency - self._latencies[checksum_address])
+            self._new_nodes[checksum_address] += self.SMOOTHING * (new_nodes - self._new_nodes[checksum_address])
+        else:
+            self._latencies[checksum_address] = latency
+            self._new_nodes[checksum_address] = new_nodes
+        self._failures.pop(host, None)
+
+    def record_failure(self, checksum_address: str, host: str, now: float = None):
+        now = time.time() if now is None else now
+        failures = self._failures.get(host, (0, None))[0] + 1
+        backoff = min(self.BASE_BACKOFF * 2 ** (failures - 1), self.MAX_BACKOFF)
+        self._failures[host] = (failures, now + backoff)
+
+    def forget(self, checksum_address: str):
+        self._latencies.pop(checksum_address, None)
+        self._new_nodes.pop(checksum_address, None)
@@ -0,0 +1,846 @@
+import re
+import sqlite3
+import threading
+from collections import OrderedDict, defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import requests
+from influxdb import InfluxDBClient
+from maya import MayaDT
+from twisted.logger import Logger
+
+EPOCH = datetime(year=1970, month=1, day=1)  # InfluxDB aligns GROUP BY time() buckets to the epoch
+
+DURATION_UNITS = {'s': 'seconds', 'm': 'minutes', 'h': 'hours', 'd': 'days', 'w': 'weeks'}
+
+# InfluxDB line protocol: measurement[,tag=value...] field=value[,field=value...] timestamp
+_KEY = r'(?:[^ ,=\\"]|\\.)+'
+_FIELD_VALUE = r'(?:"(?:[^"\\]|\\.)*"|[^ ,"]+)'
+LINE_PROTOCOL_POINT = re.compile(rf'((?:[^ ,\\]|\\.)+)((?:,{_KEY}={_KEY})*) '
+                                 rf'({_KEY}={_FIELD_VALUE}(?:,{_KEY}={_FIELD_VALUE})*) '
+                                 rf'(-?\d+)$')
+LINE_PROTOCOL_TAG = re.compile(rf'({_KEY})=({_KEY})')
+LINE_PROTOCOL_FIELD = re.compile(rf'({_KEY})=({_FIELD_VALUE})')
+LINE_PROTOCOL_ESCAPE = re.compile(r'\\(.)')
+
+
+def parse_duration(duration: str) -> Optional[timedelta]:
+    """InfluxDB duration literal eg. '5w' as a timedelta; None for an infinite duration"""
+    if duration.upper() == 'INF':
+        return None
+    return timedelta(**{DURATION_UNITS[duration[-1]]: int(duration[:-1])})
+
+
+def parse_line_protocol(point: str) -> Tuple[str, Dict[str, str], Dict[str, Any], int]:
+    """
+    Measurement, tags, fields and timestamp of a point in InfluxDB line protocol, eg.
+    'weather,location=us-midwest temperature=82,humidity=71i,station="a b" 1465839830'
+    """
+    match = LINE_PROTOCOL_POINT.match(point.strip())
+    if not match:
+        raise ValueError(f'Invalid line protocol point: {point}')
+    measurement, tag_set, field_set, timestamp = match.groups()
+
+    tags = {_unescape(key): _unescape(value) for key, value in LINE_PROTOCOL_TAG.findall(tag_set)}
+    fields = {_unescape(key): _parse_field_value(value) for key, value in LINE_PROTOCOL_FIELD.findall(field_set)}
+    return _unescape(measurement), tags, fields, int(timestamp)
+
+
+def _unescape(text: str) -> str:
+    return LINE_PROTOCOL_ESCAPE.sub(r'\1', text) if '\\' in text else text
+
+
+def _parse_field_value(value: str):
+    if value.startswith('"'):
+        return _unescape(value[1:-1])
+    if value.endswith('i'):
+        return int(value[:-1])
+    if value in ('t', 'T', 'true', 'True', 'TRUE'):
+        return True
+    if value in ('f', 'F', 'false', 'False', 'FALSE'):
+        return False
+    return float(value)
+
+
+def _rfc3339(time: datetime) -> str:
+    return MayaDT.from_datetime(time).rfc3339()
+
+
+def _influxql_string(value: str) -> str:
+    return "'{}'".format(value.replace('\\', '\\\\').replace("'", "\\'"))
+
+
+def _sql_string(value: str) -> str:
+    return "'{}'".format(value.replace("'", "''"))
+
+
+class TimeSeriesStorage:
+    """
+    Storage of the crawler's time-series data.
+
+    Points are written in batches of InfluxDB line protocol with timestamps in seconds, and read back
+    aggregated per time bucket - buckets are aligned to the epoch and each row has the rfc3339 'time'
+    of the beginning of its bucket.
+    """
+
+    def ensure_exists(self, rollups: tuple = ()) -> None:
+        """
+        Create the database if needed. `rollups` are the measurements kept at coarser resolutions once the
+        raw data expires, if supported: (name suffix, measurement, fields, tag to group by).
+        """
+        raise NotImplementedError
+
+    def refresh_rollups(self, rollups: tuple, range_begin: datetime, range_end: datetime) -> None:
+        """Recompute the `rollups` of the range, eg. after points were written retroactively, if supported"""
+        raise NotImplementedError
+
+    def get_retention(self) -> Optional[timedelta]:
+        """How long raw points are kept; None if forever"""
+        raise NotImplementedError
+
+    def get_rollup_delay(self) -> timedelta:
+        """How long after a bucket closes its rollups may still be updated; zero without rollups"""
+        raise NotImplementedError
+
+    def write_points(self, points: List[str]) -> bool:
+        """Write a batch of points in line protocol; returns whether the batch was written"""
+        raise NotImplementedError
+
+    def get_last_values(self,
+                        measurement: str,
+                        fields: Dict[str, str],
+                        range_begin: datetime,
+                        range_end: datetime,
+                        granularity: str,
+                        tags: Dict[str, str] = None) -> List[Dict]:
+        """
+        Last value of each field per bucket, as {'time': ..., alias: value} for `fields` of alias -> field;
+        only points with the `tags` values (tag -> value) are included, if specified.
+        """
+        raise NotImplementedError
+
+    def get_last_values_by_tag(self,
+                               measurement: str,
+                               fields: Dict[str, str],
+                               tag: str,
+                               tag_values: List[str],
+                               range_begin: datetime,
+                               range_end: datetime,
+                               granularity: str) -> Dict[str, List[Dict]]:
+        """
+        Last value of each field per bucket for each of the `tag_values`, read by a single query,
+        as tag value -> [{'time': ..., alias: value}]; tag values without any points are omitted.
+        """
+        raise NotImplementedError
+
+    def get_tag_totals(self,
+                       measurement: str,
+                       field: str,
+                       tag: str,
+                       range_begin: datetime,
+                       range_end: datetime,
+                       granularity: str) -> List[Dict]:
+        """
+        Sum and count of the last value of `field` for each value of `tag` per bucket,
+        as {'time': ..., 'sum': ..., 'count': ...}
+        """
+        raise NotImplementedError
+
+    def get_schema(self, measurement: str) -> Dict[str, str]:
+        """Type of each tag and field of the measurement: 'string', 'float', 'integer' or 'boolean'"""
+        raise NotImplementedError
+
+    def get_first_time(self, measurement: str) -> Optional[datetime]:
+        """Time of the earliest raw point of the measurement; None if there are none"""
+        raise NotImplementedError
+
+    def get_points(self, measurement: str, range_begin: datetime, range_end: datetime) -> List[Dict]:
+        """Raw points in the range ordered by time, as {'time': seconds since the epoch, tag/field: value}"""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        raise NotImplementedError
+
+
+class InfluxDBTimeSeriesStorage(TimeSeriesStorage):
+    """
+    Time-series data in InfluxDB; raw data is kept for a few weeks, and rolled up into coarser
+    retention tiers by continuous queries.
+    """
+
+    RETENTION_POLICY_NAME = 'network_info_retention'
+    RETENTION_POLICY_PERIOD = '5w'  # 5 weeks of data
+    RETENTION_POLICY_REPLICATION = '1'
+
+    # Rollups of the raw data, finest first: (retention policy name, retention period, resolution).
+    # Each is populated by a continuous query over the preceding (finer) tier.
+    ROLLUP_RETENTION_POLICIES = (('network_info_hourly', '52w', '1h'),  # a year of hourly data
+                                 ('network_info_daily', 'INF', '1d'))   # daily data forever
+
+    def __init__(self, host: str, port: int, database: str):
+        self.log = Logger(self.__class__.__name__)
+        self._host = host
+        self._port = port
+        self._database = database
+        self._client = InfluxDBClient(host=host, port=port, database=database)
+        self._retention_tiers = None
+
+    #
+    # Provisioning
+    #
+
+    def ensure_exists(self, rollups: tuple = ()) -> None:
+        try:
+            db_list = self._client.get_list_database()
+        except requests.exceptions.ConnectionError:
+            raise ConnectionError(f"No connection to InfluxDB at {self._host}:{self._port}")
+        found_db = (list(filter(lambda db: db['name'] == self._database, db_list)))
+        if len(found_db) == 0:
+            # db not previously created
+            self.log.info(f'Database {self._database} not found, creating it')
+            self._client.create_database(self._database)
+        else:
+            self.log.info(f'Database {self._database} already exists, no need to create it')
+
+        # retention tiers are provisioned individually so that existing databases are upgraded
+        self._ensure_retention_policies()
+        self._ensure_continuous_queries(rollups)
+
+    def _ensure_retention_policies(self):
+        existing_policies = {policy['name'] for policy in
+                             self._client.get_list_retention_policies(database=self._database)}
+
+        if self.RETENTION_POLICY_NAME not in existing_policies:
+            # TODO: review defaults for retention policy
+            self._client.create_retention_policy(name=self.RETENTION_POLICY_NAME,
+                                                 duration=self.RETENTION_POLICY_PERIOD,
+                                                 replication=self.RETENTION_POLICY_REPLICATION,
+                                                 database=self._database,
+                                                 default=True)
+
+        for policy_name, duration, _resolution in self.ROLLUP_RETENTION_POLICIES:
+            if policy_name in existing_policies:
+                continue
+            self.log.info(f'Creating retention policy {policy_name} ({duration})')
+            self._client.create_retention_policy(name=policy_name,
+                                                 duration=duration,
+                                                 replication=self.RETENTION_POLICY_REPLICATION,
+                                                 database=self._database,
+                                                 default=False)
+
+    def _ensure_continuous_queries(self, rollups: tuple):
+        result = self._client.query('SHOW CONTINUOUS QUERIES')
+        existing_queries = {query['name'] for query in result.get_points(measurement=self._database)}
+
+        source_policy = self.RETENTION_POLICY_NAME
+        source_duration = self.RETENTION_POLICY_PERIOD
+        for policy_name, duration, resolution in self.ROLLUP_RETENTION_POLICIES:
+            for suffix, measurement, fields, tag in rollups:
+                query_name = f'cq_{policy_name}{suffix}'
+                if query_name in existing_queries:
+                    continue
+
+                self.log.info(f'Creating continuous query {query_name}')
+                rollup = dict(source_policy=source_policy,
+                              target_policy=policy_name,
+                              resolution=resolution,
+                              measurement=measurement,
+                              fields=fields,
+                              tag=tag)
+                select = self._rollup_select(**rollup)
+                self._client.query(f'CREATE CONTINUOUS QUERY "{query_name}" '
+                                   f'ON "{self._database}" BEGIN {select} END',
+                                   method='POST')
+
+                # continuous queries only process new data - rollup the data already retained by the source tier
+                self._client.query(self._rollup_select(since=source_duration, **rollup), method='POST')
+            source_policy, source_duration = policy_name, duration
+
+    def _rollup_select(self,
+                       source_policy: str,
+                       target_policy: str,
+                       resolution: str,
+                       measurement: str,
+                       fields: tuple,
+                       tag: str = None,
+                       since: str = None,
+                       range_begin: datetime = None,
+                       range_end: datetime = None) -> str:
+        selectors = ', '.join(f'LAST({field}) AS {field}' for field in fields)
+        if since:
+            where_clause = f'WHERE time >= now() - {since} '
+        elif range_begin:
+            where_clause = f"WHERE time >= '{_rfc3339(range_begin)}' AND time < '{_rfc3339(range_end)}' "
+        else:
+            where_clause = ''
+        group_by_tag = f', {tag}' if tag else ''
+        return (f'SELECT {selectors} '
+                f'INTO "{self._database}"."{target_policy}"."{measurement}" '
+                f'FROM "{self._database}"."{source_policy}"."{measurement}" '
+                f'{where_clause}'
+                f'GROUP BY time({resolution}){group_by_tag}')
+
+    def refresh_rollups(self, rollups: tuple, range_begin: datetime, range_end: datetime) -> None:
+        # continuous queries only process recent intervals - each tier is recomputed from the preceding tier
+        source_policy = self.RETENTION_POLICY_NAME
+        for policy_name, _duration, resolution in self.ROLLUP_RETENTION_POLICIES:
+            # whole buckets, so that the data already in them is rolled up too
+            bucket = parse_duration(resolution)
+            begin = EPOCH + ((range_begin - EPOCH) // bucket) * bucket
+            end = EPOCH + ((range_end - EPOCH - timedelta(seconds=1)) // bucket + 1) * bucket
+            for _suffix, measurement, fields, tag in rollups:
+                select = self._rollup_select(source_policy=source_policy,
+                                             target_policy=policy_name,
+                                             resolution=resolution,
+                                             measurement=measurement,
+                                             fields=fields,
+                                             tag=tag,
+                                             range_begin=begin,
+                                             range_end=end)
+                self._client.query(select, method='POST')
+            source_policy = policy_name
+
+    def get_retention(self) -> Optional[timedelta]:
+        return parse_duration(self.RETENTION_POLICY_PERIOD)
+
+    def get_rollup_delay(self) -> timedelta:
+        # a continuous query runs once per interval of its resolution
+        return max(parse_duration(resolution) for _policy_name, _duration, resolution in self.ROLLUP_RETENTION_POLICIES)
+
+    #
+    # Retention Tiers
+    #
+
+    def _get_retention_tiers(self) -> List[tuple]:
+        """
+        Retention tiers available in the database, finest first: (retention policy, retention period, resolution).
+        The raw data tier is the default retention policy (None).
+        """
+        if self._retention_tiers is None:
+            available = {policy['name'] for policy in self._client.get_list_retention_policies()}
+            tiers = [(None, parse_duration(self.RETENTION_POLICY_PERIOD), timedelta(0))]
+            for policy_name, duration, resolution in self.ROLLUP_RETENTION_POLICIES:
+                if policy_name in available:  # the crawler may not have provisioned rollups yet
+                    tiers.append((policy_name, parse_duration(duration), parse_duration(resolution)))
+            self._retention_tiers = tiers
+        return self._retention_tiers
+
+    def select_retention_policy(self,
+                                range_begin: datetime,
+                                range_end: datetime,
+                                granularity: timedelta) -> Optional[str]:
+        """
+        Coarsest retention tier that still retains `range_begin` at a resolution no coarser than `granularity`;
+        None is the (default) raw data tier.
+
+        A rollup bucket is only written once it closes, so a range that reaches the present also
+        needs a resolution finer than `granularity` for the latest bucket to be (mostly) populated.
+        """
+        now = datetime.utcnow()
+        tiers = self._get_retention_tiers()
+        for policy_name, retention, resolution in reversed(tiers):
+            if resolution > granularity:
+                continue
+            if retention is not None and range_begin < now - retention:
+                continue
+            if policy_name is not None and range_end > now - resolution and resolution >= granularity:
+                continue
+            return policy_name
+
+        # no tier satisfies everything - prefer having the history, at the requested granularity if possible
+        candidates = [tier for tier in tiers if tier[2] <= granularity] or tiers
+        policy_name, _retention, _resolution = max(candidates, key=lambda tier: tier[1] or timedelta.max)
+        return policy_name
+
+    def _measurement(self, measurement: str, range_begin: datetime, range_end: datetime, granularity: str) -> str:
+        retention_policy = self.select_retention_policy(range_begin,
+                                                        range_end,
+                                                        granularity=parse_duration(granularity))
+        if retention_policy is None:
+            return measurement
+        return f'"{retention_policy}".{measurement}'
+
+    #
+    # Data
+    #
+
+    def write_points(self, points: List[str]) -> bool:
+        return self._client.write_points(points,
+                                         database=self._database,
+                                         time_precision='s',
+                                         batch_size=10000,
+                                         protocol='line')
+
+    def get_last_values(self,
+                        measurement: str,
+                        fields: Dict[str, str],
+                        range_begin: datetime,
+                        range_end: datetime,
+                        granularity: str,
+                        tags: Dict[str, str] = None) -> List[Dict]:
+        selectors = ', '.join(f'LAST({field}) AS {alias}' for alias, field in fields.items())
+        # tag values are indexed - only the matching series are read
+        tag_conditions = ''.join(f'"{tag}" = {_influxql_string(value)} AND ' for tag, value in (tags or dict()).items())
+        query = (f"SELECT {selectors} "
+                 f"FROM {self._measurement(measurement, range_begin, range_end, granularity)} WHERE "
+                 f"{tag_conditions}"
+                 f"time >= '{_rfc3339(range_begin)}' AND "
+                 f"time < '{_rfc3339(range_end)}' "
+                 f"GROUP BY time({granularity})")
+        return list(self._client.query(query).get_points())
+
+    def get_last_values_by_tag(self,
+                               measurement: str,
+                               fields: Dict[str, str],
+                               tag: str,
+                               tag_values: List[str],
+                               range_begin: datetime,
+                               range_end: datetime,
+                               granularity: str) -> Dict[str, List[Dict]]:
+        if not tag_values:
+            return dict()
+        selectors = ', '.join(f'LAST({field}) AS {alias}' for alias, field in fields.items())
+        tag_conditions = ' OR '.join(f'"{tag}" = {_influxql_string(value)}' for value in tag_values)
+        query = (f"SELECT {selectors} "
+                 f"FROM {self._measurement(measurement, range_begin, range_end, granularity)} WHERE "
+                 f"({tag_conditions}) AND "
+                 f"time >= '{_rfc3339(range_begin)}' AND "
+                 f"time < '{_rfc3339(range_end)}' "
+                 f"GROUP BY time({granularity}), \"{tag}\"")
+        # a series per tag value
+        return {series_tags[tag]: list(points)
+                for (_measurement, series_tags), points in self._client.query(query).items()}
+
+    def get_tag_totals(self,
+                       measurement: str,
+                       field: str,
+                       tag: str,
+                       range_begin: datetime,
+                       range_end: datetime,
+                       granularity: str) -> List[Dict]:
+        # both aggregates share the inner per-tag subquery
+        query = (f"SELECT SUM({field}), COUNT({field}) "
+                 f"FROM ("
+                 f"SELECT LAST({field}) "
+                 f"AS {field} "
+                 f"FROM {self._measurement(measurement, range_begin, range_end, granularity)} WHERE "
+                 f"time >= '{_rfc3339(range_begin)}' AND "
+                 f"time < '{_rfc3339(range_end)}' "
+                 f"GROUP BY {tag}, time({granularity})"
+                 f") "
+                 f"GROUP BY time({granularity})")
+        return list(self._client.query(query).get_points())
+
+    def get_schema(self, measurement: str) -> Dict[str, str]:
+        schema = OrderedDict()
+        for tag in self._client.query(f'SHOW TAG KEYS FROM {measurement}').get_points():
+            schema[tag['tagKey']] = 'string'
+        for field in self._client.query(f'SHOW FIELD KEYS FROM {measurement}').get_points():
+            schema[field['fieldKey']] = field['fieldType']
+        return schema
+
+    def get_first_time(self, measurement: str) -> Optional[datetime]:
+        result = self._client.query(f'SELECT * FROM {measurement} ORDER BY time ASC LIMIT 1', epoch='s')
+        for point in result.get_points():
+            return EPOCH + timedelta(seconds=point['time'])
+        return None
+
+    def get_points(self, measurement: str, range_begin: datetime, range_end: datetime) -> List[Dict]:
+        query = (f"SELECT * FROM {measurement} WHERE "
+                 f"time >= '{_rfc3339(range_begin)}' AND "
+                 f"time < '{_rfc3339(range_end)}'")
+        return list(self._client.query(query, epoch='s').get_points())
+
+    def close(self) -> None:
+        self._client.close()
+
+
+class SQLiteTimeSeriesStorage(TimeSeriesStorage):
+    """
+    Time-series data in an embedded SQLite database, for deployments without an InfluxDB service.
+
+    Each measurement is partitioned by time into tables covering `PARTITION_DURATION`, indexed by
+    (tags, time) - range queries only touch the partitions they overlap, and expired data is dropped
+    a partition at a time. As in InfluxDB, a point replaces any previous point of the same series and time;
+    tags missing from a point are stored as empty values, so that they identify a single series too.
+    There are no rollups; all data is kept at full resolution for `retention` (forever by default).
+    """
+
+    PARTITION_DURATION = timedelta(weeks=1)
+    PARTITION_TABLE_NAME = 'partitions'
+
+    # declared column type -> tag/field type
+    COLUMN_TYPES = {'text': 'string', 'real': 'float', 'integer': 'integer', 'boolean': 'boolean'}
+
+    def __init__(self, db_filepath: str, retention: str = 'INF'):
+        self.log = Logger(self.__class__.__name__)
+        self._db_filepath = db_filepath
+        self._retention = parse_duration(retention)
+        self._table_columns = dict()  # partition table -> column names
+        self._table_tags = dict()  # partition table -> tag column names
+        self._schema_version = None  # of the db, when columns and tags were cached
+        self._local = threading.local()
+
+    def _connect(self) -> sqlite3.Connection:
+        # dash threading means that connection needs to be established in same thread as use;
+        # each thread keeps its own, since closing a connection checkpoints the WAL
+        db_conn = getattr(self._local, 'db_conn', None)
+        if db_conn is None:
+            db_conn = sqlite3.connect(self._db_filepath)
+            db_conn.execute('PRAGMA journal_mode=WAL')  # dashboard reads while the crawler writes
+            db_conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.db_conn = db_conn
+        return db_conn
+
+    def ensure_exists(self, rollups: tuple = ()) -> None:
+        db_conn = self._connect()
+        with db_conn:
+            db_conn.execute(f'CREATE TABLE IF NOT EXISTS {self.PARTITION_TABLE_NAME} '
+                            f'(name text primary key, measurement text, begin integer, end integer)')
+            db_conn.execute(f'CREATE INDEX IF NOT EXISTS {self.PARTITION_TABLE_NAME}_range '
+                            f'ON {self.PARTITION_TABLE_NAME} (measurement, begin)')
+
+    def refresh_rollups(self, rollups: tuple, range_begin: datetime, range_end: datetime) -> None:
+        pass  # no rollups - all data is kept at full resolution
+
+    def get_retention(self) -> Optional[timedelta]:
+        return self._retention
+
+    def get_rollup_delay(self) -> timedelta:
+        return timedelta(0)  # no rollups
+
+    #
+    # Partitions
+    #
+
+    def _partition_begin(self, timestamp: int) -> int:
+        duration = int(self.PARTITION_DURATION.total_seconds())
+        return timestamp - timestamp % duration
+
+    def _check_schema_version(self, db_conn: sqlite3.Connection):
+        # columns and tags may be added by another connection eg. the crawler's, while the dashboard reads
+        schema_version = db_conn.execute('PRAGMA schema_version').fetchone()[0]
+        if schema_version != self._schema_version:
+            self._table_columns.clear()
+            self._table_tags.clear()
+            self._schema_version = schema_version
+
+    def _get_columns(self, db_conn: sqlite3.Connection, table: str) -> List[str]:
+        self._check_schema_version(db_conn)
+        if table not in self._table_columns:
+            rows = db_conn.execute(f'PRAGMA table_info("{table}")').fetchall()
+            self._table_columns[table] = [row[1] for row in rows]
+        return self._table_columns[table]
+
+    def _get_tags(self, db_conn: sqlite3.Connection, table: str) -> List[str]:
+        """Tag columns of a partition i.e. the columns of its series index, besides time"""
+        self._check_schema_version(db_conn)
+        if table not in self._table_tags:
+            rows = db_conn.execute(f'PRAGMA index_info("{table}_series")').fetchall()
+            self._table_tags[table] = [name for _seqno, _cid, name in sorted(rows) if name != 'time']
+        return self._table_tags[table]
+
+    def _ensure_partition(self,
+                          db_conn: sqlite3.Connection,
+                          measurement: str,
+                          begin: int,
+                          tags: List[str],
+                          fields: Dict[str, Any]) -> str:
+        table = f'{measurement}_{(EPOCH + timedelta(seconds=begin)).strftime("%Y%m%d")}'
+        columns = self._get_columns(db_conn, table)
+        if not columns:
+            tag_columns = ''.join(f'{self._tag_column_definition(tag)}, ' for tag in tags)
+            db_conn.execute(f'CREATE TABLE "{table}" (time integer not null, {tag_columns}'
+                            f'{", ".join(self._column_definition(field, value) for field, value in fields.items())})')
+            self._create_series_index(db_conn, table, tags=tags)
+            db_conn.execute(f'INSERT INTO {self.PARTITION_TABLE_NAME} VALUES (?,?,?,?)',
+                            (table, measurement, begin, begin + int(self.PARTITION_DURATION.total_seconds())))
+            self._table_columns.pop(table, None)
+        else:
+            table_tags = self._get_tags(db_conn, table)
+            new_tags = [tag for tag in tags if tag not in table_tags]
+            for tag in new_tags:
+                if tag not in columns:
+                    db_conn.execute(f'ALTER TABLE "{table}" ADD COLUMN {self._tag_column_definition(tag)}')
+                    self._table_columns.pop(table, None)
+            if new_tags:
+                # points already in the partition have empty values for the new tags
+                db_conn.execute(f'DROP INDEX "{table}_series"')
+                self._create_series_index(db_conn, table, tags=table_tags + new_tags)
+            for field, value in fields.items():
+                if field not in columns:
+                    db_conn.execute(f'ALTER TABLE "{table}" ADD COLUMN {self._column_definition(field, value)}')
+                    self._table_columns.pop(table, None)
+        return table
+
+    def _create_series_index(self, db_conn: sqlite3.Connection, table: str, tags: List[str]):
+        # a series (tag set) has a single point per time
+        series = ''.join(f'"{tag}", ' for tag in tags)
+        db_conn.execute(f'CREATE UNIQUE INDEX "{table}_series" ON "{table}" ({series}time)')
+        if tags:
+            db_conn.execute(f'CREATE INDEX IF NOT EXISTS "{table}_time" ON "{table}" (time)')
+        self._table_tags.pop(table, None)
+
+    @staticmethod
+    def _tag_column_definition(tag: str) -> str:
+        # not null, since NULLs are distinct from one another in a unique index
+        return f"\"{tag}\" text not null default ''"
+
+    @staticmethod
+    def _column_definition(field: str, value) -> str:
+        if isinstance(value, str):
+            column_type = 'text'
+        elif isinstance(value, bool):
+            column_type = 'boolean'
+        elif isinstance(value, int):
+            column_type = 'integer'
+        else:
+            column_type = 'real'
+        return f'"{field}" {column_type}'
+
+    def _get_partitions(self,
+                        db_conn: sqlite3.Connection,
+                        measurement: str,
+                        range_begin: int,
+                        range_end: int) -> List[str]:
+        rows = db_conn.execute(f'SELECT name FROM {self.PARTITION_TABLE_NAME} '
+                               f'WHERE measurement = ? AND begin < ? AND end > ? ORDER BY begin',
+                               (measurement, range_end, range_begin))
+        return [row[0] for row in rows]
+
+    def _drop_expired_partitions(self, db_conn: sqlite3.Connection, now: int):
+        if self._retention is None:
+            return
+        expiry = now - int(self._retention.total_seconds())
+        expired = db_conn.execute(f'SELECT name FROM {self.PARTITION_TABLE_NAME} WHERE end <= ?', (expiry,))
+        for (table, ) in expired.fetchall():
+            db_conn.execute(f'DROP TABLE IF EXISTS "{table}"')
+            db_conn.execute(f'DELETE FROM {self.PARTITION_TABLE_NAME} WHERE name = ?', (table, ))
+            self._table_columns.pop(table, None)
+            self._table_tags.pop(table, None)
+
+    #
+    # Data
+    #
+
+    def write_points(self, points: List[str]) -> bool:
+        # group points by partition
+        partitioned = defaultdict(list)
+        for point in points:
+            measurement, tags, fields, timestamp = parse_line_protocol(point)
+            partitioned[(measurement, self._partition_begin(timestamp))].append((tags, fields, timestamp))
+
+        db_conn = self._connect()
+        try:
+            with db_conn:
+                for (measurement, begin), series_points in partitioned.items():
+                    tags = sorted({tag for point_tags, _, _ in series_points for tag in point_tags})
+                    fields = OrderedDict()
+                    for _, point_fields, _ in series_points:
+                        for field, value in point_fields.items():
+                            fields.setdefault(field, value)
+                    table = self._ensure_partition(db_conn, measurement, begin, tags=tags, fields=fields)
+                    table_tags = self._get_tags(db_conn, table)
+
+                    columns = ['time'] + table_tags + list(fields)
+                    column_names = ', '.join(f'"{column}"' for column in columns)
+                    rows = [[timestamp] + [point_tags.get(tag, '') for tag in table_tags] +
+                            [point_fields.get(field) for field in fields]
+                            for point_tags, point_fields, timestamp in series_points]
+                    db_conn.executemany(f'INSERT OR REPLACE INTO "{table}" ({column_names}) '
+                                        f'VALUES ({",".join("?" * len(columns))})',
+                                        rows)
+                self._drop_expired_partitions(db_conn, now=int((datetime.utcnow() - EPOCH).total_seconds()))
+            return True
+        except sqlite3.Error as e:
+            self.log.warn(f'Unable to write {len(points)} points to {self._db_filepath}: {e}')
+            return False
+
+    @staticmethod
+    def _epoch_seconds(time: datetime) -> int:
+        if time.tzinfo is not None:
+            time = time.astimezone(timezone.utc).replace(tzinfo=None)
+        return int((time - EPOCH).total_seconds())
+
+    def _select_range(self,
+                      db_conn: sqlite3.Connection,
+                      measurement: str,
+                      columns: List[str],
+                      range_begin: int,
+                      range_end: int,
+                      tags: Dict[str, Union[str, List[str]]] = None) -> Optional[str]:
+        """
+        Union of the rows of the partitions overlapping the range, with the `tags` values (a value, or any
+        of a list of values) if specified; None if there are none
+        """
+        tags = tags or dict()
+        selects = []
+        for table in self._get_partitions(db_conn, measurement, range_begin, range_end):
+            table_columns = self._get_columns(db_conn, table)
+            if any(tag not in table_columns for tag in tags):
+                continue  # no points with the tags
+            selectors = ', '.join(f'"{column}"' if column in table_columns else f'NULL AS "{column}"'
+                                  for column in columns)
+            # with tag values, the (tags, time) series index is used
+            tag_conditions = ''.join(f'{self._tag_condition(tag, value)} AND ' for tag, value in tags.items())
+            selects.append(f'SELECT time, {selectors} FROM "{table}" '
+                           f'WHERE {tag_conditions}time >= {range_begin} AND time < {range_end}')
+        return ' UNION ALL '.join(selects) or None
+
+    @staticmethod
+    def _tag_condition(tag: str, value: Union[str, List[str]]) -> str:
+        if isinstance(value, str):
+            return f'"{tag}" = {_sql_string(value)}'
+        return f'"{tag}" IN ({", ".join(_sql_string(tag_value) for tag_value in value)})'
+
+    @staticmethod
+    def _bucket_time(bucket: int, resolution: int) -> str:
+        return (EPOCH + timedelta(seconds=bucket * resolution)).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+    def get_last_values(self,
+                        measurement: str,
+                        fields: Dict[str, str],
+                        range_begin: datetime,
+                        range_end: datetime,
+                        granularity: str,
+                        tags: Dict[str, str] = None) -> List[Dict]:
+        resolution = int(parse_duration(granularity).total_seconds())
+        db_conn = self._connect()
+        rows = self._select_range(db_conn,
+                                  measurement,
+                                  columns=list(fields.values()),
+                                  range_begin=self._epoch_seconds(range_begin),
+                                  range_end=self._epoch_seconds(range_end),
+                                  tags=tags)
+        if rows is None:
+            return list()
+
+        # with MAX(), SQLite takes the other columns from the row with the latest time in each bucket
+        selectors = ', '.join(f'"{field}"' for field in fields.values())
+        result = db_conn.execute(f'SELECT time / {resolution} AS bucket, {selectors}, MAX(time) '
+                                 f'FROM ({rows}) GROUP BY bucket ORDER BY bucket')
+        return [dict(time=self._bucket_time(row[0], resolution), **dict(zip(fields, row[1:-1])))
+                for row in result]
+
+    def get_last_values_by_tag(self,
+                               measurement: str,
+                               fields: Dict[str, str],
+                               tag: str,
+                               tag_values: List[str],
+                               range_begin: datetime,
+                               range_end: datetime,
+                               granularity: str) -> Dict[str, List[Dict]]:
+        if not tag_values:
+            return dict()
+        resolution = int(parse_duration(granularity).total_seconds())
+        db_conn = self._connect()
+        rows = self._select_range(db_conn,
+                                  measurement,
+                                  columns=[tag] + list(fields.values()),
+                                  range_begin=self._epoch_seconds(range_begin),
+                                  range_end=self._epoch_seconds(range_end),
+                                  tags={tag: list(tag_values)})
+        if rows is None:
+            return dict()
+
+        selectors = ', '.join(f'"{field}"' for field in fields.values())
+        result = db_conn.execute(f'SELECT "{tag}", time / {resolution} AS bucket, {selectors}, MAX(time) '
+                                 f'FROM ({rows}) GROUP BY "{tag}", bucket ORDER BY "{tag}", bucket')
+        values = OrderedDict()
+        for row in result:
+            values.setdefault(row[0], list()).append(dict(time=self._bucket_time(row[1], resolution),
+                                                          **dict(zip(fields, row[2:-1]))))
+        return values
+
+    def get_tag_totals(self,
+                       measurement: str,
+                       field: str,
+                       tag: str,
+                       range_begin: datetime,
+                       range_end: datetime,
+                       granularity: str) -> List[Dict]:
+        resolution = int(parse_duration(granularity).total_seconds())
+        db_conn = self._connect()
+        rows = self._select_range(db_conn,
+                                  measurement,
+                                  columns=[tag, field],
+                                  range_begin=self._epoch_seconds(range_begin),
+                                  range_end=self._epoch_seconds(range_end))
+        if rows is None:
+            return list()
+
+        result = db_conn.execute(f'SELECT bucket, SUM(value), COUNT(value) FROM ('
+                                 f'SELECT time / {resolution} AS bucket, "{field}" AS value, MAX(time) '
+                                 f'FROM ({rows}) GROUP BY bucket, "{tag}"'
+                                 f') GROUP BY bucket ORDER BY bucket')
+        return [dict(time=self._bucket_time(bucket, resolution), sum=total, count=count)
+                for bucket, total, count in result]
+
+    def get_schema(self, measurement: str) -> Dict[str, str]:
+        db_conn = self._connect()
+        schema = OrderedDict()
+        partitions = db_conn.execute(f'SELECT name FROM {self.PARTITION_TABLE_NAME} '
+                                     f'WHERE measurement = ? ORDER BY begin', (measurement, ))
+        for (table, ) in partitions.fetchall():
+            for _, column, column_type, *_ in db_conn.execute(f'PRAGMA table_info("{table}")'):
+                if column != 'time':
+                    schema.setdefault(column, self.COLUMN_TYPES[column_type.lower()])
+        return schema
+
+    def get_first_time(self, measurement: str) -> Optional[datetime]:
+        db_conn = self._connect()
+        first_partition = db_conn.execute(f'SELECT name FROM {self.PARTITION_TABLE_NAME} '
+                                          f'WHERE measurement = ? ORDER BY begin LIMIT 1', (measurement, )).fetchone()
+        if first_partition is None:
+            return None
+        first_time, = db_conn.execute(f'SELECT MIN(time) FROM "{first_partition[0]}"').fetchone()
+        return EPOCH + timedelta(seconds=first_time)
+
+    def get_points(self, measurement: str, range_begin: datetime, range_end: datetime) -> List[Dict]:
+        schema = self.get_schema(measurement)
+        db_conn = self._connect()
+        rows = self._select_range(db_conn,
+                                  measurement,
+                                  columns=list(schema),
+                                  range_begin=self._epoch_seconds(range_begin),
+                                  range_end=self._epoch_seconds(range_end))
+        if rows is None:
+            return list()
+
+        booleans = [column for column, column_type in schema.items() if column_type == 'boolean']
+        tags = {tag for table in self._get_partitions(db_conn,
+                                                      measurement,
+                                                      range_begin=self._epoch_seconds(range_begin),
+                                                      range_end=self._epoch_seconds(range_end))
+                for tag in self._get_tags(db_conn, table)}
+        points = []
+        for row in db_conn.execute(f'SELECT * FROM ({rows}) ORDER BY time'):
+            point = dict(zip(['time'] + list(schema), row))
+            for column in booleans:
+                if point[column] is not None:
+                    point[column] = bool(point[column])
+            for column in tags:
+                if point[column] == '':
+                    point[column] = None  # tag missing from the point
+            points.append(point)
+        return points
+
+    def close(self) -> None:
+        db_conn = getattr(self._local, 'db_conn', None)
+        if db_conn is not None:
+            db_conn.close()
+            self._local.db_conn = None
+        self._table_columns.clear()
+        self._table_tags.clear()
+        self._schema_version = None
+
+
+def get_time_series_storage(database: str,
+                            host: str = None,
+                            port: int = None,
+                            db_filepath: str = None) -> TimeSeriesStorage:
+    """Embedded SQLite storage if a database filepath is provided, otherwise InfluxDB"""
+    if db_filepath:
+        return SQLiteTimeSeriesStorage(db_filepath=db_filepath)
+    return InfluxDBTimeSeriesStorage(host=host, port=port, database=database)
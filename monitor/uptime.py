@@ -0,0 +1,183 @@
+import math
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Dict, Iterable, Optional
+
+
+class LatencySketch:
+    """
+    Mergeable sketch of a distribution of latencies, for estimating its quantiles in constant memory.
+
+    Values are counted in logarithmically sized bins (as in DDSketch, Masson et al., 2019), so every quantile
+    estimate is within `RELATIVE_ACCURACY` of the true value. Values outside MIN_VALUE..MAX_VALUE are counted
+    in the lowest and highest bins, which bounds the number of bins; sketches merge by adding bin counts.
+    """
+
+    RELATIVE_ACCURACY = 0.02
+    MIN_VALUE = 0.0001  # seconds
+    MAX_VALUE = 600
+
+    GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+
+    __slots__ = ('bins', 'count')
+
+    def __init__(self):
+        self.bins = dict()  # bin index -> count, only of non-empty bins
+        self.count = 0
+
+    @classmethod
+    def _index(cls, value: float) -> int:
+        value = min(max(value, cls.MIN_VALUE), cls.MAX_VALUE)
+        return math.ceil(math.log(value, cls.GAMMA))
+
+    def add(self, value: float):
+        index = self._index(value)
+        self.bins[index] = self.bins.get(index, 0) + 1
+        self.count += 1
+
+    def merge(self, other: 'LatencySketch'):
+        for index, count in other.bins.items():
+            self.bins[index] = self.bins.get(index, 0) + count
+        self.count += other.count
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate of the q-quantile (0 <= q <= 1); None if empty"""
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        cumulative = 0
+        for index in sorted(self.bins):
+            cumulative += self.bins[index]
+            if cumulative > rank:
+                break
+        return 2 * self.GAMMA ** index / (self.GAMMA + 1)  # midpoint (in relative terms) of the bin
+
+
+class RollingWindow:
+    """
+    Observations of a node over a sliding window of time, counted in a ring of fixed size buckets.
+
+    Each bucket covers `length / num_buckets` seconds and keeps the number of observations, how many found the node
+    up, and a sketch of the latencies; a bucket is reset when the ring comes around to it again. Memory is constant,
+    and the window covers between `length` and a bucket more than `length` seconds of observations.
+    """
+
+    __slots__ = ('length', 'bucket_length', '_begins', '_observations', '_up', '_latencies')
+
+    def __init__(self, length: int, num_buckets: int):
+        self.length = length
+        self.bucket_length = length // num_buckets
+        self._begins = [None] * num_buckets
+        self._observations = [0] * num_buckets
+        self._up = [0] * num_buckets
+        self._latencies = [None] * num_buckets  # sketches created on first latency
+
+    def add(self, timestamp: int, up: bool, latency: float = None):
+        begin = timestamp - timestamp % self.bucket_length
+        index = (begin // self.bucket_length) % len(self._begins)
+        if self._begins[index] != begin:
+            if self._begins[index] is not None and self._begins[index] > begin:
+                return  # too old, the bucket has already been reused
+            self._begins[index] = begin
+            self._observations[index] = 0
+            self._up[index] = 0
+            self._latencies[index] = None
+
+        self._observations[index] += 1
+        if up:
+            self._up[index] += 1
+        if latency is not None:
+            if self._latencies[index] is None:
+                self._latencies[index] = LatencySketch()
+            self._latencies[index].add(latency)
+
+    def summary(self, now: int, percentiles: Iterable[int]) -> Dict:
+        """Uptime (%) and latency percentiles (seconds) of the observations within the window"""
+        observations, up = 0, 0
+        latencies = LatencySketch()
+        for index, begin in enumerate(self._begins):
+            if begin is None or begin + self.bucket_length <= now - self.length or begin > now:
+                continue
+            observations += self._observations[index]
+            up += self._up[index]
+            if self._latencies[index] is not None:
+                latencies.merge(self._latencies[index])
+
+        summary = OrderedDict(observations=observations,
+                              uptime=100 * up / observations if observations else None)
+        for percentile in percentiles:
+            summary[f'p{percentile}'] = latencies.quantile(percentile / 100)
+        return summary
+
+
+class NodeStatistics:
+    """
+    Rolling uptime and latency percentiles of each node, maintained incrementally from a stream of
+    observations of the nodes (e.g. reachability probes) rather than by querying their history.
+
+    Every node has a `RollingWindow` per window length, so memory is constant per node.
+
+    Observations may be recorded late, after later ones - so the stream is read again from `resume_time`, and
+    observations within `LATE_OBSERVATION_WINDOW` of the last one are only counted once.
+    """
+
+    # window -> (length in seconds, number of buckets)
+    WINDOWS = OrderedDict((('1h', (60 * 60, 12)),
+                           ('24h', (24 * 60 * 60, 24)),
+                           ('7d', (7 * 24 * 60 * 60, 28))))
+    PERCENTILES = (50, 95, 99)
+    LATE_OBSERVATION_WINDOW = 10 * 60  # seconds
+
+    def __init__(self):
+        self._nodes = dict()  # staker address -> window -> rolling window
+        self._lock = Lock()
+        self._recent_observations = dict()  # timestamp -> staker addresses, within the late window of the last one
+        self.last_observation_time = None
+
+    @classmethod
+    def longest_window(cls) -> int:
+        return max(length for length, _num_buckets in cls.WINDOWS.values())
+
+    def resume_time(self) -> Optional[int]:
+        """Time from which to read observations again, so as not to miss late ones; None if none observed yet"""
+        if self.last_observation_time is None:
+            return None
+        return self.last_observation_time - self.LATE_OBSERVATION_WINDOW
+
+    def add_observation(self, staker_address: str, timestamp: int, up: bool, latency: float = None):
+        with self._lock:
+            stakers = self._recent_observations.get(timestamp)
+            if stakers is not None and staker_address in stakers:
+                return  # read again
+            if self.last_observation_time is None or timestamp > self.last_observation_time:
+                self.last_observation_time = timestamp
+                late_begin = timestamp - self.LATE_OBSERVATION_WINDOW
+                for expired in [recent for recent in self._recent_observations if recent < late_begin]:
+                    del self._recent_observations[expired]
+            if timestamp >= self.last_observation_time - self.LATE_OBSERVATION_WINDOW:
+                self._recent_observations.setdefault(timestamp, set()).add(staker_address)
+
+            windows = self._nodes.get(staker_address)
+            if windows is None:
+                windows = OrderedDict((window, RollingWindow(length, num_buckets))
+                                      for window, (length, num_buckets) in self.WINDOWS.items())
+                self._nodes[staker_address] = windows
+            for rolling_window in windows.values():
+                rolling_window.add(timestamp, up=up, latency=latency)
+
+    def add_probe_results(self, points: Iterable[Dict]):
+        """Observations from points of probe results i.e. of the `NodeProber` measurement"""
+        for point in points:
+            self.add_observation(staker_address=point['staker_address'],
+                                 timestamp=int(point['time']),
+                                 up=bool(point['reachable']),
+                                 latency=point.get('latency'))
+
+    def get_statistics(self, now: int = None) -> Dict[str, Dict[str, Dict]]:
+        """Statistics of each node: staker address -> window -> uptime and latency percentiles"""
+        now = int(time.time()) if now is None else now
+        with self._lock:
+            return {staker_address: OrderedDict((window, rolling_window.summary(now, self.PERCENTILES))
+                                                for window, rolling_window in windows.items())
+                    for staker_address, windows in self._nodes.items()}
@@ -0,0 +1,92 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, List, Optional, Tuple
+
+from nucypher.blockchain.eth.interfaces import BlockchainInterfaceFactory
+from nucypher.blockchain.eth.registry import InMemoryContractRegistry
+from nucypher.network.exceptions import NodeSeemsToBeDown
+from nucypher.network.middleware import RestMiddleware
+from nucypher.network.protocols import SuspiciousActivity
+from requests.exceptions import SSLError
+
+# registry and middleware of each verification worker process
+_worker_registry = None
+_worker_middleware = None
+
+
+def _init_worker(provider_uri: str, registry_data: list):
+    global _worker_registry, _worker_middleware
+    BlockchainInterfaceFactory.initialize_interface(provider_uri=provider_uri)
+    _worker_registry = InMemoryContractRegistry()
+    _worker_registry.write(registry_data)
+    _worker_middleware = RestMiddleware()
+
+
+def check_node(node, network_middleware, registry, certificate_filepath: str) -> Optional[str]:
+    """Verify a node as `Learner.remember_node` does (blocking); None if verified, otherwise why not"""
+    try:
+        node.verify_node(network_middleware=network_middleware,
+                         registry=registry,
+                         certificate_filepath=certificate_filepath)
+    except (SuspiciousActivity, *NodeSeemsToBeDown, SSLError) as e:
+        return f'{e.__class__.__name__} {e}'
+    return None
+
+
+def is_unreachable(failure_reason: str) -> bool:
+    """Whether a node wasn't verified (see `check_node`) because it couldn't be reached, rather than being invalid"""
+    return failure_reason.split(' ', 1)[0] in {error.__name__ for error in (*NodeSeemsToBeDown, SSLError)}
+
+
+def _verify_node(node_metadata: bytes, certificate_filepath: str) -> Optional[str]:
+    from nucypher.characters.lawful import Ursula
+    node = Ursula.from_bytes(node_metadata, registry=_worker_registry)
+    return check_node(node, _worker_middleware, _worker_registry, certificate_filepath)
+
+
+class NodeVerifier:
+    """
+    Verifies nodes learnt about in a pool of worker processes, instead of one after the other on the reactor thread.
+
+    Verifying a node checks the signatures of its metadata and that its worker is bonded to a staker that is staking,
+    and then requests the node's own metadata - CPU bound crypto and blocking requests, which the workers run
+    in parallel. Each worker rebuilds the nodes from their metadata; the learner remembers the nodes that were
+    verified. Workers are started on first use, and are spawned rather than forked from the (threaded) crawler.
+    """
+
+    DEFAULT_WORKERS = 4
+
+    def __init__(self, provider_uri: str, registry, workers: int = DEFAULT_WORKERS):
+        self._provider_uri = provider_uri
+        self._registry_data = registry.read()
+        self._workers = workers
+        self._executor = None
+
+    def run(self, nodes: List[Tuple[bytes, str]]) -> List[Optional[str]]:
+        """
+        Blocking verification of the nodes i.e. for use in a thread; for the (metadata, certificate filepath)
+        of each node, None if it was verified, otherwise why not
+        """
+        if not nodes:
+            return []
+        initializer, verifier = self._worker_functions()
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self._workers,
+                                                 mp_context=multiprocessing.get_context('spawn'),
+                                                 initializer=initializer,
+                                                 initargs=(self._provider_uri, self._registry_data))
+        chunksize = max(1, len(nodes) // (self._workers * 4))
+        node_metadata, certificate_filepaths = zip(*nodes)
+        return list(self._executor.map(verifier, node_metadata, certificate_filepaths, chunksize=chunksize))
+
+    def _worker_functions(self) -> Tuple[Callable, Callable]:
+        """
+        The initializer of each worker process, called with the provider uri and registry data, and the verification
+        of a node's (metadata, certificate filepath) - module level functions, as they are pickled to the workers
+        """
+        return _init_worker, _verify_node
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
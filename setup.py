@@ -78,9 +78,14 @@ DEPLOY_REQUIRES = [
     'bumpversion',
 ]
 
+EXPORT_REQUIRES = [
+    'pyarrow',
+]
+
 
 EXTRAS_REQUIRE = {'development': TESTS_REQUIRE,
-                  'deployment': DEPLOY_REQUIRES}
+                  'deployment': DEPLOY_REQUIRES,
+                  'export': EXPORT_REQUIRES}
 
 setup(name=ABOUT['__title__'],
       url=ABOUT['__url__'],
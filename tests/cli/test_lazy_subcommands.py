@@ -0,0 +1,69 @@
+import json
+import subprocess
+import sys
+
+import click
+from click.testing import CliRunner
+
+from monitor.cli.main import SUBCOMMANDS, monitor
+
+HEAVY_MODULES = ('nucypher', 'web3', 'twisted', 'dash', 'plotly', 'influxdb', 'flask')
+IMPORT_TIME_BUDGET = 0.5  # seconds, for `monitor.cli.main` and everything it imports
+
+
+def run_python(code: str, *options) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, *options, '-c', code],
+                          stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, check=True)
+
+
+def test_cli_import_time():
+    result = run_python("import json, sys; import monitor.cli.main; print(json.dumps(list(sys.modules)))",
+                        '-X', 'importtime')
+    imported = {module.split('.')[0] for module in json.loads(result.stdout)}
+    assert not imported.intersection(HEAVY_MODULES)
+
+    # "import time: self [us] | cumulative | imported package"
+    cumulative_times = dict()
+    for line in result.stderr.splitlines():
+        if line.startswith('import time:') and '|' in line:
+            _self_time, cumulative_time, module = line[len('import time:'):].split('|')
+            if cumulative_time.strip().isdigit():
+                cumulative_times[module.strip()] = int(cumulative_time)
+    assert cumulative_times['monitor.cli.main'] / 1e6 < IMPORT_TIME_BUDGET
+
+
+def test_cli_help_does_not_import_subcommands():
+    result = run_python("import json, sys\n"
+                        "from click.testing import CliRunner\n"
+                        "from monitor.cli.main import monitor\n"
+                        "result = CliRunner().invoke(monitor, ['--help'])\n"
+                        "print(json.dumps(dict(output=result.output, exit_code=result.exit_code,\n"
+                        "                      modules=list(sys.modules))))")
+    help_result = json.loads(result.stdout)
+    assert help_result['exit_code'] == 0
+    for name in SUBCOMMANDS:
+        assert name in help_result['output']
+    assert '--nucypher-version' in help_result['output']
+    imported = {module.split('.')[0] for module in help_result['modules']}
+    assert not imported.intersection(HEAVY_MODULES)
+    assert not any(module in help_result['modules'] for module in ('monitor.cli.crawl', 'monitor.cli.dashboard'))
+
+
+def test_cli_lazy_subcommands():
+    with click.Context(monitor) as ctx:
+        assert monitor.list_commands(ctx) == list(SUBCOMMANDS)
+        for name, (_import_path, short_help) in SUBCOMMANDS.items():
+            command = monitor.get_command(ctx, name)
+            assert isinstance(command, click.Command)
+            assert command.name == name
+            assert command.help.strip() == short_help  # listed help matches the subcommand's own
+        assert monitor.get_command(ctx, 'unknown') is None
+
+    runner = CliRunner()
+    for name in SUBCOMMANDS:
+        result = runner.invoke(monitor, [name, '--help'])
+        assert result.exit_code == 0, result.output
+        assert f'Usage: monitor {name} [OPTIONS]' in result.output
+
+    result = runner.invoke(monitor, ['unknown'])
+    assert result.exit_code != 0
@@ -2,11 +2,13 @@ from unittest.mock import MagicMock, patch
 
 import nucypher
 import pytest
+import click
 from click.testing import CliRunner
 from nucypher.blockchain.eth.agents import StakingEscrowAgent
 
 import monitor
-from monitor.cli.main import monitor as monitor_cli, CRAWLER, MONITOR_BANNER, DASHBOARD
+from monitor.cli._utils import CRAWLER, DASHBOARD, MONITOR_BANNER
+from monitor.cli.main import SUBCOMMANDS, monitor as monitor_cli
 from tests.utilities import MockContractAgency
 
 
@@ -28,12 +30,18 @@ def test_monitor_help_message(click_runner):
     result = click_runner.invoke(monitor_cli, help_args, catch_exceptions=False)
     assert result.exit_code == 0
     assert f'{monitor_cli.name} [OPTIONS] COMMAND [ARGS]' in result.output, 'Missing or invalid help text was produced.'
-    for sub_command in monitor_cli.commands.values():
-        assert sub_command.name in result.output, f"Sub command {sub_command.name} in help message"
-
-
-@pytest.mark.parametrize('command_name, command', ([command.name, command] for command in monitor_cli.commands.values()))
-def test_monitor_sub_command_help_messages(click_runner, command_name, command):
+    with click.Context(monitor_cli) as ctx:
+        command_names = monitor_cli.list_commands(ctx)
+    assert command_names == list(SUBCOMMANDS)
+    for command_name in command_names:
+        assert command_name in result.output, f"Sub command {command_name} in help message"
+
+
+@pytest.mark.parametrize('command_name', list(SUBCOMMANDS))
+def test_monitor_sub_command_help_messages(click_runner, command_name):
+    with click.Context(monitor_cli) as ctx:
+        command = monitor_cli.get_command(ctx, command_name)
+    assert command is not None and command.name == command_name
     result = click_runner.invoke(monitor_cli, (command_name, '--help'), catch_exceptions=False)
     assert result.exit_code == 0
     assert f'{monitor_cli.name} {command_name} [OPTIONS]' in result.output, \
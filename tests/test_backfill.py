@@ -0,0 +1,204 @@
+from concurrent.futures import ThreadPoolExecutor
+import os
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+from nucypher.blockchain.eth.agents import StakingEscrowAgent
+from nucypher.blockchain.eth.registry import InMemoryContractRegistry
+from nucypher.blockchain.eth.token import NU
+from web3.exceptions import BlockNotFound
+
+import monitor
+from monitor.backfill import CrawlerBackfill, split_block_range
+from monitor.crawler import Crawler
+from monitor.db import CrawlerBlockchainDBClient
+from monitor.timeseries import EPOCH, SQLiteTimeSeriesStorage, parse_line_protocol
+from tests.utilities import MockContractAgency
+
+SECONDS_PER_PERIOD = 24 * 60 * 60
+FIRST_PERIOD = 18300  # 2020-02-08
+BLOCKS_PER_PERIOD = 100
+
+
+def block_time(block_number: int) -> int:
+    return FIRST_PERIOD * SECONDS_PER_PERIOD + block_number * SECONDS_PER_PERIOD // BLOCKS_PER_PERIOD
+
+
+def activity_confirmed_event(block_number: int, staker: str, value: int):
+    # activity is confirmed for the next period
+    period = block_time(block_number) // SECONDS_PER_PERIOD + 1
+    return dict(blockNumber=block_number, args=dict(staker=staker, period=period, value=value))
+
+
+def configure_mock_staking_agent(staking_agent, events, latest_block=None):
+    def get_block(block_number):
+        if latest_block is not None and block_number > latest_block:
+            raise BlockNotFound(f"Block with id: {block_number} not found.")
+        return MagicMock(timestamp=block_time(block_number))
+    staking_agent.blockchain = MagicMock()
+    staking_agent.blockchain.client.w3.eth.getBlock.side_effect = get_block
+
+    def get_logs(fromBlock, toBlock):
+        return [event for event in events if fromBlock <= event['blockNumber'] <= toBlock]
+    staking_agent.contract.events.ActivityConfirmed.getLogs.side_effect = get_logs
+
+
+def create_backfill(storage, get_agent, new_economics, events, batch_size=50, cache_filepath=None, latest_block=None):
+    staking_agent = MagicMock(spec=StakingEscrowAgent)
+    configure_mock_staking_agent(staking_agent, events, latest_block=latest_block)
+    contract_agency = MockContractAgency(staking_agent=staking_agent)
+    get_agent.side_effect = contract_agency.get_agent
+    new_economics.get_economics.return_value.seconds_per_period = SECONDS_PER_PERIOD
+
+    return CrawlerBackfill(registry=InMemoryContractRegistry(),
+                           provider_uri='tester://pyevm',
+                           storage=storage,
+                           workers=2,
+                           batch_size=batch_size,
+                           cache_filepath=cache_filepath)
+
+
+def test_split_block_range():
+    assert split_block_range(0, 9, batch_size=5) == [(0, 4), (5, 9)]
+    assert split_block_range(10, 22, batch_size=5) == [(10, 14), (15, 19), (20, 22)]
+    assert split_block_range(10, 10, batch_size=5) == [(10, 10)]
+
+
+@patch('monitor.backfill.TokenEconomicsFactory')
+@patch.object(monitor.backfill.ContractAgency, 'get_agent', autospec=True)
+def test_backfill_period_points(get_agent, new_economics):
+    backfill = create_backfill(storage=MagicMock(), get_agent=get_agent, new_economics=new_economics, events=[])
+
+    confirmations = [('0xa', FIRST_PERIOD, NU(10, 'NU').to_nunits()),
+                     ('0xb', FIRST_PERIOD, NU(20, 'NU').to_nunits()),
+                     ('0xa', FIRST_PERIOD + 1, NU(11, 'NU').to_nunits())]
+    period_points = backfill.get_period_points(confirmations, first_period=FIRST_PERIOD, last_period=FIRST_PERIOD + 2)
+    assert list(period_points) == [FIRST_PERIOD, FIRST_PERIOD + 1]  # no confirmations for the last period
+
+    points = [parse_line_protocol(point) for point in period_points[FIRST_PERIOD]]
+    timestamp = FIRST_PERIOD * SECONDS_PER_PERIOD
+    assert points == [
+        (Crawler.BLOCKCHAIN_DB_MEASUREMENT, {'staker_address': '0xa'},
+         dict(locked_stake=10.0, current_period=FIRST_PERIOD, last_confirmed_period=FIRST_PERIOD + 1), timestamp),
+        (Crawler.BLOCKCHAIN_DB_MEASUREMENT, {'staker_address': '0xb'},
+         dict(locked_stake=20.0, current_period=FIRST_PERIOD, last_confirmed_period=FIRST_PERIOD), timestamp),
+        (Crawler.NETWORK_SUMMARY_MEASUREMENT, {},
+         dict(total_locked=30.0, num_stakers=2, confirmed=1, pending=1, current_period=FIRST_PERIOD), timestamp)
+    ]
+
+
+@patch('monitor.backfill.ProcessPoolExecutor', ThreadPoolExecutor)
+@patch('monitor.backfill.BlockchainInterfaceFactory')
+@patch('monitor.backfill.TokenEconomicsFactory')
+@patch.object(monitor.backfill.ContractAgency, 'get_agent', autospec=True)
+def test_backfill_sqlite_storage_idempotent(get_agent, new_economics, new_interface_factory, tempfile_path):
+    storage = SQLiteTimeSeriesStorage(db_filepath=tempfile_path)
+    storage.ensure_exists()
+
+    # 2 stakers confirming activity every period, for 5 periods; staker 0xb stops after 3
+    events = []
+    for period in range(5):
+        events.append(activity_confirmed_event(period * BLOCKS_PER_PERIOD + 10, '0xa', (period + 1) * 10**18))
+        if period < 3:
+            events.append(activity_confirmed_event(period * BLOCKS_PER_PERIOD + 20, '0xb', 5 * 10**18))
+    backfill = create_backfill(storage=storage, get_agent=get_agent, new_economics=new_economics, events=events)
+
+    to_block = 5 * BLOCKS_PER_PERIOD - 1
+    assert backfill.backfill(from_block=0, to_block=to_block) == 4
+    assert backfill.backfill(from_block=0, to_block=to_block) == 4  # rerun
+    new_interface_factory.initialize_interface.assert_called_with(provider_uri='tester://pyevm')
+
+    # points of each period are rewritten, not duplicated
+    range_end = datetime(year=2100, month=1, day=1)
+    summaries = storage.get_points(Crawler.NETWORK_SUMMARY_MEASUREMENT, range_begin=EPOCH, range_end=range_end)
+    assert [(summary['current_period'], summary['num_stakers'], summary['total_locked'])
+            for summary in summaries] == [(FIRST_PERIOD + 1, 2, 6.0),
+                                          (FIRST_PERIOD + 2, 2, 7.0),
+                                          (FIRST_PERIOD + 3, 2, 8.0),
+                                          (FIRST_PERIOD + 4, 1, 4.0)]
+    # timestamped at the beginning of each period
+    assert [summary['time'] for summary in summaries] == [(FIRST_PERIOD + period) * SECONDS_PER_PERIOD
+                                                          for period in range(1, 5)]
+    # activity of the last period's stakers for the next period was confirmed within the range
+    assert [summary['confirmed'] for summary in summaries] == [2, 2, 1, 1]
+
+    stakers = storage.get_points(Crawler.BLOCKCHAIN_DB_MEASUREMENT, range_begin=EPOCH, range_end=range_end)
+    assert len(stakers) == 2 + 2 + 2 + 1
+
+
+@patch('monitor.backfill.ProcessPoolExecutor', ThreadPoolExecutor)
+@patch('monitor.backfill.BlockchainInterfaceFactory')
+@patch('monitor.backfill.TokenEconomicsFactory')
+@patch.object(monitor.backfill.ContractAgency, 'get_agent', autospec=True)
+def test_backfill_open_period_not_written(get_agent, new_economics, new_interface_factory, tempfile_path):
+    storage = SQLiteTimeSeriesStorage(db_filepath=tempfile_path)
+    storage.ensure_exists()
+
+    # a staker confirming activity late in every period; the latest block is in the middle of the 5th period
+    events = [activity_confirmed_event(period * BLOCKS_PER_PERIOD + 90, '0xa', (period + 1) * 10**18)
+              for period in range(5)]
+    latest_block = 4 * BLOCKS_PER_PERIOD + 50
+    backfill = create_backfill(storage=storage, get_agent=get_agent, new_economics=new_economics, events=events,
+                               latest_block=latest_block)
+
+    # the current period isn't written, nor is a period that isn't covered until its end
+    range_end = datetime(year=2100, month=1, day=1)
+    for to_block in (latest_block, 4 * BLOCKS_PER_PERIOD + 20):
+        assert backfill.backfill(from_block=0, to_block=to_block) == 3
+        summaries = storage.get_points(Crawler.NETWORK_SUMMARY_MEASUREMENT, range_begin=EPOCH, range_end=range_end)
+        assert [summary['current_period'] for summary in summaries] == [FIRST_PERIOD + period for period in range(1, 4)]
+        assert [summary['confirmed'] for summary in summaries] == [1, 1, 1]
+
+    # written once it ends, with the confirmations made during it
+    configure_mock_staking_agent(backfill.staking_agent, events, latest_block=6 * BLOCKS_PER_PERIOD)
+    assert backfill.backfill(from_block=0, to_block=5 * BLOCKS_PER_PERIOD - 1) == 4
+    summaries = storage.get_points(Crawler.NETWORK_SUMMARY_MEASUREMENT, range_begin=EPOCH, range_end=range_end)
+    assert [summary['current_period'] for summary in summaries] == [FIRST_PERIOD + period for period in range(1, 5)]
+    assert [summary['confirmed'] for summary in summaries] == [1, 1, 1, 1]
+    storage.close()
+
+
+@patch('monitor.backfill.ProcessPoolExecutor', ThreadPoolExecutor)
+@patch('monitor.backfill.BlockchainInterfaceFactory')
+@patch('monitor.backfill.TokenEconomicsFactory')
+@patch.object(monitor.backfill.ContractAgency, 'get_agent', autospec=True)
+def test_backfill_invalidates_cached_history(get_agent, new_economics, new_interface_factory, tempfile_path, tmpdir):
+    cache_filepath = os.path.join(str(tmpdir), 'historical-cache.json')
+    blockchain_db_client = CrawlerBlockchainDBClient(None, None, None,
+                                                     cache_filepath=cache_filepath,
+                                                     db_filepath=tempfile_path)
+    storage = SQLiteTimeSeriesStorage(db_filepath=tempfile_path)
+    storage.ensure_exists(rollups=Crawler.BLOCKCHAIN_DB_ROLLUPS)
+
+    # the days to be backfilled are already cached, without any data
+    days = (datetime.utcnow() - EPOCH).days - FIRST_PERIOD + 1
+    network_data = blockchain_db_client.get_historical_network_data(range_length=f'{days}d')
+    assert network_data['locked_stake'] == []
+
+    events = [activity_confirmed_event(period * BLOCKS_PER_PERIOD + 10, '0xa', (period + 1) * 10**18)
+              for period in range(5)]
+    backfill = create_backfill(storage=storage, get_agent=get_agent, new_economics=new_economics, events=events,
+                               cache_filepath=cache_filepath)
+    assert backfill.backfill(from_block=0, to_block=5 * BLOCKS_PER_PERIOD - 1) == 4
+
+    # the backfilled days are read again from the storage
+    network_data = blockchain_db_client.get_historical_network_data(range_length=f'{days}d')
+    assert network_data['locked_stake'] == [1.0, 2.0, 3.0, 4.0]
+    assert [time.timestamp() for time in network_data['time']] == [(FIRST_PERIOD + period) * SECONDS_PER_PERIOD
+                                                                   for period in range(1, 5)]
+
+    # and then cached again
+    assert blockchain_db_client.get_historical_network_data(range_length=f'{days}d') == network_data
+    storage.close()
+    blockchain_db_client.close()
+
+
+@patch('monitor.backfill.TokenEconomicsFactory')
+@patch.object(monitor.backfill.ContractAgency, 'get_agent', autospec=True)
+def test_backfill_no_complete_periods(get_agent, new_economics):
+    storage = MagicMock()
+    storage.get_retention.return_value = None
+    backfill = create_backfill(storage=storage, get_agent=get_agent, new_economics=new_economics, events=[])
+
+    assert backfill.backfill(from_block=10, to_block=BLOCKS_PER_PERIOD + 10) == 0
+    storage.write_points.assert_not_called()
@@ -0,0 +1,180 @@
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock
+
+import plotly.graph_objs as go
+import pytest
+from nucypher.blockchain.eth.agents import StakingEscrowAgent
+from nucypher.blockchain.eth.token import NU
+
+from monitor import charts
+from monitor.charts import FigureCache, FIGURE_CACHES
+
+
+@pytest.fixture(autouse=True)
+def clear_figure_cache():
+    for figure_cache in FIGURE_CACHES:
+        figure_cache.clear()
+    yield
+    for figure_cache in FIGURE_CACHES:
+        figure_cache.clear()
+
+
+def create_historical_data(days: int = 30):
+    start = datetime(year=2020, month=1, day=1)
+    return dict(time=[start + timedelta(days=day) for day in range(days)],
+                locked_stake=[500000 + day * 1000 for day in range(days)],
+                num_stakers=[100 + day for day in range(days)])
+
+
+def test_figure_fast_path_is_valid_plotly():
+    historical_data = create_historical_data()
+    future_data = {period: (NU(1000000 - period * 100, 'NU').to_tokens(), 100 - period // 10)
+                   for period in range(1, 366)}
+
+    figures = [charts._historical_known_nodes_figure(historical_data['time'], historical_data['num_stakers']),
+               charts._historical_locked_tokens_figure(historical_data['time'], historical_data['locked_stake']),
+               charts._stakers_breakdown_figure(dict(Active=25, Pending=5, Inactive=10)),
+               charts._future_locked_tokens_figure(future_data),
+               charts._staker_locked_stake_figure(historical_data['time'], historical_data['locked_stake']),
+               charts._staker_confirmations_figure(historical_data['time'], ['Confirmed'] * 29 + ['Missed'])]
+    for figure in figures:
+        assert isinstance(figure, dict)
+        go.Figure(figure)  # raises if the plain dict isn't a valid figure
+
+
+def test_historical_charts_are_downsampled():
+    historical_data = create_historical_data(days=charts.MAX_CHART_POINTS * 4)
+    historical_data['num_stakers'][123] = 10000  # outlier must survive downsampling
+
+    known_nodes = charts.historical_known_nodes_line_chart(data=historical_data, range_label='year')
+    figure = known_nodes.figure
+    x = figure['data'][0]['x']
+    y = figure['data'][0]['y']
+    assert len(x) == len(y) == charts.MAX_CHART_POINTS
+    assert x == sorted(x)
+    assert 10000 in y
+    assert figure['layout']['title'].endswith('previous year.')
+
+    locked_tokens = charts.historical_locked_tokens_bar_chart(data=create_historical_data(days=30))
+    assert len(locked_tokens.figure['data'][0]['x']) == 30
+
+
+def test_staker_confirmations_chart():
+    assert charts.confirmation_status(current_period=100, last_confirmed_period=101) == 'Confirmed'
+    assert charts.confirmation_status(current_period=100, last_confirmed_period=100) == 'Pending'
+    assert charts.confirmation_status(current_period=100, last_confirmed_period=98) == 'Missed'
+    assert charts.confirmation_status(current_period=100, last_confirmed_period=0) == 'Missed'
+
+    start = datetime(year=2020, month=1, day=1)
+    history = dict(time=[start + timedelta(days=day) for day in range(5)],
+                   current_period=[100, 101, 102, 103, 104],
+                   last_confirmed_period=[101, 102, 102, 102, 105])
+    figure = charts.staker_confirmations_chart('0x1', history).figure
+    days = {trace['name']: trace['x'] for trace in figure['data']}
+    assert len(days['Confirmed']) == 3
+    assert len(days['Pending']) == len(days['Missed']) == 1
+    assert days['Pending'][0].startswith('2020-01-03')
+    assert days['Missed'][0].startswith('2020-01-04')
+
+
+def test_figure_cache_builds_once_per_version():
+    figure_cache = FigureCache(max_size=2)
+    build = MagicMock(return_value={'data': [], 'layout': {'title': 'test'}})
+
+    figure = figure_cache.get(chart='chart', version=1, build=build)
+    assert figure == {'data': [], 'layout': {'title': 'test'}}
+    assert figure_cache.get(chart='chart', version=1, build=build) is figure
+    build.assert_called_once()
+
+    # new data version is rebuilt
+    figure_cache.get(chart='chart', version=2, build=build)
+    assert build.call_count == 2
+
+    # bounded size - least recently used version is evicted
+    figure_cache.get(chart='chart', version=3, build=build)
+    assert len(figure_cache) == 2
+    figure_cache.get(chart='chart', version=1, build=build)
+    assert build.call_count == 4
+
+
+def test_figure_cache_stores_json():
+    historical_data = create_historical_data(days=5)
+    graph = charts.historical_locked_tokens_bar_chart(data=historical_data)
+    x_values = graph.figure['data'][0]['x']
+    assert len(x_values) == 5
+    assert all(isinstance(x, str) for x in x_values)  # datetimes already serialized
+
+    # same data served from cache
+    assert charts.historical_locked_tokens_bar_chart(data=historical_data).figure is graph.figure
+    historical_data['locked_stake'][-1] += 1
+    assert charts.historical_locked_tokens_bar_chart(data=historical_data).figure is not graph.figure
+
+
+def test_figure_cache_keyed_by_fingerprint():
+    historical_data = create_historical_data(days=30)
+    figure = charts.historical_known_nodes_line_chart(data=historical_data, range_label='30 days').figure
+
+    # the same history read again
+    assert charts.historical_known_nodes_line_chart(data=create_historical_data(days=30),
+                                                    range_label='30 days').figure is figure
+
+    # another range, a new bucket, or revised buckets eg. by a backfill
+    assert charts.historical_known_nodes_line_chart(data=historical_data, range_label='month').figure is not figure
+    assert charts.historical_known_nodes_line_chart(data=create_historical_data(days=31),
+                                                    range_label='30 days').figure is not figure
+    historical_data['num_stakers'][10] += 1
+    revised_figure = charts.historical_known_nodes_line_chart(data=historical_data, range_label='30 days').figure
+    assert revised_figure is not figure
+    assert revised_figure['data'][0]['y'][10] == historical_data['num_stakers'][10]
+
+    # charts of many stakers don't evict the network charts
+    start = datetime(year=2020, month=1, day=1)
+    for staker in range(charts.STAKER_FIGURES._max_size):
+        history = dict(time=[start + timedelta(days=day) for day in range(5)],
+                       locked_stake=[1000.0 * staker + day for day in range(5)])
+        charts.staker_locked_stake_line_chart(f'0x{staker}', history)
+    assert len(charts.STAKER_FIGURES) == charts.STAKER_FIGURES._max_size
+    assert charts.historical_known_nodes_line_chart(data=historical_data,
+                                                    range_label='30 days').figure is revised_figure
+
+
+def test_figure_cache_histories_with_same_endpoints():
+    # both stakers missed a confirmation, in different periods
+    start = datetime(year=2020, month=1, day=1)
+    times = [start + timedelta(days=day) for day in range(3)]
+    history = dict(time=times, current_period=[101, 102, 103], last_confirmed_period=[101, 101, 103])
+    other_history = dict(time=list(times), current_period=[101, 102, 103], last_confirmed_period=[100, 102, 103])
+
+    def missed_days(figure):
+        return [trace['x'] for trace in figure['data'] if trace['name'] == 'Missed'][0]
+
+    figure = charts.staker_confirmations_chart('0x1', history).figure
+    other_figure = charts.staker_confirmations_chart('0x2', other_history).figure
+    assert other_figure is not figure
+    assert [day[:10] for day in missed_days(figure)] == ['2020-01-02']
+    assert [day[:10] for day in missed_days(other_figure)] == ['2020-01-01']
+
+    # the same history of another staker isn't shared either, nor are network histories with the same endpoints
+    assert charts.staker_confirmations_chart('0x2', dict(history)).figure is not figure
+    network_data = dict(time=times, locked_stake=[1.0, 2.0, 3.0], num_stakers=[1, 3, 3])
+    other_network_data = dict(time=times, locked_stake=[1.0, 2.0, 3.0], num_stakers=[2, 2, 3])
+    figure = charts.historical_known_nodes_line_chart(data=network_data).figure
+    other_figure = charts.historical_known_nodes_line_chart(data=other_network_data).figure
+    assert figure['data'][0]['y'] == [1, 3, 3]
+    assert other_figure['data'][0]['y'] == [2, 2, 3]
+
+
+def test_future_locked_tokens_chart_built_once_per_period():
+    staking_agent = MagicMock(spec=StakingEscrowAgent)
+    staking_agent.get_current_period.return_value = 18622
+    staking_agent.get_all_active_stakers.return_value = (NU(1000000, 'NU').to_nunits(), ['0x1', '0x2'])
+
+    charts.future_locked_tokens_bar_chart(staking_agent=staking_agent)
+    assert staking_agent.get_all_active_stakers.call_count == 365
+
+    charts.future_locked_tokens_bar_chart(staking_agent=staking_agent)
+    assert staking_agent.get_all_active_stakers.call_count == 365  # cached
+
+    staking_agent.get_current_period.return_value = 18623
+    charts.future_locked_tokens_bar_chart(staking_agent=staking_agent)
+    assert staking_agent.get_all_active_stakers.call_count == 365 * 2
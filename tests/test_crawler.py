@@ -1,4 +1,7 @@
 import os
+import sqlite3
+import time
+from datetime import datetime, timedelta
 from unittest.mock import MagicMock, patch
 
 import maya
@@ -10,19 +13,33 @@ from nucypher.blockchain.eth.token import NU
 from nucypher.blockchain.eth.utils import datetime_to_period
 from nucypher.cli import actions
 from nucypher.config.storages import SQLiteForgetfulNodeStorage
+from nucypher.network.exceptions import NodeSeemsToBeDown
 from nucypher.network.middleware import RestMiddleware
+from nucypher.network.nodes import Teacher
+from twisted.internet.defer import succeed
 
 import monitor
 from monitor.crawler import CrawlerNodeStorage, Crawler
 from monitor.db import CrawlerNodeMetadataDBClient
+from monitor.known_nodes import BoundedFleetStateTracker, NodeSummary
+from monitor.prober import NodeProber, split_rest_url
+from monitor.snapshot import DashboardSnapshot, SnapshotReader, publish_snapshot
+from monitor.teachers import TeacherScheduler
+from monitor.timeseries import InfluxDBTimeSeriesStorage, SQLiteTimeSeriesStorage
+from monitor.verifier import NodeVerifier
 from tests.utilities import (
+    create_eth_address,
     create_random_mock_node,
     create_specific_mock_node,
     create_specific_mock_state,
+    create_staker_table,
     MockContractAgency)
 
 IN_MEMORY_FILEPATH = ':memory:'
-DB_TABLES = [CrawlerNodeStorage.NODE_DB_NAME, CrawlerNodeStorage.STATE_DB_NAME, CrawlerNodeStorage.TEACHER_DB_NAME]
+DB_TABLES = [CrawlerNodeStorage.NODE_DB_NAME, CrawlerNodeStorage.STATE_DB_NAME, CrawlerNodeStorage.TEACHER_DB_NAME,
+             CrawlerNodeStorage.SIGHTINGS_DB_NAME, CrawlerNodeStorage.NODE_EVENTS_DB_NAME,
+             CrawlerNodeStorage.NODE_METADATA_DB_NAME, CrawlerNodeStorage.LAST_BLOCK_DB_NAME,
+             CrawlerNodeStorage.STAKER_TABLE_DB_NAME]
 
 
 #
@@ -75,6 +92,57 @@ def test_storage_store_node_metadata_store():
         verify_mock_node_matches(updated_node, row)
 
 
+def test_storage_node_events():
+    node_storage = CrawlerNodeStorage(storage_filepath=IN_MEMORY_FILEPATH)
+    checksum_address = create_eth_address()
+    node = create_specific_mock_node(checksum_address=checksum_address)
+    node_storage.store_node_metadata(node=node)
+    assert get_node_events(node_storage.db_conn) == [(checksum_address, 'new', None, node.rest_url())]
+
+    # node unchanged, or only seen again within the last seen threshold - nothing is written
+    node_storage.store_node_metadata(node=node)
+    recently_seen_node = create_specific_mock_node(checksum_address=checksum_address,
+                                                   timestamp=node.timestamp,
+                                                   last_seen=node.last_seen.add(minutes=1))
+    node_storage.store_node_metadata(node=recently_seen_node)
+    assert len(get_node_events(node_storage.db_conn)) == 1
+    result = node_storage.db_conn.execute(f"SELECT * FROM {CrawlerNodeStorage.NODE_DB_NAME}").fetchall()
+    verify_mock_node_matches(node, result[0])  # not rewritten
+
+    # rest url and fleet state change, and last seen advanced beyond the threshold
+    last_seen = node.last_seen.add(minutes=10)
+    moved_node = create_specific_mock_node(checksum_address=checksum_address,
+                                           host='127.0.0.2',
+                                           timestamp=node.timestamp,
+                                           last_seen=last_seen,
+                                           fleet_state_nickname_metadata=[({'hex': '#4F3D21', 'color': 'red'}, '%')])
+    node_storage.store_node_metadata(node=moved_node)
+    assert get_node_events(node_storage.db_conn)[1:] == [
+        (checksum_address, 'rest_url', node.rest_url(), '127.0.0.2:9151'),
+        (checksum_address, 'fleet_state_icon', '?', '%'),
+        (checksum_address, 'last_seen', node.last_seen.iso8601(), last_seen.iso8601())
+    ]
+    result = node_storage.db_conn.execute(f"SELECT rest_url, last_seen, fleet_state_icon "
+                                          f"FROM {CrawlerNodeStorage.NODE_DB_NAME}").fetchall()
+    assert result == [('127.0.0.2:9151', last_seen.iso8601(), '%')]
+
+    # nodes not seen for a while are lost, once
+    other_node = create_specific_mock_node(checksum_address=create_eth_address(),
+                                           host='127.0.0.3',
+                                           last_seen=last_seen.add(minutes=5))
+    node_storage.store_node_metadata(node=other_node)
+    seen_before = last_seen.add(minutes=1).datetime()
+    assert node_storage.record_lost_nodes(seen_before=seen_before) == [checksum_address]
+    assert node_storage.record_lost_nodes(seen_before=seen_before) == []
+    assert get_node_events(node_storage.db_conn)[-1] == (checksum_address, 'lost', last_seen.iso8601(), None)
+
+    # removed nodes are lost (unless already lost)
+    node_storage.remove(checksum_address=other_node.checksum_address, certificate=False)
+    node_storage.remove(checksum_address=checksum_address, certificate=False)
+    events = get_node_events(node_storage.db_conn)
+    assert events[-2] == (checksum_address, 'lost', last_seen.iso8601(), None)
+    assert events[-1] == (other_node.checksum_address, 'lost', other_node.last_seen.iso8601(), None)
+
 def test_storage_store_state_metadata_store():
     node_storage = CrawlerNodeStorage(storage_filepath=IN_MEMORY_FILEPATH)
 
@@ -127,6 +195,51 @@ def test_storage_deletion(tempfile_path):
     assert not os.path.exists(tempfile_path)  # db file deleted
 
 
+@patch('nucypher.characters.lawful.Ursula.from_bytes')
+def test_storage_warm_start(from_bytes, tempfile_path):
+    node_storage = CrawlerNodeStorage(storage_filepath=tempfile_path, warm_start=True)
+    nodes = [create_random_mock_node(generate_certificate=True) for _ in range(3)]
+    for node in nodes:
+        node_storage.store_node_metadata(node=node)
+    node_storage.store_current_teacher(teacher_checksum=nodes[0].checksum_address)
+    node_storage.store_state_metadata(state=create_specific_mock_state())
+    node_storage.store_last_processed_block(block_number=1234, block_time=1580000000)
+    node_storage.store_staker_table(create_staker_table(staker_addresses=[node.checksum_address for node in nodes]))
+    lost = node_storage.record_lost_nodes(seen_before=datetime.utcnow() + timedelta(minutes=1))
+    assert len(lost) == 3
+    del node_storage
+
+    assert os.path.exists(tempfile_path)  # db file kept for the next run
+
+    # data of the previous run is kept
+    node_storage = CrawlerNodeStorage(storage_filepath=tempfile_path, warm_start=True)
+    verify_all_db_tables_exist(node_storage.db_conn)
+    for table in DB_TABLES:
+        assert node_storage.db_conn.execute(f"SELECT * FROM {table}").fetchall()
+    assert node_storage.get_last_processed_block() == (1234, 1580000000)
+    assert node_storage.record_lost_nodes(seen_before=datetime.utcnow() + timedelta(minutes=1)) == []
+
+    # nodes restored from their full metadata
+    metadata = [row[0] for row in node_storage.db_conn.execute(f"SELECT metadata "
+                                                               f"FROM {CrawlerNodeStorage.NODE_METADATA_DB_NAME}")]
+    assert len(metadata) == len(nodes)
+    from_bytes.side_effect = nodes
+    restored_nodes = list(node_storage.restore_nodes())
+    assert [call[0][0] for call in from_bytes.call_args_list] == metadata
+    assert {node.checksum_address for node in restored_nodes} == {node.checksum_address for node in nodes}
+    for node in restored_nodes:
+        assert node_storage.get(federated_only=False, checksum_address=node.checksum_address) is node
+        assert node.certificate_filepath == node_storage.generate_certificate_filepath(node.checksum_address)
+
+    # cold start - data of the previous run is dropped, and the db file deleted
+    del node_storage
+    node_storage = CrawlerNodeStorage(storage_filepath=tempfile_path)
+    verify_all_db_tables(node_storage.db_conn, expect_empty=True)
+    assert node_storage.get_last_processed_block() is None
+    del node_storage
+    assert not os.path.exists(tempfile_path)
+
+
 def test_storage_db_clear():
     node_storage = CrawlerNodeStorage(storage_filepath=IN_MEMORY_FILEPATH)
     verify_all_db_tables_exist(node_storage.db_conn)
@@ -141,6 +254,9 @@ def test_storage_db_clear():
     teacher_checksum = '0x123456789'
     node_storage.store_current_teacher(teacher_checksum)
 
+    node_storage.store_last_processed_block(block_number=1234, block_time=1580000000)
+    node_storage.store_staker_table(create_staker_table(staker_addresses=[node.checksum_address]))
+
     verify_all_db_tables(node_storage.db_conn, expect_empty=False)
 
     # clear tables
@@ -163,6 +279,9 @@ def test_storage_db_clear_only_metadata_not_certificates():
     teacher_checksum = '0x123456789'
     node_storage.store_current_teacher(teacher_checksum)
 
+    node_storage.store_last_processed_block(block_number=1234, block_time=1580000000)
+    node_storage.store_staker_table(create_staker_table(staker_addresses=[node.checksum_address]))
+
     verify_all_db_tables(node_storage.db_conn, expect_empty=False)
 
     # clear metadata tables
@@ -185,6 +304,9 @@ def test_storage_db_clear_not_metadata():
     teacher_checksum = '0x123456789'
     node_storage.store_current_teacher(teacher_checksum)
 
+    node_storage.store_last_processed_block(block_number=1234, block_time=1580000000)
+    node_storage.store_staker_table(create_staker_table(staker_addresses=[node.checksum_address]))
+
     verify_all_db_tables(node_storage.db_conn, expect_empty=False)
 
     # only clear certificates data
@@ -198,7 +320,12 @@ def test_storage_db_clear_not_metadata():
 # Crawler tests.
 #
 
-def create_crawler(node_db_filepath: str = IN_MEMORY_FILEPATH, dont_set_teacher: bool = False):
+def create_crawler(node_db_filepath: str = IN_MEMORY_FILEPATH,
+                   dont_set_teacher: bool = False,
+                   blockchain_db_filepath: str = None,
+                   warm_start: bool = False,
+                   max_hydrated_nodes: int = None,
+                   snapshot_filepath: str = None):
     registry = InMemoryContractRegistry()
     middleware = RestMiddleware()
     teacher_nodes = None
@@ -218,7 +345,11 @@ def create_crawler(node_db_filepath: str = IN_MEMORY_FILEPATH, dont_set_teacher:
                       learn_on_same_thread=False,
                       blockchain_db_host='localhost',
                       blockchain_db_port=8086,
-                      node_storage_filepath=node_db_filepath
+                      node_storage_filepath=node_db_filepath,
+                      blockchain_db_filepath=blockchain_db_filepath,
+                      max_hydrated_nodes=max_hydrated_nodes,
+                      snapshot_filepath=snapshot_filepath,
+                      warm_start=warm_start
                       )
     return crawler
 
@@ -246,7 +377,7 @@ def test_crawler_init(get_agent):
 
 
 @patch.object(monitor.crawler.ContractAgency, 'get_agent', autospec=True)
-@patch('monitor.crawler.InfluxDBClient', autospec=True)
+@patch('monitor.timeseries.InfluxDBClient', autospec=True)
 def test_crawler_stop_before_start(new_influx_db, get_agent):
     mock_influxdb_client = new_influx_db.return_value
 
@@ -264,7 +395,7 @@ def test_crawler_stop_before_start(new_influx_db, get_agent):
 
 
 @patch.object(monitor.crawler.ContractAgency, 'get_agent', autospec=True)
-@patch('monitor.crawler.InfluxDBClient', autospec=True)
+@patch('monitor.timeseries.InfluxDBClient', autospec=True)
 def test_crawler_start_then_stop(new_influx_db, get_agent):
     mock_influxdb_client = new_influx_db.return_value
 
@@ -299,7 +430,7 @@ def test_crawler_start_no_influx_db_connection(get_agent):
 
 
 @patch.object(monitor.crawler.ContractAgency, 'get_agent', autospec=True)
-@patch('monitor.crawler.InfluxDBClient', autospec=True)
+@patch('monitor.timeseries.InfluxDBClient', autospec=True)
 def test_crawler_start_blockchain_db_not_present(new_influx_db, get_agent):
     mock_influxdb_client = new_influx_db.return_value
     mock_influxdb_client.get_list_database.return_value = [{'name': 'db1'},
@@ -320,7 +451,19 @@ def test_crawler_start_blockchain_db_not_present(new_influx_db, get_agent):
         mock_influxdb_client.get_list_database.assert_called_once()
         # db created since not present
         mock_influxdb_client.create_database.assert_called_once_with(Crawler.BLOCKCHAIN_DB_NAME)
-        mock_influxdb_client.create_retention_policy.assert_called_once()
+
+        # raw data and rollup retention policies created
+        num_rollups = len(InfluxDBTimeSeriesStorage.ROLLUP_RETENTION_POLICIES)
+        assert mock_influxdb_client.create_retention_policy.call_count == 1 + num_rollups
+        created_policies = [call[1]['name'] for call in mock_influxdb_client.create_retention_policy.call_args_list]
+        assert created_policies[0] == InfluxDBTimeSeriesStorage.RETENTION_POLICY_NAME
+        for policy_name, _duration, _resolution in InfluxDBTimeSeriesStorage.ROLLUP_RETENTION_POLICIES:
+            assert policy_name in created_policies
+
+        # continuous queries created for rollups
+        queries = [call[0][0] for call in mock_influxdb_client.query.call_args_list]
+        continuous_queries = [query for query in queries if query.startswith('CREATE CONTINUOUS QUERY')]
+        assert len(continuous_queries) == 2 * num_rollups  # per-staker data and network summaries
     finally:
         crawler.stop()
 
@@ -329,12 +472,17 @@ def test_crawler_start_blockchain_db_not_present(new_influx_db, get_agent):
 
 
 @patch.object(monitor.crawler.ContractAgency, 'get_agent', autospec=True)
-@patch('monitor.crawler.InfluxDBClient', autospec=True)
+@patch('monitor.timeseries.InfluxDBClient', autospec=True)
 def test_crawler_start_blockchain_db_already_present(new_influx_db, get_agent):
     mock_influxdb_client = new_influx_db.return_value
     mock_influxdb_client.get_list_database.return_value = [{'name': 'db1'},
                                                            {'name': f'{Crawler.BLOCKCHAIN_DB_NAME}'},
                                                            {'name': 'db3'}]
+    rollups = InfluxDBTimeSeriesStorage.ROLLUP_RETENTION_POLICIES
+    mock_influxdb_client.get_list_retention_policies.return_value = \
+        [{'name': InfluxDBTimeSeriesStorage.RETENTION_POLICY_NAME}] + [{'name': policy} for policy, _, _ in rollups]
+    mock_influxdb_client.query.return_value.get_points.return_value = \
+        [{'name': f'cq_{policy}{suffix}', 'query': ''} for policy, _, _ in rollups for suffix in ('', '_summary')]
 
     staking_agent = MagicMock(spec=StakingEscrowAgent)
     contract_agency = MockContractAgency(staking_agent=staking_agent)
@@ -351,6 +499,8 @@ def test_crawler_start_blockchain_db_already_present(new_influx_db, get_agent):
         # db not created since not present
         mock_influxdb_client.create_database.assert_not_called()
         mock_influxdb_client.create_retention_policy.assert_not_called()
+        # only the check for existing continuous queries
+        mock_influxdb_client.query.assert_called_once_with('SHOW CONTINUOUS QUERIES')
     finally:
         crawler.stop()
 
@@ -359,7 +509,86 @@ def test_crawler_start_blockchain_db_already_present(new_influx_db, get_agent):
 
 
 @patch.object(monitor.crawler.ContractAgency, 'get_agent', autospec=True)
-@patch('monitor.crawler.InfluxDBClient', autospec=True)
+@patch('monitor.timeseries.InfluxDBClient', autospec=True)
+def test_crawler_start_blockchain_db_present_without_rollups(new_influx_db, get_agent):
+    mock_influxdb_client = new_influx_db.return_value
+    mock_influxdb_client.get_list_database.return_value = [{'name': f'{Crawler.BLOCKCHAIN_DB_NAME}'}]
+    # database previously created with only the raw data retention policy
+    mock_influxdb_client.get_list_retention_policies.return_value = [
+        {'name': InfluxDBTimeSeriesStorage.RETENTION_POLICY_NAME}
+    ]
+    mock_influxdb_client.query.return_value.get_points.return_value = []
+
+    staking_agent = MagicMock(spec=StakingEscrowAgent)
+    contract_agency = MockContractAgency(staking_agent=staking_agent)
+    get_agent.side_effect = contract_agency.get_agent
+
+    crawler = create_crawler()
+    try:
+        crawler.start()
+        assert crawler.is_running
+
+        mock_influxdb_client.create_database.assert_not_called()
+
+        # rollup tiers added to existing database
+        rollups = InfluxDBTimeSeriesStorage.ROLLUP_RETENTION_POLICIES
+        assert mock_influxdb_client.create_retention_policy.call_count == len(rollups)
+        for call, (policy_name, duration, _resolution) in zip(
+                mock_influxdb_client.create_retention_policy.call_args_list, rollups):
+            assert call[1]['name'] == policy_name
+            assert call[1]['duration'] == duration
+            assert not call[1]['default']  # raw data remains the default
+
+        # continuous queries per rollup, each populated from the preceding tier
+        queries = [call[0][0] for call in mock_influxdb_client.query.call_args_list]
+        source_policy = InfluxDBTimeSeriesStorage.RETENTION_POLICY_NAME
+        for policy_name, _duration, resolution in rollups:
+            for suffix, measurement, group_by in (('', Crawler.BLOCKCHAIN_DB_MEASUREMENT, ', staker_address'),
+                                                  ('_summary', Crawler.NETWORK_SUMMARY_MEASUREMENT, '')):
+                continuous_query = [query for query in queries
+                                    if f'CREATE CONTINUOUS QUERY "cq_{policy_name}{suffix}"' in query]
+                assert len(continuous_query) == 1
+                assert f'INTO "{Crawler.BLOCKCHAIN_DB_NAME}"."{policy_name}"."{measurement}"' in continuous_query[0]
+                assert f'FROM "{Crawler.BLOCKCHAIN_DB_NAME}"."{source_policy}"."{measurement}"' in continuous_query[0]
+                assert continuous_query[0].endswith(f'GROUP BY time({resolution}){group_by} END')
+
+                # existing data rolled up
+                backfill = [query for query in queries if query.startswith('SELECT')
+                            and f'"{policy_name}"."{measurement}"' in query and 'WHERE time >=' in query]
+                assert len(backfill) == 1
+            source_policy = policy_name
+    finally:
+        crawler.stop()
+
+
+@patch.object(monitor.crawler.ContractAgency, 'get_agent', autospec=True)
+@patch('monitor.timeseries.InfluxDBClient', autospec=True)
+def test_crawler_start_sqlite_blockchain_db(new_influx_db, get_agent, tempfile_path):
+    staking_agent = MagicMock(spec=StakingEscrowAgent)
+    contract_agency = MockContractAgency(staking_agent=staking_agent)
+    get_agent.side_effect = contract_agency.get_agent
+
+    crawler = create_crawler(blockchain_db_filepath=tempfile_path)
+    try:
+        crawler.start()
+        assert crawler.is_running
+
+        # embedded storage instead of InfluxDB
+        new_influx_db.assert_not_called()
+        db_conn = sqlite3.connect(tempfile_path)
+        try:
+            tables = [row[0] for row in db_conn.execute("SELECT name FROM sqlite_master WHERE type='table'")]
+            assert SQLiteTimeSeriesStorage.PARTITION_TABLE_NAME in tables
+        finally:
+            db_conn.close()
+    finally:
+        crawler.stop()
+
+    assert not crawler.is_running
+
+
+@patch.object(monitor.crawler.ContractAgency, 'get_agent', autospec=True)
+@patch('monitor.timeseries.InfluxDBClient', autospec=True)
 def test_crawler_learn_no_teacher(new_influx_db, get_agent, tempfile_path):
     mock_influxdb_client = new_influx_db.return_value
 
@@ -389,7 +618,7 @@ def test_crawler_learn_no_teacher(new_influx_db, get_agent, tempfile_path):
 
 
 @patch.object(monitor.crawler.ContractAgency, 'get_agent', autospec=True)
-@patch('monitor.crawler.InfluxDBClient', autospec=True)
+@patch('monitor.timeseries.InfluxDBClient', autospec=True)
 def test_crawler_learn_about_teacher(new_influx_db, get_agent, tempfile_path):
     mock_influxdb_client = new_influx_db.return_value
 
@@ -421,7 +650,7 @@ def test_crawler_learn_about_teacher(new_influx_db, get_agent, tempfile_path):
 
 @patch.object(monitor.crawler.TokenEconomicsFactory, 'get_economics', autospec=True)
 @patch.object(monitor.crawler.ContractAgency, 'get_agent', autospec=True)
-@patch('monitor.crawler.InfluxDBClient', autospec=True)
+@patch('monitor.timeseries.InfluxDBClient', autospec=True)
 def test_crawler_learn_about_nodes(new_influx_db, get_agent, get_economics, tempfile_path):
     mock_influxdb_client = new_influx_db.return_value
     mock_influxdb_client.write_points.return_value = True
@@ -435,6 +664,9 @@ def test_crawler_learn_about_nodes(new_influx_db, get_agent, get_economics, temp
     token_economics = StandardTokenEconomics()
     get_economics.return_value = token_economics
 
+    block = MagicMock(number=1234, timestamp=int(time.time()))
+    staking_agent.blockchain.client.w3.eth.getBlock.return_value = block
+
     crawler = create_crawler(node_db_filepath=tempfile_path)
     node_db_client = CrawlerNodeMetadataDBClient(db_filepath=tempfile_path)
     try:
@@ -488,6 +720,32 @@ def test_crawler_learn_about_nodes(new_influx_db, get_agent, get_economics, temp
                 assert arg in influx_db_line_protocol_statement, \
                     f"{arg} in {influx_db_line_protocol_statement} for iteration {i}"
 
+            # network summary of the cycle written with the per-staker data
+            num_stakers = len(crawler.known_nodes.abridged_nodes_dict())
+            locked_tokens = float(NU.from_nunits(tokens).to_tokens())
+            expected_summary = [f'{Crawler.NETWORK_SUMMARY_MEASUREMENT} ',
+                                f'total_locked={sum([locked_tokens] * num_stakers)}',
+                                f'num_stakers={num_stakers}i',
+                                f'confirmed=0i',
+                                f'pending={num_stakers if i == 0 else 0}i',
+                                f'inactive={0 if i == 0 else num_stakers}i',
+                                f'headless=0i',
+                                f'current_period={current_period}i']
+            for arg in expected_summary:
+                assert arg in influx_db_line_protocol_statement, \
+                    f"{arg} in {influx_db_line_protocol_statement} for iteration {i}"
+
+            # block processed
+            assert crawler.node_storage.get_last_processed_block() == (block.number, block.timestamp)
+
+            # staker table of the cycle stored for the dashboard
+            staker_table = node_db_client.get_staker_table()
+            assert len(staker_table) == num_stakers
+            assert staker_table.current_period == current_period
+            staker_id = staker_table.get_id(random_node.checksum_address)
+            assert staker_table.worker_address[staker_id] == random_node.worker_address
+            assert staker_table.last_confirmed_period[staker_id] == last_active_period
+
             mock_influxdb_client.reset_mock()
     finally:
         crawler.stop()
@@ -496,6 +754,426 @@ def test_crawler_learn_about_nodes(new_influx_db, get_agent, get_economics, temp
     assert not crawler.is_running
 
 
+@patch('monitor.crawler.threads.deferToThread', side_effect=lambda f, *args, **kwargs: succeed(f(*args, **kwargs)))
+@patch.object(monitor.crawler.ContractAgency, 'get_agent', autospec=True)
+@patch('monitor.timeseries.InfluxDBClient', autospec=True)
+def test_crawler_probe_nodes(new_influx_db, get_agent, defer_to_thread, tempfile_path):
+    mock_influxdb_client = new_influx_db.return_value
+    mock_influxdb_client.write_points.return_value = True
+
+    staking_agent = MagicMock(spec=StakingEscrowAgent)
+    contract_agency = MockContractAgency(staking_agent=staking_agent)
+    get_agent.side_effect = contract_agency.get_agent
+
+    crawler = create_crawler(node_db_filepath=tempfile_path, dont_set_teacher=True)
+    prober = MagicMock(spec=NodeProber)
+    crawler._prober = prober
+    try:
+        crawler.start()
+        assert crawler._nodes_probing_task.running
+
+        node = create_random_mock_node(generate_certificate=True)
+        crawler.remember_node(node=node, force_verification_check=False, record_fleet_state=True)
+        prober.run.return_value = {node.checksum_address: dict(reachable=True, status=200, latency=0.25,
+                                                               connect_time=0.05, tls_handshake_time=0.1,
+                                                               error=None)}
+
+        # run crawler callable
+        crawler._probe_nodes()
+
+        prober.run.assert_called_once_with({node.checksum_address: node.rest_url()})
+        mock_influxdb_client.write_points.assert_called_once()
+        influx_db_line_protocol_statement = str(mock_influxdb_client.write_points.call_args_list[0][0])
+        expected_arguments = [f'{NodeProber.MEASUREMENT},staker_address={node.checksum_address} ',
+                              'reachable=true',
+                              'status=200i',
+                              'latency=0.25',
+                              'tls_handshake_time=0.1']
+        for arg in expected_arguments:
+            assert arg in influx_db_line_protocol_statement
+    finally:
+        crawler.stop()
+
+    assert not crawler._nodes_probing_task.running
+
+
+@patch('monitor.crawler.threads.deferToThread', side_effect=lambda f, *args, **kwargs: succeed(f(*args, **kwargs)))
+@patch('nucypher.characters.lawful.Ursula.from_bytes')
+@patch.object(monitor.crawler.ContractAgency, 'get_agent', autospec=True)
+@patch('monitor.timeseries.InfluxDBClient', autospec=True)
+def test_crawler_warm_start(new_influx_db, get_agent, from_bytes, defer_to_thread, tempfile_path):
+    staking_agent = MagicMock(spec=StakingEscrowAgent)
+    contract_agency = MockContractAgency(staking_agent=staking_agent)
+    get_agent.side_effect = contract_agency.get_agent
+
+    # nodes known by a previous run
+    node_storage = CrawlerNodeStorage(storage_filepath=tempfile_path, warm_start=True)
+    nodes = [create_random_mock_node(generate_certificate=True) for _ in range(5)]
+    for node in nodes:
+        node_storage.store_node_metadata(node=node)
+    node_storage.store_last_processed_block(block_number=1234, block_time=int(time.time()))
+    del node_storage
+
+    from_bytes.side_effect = nodes
+    invalid_node = nodes[0]
+    invalid_node.verify_node.side_effect = Teacher.InvalidNode('invalid stamp')
+    crawler = create_crawler(node_db_filepath=tempfile_path, dont_set_teacher=True, warm_start=True)
+
+    # known right away, not verified yet
+    assert {node.checksum_address for node in crawler.known_nodes} == {node.checksum_address for node in nodes}
+    for node in nodes:
+        node.verify_node.assert_not_called()
+    node_db_client = CrawlerNodeMetadataDBClient(db_filepath=tempfile_path)
+    assert node_db_client.get_states_fingerprint()[0] == 1
+
+    try:
+        crawler.start()
+
+        # verified in the background; invalid nodes are forgotten
+        for node in nodes:
+            node.verify_node.assert_called_once()
+        assert invalid_node.checksum_address not in crawler.known_nodes
+        assert len(crawler.known_nodes) == len(nodes) - 1
+        assert invalid_node.checksum_address not in node_db_client.get_known_nodes_metadata()
+        events, _cursor = node_db_client.get_node_events(staker_address=invalid_node.checksum_address)
+        assert events[-1]['event'] == CrawlerNodeStorage.LOST_NODE_EVENT
+    finally:
+        crawler.stop()
+
+
+@patch('monitor.crawler.threads.deferToThread', side_effect=lambda f, *args, **kwargs: succeed(f(*args, **kwargs)))
+@patch('nucypher.characters.lawful.Ursula.from_bytes')
+@patch.object(monitor.crawler.ContractAgency, 'get_agent', autospec=True)
+@patch('monitor.timeseries.InfluxDBClient', autospec=True)
+def test_crawler_warm_start_bounded_known_nodes(new_influx_db, get_agent, from_bytes, defer_to_thread, tempfile_path):
+    staking_agent = MagicMock(spec=StakingEscrowAgent)
+    contract_agency = MockContractAgency(staking_agent=staking_agent)
+    get_agent.side_effect = contract_agency.get_agent
+
+    # more nodes known by a previous run than kept in memory - each restored from its own metadata
+    node_storage = CrawlerNodeStorage(storage_filepath=tempfile_path, warm_start=True)
+    nodes = [create_random_mock_node(generate_certificate=True) for _ in range(5)]
+    for node in nodes:
+        node_storage.store_node_metadata(node=node)
+    with node_storage.db_conn:
+        node_storage.db_conn.executemany(f"UPDATE {CrawlerNodeStorage.NODE_METADATA_DB_NAME} SET metadata = ? "
+                                         f"WHERE staker_address = ?",
+                                         [(node.checksum_address.encode(), node.checksum_address) for node in nodes])
+    del node_storage
+
+    nodes_by_metadata = {node.checksum_address.encode(): node for node in nodes}
+    from_bytes.side_effect = lambda metadata, federated_only: nodes_by_metadata[metadata]
+    crawler = create_crawler(node_db_filepath=tempfile_path, dont_set_teacher=True, warm_start=True,
+                             max_hydrated_nodes=2)
+    node_verifier = MagicMock(spec=NodeVerifier)
+    crawler._node_verifier = node_verifier
+
+    # known right away, but only the most recently restored nodes are kept in memory
+    assert {node.checksum_address for node in crawler.known_nodes} == {node.checksum_address for node in nodes}
+    assert len(crawler.known_nodes._hydrated) == 2
+    node_verifier.run.assert_not_called()
+
+    invalid_node, unreachable_node = nodes[0], nodes[1]
+    failure_reasons = {invalid_node.certificate_filepath: 'InvalidNode invalid stamp',
+                       unreachable_node.certificate_filepath: f'{NodeSeemsToBeDown[0].__name__} unreachable'}
+    node_verifier.run.side_effect = lambda batch: [failure_reasons.get(certificate_filepath)
+                                                   for _metadata, certificate_filepath in batch]
+    try:
+        crawler.start()
+
+        # verified in the pool of the verifier, a batch of at most as many nodes as kept in memory at a time
+        assert [len(call[0][0]) for call in node_verifier.run.call_args_list] == [2, 2, 1]
+        verified_filepaths = [certificate_filepath for call in node_verifier.run.call_args_list
+                              for _metadata, certificate_filepath in call[0][0]]
+        assert sorted(verified_filepaths) == sorted(node.certificate_filepath for node in nodes)
+        assert len(crawler.known_nodes._hydrated) <= 2
+
+        # invalid nodes are forgotten, nodes that can't be reached right now are not
+        assert invalid_node.checksum_address not in crawler.known_nodes
+        assert unreachable_node.checksum_address in crawler.known_nodes
+        assert len(crawler.known_nodes) == len(nodes) - 1
+        assert invalid_node.checksum_address not in dict(crawler.node_storage.iter_node_metadata())
+    finally:
+        crawler.stop()
+
+
+@patch.object(monitor.crawler.FleetStateTracker, 'snapshot_splitter')
+@patch('monitor.crawler.signature_splitter')
+@patch('nucypher.characters.lawful.Ursula.batch_from_bytes')
+@patch('monitor.crawler.threads.deferToThread', side_effect=lambda f, *args, **kwargs: succeed(f(*args, **kwargs)))
+@patch.object(monitor.crawler.ContractAgency, 'get_agent', autospec=True)
+@patch('monitor.timeseries.InfluxDBClient', autospec=True)
+def test_crawler_learn_from_teacher_in_pool(new_influx_db, get_agent, defer_to_thread, batch_from_bytes,
+                                            signature_splitter, snapshot_splitter, tempfile_path):
+    staking_agent = MagicMock(spec=StakingEscrowAgent)
+    contract_agency = MockContractAgency(staking_agent=staking_agent)
+    get_agent.side_effect = contract_agency.get_agent
+
+    crawler = create_crawler(node_db_filepath=tempfile_path, dont_set_teacher=True)
+    node_verifier = MagicMock(spec=NodeVerifier)
+    crawler._node_verifier = node_verifier
+    node_db_client = CrawlerNodeMetadataDBClient(db_filepath=tempfile_path)
+
+    teacher = create_random_mock_node(generate_certificate=True)
+    teacher.serving_domains = {'goerli'}
+    crawler.remember_node(node=teacher, record_fleet_state=True)
+
+    # teacher knows about itself, new nodes, an invalid node and a node of another domain
+    new_nodes = [create_random_mock_node(generate_certificate=True) for _ in range(5)]
+    invalid_node = create_random_mock_node(generate_certificate=True)
+    other_domain_node = create_random_mock_node(generate_certificate=True)
+    for node in new_nodes + [invalid_node]:
+        node.serving_domains = {'goerli'}
+    other_domain_node.serving_domains = {'mainnet'}
+    batch_from_bytes.return_value = [teacher, *new_nodes, invalid_node, other_domain_node]
+
+    crawler.network_middleware = MagicMock(spec=RestMiddleware)
+    crawler.network_middleware.get_nodes_via_rest.return_value = MagicMock(status_code=200, content=b'payload')
+    signature_splitter.return_value = (MagicMock(), b'payload')
+    snapshot_splitter.return_value = (os.urandom(32), int(time.time()).to_bytes(4, byteorder='big'), b'nodes')
+    node_verifier.run.side_effect = lambda nodes: [None] * (len(nodes) - 1) + ['InvalidNode invalid stamp']
+
+    try:
+        crawler.start()
+        with patch.object(crawler, 'current_teacher_node', return_value=teacher), \
+                patch.object(crawler, 'cycle_teacher_node'), \
+                patch.object(crawler, 'verify_from'):
+            learnt_nodes = []
+            crawler.keep_learning_about_nodes().addCallback(learnt_nodes.extend)
+
+        # only new nodes of the domain are verified, in the pool of the verifier
+        node_verifier.run.assert_called_once()
+        nodes_to_verify = node_verifier.run.call_args[0][0]
+        assert len(nodes_to_verify) == len(new_nodes) + 1
+        assert [certificate_filepath for _metadata, certificate_filepath in nodes_to_verify] == \
+               [node.certificate_filepath for node in new_nodes + [invalid_node]]
+
+        # verified nodes are remembered, and stored
+        assert learnt_nodes == new_nodes
+        for node in new_nodes:
+            assert node.verified_node is True
+            assert node.checksum_address in crawler.known_nodes
+        assert invalid_node.checksum_address not in crawler.known_nodes
+        assert other_domain_node.checksum_address not in crawler.known_nodes
+
+        known_nodes = node_db_client.get_known_nodes_metadata()
+        assert set(known_nodes) == {node.checksum_address for node in new_nodes + [teacher]}
+        assert node_db_client.get_current_teacher_checksum() == teacher.checksum_address
+    finally:
+        crawler.stop()
+
+    node_verifier.close.assert_called_once()
+
+
+@patch.object(monitor.crawler.FleetStateTracker, 'snapshot_splitter')
+@patch('monitor.crawler.signature_splitter')
+@patch('nucypher.characters.lawful.Ursula.batch_from_bytes')
+@patch('monitor.crawler.threads.deferToThread', side_effect=lambda f, *args, **kwargs: succeed(f(*args, **kwargs)))
+@patch.object(monitor.crawler.ContractAgency, 'get_agent', autospec=True)
+@patch('monitor.timeseries.InfluxDBClient', autospec=True)
+def test_crawler_learn_from_several_teachers(new_influx_db, get_agent, defer_to_thread, batch_from_bytes,
+                                             signature_splitter, snapshot_splitter, tempfile_path):
+    mock_influxdb_client = new_influx_db.return_value
+    mock_influxdb_client.write_points.return_value = True
+
+    staking_agent = MagicMock(spec=StakingEscrowAgent)
+    contract_agency = MockContractAgency(staking_agent=staking_agent)
+    get_agent.side_effect = contract_agency.get_agent
+
+    crawler = create_crawler(node_db_filepath=tempfile_path, dont_set_teacher=True)
+    teacher_scheduler = TeacherScheduler(teachers_per_round=2)
+    crawler._teacher_scheduler = teacher_scheduler
+    node_db_client = CrawlerNodeMetadataDBClient(db_filepath=tempfile_path)
+
+    # a teacher that responds, and one that is down
+    teacher, down_teacher = create_random_mock_node(generate_certificate=True), \
+        create_random_mock_node(generate_certificate=True)
+    for node in (teacher, down_teacher):
+        node.serving_domains = {'goerli'}
+        crawler.remember_node(node=node, record_fleet_state=True)
+    teacher_host = split_rest_url(teacher.rest_url())[0]
+    down_teacher_host = split_rest_url(down_teacher.rest_url())[0]
+    teacher_scheduler.record_response(teacher.checksum_address, teacher_host, latency=0.5, new_nodes=0)
+
+    new_nodes = [create_random_mock_node(generate_certificate=True) for _ in range(5)]
+    invalid_node = create_random_mock_node(generate_certificate=True)
+    invalid_node.verify_node.side_effect = Teacher.InvalidNode('invalid stamp')
+    for node in new_nodes + [invalid_node]:
+        node.serving_domains = {'goerli'}
+    batch_from_bytes.return_value = [teacher, down_teacher, *new_nodes, invalid_node]
+
+    def get_nodes_via_rest(node, *args, **kwargs):
+        if node is down_teacher:
+            raise NodeSeemsToBeDown[0]('connection refused')
+        return MagicMock(status_code=200, content=b'payload')
+    crawler.network_middleware = MagicMock(spec=RestMiddleware)
+    crawler.network_middleware.get_nodes_via_rest.side_effect = get_nodes_via_rest
+    signature_splitter.return_value = (MagicMock(), b'payload')
+    snapshot_splitter.return_value = (os.urandom(32), int(time.time()).to_bytes(4, byteorder='big'), b'nodes')
+
+    try:
+        crawler.start()
+        with patch.object(crawler, 'verify_from'):
+            learnt_nodes = []
+            crawler.keep_learning_about_nodes().addCallback(learnt_nodes.extend)
+
+        # both teachers requested
+        assert crawler.network_middleware.get_nodes_via_rest.call_count == 2
+
+        # new nodes verified and remembered
+        assert learnt_nodes == new_nodes
+        for node in new_nodes:
+            node.verify_node.assert_called()
+            assert node.checksum_address in crawler.known_nodes
+        assert invalid_node.checksum_address not in crawler.known_nodes
+        known_nodes = node_db_client.get_known_nodes_metadata()
+        assert set(known_nodes) == {node.checksum_address for node in new_nodes + [teacher, down_teacher]}
+        assert node_db_client.get_current_teacher_checksum() == teacher.checksum_address
+
+        # teachers scored; the host of the teacher that is down is backed off
+        assert teacher_scheduler.score(teacher.checksum_address) > 0
+        assert teacher_scheduler.is_backed_off(down_teacher_host)
+        assert not teacher_scheduler.is_backed_off(teacher_host)
+        assert teacher_scheduler.select({down_teacher.checksum_address: down_teacher_host}) == []
+
+        # discovery rate recorded
+        influx_db_line_protocol_statement = str(mock_influxdb_client.write_points.call_args_list[-1][0])
+        expected_arguments = [f'{Crawler.NODE_DISCOVERY_MEASUREMENT} ',
+                              'teachers=2i',
+                              'responses=1i',
+                              f'new_nodes={len(new_nodes)}i',
+                              f'known_nodes={len(new_nodes) + 2}i',
+                              'discovery_rate=']
+        for arg in expected_arguments:
+            assert arg in influx_db_line_protocol_statement
+    finally:
+        crawler.stop()
+
+
+@patch.object(monitor.crawler.ContractAgency, 'get_agent', autospec=True)
+@patch('monitor.timeseries.InfluxDBClient', autospec=True)
+def test_crawler_warm_start_overdue_block(new_influx_db, get_agent, tempfile_path):
+    staking_agent = MagicMock(spec=StakingEscrowAgent)
+    contract_agency = MockContractAgency(staking_agent=staking_agent)
+    get_agent.side_effect = contract_agency.get_agent
+
+    node_storage = CrawlerNodeStorage(storage_filepath=tempfile_path, warm_start=True)
+    node_storage.store_last_processed_block(block_number=1234,
+                                            block_time=int(time.time()) - Crawler.DEFAULT_REFRESH_RATE)
+    del node_storage
+
+    # the network information is updated right away when the last processed block is older than a refresh
+    crawler = create_crawler(node_db_filepath=tempfile_path, dont_set_teacher=True, warm_start=True)
+    with patch.object(crawler._nodes_contract_info_learning_task, 'start', autospec=True) as start_task:
+        crawler.start()
+    start_task.assert_called_once_with(interval=Crawler.DEFAULT_REFRESH_RATE, now=True)
+
+
+@patch.object(monitor.crawler.ContractAgency, 'get_agent', autospec=True)
+def test_crawler_bounded_known_nodes(get_agent, tempfile_path):
+    staking_agent = MagicMock(spec=StakingEscrowAgent)
+    contract_agency = MockContractAgency(staking_agent=staking_agent)
+    get_agent.side_effect = contract_agency.get_agent
+
+    crawler = create_crawler(node_db_filepath=tempfile_path, dont_set_teacher=True, max_hydrated_nodes=2)
+    assert isinstance(crawler.known_nodes, BoundedFleetStateTracker)
+    nodes = [create_random_mock_node(generate_certificate=True) for _ in range(5)]
+    for node in nodes:
+        crawler.known_nodes[node.checksum_address] = node
+        crawler.node_storage.store_node_metadata(node=node)
+    crawler.known_nodes.record_fleet_state()
+
+    # summaries of the known nodes are kept in memory, but not the nodes themselves - by the storage either
+    assert {node.checksum_address for node in crawler.known_nodes} == {node.checksum_address for node in nodes}
+    assert all(isinstance(known_node, NodeSummary) for known_node in crawler.known_nodes)
+    assert crawler.node_storage.all(federated_only=False) == set()
+    stored_metadata = dict(crawler.node_storage.iter_node_metadata())
+    assert set(stored_metadata) == {node.checksum_address for node in nodes}
+
+    # invalid nodes are forgotten, and no longer learnt from
+    crawler.select_teacher_nodes()
+    invalid_node = nodes[0]
+    crawler._forget_nodes([invalid_node])
+    assert invalid_node.checksum_address not in crawler.known_nodes
+    assert len(crawler.known_nodes) == len(nodes) - 1
+    assert invalid_node.checksum_address not in {teacher.checksum_address for teacher in crawler.teacher_nodes}
+    assert crawler.node_storage.load_node(invalid_node.checksum_address) is None
+    assert invalid_node.checksum_address not in dict(crawler.node_storage.iter_node_metadata())
+
+
+@patch.object(monitor.crawler.ContractAgency, 'get_agent', autospec=True)
+def test_crawler_bounded_known_nodes_teacher_evicted(get_agent, tempfile_path):
+    staking_agent = MagicMock(spec=StakingEscrowAgent)
+    contract_agency = MockContractAgency(staking_agent=staking_agent)
+    get_agent.side_effect = contract_agency.get_agent
+
+    crawler = create_crawler(node_db_filepath=tempfile_path, dont_set_teacher=True, max_hydrated_nodes=2)
+    teacher = create_random_mock_node(generate_certificate=True)
+    crawler.known_nodes[teacher.checksum_address] = teacher
+    crawler.node_storage.store_node_metadata(node=teacher)
+
+    # the teacher is evicted by nodes learnt while it is requested
+    for node in [create_random_mock_node(generate_certificate=True) for _ in range(2)]:
+        crawler.known_nodes[node.checksum_address] = node
+    assert teacher.checksum_address not in crawler.known_nodes._hydrated
+
+    # its last seen time is kept by its summary, and by the node storage
+    assert crawler._update_teacher(teacher, fleet_state=(os.urandom(32).hex(), maya.now(), None)) == []
+    assert crawler.known_nodes[teacher.checksum_address].last_seen == teacher.last_seen
+    node_db_client = CrawlerNodeMetadataDBClient(db_filepath=tempfile_path)
+    known_nodes = node_db_client.get_known_nodes_metadata()
+    assert known_nodes[teacher.checksum_address]['last_seen'] == teacher.last_seen.iso8601()
+
+
+@patch.object(monitor.crawler.ContractAgency, 'get_agent', autospec=True)
+def test_crawler_publish_snapshot(get_agent, tempfile_path, tmpdir):
+    staking_agent = MagicMock(spec=StakingEscrowAgent)
+    contract_agency = MockContractAgency(staking_agent=staking_agent)
+    get_agent.side_effect = contract_agency.get_agent
+
+    # snapshot of a previous run is removed
+    snapshot_filepath = os.path.join(str(tmpdir), DashboardSnapshot.FILE_NAME)
+    publish_snapshot(snapshot_filepath, b'stale')
+    crawler = create_crawler(node_db_filepath=tempfile_path, dont_set_teacher=True,
+                             snapshot_filepath=snapshot_filepath)
+    assert not os.path.exists(snapshot_filepath)
+
+    nodes = [create_random_mock_node() for _ in range(3)]
+    for node in nodes:
+        crawler.node_storage.store_node_metadata(node=node)
+    crawler.node_storage.store_current_teacher(teacher_checksum=nodes[0].checksum_address)
+
+    # published after a learning round, with the known nodes of the db
+    snapshot_reader = SnapshotReader(snapshot_filepath)
+    with patch.object(crawler, 'learn_from_teacher_node', autospec=True, return_value=[]):
+        assert crawler.keep_learning_about_nodes() == []
+        snapshot = snapshot_reader.get()
+        node_db_client = CrawlerNodeMetadataDBClient(db_filepath=tempfile_path)
+        assert snapshot.known_nodes == node_db_client.get_known_nodes_metadata()
+        assert snapshot.teacher_checksum == nodes[0].checksum_address
+        assert len(snapshot.staker_table) == 0
+
+        # only published again when changed
+        with patch('monitor.crawler.publish_snapshot', autospec=True) as publish:
+            crawler.keep_learning_about_nodes()
+            publish.assert_not_called()
+
+        crawler.node_storage.store_node_metadata(node=create_random_mock_node())
+        crawler.keep_learning_about_nodes()
+        assert len(snapshot_reader.get().known_nodes) == len(nodes) + 1
+
+        # or when due to be republished, so that the dashboard knows it is current
+        crawler._snapshot_published -= DashboardSnapshot.REPUBLISH_INTERVAL.total_seconds()
+        with patch('monitor.crawler.publish_snapshot', autospec=True) as publish:
+            crawler.keep_learning_about_nodes()
+            publish.assert_called_once()
+
+
+def get_node_events(db_conn):
+    return db_conn.execute(f"SELECT staker_address, event, old_value, new_value "
+                           f"FROM {CrawlerNodeStorage.NODE_EVENTS_DB_NAME} ORDER BY id").fetchall()
+
+
 def verify_all_db_tables_exist(db_conn, expect_present=True):
     # check tables created
     result = db_conn.execute("SELECT name FROM sqlite_master WHERE type='table'").fetchall()
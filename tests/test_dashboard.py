@@ -1,19 +1,37 @@
 import random
-from collections import OrderedDict
 from datetime import datetime, timedelta
 from typing import List, Dict
 from unittest.mock import MagicMock, patch
 
 import nucypher
+import pytest
 from flask import Flask
 from nucypher.blockchain.eth.agents import StakingEscrowAgent
 from nucypher.blockchain.eth.interfaces import BlockchainInterface
 from nucypher.blockchain.eth.token import NU
 
+import monitor.charts
 import monitor.dashboard
+from monitor import layout
 from monitor.crawler import CrawlerNodeStorage
+from monitor.timeseries import EPOCH
+from monitor.uptime import NodeStatistics
 from tests.markers import circleci_only
-from tests.utilities import MockContractAgency, create_random_mock_node, create_random_mock_state
+from tests.utilities import (
+    MockContractAgency,
+    create_eth_address,
+    create_random_mock_node,
+    create_random_mock_state,
+    create_specific_mock_node,
+    create_staker_table
+)
+
+
+@pytest.fixture(autouse=True)
+def change_detector_start():
+    # changes are checked for by the tests themselves, rather than in the background
+    with patch('monitor.dashboard.ChangeDetector.start', autospec=True) as start:
+        yield start
 
 
 @circleci_only(reason="Additional complexity when using local machine's chromedriver")
@@ -143,6 +161,617 @@ def test_dashboard_render(new_blockchain_db_client, get_agent, tempfile_path, da
         verify_state_data_in_table(state, state_table_updated)
 
 
+@patch.object(monitor.dashboard.ContractAgency, 'get_agent', autospec=True)
+@patch('monitor.dashboard.CrawlerBlockchainDBClient', autospec=True)
+def test_dashboard_network_stats_single_snapshot(new_blockchain_db_client, get_agent, tempfile_path):
+    current_period = 18622
+    nodes_list, last_confirmed_period_dict = create_nodes(num_nodes=5, current_period=current_period)
+    CrawlerNodeStorage(storage_filepath=tempfile_path)
+
+    partitioned_stakers = (25, 5, 10)  # confirmed, pending, inactive
+    global_locked_tokens = NU(1000000, 'NU').to_nunits()
+    staking_agent = create_mocked_staker_agent(partitioned_stakers=partitioned_stakers,
+                                               current_period=current_period,
+                                               global_locked_tokens=global_locked_tokens,
+                                               last_confirmed_period_dict=last_confirmed_period_dict,
+                                               nodes_list=nodes_list)
+    contract_agency = MockContractAgency(staking_agent=staking_agent)
+    get_agent.side_effect = contract_agency.get_agent
+
+    server = Flask("monitor-dashboard")
+    dashboard = monitor.dashboard.Dashboard(flask_server=server,
+                                            route_url='/',
+                                            registry=None,
+                                            domain='goerli',
+                                            blockchain_db_host='localhost',
+                                            blockchain_db_port=8086,
+                                            node_storage_filepath=tempfile_path)
+
+    # all stat panels are filled by a single callback
+    stat_panels = ['current-period', 'active-stakers', 'staked-tokens', 'staker-breakdown']
+    stats_outputs = [output for output in dashboard.dash_app.callback_map
+                     if any(f'{panel}.children' in output for panel in stat_panels)]
+    assert len(stats_outputs) == 1
+    stats_output = stats_outputs[0]
+    for panel in stat_panels:
+        assert f'{panel}.children' in stats_output
+
+    # one request reads a single snapshot of chain data
+    response = server.test_client().post('/_dash-update-component',
+                                         json={'output': stats_output,
+                                               'inputs': [{'id': 'network-update-button',
+                                                           'property': 'n_clicks',
+                                                           'value': None},
+                                                          {'id': 'fallback-interval',
+                                                           'property': 'n_intervals',
+                                                           'value': 1}],
+                                               'state': [{'id': 'prefilled-components',
+                                                          'property': 'data',
+                                                          'value': []}],
+                                               'changedPropIds': ['fallback-interval.n_intervals']})
+    assert response.status_code == 200
+    staking_agent.get_current_period.assert_called_once()
+    staking_agent.partition_stakers_by_activity.assert_called_once()
+    staking_agent.get_global_locked_tokens.assert_called_once()
+
+    response_text = response.get_data(as_text=True)
+    assert str(current_period) in response_text
+    assert str(NU.from_nunits(global_locked_tokens)) in response_text
+
+    #
+    # rendered panels are pre-filled into the page served to the next visitor
+    #
+    cached_components = dashboard.get_cached_components()
+    for panel in stat_panels:
+        assert panel in cached_components
+
+    page_layout = dashboard.dash_app.layout()
+    assert str(current_period) in str(page_layout.to_plotly_json())
+    prefilled = [component for component in page_layout.children if component.id == 'prefilled-components'][0].data
+    assert set(stat_panels).issubset(set(prefilled))
+
+    # ...so the page load callback is skipped without any chain reads
+    staking_agent.reset_mock()
+    response = server.test_client().post('/_dash-update-component',
+                                         json={'output': stats_output,
+                                               'inputs': [{'id': 'network-update-button',
+                                                           'property': 'n_clicks',
+                                                           'value': None},
+                                                          {'id': 'fallback-interval',
+                                                           'property': 'n_intervals',
+                                                           'value': 0}],
+                                               'state': [{'id': 'prefilled-components',
+                                                          'property': 'data',
+                                                          'value': prefilled}],
+                                               'changedPropIds': []})
+    assert response.status_code == 204
+    staking_agent.get_current_period.assert_not_called()
+
+
+@patch.object(monitor.dashboard.ContractAgency, 'get_agent', autospec=True)
+@patch('monitor.dashboard.CrawlerBlockchainDBClient', autospec=True)
+def test_dashboard_static_widgets_need_no_server_callbacks(new_blockchain_db_client, get_agent, tempfile_path):
+    staking_agent = MagicMock(spec=StakingEscrowAgent, autospec=True)
+    contract_agency = MockContractAgency(staking_agent=staking_agent)
+    get_agent.side_effect = contract_agency.get_agent
+
+    server = Flask("monitor-dashboard")
+    dashboard = monitor.dashboard.Dashboard(flask_server=server,
+                                            route_url='/',
+                                            registry=None,
+                                            domain='goerli',
+                                            blockchain_db_host='localhost',
+                                            blockchain_db_port=8086,
+                                            node_storage_filepath=tempfile_path)
+    callback_map = dashboard.dash_app.callback_map
+
+    # header and domain are rendered into the layout
+    for output_id in ('header.children', 'domains.children'):
+        assert not any(output_id in output for output in callback_map)
+    layout_json = str(dashboard.dash_app.layout().to_plotly_json())
+    assert f'v{nucypher.__version__}' in layout_json
+    assert 'goerli' in layout_json
+
+    # time remaining is computed in the browser
+    time_remaining_callback = callback_map['time-remaining-value.children']
+    assert 'callback' not in time_remaining_callback
+    assert time_remaining_callback['clientside_function']['function_name'] == 'time_remaining'
+
+
+@patch.object(monitor.dashboard.ContractAgency, 'get_agent', autospec=True)
+@patch('monitor.dashboard.CrawlerBlockchainDBClient', autospec=True)
+def test_dashboard_pushes_updates(new_blockchain_db_client, get_agent, tempfile_path, change_detector_start):
+    current_period = 18622
+    nodes_list, last_confirmed_period_dict = create_nodes(num_nodes=5, current_period=current_period)
+    node_storage = CrawlerNodeStorage(storage_filepath=tempfile_path)
+    store_node_db_data(node_storage, nodes=nodes_list, states=create_states(num_states=1))
+
+    staking_agent = create_mocked_staker_agent(partitioned_stakers=(25, 5, 10),
+                                               current_period=current_period,
+                                               global_locked_tokens=NU(1000000, 'NU').to_nunits(),
+                                               last_confirmed_period_dict=last_confirmed_period_dict,
+                                               nodes_list=nodes_list)
+    contract_agency = MockContractAgency(staking_agent=staking_agent)
+    get_agent.side_effect = contract_agency.get_agent
+
+    server = Flask("monitor-dashboard")
+    dashboard = monitor.dashboard.Dashboard(flask_server=server,
+                                            route_url='/',
+                                            registry=None,
+                                            domain='goerli',
+                                            blockchain_db_host='localhost',
+                                            blockchain_db_port=8086,
+                                            node_storage_filepath=tempfile_path)
+    # checks for changes from the start, before any client subscribes
+    change_detector = dashboard.change_detector
+    change_detector_start.assert_called_once_with(change_detector)
+    change_detector.check()  # initial fingerprints
+
+    response = server.test_client().get('/updates')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+    assert dashboard.update_broker.subscriber_count == 1
+    try:
+        dashboard.cache_components({'known-nodes': 'cached nodes table', 'prev-states': 'cached states'})
+
+        # new node stored by the crawler
+        node_storage.store_node_metadata(node=create_random_mock_node())
+        assert change_detector.check() == ['nodes']
+
+        event = next(response.response)
+        event = event.decode() if isinstance(event, bytes) else event
+        assert 'node-update-button' in event
+
+        # only the affected component is dropped from the pre-render cache
+        cached_components = dashboard.get_cached_components()
+        assert 'known-nodes' not in cached_components
+        assert 'prev-states' in cached_components
+
+        # stakers confirming activity within the period
+        confirmed, pending, inactive = staking_agent.partition_stakers_by_activity.return_value
+        staking_agent.partition_stakers_by_activity.return_value = ([None] * 26, [None] * 4, inactive)
+        assert change_detector.check() == ['network']
+        staker_addresses = [node.checksum_address for node in nodes_list]
+        node_storage.store_staker_table(create_staker_table(staker_addresses=staker_addresses,
+                                                            current_period=current_period,
+                                                            last_confirmed_periods=[current_period] * 5))
+        assert change_detector.check() == ['network']  # as of the crawler's staker table
+        node_storage.store_staker_table(create_staker_table(staker_addresses=staker_addresses,
+                                                            current_period=current_period,
+                                                            last_confirmed_periods=[current_period + 1] * 5))
+        assert change_detector.check() == ['network']
+
+        # new period
+        staking_agent.get_current_period.return_value = current_period + 1
+        assert sorted(change_detector.check()) == ['network', 'period']
+    finally:
+        change_detector.stop()
+        response.close()
+
+
+@patch.object(monitor.dashboard.ContractAgency, 'get_agent', autospec=True)
+@patch('monitor.dashboard.CrawlerBlockchainDBClient', autospec=True)
+def test_dashboard_historical_range_selection(new_blockchain_db_client, get_agent, tempfile_path):
+    staking_agent = MagicMock(spec=StakingEscrowAgent, autospec=True)
+    contract_agency = MockContractAgency(staking_agent=staking_agent)
+    get_agent.side_effect = contract_agency.get_agent
+
+    # a year of hourly data
+    hours = 365 * 24
+    range_begin = datetime.utcnow() - timedelta(hours=hours)
+    mocked_blockchain_db_client = new_blockchain_db_client.return_value
+    mocked_blockchain_db_client.get_historical_network_data.return_value = dict(
+        time=[range_begin + timedelta(hours=hour) for hour in range(hours)],
+        locked_stake=[random.randint(500000, 1000000) for _ in range(hours)],
+        num_stakers=[random.randint(10, 100) for _ in range(hours)])
+
+    server = Flask("monitor-dashboard")
+    dashboard = monitor.dashboard.Dashboard(flask_server=server,
+                                            route_url='/',
+                                            registry=None,
+                                            domain='goerli',
+                                            blockchain_db_host='localhost',
+                                            blockchain_db_port=8086,
+                                            node_storage_filepath=tempfile_path)
+
+    historical_outputs = [output for output in dashboard.dash_app.callback_map
+                          if 'prev-locked-stake-graph.children' in output]
+    assert len(historical_outputs) == 1
+    historical_output = historical_outputs[0]
+    assert 'prev-num-stakers-graph.children' in historical_output
+
+    def select(range_length, granularity, prefilled=(), changed_prop_ids=('historical-range.value',)):
+        return server.test_client().post('/_dash-update-component',
+                                         json={'output': historical_output,
+                                               'inputs': [{'id': 'period-update-button',
+                                                           'property': 'n_clicks',
+                                                           'value': None},
+                                                          {'id': 'daily-interval',
+                                                           'property': 'n_intervals',
+                                                           'value': 0},
+                                                          {'id': 'historical-range',
+                                                           'property': 'value',
+                                                           'value': range_length},
+                                                          {'id': 'historical-granularity',
+                                                           'property': 'value',
+                                                           'value': granularity}],
+                                               'state': [{'id': 'prefilled-components',
+                                                          'property': 'data',
+                                                          'value': list(prefilled)}],
+                                               'changedPropIds': list(changed_prop_ids)})
+
+    response = select(range_length='365d', granularity='1h')
+    assert response.status_code == 200
+    mocked_blockchain_db_client.get_historical_network_data.assert_called_once_with(range_length='365d',
+                                                                                    granularity='1h')
+
+    # long ranges are downsampled before sending
+    response_json = response.get_json()['response']
+    for graph_id in ('prev-locked-stake-graph', 'prev-num-stakers-graph'):
+        figure = response_json[graph_id]['children']['props']['figure']
+        assert 2 < len(figure['data'][0]['x']) <= monitor.charts.MAX_CHART_POINTS
+    assert 'previous year' in response.get_data(as_text=True)
+
+    # only the default selection is pre-filled into the page of new visitors
+    assert 'prev-locked-stake-graph' not in dashboard.get_cached_components()
+    response = select(range_length=layout.DEFAULT_HISTORICAL_RANGE, granularity=layout.DEFAULT_HISTORICAL_GRANULARITY)
+    assert response.status_code == 200
+    assert 'prev-locked-stake-graph' in dashboard.get_cached_components()
+
+    # the pre-filled default selection isn't updated on page load...
+    historical_graphs = ['prev-locked-stake-graph', 'prev-num-stakers-graph']
+    mocked_blockchain_db_client.get_historical_network_data.reset_mock()
+    response = select(range_length=layout.DEFAULT_HISTORICAL_RANGE, granularity=layout.DEFAULT_HISTORICAL_GRANULARITY,
+                      prefilled=historical_graphs, changed_prop_ids=())
+    assert response.status_code == 204
+    mocked_blockchain_db_client.get_historical_network_data.assert_not_called()
+
+    # ...but is when switching back to it from another selection
+    response = select(range_length='365d', granularity='1h', prefilled=historical_graphs)
+    assert response.status_code == 200
+    response = select(range_length=layout.DEFAULT_HISTORICAL_RANGE, granularity=layout.DEFAULT_HISTORICAL_GRANULARITY,
+                      prefilled=historical_graphs)
+    assert response.status_code == 200
+    mocked_blockchain_db_client.get_historical_network_data.assert_called_with(
+        range_length=layout.DEFAULT_HISTORICAL_RANGE,
+        granularity=layout.DEFAULT_HISTORICAL_GRANULARITY)
+    assert 'previous year' not in response.get_data(as_text=True)
+
+    # unknown selections are ignored
+    mocked_blockchain_db_client.get_historical_network_data.reset_mock()
+    response = select(range_length='1000y', granularity='1d')
+    assert response.status_code == 204
+    mocked_blockchain_db_client.get_historical_network_data.assert_not_called()
+
+
+@patch.object(monitor.dashboard.ContractAgency, 'get_agent', autospec=True)
+@patch('monitor.dashboard.CrawlerBlockchainDBClient', autospec=True)
+def test_dashboard_known_nodes_history_sparklines(new_blockchain_db_client, get_agent, tempfile_path):
+    current_period = 18622
+    nodes_list, last_confirmed_period_dict = create_nodes(num_nodes=5, current_period=current_period)
+    node_storage = CrawlerNodeStorage(storage_filepath=tempfile_path)
+    store_node_db_data(node_storage, nodes=nodes_list, states=[])
+
+    staking_agent = create_mocked_staker_agent(partitioned_stakers=(25, 5, 10),
+                                               current_period=current_period,
+                                               global_locked_tokens=NU(1000000, 'NU').to_nunits(),
+                                               last_confirmed_period_dict=last_confirmed_period_dict,
+                                               nodes_list=nodes_list)
+    contract_agency = MockContractAgency(staking_agent=staking_agent)
+    get_agent.side_effect = contract_agency.get_agent
+
+    # recent history of all but the last node
+    periods = layout.NODE_HISTORY_PERIODS
+    range_begin = datetime.utcnow() - timedelta(days=periods)
+    histories = {node.checksum_address: dict(time=[range_begin + timedelta(days=day) for day in range(periods)],
+                                             locked_stake=[1000.0 + day for day in range(periods)],
+                                             worker_address=[node.worker_address] * periods,
+                                             current_period=[current_period - periods + day for day in range(periods)],
+                                             last_confirmed_period=[current_period - periods + day + 1
+                                                                    for day in range(periods)])
+                 for node in nodes_list[:-1]}
+    mocked_blockchain_db_client = new_blockchain_db_client.return_value
+    mocked_blockchain_db_client.get_stakers_history.return_value = histories
+
+    server = Flask("monitor-dashboard")
+    dashboard = monitor.dashboard.Dashboard(flask_server=server,
+                                            route_url='/',
+                                            registry=None,
+                                            domain='goerli',
+                                            blockchain_db_host='localhost',
+                                            blockchain_db_port=8086,
+                                            node_storage_filepath=tempfile_path)
+    response = server.test_client().post('/_dash-update-component',
+                                         json={'output': 'known-nodes.children',
+                                               'inputs': [{'id': 'node-update-button',
+                                                           'property': 'n_clicks',
+                                                           'value': 1},
+                                                          {'id': 'fallback-interval',
+                                                           'property': 'n_intervals',
+                                                           'value': 0}],
+                                               'state': [{'id': 'prefilled-components',
+                                                          'property': 'data',
+                                                          'value': []}],
+                                               'changedPropIds': ['node-update-button.n_clicks']})
+    assert response.status_code == 200
+
+    # history of all stakers in the table is read at once
+    mocked_blockchain_db_client.get_stakers_history.assert_called_once()
+    call_kwargs = mocked_blockchain_db_client.get_stakers_history.call_args[1]
+    assert sorted(call_kwargs['staker_addresses']) == sorted(node.checksum_address for node in nodes_list)
+    assert call_kwargs['range_length'] == f'{periods}d'
+
+    # inline svg sparklines for each staker with history
+    response_text = response.get_data(as_text=True)
+    assert response_text.count('data:image/svg+xml,') == 2 * len(histories)
+    assert f'Confirmation streak: {periods} periods' in response_text
+    assert f'Locked stake: {1000.0 + periods - 1:,.0f} NU' in response_text
+
+    # checksums link to the staker detail pages
+    for node in nodes_list:
+        assert f'/staker/{node.checksum_address}' in response_text
+
+
+@patch.object(monitor.dashboard.ContractAgency, 'get_agent', autospec=True)
+@patch('monitor.dashboard.CrawlerBlockchainDBClient', autospec=True)
+def test_dashboard_known_nodes_staker_table(new_blockchain_db_client, get_agent, tempfile_path):
+    current_period = 18622
+    nodes_list, last_confirmed_period_dict = create_nodes(num_nodes=5, current_period=current_period)
+    node_storage = CrawlerNodeStorage(storage_filepath=tempfile_path)
+    store_node_db_data(node_storage, nodes=nodes_list, states=[])
+
+    # staker table of the crawler's last cycle, of all but the last node
+    staker_table = create_staker_table(staker_addresses=[node.checksum_address for node in nodes_list[:-1]],
+                                       current_period=current_period,
+                                       worker_addresses=[node.worker_address for node in nodes_list[:-1]],
+                                       last_confirmed_periods=[last_confirmed_period_dict[node.checksum_address]
+                                                               for node in nodes_list[:-1]])
+    node_storage.store_staker_table(staker_table)
+
+    staking_agent = create_mocked_staker_agent(partitioned_stakers=(25, 5, 10),
+                                               current_period=current_period,
+                                               global_locked_tokens=NU(1000000, 'NU').to_nunits(),
+                                               last_confirmed_period_dict=last_confirmed_period_dict,
+                                               nodes_list=nodes_list)
+    contract_agency = MockContractAgency(staking_agent=staking_agent)
+    get_agent.side_effect = contract_agency.get_agent
+    mocked_blockchain_db_client = new_blockchain_db_client.return_value
+    mocked_blockchain_db_client.get_stakers_history.return_value = dict()
+    mocked_blockchain_db_client.get_node_reachability.return_value = []
+
+    server = Flask("monitor-dashboard")
+    dashboard = monitor.dashboard.Dashboard(flask_server=server,
+                                            route_url='/',
+                                            registry=None,
+                                            domain='goerli',
+                                            blockchain_db_host='localhost',
+                                            blockchain_db_port=8086,
+                                            node_storage_filepath=tempfile_path)
+    response = server.test_client().post('/_dash-update-component',
+                                         json={'output': 'known-nodes.children',
+                                               'inputs': [{'id': 'node-update-button',
+                                                           'property': 'n_clicks',
+                                                           'value': 1},
+                                                          {'id': 'fallback-interval',
+                                                           'property': 'n_intervals',
+                                                           'value': 0}],
+                                               'state': [{'id': 'prefilled-components',
+                                                          'property': 'data',
+                                                          'value': []}],
+                                               'changedPropIds': ['node-update-button.n_clicks']})
+    assert response.status_code == 200
+
+    # chain is only called for the staker missing from the staker table
+    unknown_staker_address = nodes_list[-1].checksum_address
+    staking_agent.get_last_active_period.assert_called_once_with(unknown_staker_address)
+    staking_agent.get_worker_from_staker.assert_called_once_with(unknown_staker_address)
+
+    response_text = response.get_data(as_text=True)
+    for node in nodes_list:
+        last_confirmed_period = last_confirmed_period_dict[node.checksum_address]
+        assert f'Period {last_confirmed_period}' in response_text
+        assert get_expected_status_text(current_period=current_period,
+                                        last_confirmed_period=last_confirmed_period,
+                                        worker_address=node.worker_address) in response_text
+
+
+@patch.object(monitor.dashboard.ContractAgency, 'get_agent', autospec=True)
+@patch('monitor.dashboard.CrawlerBlockchainDBClient', autospec=True)
+def test_dashboard_node_statistics(new_blockchain_db_client, get_agent, tempfile_path):
+    current_period = 18622
+    nodes_list, last_confirmed_period_dict = create_nodes(num_nodes=2, current_period=current_period)
+    node_storage = CrawlerNodeStorage(storage_filepath=tempfile_path)
+    store_node_db_data(node_storage, nodes=nodes_list, states=[])
+
+    staking_agent = create_mocked_staker_agent(partitioned_stakers=(25, 5, 10),
+                                               current_period=current_period,
+                                               global_locked_tokens=NU(1000000, 'NU').to_nunits(),
+                                               last_confirmed_period_dict=last_confirmed_period_dict,
+                                               nodes_list=nodes_list)
+    contract_agency = MockContractAgency(staking_agent=staking_agent)
+    get_agent.side_effect = contract_agency.get_agent
+
+    # probes of the first node over the last 10 minutes; one of them failed
+    now = int((datetime.utcnow() - EPOCH).total_seconds())
+    staker_address = nodes_list[0].checksum_address
+    points = [dict(time=now - minutes * 60, staker_address=staker_address, reachable=minutes != 5,
+                   latency=0.1 if minutes != 5 else None)
+              for minutes in range(10, 0, -1)]
+    mocked_blockchain_db_client = new_blockchain_db_client.return_value
+    configure_mocked_blockchain_db_client(mocked_db_client=mocked_blockchain_db_client,
+                                          historical_tokens=[],
+                                          historical_stakers=[])
+    mocked_blockchain_db_client.get_node_reachability.return_value = points
+
+    server = Flask("monitor-dashboard")
+    dashboard = monitor.dashboard.Dashboard(flask_server=server,
+                                            route_url='/',
+                                            registry=None,
+                                            domain='goerli',
+                                            blockchain_db_host='localhost',
+                                            blockchain_db_port=8086,
+                                            node_storage_filepath=tempfile_path)
+
+    # seeded with the history of the probe results in the background
+    dashboard._node_statistics_seeding.join(timeout=5)
+    mocked_blockchain_db_client.get_node_reachability.assert_called_once()
+    range_begin = mocked_blockchain_db_client.get_node_reachability.call_args[1]['range_begin']
+    assert range_begin <= datetime.utcnow() - timedelta(days=7)
+
+    # probe results read again are only counted once
+    response = server.test_client().get('/node-statistics')
+    assert response.status_code == 200
+    statistics = response.get_json()
+    assert statistics['windows'] == list(NodeStatistics.WINDOWS)
+    assert list(statistics['nodes']) == [staker_address]
+    for window in NodeStatistics.WINDOWS:
+        assert statistics['nodes'][staker_address][window]['observations'] == 10
+        assert statistics['nodes'][staker_address][window]['uptime'] == 90.0
+        assert statistics['nodes'][staker_address][window]['p50'] == pytest.approx(0.1, rel=0.05)
+
+    # history is only queried once; subsequent updates only query the probe results that may be recorded since
+    mocked_blockchain_db_client.get_node_reachability.return_value = []
+    response = server.test_client().post('/_dash-update-component',
+                                         json={'output': 'known-nodes.children',
+                                               'inputs': [{'id': 'node-update-button',
+                                                           'property': 'n_clicks',
+                                                           'value': 1},
+                                                          {'id': 'fallback-interval',
+                                                           'property': 'n_intervals',
+                                                           'value': 0}],
+                                               'state': [{'id': 'prefilled-components',
+                                                          'property': 'data',
+                                                          'value': []}],
+                                               'changedPropIds': ['node-update-button.n_clicks']})
+    assert response.status_code == 200
+    range_begin = mocked_blockchain_db_client.get_node_reachability.call_args[1]['range_begin']
+    assert range_begin == EPOCH + timedelta(seconds=now - 60 - NodeStatistics.LATE_OBSERVATION_WINDOW)
+
+    # uptime and latency columns of the nodes table
+    response_text = response.get_data(as_text=True)
+    assert '24h: 90.0%' in response_text
+    assert 'p50: 100 ms' in response_text
+    assert '24h: -' in response_text  # node without probe results
+
+@patch.object(monitor.dashboard.ContractAgency, 'get_agent', autospec=True)
+@patch('monitor.dashboard.CrawlerBlockchainDBClient', autospec=True)
+def test_dashboard_staker_detail(new_blockchain_db_client, get_agent, tempfile_path):
+    staking_agent = MagicMock(spec=StakingEscrowAgent, autospec=True)
+    contract_agency = MockContractAgency(staking_agent=staking_agent)
+    get_agent.side_effect = contract_agency.get_agent
+
+    # the staker's node was seen by the crawler
+    staker_address = create_eth_address()
+    node_storage = CrawlerNodeStorage(storage_filepath=tempfile_path)
+    node_storage.store_node_metadata(node=create_specific_mock_node(checksum_address=staker_address))
+
+    # 90 days of history; worker changed 10 days ago, and a confirmation was missed
+    days = 90
+    range_begin = datetime.utcnow() - timedelta(days=days)
+    workers = [create_eth_address(), create_eth_address()]
+    mocked_blockchain_db_client = new_blockchain_db_client.return_value
+    mocked_blockchain_db_client.get_staker_history.return_value = dict(
+        time=[range_begin + timedelta(days=day) for day in range(days)],
+        locked_stake=[1000.0 + day for day in range(days)],
+        worker_address=[workers[0] if day < days - 10 else workers[1] for day in range(days)],
+        current_period=[18000 + day for day in range(days)],
+        last_confirmed_period=[18000 + day + (0 if day == 50 else 1) for day in range(days)])
+
+    server = Flask("monitor-dashboard")
+    dashboard = monitor.dashboard.Dashboard(flask_server=server,
+                                            route_url='/',
+                                            registry=None,
+                                            domain='goerli',
+                                            blockchain_db_host='localhost',
+                                            blockchain_db_port=8086,
+                                            node_storage_filepath=tempfile_path)
+
+    detail_outputs = [output for output in dashboard.dash_app.callback_map if 'staker-detail.children' in output]
+    assert len(detail_outputs) == 1
+    detail_output = detail_outputs[0]
+    assert 'main.style' in detail_output
+
+    def navigate(pathname):
+        return server.test_client().post('/_dash-update-component',
+                                         json={'output': detail_output,
+                                               'inputs': [{'id': 'url',
+                                                           'property': 'pathname',
+                                                           'value': pathname}],
+                                               'state': [],
+                                               'changedPropIds': ['url.pathname']})
+
+    response = navigate(f'/staker/{staker_address}')
+    assert response.status_code == 200
+    mocked_blockchain_db_client.get_staker_history.assert_called_once_with(
+        staker_address=staker_address,
+        range_length=layout.STAKER_HISTORY_RANGE,
+        granularity=layout.STAKER_HISTORY_GRANULARITY)
+
+    # main page is hidden
+    response_json = response.get_json()['response']
+    assert response_json['main']['style'] == {'display': 'none'}
+
+    response_text = response.get_data(as_text=True)
+    assert staker_address in response_text
+    assert 'staker-locked-stake-graph' in response_text
+    assert 'staker-confirmations-graph' in response_text
+    for worker in workers:
+        assert worker in response_text, 'worker changes displayed'
+    assert 'sightings-table' in response_text
+
+    confirmations_figure = response_json['staker-detail']['children']['props']['children'][2]['props'][
+        'children'][1]['props']['figure']
+    statuses = {trace['name']: len(trace['x']) for trace in confirmations_figure['data']}
+    assert statuses == dict(Confirmed=days - 1, Pending=1, Missed=0)
+
+    # other routes show the main page, without any queries
+    mocked_blockchain_db_client.get_staker_history.reset_mock()
+    for pathname in ('/', '/staker/', '/staker/0xnotanaddress'):
+        response = navigate(pathname)
+        assert response.status_code == 200
+        response_json = response.get_json()['response']
+        assert response_json['staker-detail']['children'] is None
+        assert response_json['main']['style'] is None
+    mocked_blockchain_db_client.get_staker_history.assert_not_called()
+
+    # addresses are checksummed
+    assert navigate(f'/staker/{staker_address.lower()}').status_code == 200
+    assert mocked_blockchain_db_client.get_staker_history.call_args[1]['staker_address'] == staker_address
+
+
+@patch.object(monitor.dashboard.ContractAgency, 'get_agent', autospec=True)
+@patch('monitor.dashboard.CrawlerBlockchainDBClient', autospec=True)
+def test_dashboard_node_events(new_blockchain_db_client, get_agent, tempfile_path):
+    nodes_list, _last_confirmed_period_dict = create_nodes(num_nodes=3, current_period=18622)
+    node_storage = CrawlerNodeStorage(storage_filepath=tempfile_path)
+    store_node_db_data(node_storage, nodes=nodes_list, states=[])
+
+    server = Flask("monitor-dashboard")
+    monitor.dashboard.Dashboard(flask_server=server,
+                                route_url='/',
+                                registry=None,
+                                domain='goerli',
+                                blockchain_db_host='localhost',
+                                blockchain_db_port=8086,
+                                node_storage_filepath=tempfile_path)
+    client = server.test_client()
+
+    response = client.get('/node-events?limit=2')
+    assert response.status_code == 200
+    page = response.get_json()
+    assert [event['staker_address'] for event in page['events']] == [node.checksum_address for node in nodes_list[:2]]
+
+    response = client.get(f"/node-events?cursor={page['cursor']}")
+    page = response.get_json()
+    assert [event['staker_address'] for event in page['events']] == [nodes_list[2].checksum_address]
+    assert client.get(f"/node-events?cursor={page['cursor']}").get_json() == dict(events=[], cursor=page['cursor'])
+
+    response = client.get(f'/node-events?staker={nodes_list[1].checksum_address}')
+    assert [event['event'] for event in response.get_json()['events']] == [CrawlerNodeStorage.NEW_NODE_EVENT]
+
+    assert client.get('/node-events?cursor=latest').status_code == 400
+
+
 def create_nodes(num_nodes: int, current_period: int):
     nodes_list = []
     base_active_period = current_period + 1
@@ -197,19 +826,14 @@ def configure_mocked_blockchain_db_client(mocked_db_client,
                          hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)  # include today
     range_begin = range_end - timedelta(days=len(historical_tokens))
 
-    # mock get_historical_locked_tokens_over_range tokens
-    locked_tokens_dict = OrderedDict()
-    for idx, tokens in enumerate(historical_tokens):
-        locked_tokens_dict[range_begin + timedelta(days=idx)] = tokens
-
-    mocked_db_client.get_historical_locked_tokens_over_range.return_value = locked_tokens_dict
-
-    # mock get_historical_num_stakers_over_range
-    num_stakers_dict = OrderedDict()
-    for idx, stakers in enumerate(historical_stakers):
-        num_stakers_dict[range_begin + timedelta(days=idx)] = stakers
+    # mock get_historical_network_data
+    network_data = dict(time=[range_begin + timedelta(days=idx) for idx in range(len(historical_tokens))],
+                        locked_stake=list(historical_tokens),
+                        num_stakers=list(historical_stakers))
 
-    mocked_db_client.get_historical_num_stakers_over_range.return_value = num_stakers_dict
+    mocked_db_client.get_historical_network_data.return_value = network_data
+    mocked_db_client.get_stakers_history.return_value = dict()
+    mocked_db_client.get_node_reachability.return_value = []
 
 
 def create_mocked_staker_agent(partitioned_stakers: tuple,
@@ -1,3 +1,5 @@
+import os
+import time
 from datetime import datetime, timedelta
 from unittest.mock import MagicMock, patch
 
@@ -5,11 +7,19 @@ import maya
 from influxdb.resultset import ResultSet
 from maya import MayaDT
 
-from monitor.crawler import CrawlerNodeStorage
-from monitor.db import CrawlerNodeMetadataDBClient, CrawlerBlockchainDBClient
+from monitor.crawler import Crawler, CrawlerNodeStorage
+from monitor.db import (
+    BUCKET_KEY_FORMAT,
+    CrawlerBlockchainDBClient,
+    CrawlerNodeMetadataDBClient,
+    HistoricalAggregateCache
+)
+from monitor.prober import NodeProber
+from monitor.timeseries import EPOCH, SQLiteTimeSeriesStorage
 from tests.utilities import (
     create_random_mock_node,
     create_random_mock_state,
+    create_specific_mock_node,
 )
 
 
@@ -93,10 +103,108 @@ def test_node_client_get_current_teacher_checksum(tempfile_path):
     assert result == new_teacher_checksum
 
 
+def test_node_client_get_node_sightings(tempfile_path):
+    node_storage = CrawlerNodeStorage(storage_filepath=tempfile_path)
+    first_seen = maya.now().subtract(hours=3)
+    time_format = CrawlerNodeStorage.SIGHTINGS_TIME_FORMAT
+    node = create_specific_mock_node(last_seen=first_seen)
+    node_storage.store_node_metadata(node=node)
+    node_storage.store_node_metadata(node=create_specific_mock_node(last_seen=first_seen.add(hours=1)))
+    node_storage.store_node_metadata(node=create_random_mock_node())  # another staker
+
+    # fleet state changed
+    fleet_state = [(dict(hex='#1E65F3', color='blue'), '♣')]
+    changed_state_seen = first_seen.add(hours=2)
+    node_storage.store_node_metadata(node=create_specific_mock_node(last_seen=changed_state_seen,
+                                                                    fleet_state_nickname_metadata=fleet_state))
+
+    node_db_client = CrawlerNodeMetadataDBClient(db_filepath=tempfile_path)
+    sightings = node_db_client.get_node_sightings(staker_address=node.checksum_address)
+    assert [(sighting['fleet_state_icon'], sighting['first_seen'], sighting['last_seen'], sighting['sightings'])
+            for sighting in sightings] == [('♣', changed_state_seen.datetime().strftime(time_format),
+                                            changed_state_seen.datetime().strftime(time_format), 1),
+                                           ('?', first_seen.datetime().strftime(time_format),
+                                            first_seen.add(hours=1).datetime().strftime(time_format), 2)]
+
+    assert node_db_client.get_node_sightings(staker_address='0xunknown') == []
+
+
+def test_node_storage_flushes_sightings(tempfile_path):
+    node_storage = CrawlerNodeStorage(storage_filepath=tempfile_path, sightings_flush_interval=timedelta(hours=1))
+    first_seen = maya.now().subtract(hours=3)
+    node = create_specific_mock_node(last_seen=first_seen)
+    node_storage.store_node_metadata(node=node)
+    node_db_client = CrawlerNodeMetadataDBClient(db_filepath=tempfile_path)
+
+    def stored_sightings():
+        return [(sighting['last_seen'], sighting['sightings'])
+                for sighting in node_db_client.get_node_sightings(staker_address=node.checksum_address)]
+
+    # a new run is written right away
+    first_seen_time = first_seen.datetime().strftime(CrawlerNodeStorage.SIGHTINGS_TIME_FORMAT)
+    assert stored_sightings() == [(first_seen_time, 1)]
+
+    # further sightings are only counted in memory until flushed
+    last_seen = first_seen.add(hours=1)
+    for _ in range(3):
+        node_storage.store_node_metadata(node=create_specific_mock_node(last_seen=last_seen))
+    assert stored_sightings() == [(first_seen_time, 1)]
+
+    node_storage.flush_sightings()
+    assert stored_sightings() == [(last_seen.datetime().strftime(CrawlerNodeStorage.SIGHTINGS_TIME_FORMAT), 4)]
+
+    # or once the flush interval elapsed
+    node_storage._sightings_flush_interval = 0
+    node_storage.store_node_metadata(node=create_specific_mock_node(last_seen=last_seen))
+    assert stored_sightings()[0][1] == 5
+
+
+def test_node_client_get_node_events(tempfile_path):
+    node_storage = CrawlerNodeStorage(storage_filepath=tempfile_path)
+    nodes = [create_random_mock_node() for _ in range(5)]
+    for node in nodes:
+        node_storage.store_node_metadata(node=node)
+
+    node_db_client = CrawlerNodeMetadataDBClient(db_filepath=tempfile_path)
+    fingerprint = node_db_client.get_nodes_fingerprint()
+
+    # page through the log
+    events, cursor = node_db_client.get_node_events(limit=3)
+    assert [(event['staker_address'], event['event']) for event in events] == [(node.checksum_address, 'new')
+                                                                                for node in nodes[:3]]
+    assert cursor == events[-1]['id']
+    events, cursor = node_db_client.get_node_events(cursor=cursor, limit=3)
+    assert [event['staker_address'] for event in events] == [node.checksum_address for node in nodes[3:]]
+    assert node_db_client.get_node_events(cursor=cursor) == ([], cursor)  # caught up
+
+    # only changes are appended
+    node_storage.store_node_metadata(node=nodes[0])
+    assert node_db_client.get_node_events(cursor=cursor) == ([], cursor)
+    assert node_db_client.get_nodes_fingerprint() == fingerprint
+
+    moved_node = create_specific_mock_node(checksum_address=nodes[0].checksum_address,
+                                           host='127.0.0.2',
+                                           nickname=nodes[0].nickname,
+                                           timestamp=nodes[0].timestamp,
+                                           last_seen=nodes[0].last_seen)
+    node_storage.store_node_metadata(node=moved_node)
+    events, new_cursor = node_db_client.get_node_events(cursor=cursor)
+    assert len(events) == 1
+    assert events[0]['staker_address'] == nodes[0].checksum_address
+    assert events[0]['event'] == 'rest_url'
+    assert (events[0]['old_value'], events[0]['new_value']) == (nodes[0].rest_url(), '127.0.0.2:9151')
+    assert new_cursor > cursor
+    assert node_db_client.get_nodes_fingerprint() != fingerprint
+
+    # events of a single staker
+    events, _cursor = node_db_client.get_node_events(staker_address=nodes[0].checksum_address)
+    assert [event['event'] for event in events] == ['new', 'rest_url']
+
+
 #
 # CrawlerBlockchainDBClient tests
 #
-@patch('monitor.db.InfluxDBClient', autospec=True)
+@patch('monitor.timeseries.InfluxDBClient', autospec=True)
 def test_blockchain_client_close(new_influx_db):
     mock_influxdb_client = new_influx_db.return_value
 
@@ -106,129 +214,447 @@ def test_blockchain_client_close(new_influx_db):
     mock_influxdb_client.close.assert_called_once()
 
 
-@patch('monitor.db.InfluxDBClient', autospec=True)
-def test_blockchain_client_get_historical_locked_tokens(new_influx_db):
+@patch('monitor.timeseries.InfluxDBClient', autospec=True)
+def test_blockchain_client_get_historical_network_data(new_influx_db):
     mock_influxdb_client = new_influx_db.return_value
 
     mock_query_object = MagicMock(spec=ResultSet, autospec=True)
     mock_influxdb_client.query.return_value = mock_query_object
 
-    # fake results for 5 days
-    days = 5
-    start_date = maya.now().subtract(days=days)
-    base_amount = 45000
-    amount_increment = 10000
-
-    results = []
-    for day in range(0, days):
-        results.append(dict(time=start_date.add(days=day).rfc3339(), sum=base_amount + (day * amount_increment)))
-    mock_query_object.get_points.return_value = results
-
-    blockchain_db_client = CrawlerBlockchainDBClient(None, None, None)
-
-    locked_tokens_dict = blockchain_db_client.get_historical_locked_tokens_over_range(days)
-
-    # check query
+    # fake network summaries for 7 days, no data for the first day
+    days = 7
     today = datetime.utcnow()
     range_end = datetime(year=today.year, month=today.month, day=today.day,
                          hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)  # include today in range
     range_begin = range_end - timedelta(days=days)
+    results = [dict(time=MayaDT.from_datetime(range_begin).rfc3339(), locked_stake=45000, num_stakers=100)]
+    for day in range(1, days):
+        results.append(dict(time=MayaDT.from_datetime(range_begin + timedelta(days=day)).rfc3339(),
+                            locked_stake=45000 + (day * 10000),
+                            num_stakers=100 + day))
+    results[0].update(locked_stake=None, num_stakers=None)
+    mock_query_object.get_points.side_effect = [results, []]  # no per-staker data either
 
+    blockchain_db_client = CrawlerBlockchainDBClient(None, None, None)
+
+    network_data = blockchain_db_client.get_historical_network_data(range_length=f'{days}d')
+
+    # single point per cycle is read, instead of aggregating per-staker data
     expected_in_query = [
-        "SELECT SUM(locked_stake)",
-        "AS locked_stake",
+        "SELECT LAST(total_locked) AS locked_stake, LAST(num_stakers) AS num_stakers",
 
-        f"FROM moe_network_info WHERE time >= '{MayaDT.from_datetime(range_begin).rfc3339()}' AND "
+        f"FROM {Crawler.NETWORK_SUMMARY_MEASUREMENT} WHERE "
+        f"time >= '{MayaDT.from_datetime(range_begin).rfc3339()}' AND "
         f"time < '{MayaDT.from_datetime(range_end).rfc3339()}'",
 
+        "GROUP BY time(1d)",
+    ]
+    query = mock_influxdb_client.query.call_args_list[0][0][0]
+    for statement in expected_in_query:
+        assert statement in query
+
+    # days before the first summary are aggregated from the per-staker data
+    assert mock_influxdb_client.query.call_count == 2
+    query = mock_influxdb_client.query.call_args_list[1][0][0]
+    expected_in_query = [
+        "SELECT SUM(locked_stake), COUNT(locked_stake)",
+
+        f"FROM moe_network_info WHERE time >= '{MayaDT.from_datetime(range_begin).rfc3339()}' AND "
+        f"time < '{MayaDT.from_datetime(range_begin + timedelta(days=1)).rfc3339()}'",
+
         "GROUP BY staker_address, time(1d)) GROUP BY time(1d)",
     ]
+    for statement in expected_in_query:
+        assert statement in query
 
-    mock_influxdb_client.query.assert_called_once()
-    mock_query_object.get_points.assert_called_once()
+    # check columnar results
+    assert set(network_data.keys()) == {'time', 'locked_stake', 'num_stakers'}
+    assert len(network_data['time']) == len(network_data['locked_stake']) == len(network_data['num_stakers'])
+    assert network_data['time'] == [MayaDT.from_rfc3339(r['time']).datetime() for r in results[1:]]
+    assert network_data['locked_stake'] == [r['locked_stake'] for r in results[1:]]
+    assert network_data['num_stakers'] == [r['num_stakers'] for r in results[1:]]
+
+
+@patch('monitor.timeseries.InfluxDBClient', autospec=True)
+def test_blockchain_client_get_historical_network_data_hourly(new_influx_db):
+    mock_influxdb_client = new_influx_db.return_value
+
+    mock_query_object = MagicMock(spec=ResultSet, autospec=True)
+    mock_influxdb_client.query.return_value = mock_query_object
+
+    # fake network summaries for every hour of the last day
+    hours = 24
+    now = datetime.utcnow()
+    range_end = datetime(year=now.year, month=now.month, day=now.day, hour=now.hour) + timedelta(hours=1)
+    range_begin = range_end - timedelta(hours=hours)
+    results = [dict(time=MayaDT.from_datetime(range_begin + timedelta(hours=hour)).rfc3339(),
+                    locked_stake=45000 + hour,
+                    num_stakers=100 + hour) for hour in range(hours)]
+    mock_query_object.get_points.return_value = results
 
-    call_args_list = mock_influxdb_client.query.call_args_list
-    assert len(call_args_list) == 1
-    for idx, execute_call in enumerate(call_args_list):
-        query = execute_call[0][0]
-        for statement in expected_in_query:
-            assert statement in query
+    blockchain_db_client = CrawlerBlockchainDBClient(None, None, None)
 
-    # check results
-    assert len(locked_tokens_dict) == days
+    network_data = blockchain_db_client.get_historical_network_data(range_length='24h', granularity='1h')
 
-    for idx, key in enumerate(locked_tokens_dict):
-        # use of rfc3339 loses milliseconds precision
-        date = MayaDT.from_rfc3339(start_date.add(days=idx).rfc3339()).datetime()
-        assert key == date
+    # hourly buckets over the requested range
+    mock_influxdb_client.query.assert_called_once()
+    query = mock_influxdb_client.query.call_args[0][0]
+    expected_in_query = [
+        f"time >= '{MayaDT.from_datetime(range_begin).rfc3339()}' AND "
+        f"time < '{MayaDT.from_datetime(range_end).rfc3339()}'",
 
-        locked_tokens = locked_tokens_dict[key]
-        assert locked_tokens == base_amount + (idx * amount_increment)
+        "GROUP BY time(1h)",
+    ]
+    for statement in expected_in_query:
+        assert statement in query
 
-    # close must be explicitly called on CrawlerBlockchainDBClient
-    mock_influxdb_client.close.assert_not_called()
+    assert network_data['time'] == [MayaDT.from_rfc3339(r['time']).datetime() for r in results]
+    assert network_data['locked_stake'] == [r['locked_stake'] for r in results]
+    assert network_data['num_stakers'] == [r['num_stakers'] for r in results]
 
 
-@patch('monitor.db.InfluxDBClient', autospec=True)
-def test_blockchain_client_get_historical_num_stakers(new_influx_db):
+@patch('monitor.timeseries.InfluxDBClient', autospec=True)
+def test_blockchain_client_get_historical_network_data_summarized(new_influx_db):
     mock_influxdb_client = new_influx_db.return_value
 
     mock_query_object = MagicMock(spec=ResultSet, autospec=True)
     mock_influxdb_client.query.return_value = mock_query_object
 
-    # fake results for 10 days
-    days = 10
-    start_date = maya.now().subtract(days=days)
-    base_count = 100
-    count_increment = 4
-
+    # network summaries for every day in the range
+    days = 5
+    today = datetime.utcnow()
+    range_begin = datetime(year=today.year, month=today.month, day=today.day) - timedelta(days=days - 1)
     results = []
     for day in range(0, days):
-        results.append(dict(time=start_date.add(days=day).rfc3339(), count=base_count + (day * count_increment)))
+        results.append(dict(time=MayaDT.from_datetime(range_begin + timedelta(days=day)).rfc3339(),
+                            locked_stake=1000000 + day,
+                            num_stakers=50 + day))
     mock_query_object.get_points.return_value = results
 
     blockchain_db_client = CrawlerBlockchainDBClient(None, None, None)
+    network_data = blockchain_db_client.get_historical_network_data(range_length=f'{days}d')
+
+    # no per-staker aggregation needed
+    mock_influxdb_client.query.assert_called_once()
+    assert Crawler.NETWORK_SUMMARY_MEASUREMENT in mock_influxdb_client.query.call_args[0][0]
+    assert network_data['locked_stake'] == [r['locked_stake'] for r in results]
+    assert network_data['num_stakers'] == [r['num_stakers'] for r in results]
+
 
-    num_stakers_dict = blockchain_db_client.get_historical_num_stakers_over_range(days)
+@patch('monitor.timeseries.InfluxDBClient', autospec=True)
+def test_blockchain_client_historical_closed_days_cached(new_influx_db, tempfile_path):
+    mock_influxdb_client = new_influx_db.return_value
+    mock_query_object = MagicMock(spec=ResultSet, autospec=True)
+    mock_influxdb_client.query.return_value = mock_query_object
 
-    # check query
+    # fake daily network summaries for the range, including today
+    days = 5
     today = datetime.utcnow()
-    range_end = datetime(year=today.year, month=today.month, day=today.day,
-                         hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)  # include today in range
-    range_begin = range_end - timedelta(days=days)
+    today_begin = datetime(year=today.year, month=today.month, day=today.day)
+    range_begin = today_begin - timedelta(days=days - 1)
+    results = []
+    for day in range(0, days):
+        results.append(dict(time=MayaDT.from_datetime(range_begin + timedelta(days=day)).rfc3339(),
+                            locked_stake=45000 + day * 10000,
+                            num_stakers=100 + day))
+    mock_query_object.get_points.return_value = results
 
-    expected_in_query = [
-        "SELECT COUNT(staker_address)",
+    blockchain_db_client = CrawlerBlockchainDBClient(None, None, None, cache_filepath=tempfile_path)
+    network_data = blockchain_db_client.get_historical_network_data(range_length=f'{days}d')
+    assert network_data['locked_stake'] == [r['locked_stake'] for r in results]
+
+    # first query covers the whole range
+    query = mock_influxdb_client.query.call_args[0][0]
+    assert f"time >= '{MayaDT.from_datetime(range_begin).rfc3339()}'" in query
+
+    # subsequent queries only cover today (the open day), and yesterday - whose daily rollup may not have run yet
+    mock_influxdb_client.query.reset_mock()
+    mock_query_object.get_points.return_value = results[-2:]
+    network_data = blockchain_db_client.get_historical_network_data(range_length=f'{days}d')
+    assert network_data['locked_stake'] == [r['locked_stake'] for r in results]
+    assert network_data['num_stakers'] == [r['num_stakers'] for r in results]
+    query = mock_influxdb_client.query.call_args[0][0]
+    yesterday_begin = today_begin - timedelta(days=1)
+    assert f"time >= '{MayaDT.from_datetime(yesterday_begin).rfc3339()}'" in query
+
+    # closed days are persisted
+    mock_influxdb_client.query.reset_mock()
+    new_blockchain_db_client = CrawlerBlockchainDBClient(None, None, None, cache_filepath=tempfile_path)
+    network_data = new_blockchain_db_client.get_historical_network_data(range_length=f'{days}d')
+    assert network_data['locked_stake'] == [r['locked_stake'] for r in results]
+    query = mock_influxdb_client.query.call_args[0][0]
+    assert f"time >= '{MayaDT.from_datetime(yesterday_begin).rfc3339()}'" in query
+
+    # larger range only queries from the first uncached day
+    mock_influxdb_client.query.reset_mock()
+    mock_query_object.get_points.side_effect = [results, []]  # no per-staker data before the summaries
+    blockchain_db_client.get_historical_network_data(range_length=f'{days + 2}d')
+    query = mock_influxdb_client.query.call_args_list[0][0][0]
+    expected_begin = range_begin - timedelta(days=2)
+    assert f"time >= '{MayaDT.from_datetime(expected_begin).rfc3339()}'" in query
+
+    # each granularity has its own cache
+    mock_influxdb_client.query.reset_mock()
+    mock_query_object.get_points.side_effect = None
+    mock_query_object.get_points.return_value = []
+    blockchain_db_client.get_historical_network_data(range_length=f'{days}d', granularity='1w')
+    query = mock_influxdb_client.query.call_args_list[0][0][0]
+    assert "GROUP BY time(1w)" in query
+
+
+def test_historical_aggregate_cache_bounded():
+    cache = HistoricalAggregateCache(max_metrics=2, max_age=timedelta(days=9, hours=12))
+    today = datetime.utcnow()
+    days = [(today - timedelta(days=day)).strftime(BUCKET_KEY_FORMAT) for day in range(15)]
+
+    # buckets older than the max age are dropped
+    cache.update('a_1d', {day: [day] for day in days})
+    assert list(cache.get('a_1d')) == days[:10]
+
+    # only the most recently used metrics are kept
+    cache.update('b_1d', {days[0]: [1]})
+    cache.get('a_1d')
+    cache.update('c_1d', {days[0]: [2]})
+    assert cache.get('b_1d') == dict()
+    assert cache.get('a_1d') and cache.get('c_1d')
+
+    # the history of stakers is bounded separately, so it doesn't evict the others
+    for staker in ['0xa', '0xb', '0xc']:
+        cache.update(f'{HistoricalAggregateCache.STAKER_METRIC_PREFIX}{staker}_1d', {days[0]: [3]})
+    assert cache.get('staker_0xa_1d') == dict()
+    assert cache.get('staker_0xb_1d') and cache.get('staker_0xc_1d')
+    assert cache.get('a_1d') and cache.get('c_1d')
+
+
+def test_historical_aggregate_cache_invalidations(tempfile_path):
+    os.remove(tempfile_path)
+    cache = HistoricalAggregateCache(filepath=tempfile_path)
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    days = [(today - timedelta(days=day)).strftime(BUCKET_KEY_FORMAT) for day in range(3)]
+    cache.update('a_1d', {day: [day] for day in days})
+
+    # marked ranges are only checked for once in a while when reading
+    HistoricalAggregateCache.invalidate_range(tempfile_path,
+                                              range_begin=today - timedelta(days=1),
+                                              range_end=today)
+    assert list(cache.get('a_1d')) == days
+    later = time.monotonic() + HistoricalAggregateCache.INVALIDATIONS_CHECK_INTERVAL
+    with patch('monitor.db.time.monotonic', return_value=later):
+        assert list(cache.get('a_1d')) == [days[0], days[2]]
+
+    # but always before updating
+    HistoricalAggregateCache.invalidate_range(tempfile_path,
+                                              range_begin=today - timedelta(days=2),
+                                              range_end=today - timedelta(days=1))
+    cache.update('b_1d', {days[0]: [0]})
+    assert list(cache.get('a_1d')) == [days[0]]
+    cache.clear()
+
+
+def test_historical_aggregate_cache_journal(tempfile_path):
+    os.remove(tempfile_path)
+    cache = HistoricalAggregateCache(filepath=tempfile_path)
+    journal_filepath = f'{tempfile_path}{HistoricalAggregateCache.JOURNAL_SUFFIX}'
+    today = datetime.utcnow()
+    days = [(today - timedelta(days=day)).strftime(BUCKET_KEY_FORMAT) for day in range(3)]
 
-        f"FROM moe_network_info WHERE time >= '{MayaDT.from_datetime(range_begin).rfc3339()}' AND "
-        f"time < '{MayaDT.from_datetime(range_end).rfc3339()}'",
+    cache.update('a_1d', {days[2]: [2]})
+    file_size = os.path.getsize(tempfile_path)
 
-        "GROUP BY staker_address, time(1d)) GROUP BY time(1d)",
-    ]
+    # updates are appended to the journal, without rewriting the file
+    cache.update('a_1d', {days[1]: [1]})
+    cache.update('b_1d', {days[1]: None})
+    assert os.path.getsize(tempfile_path) == file_size
+    assert os.path.exists(journal_filepath)
 
-    mock_influxdb_client.query.assert_called_once()
-    mock_query_object.get_points.assert_called_once()
+    new_cache = HistoricalAggregateCache(filepath=tempfile_path)
+    assert new_cache.get('a_1d') == {days[2]: [2], days[1]: [1]}
+    assert new_cache.get('b_1d') == {days[1]: None}
+
+    # the journal is folded into the file once full
+    with patch.object(HistoricalAggregateCache, 'JOURNAL_COMPACTION_SIZE', 2):
+        cache.update('a_1d', {days[0]: [0]})
+    assert not os.path.exists(journal_filepath)
+    new_cache = HistoricalAggregateCache(filepath=tempfile_path)
+    assert new_cache.get('a_1d') == {days[2]: [2], days[1]: [1], days[0]: [0]}
+    cache.clear()
+
+
+def test_blockchain_client_sqlite_storage(tempfile_path):
+    storage = SQLiteTimeSeriesStorage(db_filepath=tempfile_path)
+    storage.ensure_exists()
+
+    # per-staker data from 3 days ago, network summaries since
+    days = 3
+    today = datetime.utcnow()
+    today_begin = datetime(year=today.year, month=today.month, day=today.day)
+    range_begin = today_begin - timedelta(days=days - 1)
+    stakers = ['0x' + str(staker) * 40 for staker in range(1, 4)]
+    points = []
+    for staker in stakers:
+        points.append(Crawler.BLOCKCHAIN_DB_LINE_PROTOCOL.format(
+            measurement=Crawler.BLOCKCHAIN_DB_MEASUREMENT,
+            staker_address=staker,
+            worker_address=staker,
+            start_date=0.0,
+            end_date=0.0,
+            stake=1000.0,
+            locked_stake=1000.0,
+            current_period=1,
+            last_confirmed_period=1,
+            timestamp=int((range_begin - EPOCH).total_seconds())))
+    for day in range(1, days):
+        points.append(Crawler.NETWORK_SUMMARY_LINE_PROTOCOL.format(
+            measurement=Crawler.NETWORK_SUMMARY_MEASUREMENT,
+            total_locked=5000.0 + day,
+            total_staked=5000.0 + day,
+            num_stakers=5 + day,
+            confirmed=0,
+            pending=0,
+            inactive=0,
+            headless=0,
+            current_period=1,
+            timestamp=int((range_begin + timedelta(days=day) - EPOCH).total_seconds())))
+    assert storage.write_points(points)
+
+    blockchain_db_client = CrawlerBlockchainDBClient(None, None, None, db_filepath=tempfile_path)
+    network_data = blockchain_db_client.get_historical_network_data(range_length=f'{days}d')
+    assert network_data['time'] == [MayaDT.from_datetime(range_begin + timedelta(days=day)).datetime()
+                                    for day in range(days)]
+    assert network_data['locked_stake'] == [3000.0, 5001.0, 5002.0]
+    assert network_data['num_stakers'] == [3, 6, 7]
+
+    blockchain_db_client.close()
+
+
+def test_blockchain_client_staker_history(tempfile_path):
+    storage = SQLiteTimeSeriesStorage(db_filepath=tempfile_path)
+    storage.ensure_exists()
+
+    # daily points of 2 stakers over the last 5 days; the worker of the first staker changes
+    days = 5
+    today = datetime.utcnow()
+    today_begin = datetime(year=today.year, month=today.month, day=today.day)
+    stakers = ['0x' + str(staker) * 40 for staker in range(1, 3)]
+    workers = ['0x' + 'a' * 40, '0x' + 'b' * 40]
+    points = []
+    for day in range(days):
+        for index, staker in enumerate(stakers):
+            points.append(Crawler.BLOCKCHAIN_DB_LINE_PROTOCOL.format(
+                measurement=Crawler.BLOCKCHAIN_DB_MEASUREMENT,
+                staker_address=staker,
+                worker_address=workers[0] if (index or day < 3) else workers[1],
+                start_date=0.0,
+                end_date=0.0,
+                stake=1000.0,
+                locked_stake=1000.0 * (index + 1) + day,
+                current_period=100 + day,
+                last_confirmed_period=100 + day + (1 if day != 2 else 0),  # pending on day 2
+                timestamp=int((today_begin - timedelta(days=days - 1 - day) - EPOCH).total_seconds())))
+    assert storage.write_points(points)
+
+    blockchain_db_client = CrawlerBlockchainDBClient(None, None, None, db_filepath=tempfile_path)
+    history = blockchain_db_client.get_staker_history(staker_address=stakers[0], range_length=f'{days}d')
+    assert history['time'] == [MayaDT.from_datetime(today_begin - timedelta(days=days - 1 - day)).datetime()
+                               for day in range(days)]
+    assert history['locked_stake'] == [1000.0 + day for day in range(days)]
+    assert history['worker_address'] == [workers[0]] * 3 + [workers[1]] * 2
+    assert history['current_period'] == [100 + day for day in range(days)]
+    assert history['last_confirmed_period'] == [101, 102, 102, 104, 105]
+
+    # closed days are cached per staker
+    with patch.object(SQLiteTimeSeriesStorage, 'get_last_values', autospec=True) as get_last_values:
+        get_last_values.return_value = []
+        cached_history = blockchain_db_client.get_staker_history(staker_address=stakers[0],
+                                                                 range_length=f'{days}d')
+        query_begin = get_last_values.call_args[1]['range_begin']
+        assert query_begin == today_begin  # only today is queried
+        assert get_last_values.call_args[1]['tags'] == {'staker_address': stakers[0]}
+    assert cached_history['locked_stake'] == history['locked_stake'][:-1]
+
+    other_history = blockchain_db_client.get_staker_history(staker_address=stakers[1], range_length=f'{days}d')
+    assert other_history['locked_stake'] == [2000.0 + day for day in range(days)]
+    blockchain_db_client.close()
+
+
+def test_blockchain_client_stakers_history(tempfile_path):
+    storage = SQLiteTimeSeriesStorage(db_filepath=tempfile_path)
+    storage.ensure_exists()
 
-    call_args_list = mock_influxdb_client.query.call_args_list
-    assert len(call_args_list) == 1
-    for idx, execute_call in enumerate(call_args_list):
-        query = execute_call[0][0]
-        for statement in expected_in_query:
-            assert statement in query
+    # daily points of 3 stakers over the last 5 days; the third only has points for the last 2 days
+    days = 5
+    today = datetime.utcnow()
+    today_begin = datetime(year=today.year, month=today.month, day=today.day)
+    stakers = ['0x' + str(staker) * 40 for staker in range(1, 4)]
+    points = []
+    for day in range(days):
+        for index, staker in enumerate(stakers):
+            if index == 2 and day < days - 2:
+                continue
+            points.append(Crawler.BLOCKCHAIN_DB_LINE_PROTOCOL.format(
+                measurement=Crawler.BLOCKCHAIN_DB_MEASUREMENT,
+                staker_address=staker,
+                worker_address=staker,
+                start_date=0.0,
+                end_date=0.0,
+                stake=1000.0,
+                locked_stake=1000.0 * (index + 1) + day,
+                current_period=100 + day,
+                last_confirmed_period=101 + day,
+                timestamp=int((today_begin - timedelta(days=days - 1 - day) - EPOCH).total_seconds())))
+    assert storage.write_points(points)
+
+    blockchain_db_client = CrawlerBlockchainDBClient(None, None, None, db_filepath=tempfile_path)
+    with patch.object(SQLiteTimeSeriesStorage, 'get_last_values_by_tag', autospec=True,
+                      side_effect=SQLiteTimeSeriesStorage.get_last_values_by_tag) as get_last_values_by_tag:
+        histories = blockchain_db_client.get_stakers_history(staker_addresses=stakers + ['0xunknown'],
+                                                             range_length=f'{days}d')
+        get_last_values_by_tag.assert_called_once()  # a single query for all stakers
+
+    assert histories['0xunknown'] == dict(time=[], locked_stake=[], worker_address=[],
+                                          current_period=[], last_confirmed_period=[])
+    for index, staker in enumerate(stakers[:2]):
+        assert histories[staker]['locked_stake'] == [1000.0 * (index + 1) + day for day in range(days)]
+    assert histories[stakers[2]]['locked_stake'] == [3003.0, 3004.0]
+    assert histories[stakers[2]]['time'] == [MayaDT.from_datetime(today_begin - timedelta(days=day)).datetime()
+                                             for day in (1, 0)]
+
+    # closed days are cached per staker, and shared with the history of a single staker
+    with patch.object(SQLiteTimeSeriesStorage, 'get_last_values_by_tag', autospec=True) as get_last_values_by_tag:
+        get_last_values_by_tag.return_value = dict()
+        cached_histories = blockchain_db_client.get_stakers_history(staker_addresses=stakers,
+                                                                    range_length=f'{days}d')
+        assert get_last_values_by_tag.call_args[1]['range_begin'] == today_begin  # only today is queried
+    for staker in stakers:
+        assert cached_histories[staker]['locked_stake'] == histories[staker]['locked_stake'][:-1]
+
+    with patch.object(SQLiteTimeSeriesStorage, 'get_last_values', autospec=True) as get_last_values:
+        get_last_values.return_value = []
+        staker_history = blockchain_db_client.get_staker_history(staker_address=stakers[0], range_length=f'{days}d')
+        assert get_last_values.call_args[1]['range_begin'] == today_begin
+    assert staker_history['locked_stake'] == histories[stakers[0]]['locked_stake'][:-1]
+
+    assert blockchain_db_client.get_stakers_history(staker_addresses=[], range_length=f'{days}d') == dict()
+    blockchain_db_client.close()
 
-    # check results
-    assert len(num_stakers_dict) == days
 
-    for idx, key in enumerate(num_stakers_dict):
-        # use of rfc3339 loses milliseconds precision
-        date = MayaDT.from_rfc3339(start_date.add(days=idx).rfc3339()).datetime()
-        assert key == date
+def test_blockchain_client_get_node_reachability(tempfile_path):
+    storage = SQLiteTimeSeriesStorage(db_filepath=tempfile_path)
+    storage.ensure_exists()
 
-        num_stakers = num_stakers_dict[key]
-        assert num_stakers == base_count + (idx * count_increment)
+    now = int((datetime.utcnow() - EPOCH).total_seconds())
+    results = {'0xa': dict(reachable=True, status=200, latency=0.25, connect_time=0.05,
+                           tls_handshake_time=0.1, error=None),
+               '0xb': dict(reachable=False, status=None, latency=None, connect_time=None,
+                           tls_handshake_time=None, error='timeout')}
+    assert storage.write_points(NodeProber.to_line_protocol(results, timestamp=now - 120))
+    assert storage.write_points(NodeProber.to_line_protocol(results, timestamp=now - 60))
 
-    # close must be explicitly called on CrawlerBlockchainDBClient
-    mock_influxdb_client.close.assert_not_called()
+    blockchain_db_client = CrawlerBlockchainDBClient(None, None, None, db_filepath=tempfile_path)
+    points = blockchain_db_client.get_node_reachability(range_begin=EPOCH + timedelta(seconds=now - 90),
+                                                        range_end=EPOCH + timedelta(seconds=now))
+    assert [(point['time'], point['staker_address'], point['reachable'], point['latency']) for point in points] == \
+        [(now - 60, '0xa', True, 0.25), (now - 60, '0xb', False, None)]
 
 
 def convert_node_to_db_row(node):
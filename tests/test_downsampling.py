@@ -0,0 +1,25 @@
+import pytest
+
+from monitor.downsampling import largest_triangle_three_buckets
+
+
+def test_lttb_keeps_short_series():
+    assert largest_triangle_three_buckets([0, 1, 2], [5, 6, 7], threshold=10) == [0, 1, 2]
+
+
+def test_lttb_threshold_too_small():
+    with pytest.raises(ValueError):
+        largest_triangle_three_buckets(list(range(10)), list(range(10)), threshold=2)
+
+
+def test_lttb_preserves_shape():
+    x = list(range(1000))
+    y = [1] * 1000
+    y[567] = 100  # spike
+    y[890] = None  # gap
+
+    indices = largest_triangle_three_buckets(x, y, threshold=100)
+    assert len(indices) == 100
+    assert indices == sorted(set(indices))
+    assert indices[0] == 0 and indices[-1] == 999
+    assert 567 in indices
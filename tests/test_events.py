@@ -0,0 +1,114 @@
+import queue
+import time
+from threading import Event
+from unittest.mock import MagicMock
+
+import pytest
+
+from monitor.events import ChangeDetector, UpdateBroker
+
+
+def test_broker_publish_to_subscribers():
+    broker = UpdateBroker()
+    subscription_1 = broker.subscribe()
+    subscription_2 = broker.subscribe()
+    assert broker.subscriber_count == 2
+
+    broker.publish('nodes')
+    assert subscription_1.get_nowait() == 'nodes'
+    assert subscription_2.get_nowait() == 'nodes'
+
+    broker.unsubscribe(subscription_2)
+    broker.publish('states')
+    assert subscription_1.get_nowait() == 'states'
+    with pytest.raises(queue.Empty):
+        subscription_2.get_nowait()
+
+
+def test_broker_subscriber_limit():
+    broker = UpdateBroker(max_subscribers=1)
+    subscription = broker.subscribe()
+    with pytest.raises(UpdateBroker.TooManySubscribers):
+        broker.subscribe()
+
+    broker.unsubscribe(subscription)
+    broker.subscribe()
+
+
+def test_broker_slow_subscriber_does_not_block():
+    broker = UpdateBroker()
+    subscription = broker.subscribe()
+    for _ in range(UpdateBroker.SUBSCRIPTION_QUEUE_SIZE * 2):
+        broker.publish('nodes')
+    assert subscription.qsize() == UpdateBroker.SUBSCRIPTION_QUEUE_SIZE
+
+
+def test_change_detector_notifies_changed_topics_only():
+    nodes_source = MagicMock(return_value=(5, '2020-01-01T00:00:00Z'))
+    states_source = MagicMock(return_value=(1, '2020-01-01T00:00:00Z'))
+    listener = MagicMock()
+
+    change_detector = ChangeDetector(sources={'nodes': nodes_source, 'states': states_source},
+                                     listeners=[listener])
+
+    # first check only records fingerprints
+    assert change_detector.check() == []
+    listener.assert_not_called()
+
+    # no changes
+    assert change_detector.check() == []
+    listener.assert_not_called()
+
+    nodes_source.return_value = (6, '2020-01-01T00:01:00Z')
+    assert change_detector.check() == ['nodes']
+    listener.assert_called_once_with('nodes')
+
+
+def test_change_detector_source_failure():
+    failing_source = MagicMock(side_effect=ConnectionError)
+    working_source = MagicMock(return_value=1)
+    listener = MagicMock()
+    change_detector = ChangeDetector(sources={'network': failing_source, 'period': working_source},
+                                     listeners=[listener])
+    change_detector.check()
+
+    working_source.return_value = 2
+    assert change_detector.check() == ['period']
+    listener.assert_called_once_with('period')
+
+
+def test_change_detector_start_stop():
+    listener = MagicMock()
+    change_detector = ChangeDetector(sources={'period': MagicMock(return_value=1)},
+                                     listeners=[listener],
+                                     poll_interval=0.01)
+    assert not change_detector.is_running
+    change_detector.start()
+    assert change_detector.is_running
+    change_detector.stop()
+    assert not change_detector.is_running
+
+
+def test_change_detector_start_does_not_wait_for_sources():
+    unblock = Event()
+    period_source = MagicMock(side_effect=lambda: unblock.wait(5) and 1)
+    listener = MagicMock()
+    change_detector = ChangeDetector(sources={'period': period_source},
+                                     listeners=[listener],
+                                     poll_interval=0.01)
+    try:
+        # the baseline is taken in the background, eg. while the first client connects
+        start = time.monotonic()
+        change_detector.start()
+        assert time.monotonic() - start < 1
+        assert change_detector.is_running
+
+        unblock.set()
+        for _ in range(500):
+            if period_source.call_count > 1:
+                break
+            time.sleep(0.01)
+        assert period_source.call_count > 1
+        listener.assert_not_called()  # unchanged since the baseline
+    finally:
+        change_detector.stop()
@@ -0,0 +1,118 @@
+import json
+import os
+import sqlite3
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+
+from monitor.export import HistoryExporter
+from monitor.timeseries import EPOCH, SQLiteTimeSeriesStorage
+
+pyarrow = pytest.importorskip('pyarrow')
+import pyarrow.ipc
+import pyarrow.parquet
+
+STAKER_LINE_PROTOCOL = 'stakers,staker_address={staker} locked_stake={locked_stake},current_period={period}i {time}'
+
+
+@pytest.fixture()
+def storage(tempfile_path):
+    storage = SQLiteTimeSeriesStorage(db_filepath=tempfile_path)
+    storage.ensure_exists()
+    yield storage
+    storage.close()
+
+
+def write_days(storage, begin: datetime, days: int, samples_per_day: int = 4, stakers: int = 2):
+    for day in range(days):
+        for sample in range(samples_per_day):
+            timestamp = int((begin - EPOCH).total_seconds()) + (day * samples_per_day + sample) * 6 * 60 * 60
+            storage.write_points([STAKER_LINE_PROTOCOL.format(staker=f'0x{staker}',
+                                                              locked_stake=float(staker),
+                                                              period=day,
+                                                              time=timestamp)
+                                  for staker in range(stakers)])
+
+
+def test_export_measurement(storage, tmpdir):
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    write_days(storage, begin=today - timedelta(days=3), days=4)  # including today
+
+    exporter = HistoryExporter(storage=storage, output_dir=str(tmpdir), file_format='parquet', chunk='1d')
+    assert exporter.export_measurement('stakers') == 3 * 4 * 2  # only closed (previous) days
+
+    files = sorted(os.listdir(os.path.join(str(tmpdir), 'stakers')))
+    assert files == [f'stakers-{(today - timedelta(days=day)).strftime("%Y%m%dT%H%M%S")}.parquet'
+                     for day in (3, 2, 1)]
+    table = pyarrow.parquet.read_table(os.path.join(str(tmpdir), 'stakers', files[0]))
+    assert pyarrow.types.is_timestamp(table.schema.field('time').type)  # stored in ms, parquet has no seconds
+    assert table.schema.field('time').type.tz == 'UTC'
+    assert table.schema.field('staker_address').type == pyarrow.string()
+    assert table.schema.field('locked_stake').type == pyarrow.float64()
+    assert table.schema.field('current_period').type == pyarrow.int64()
+    assert table.num_rows == 4 * 2
+    assert table.column('current_period').to_pylist() == [0] * 8
+
+    # export resumes from the last exported chunk
+    with open(os.path.join(str(tmpdir), HistoryExporter.STATE_FILENAME)) as file:
+        assert json.load(file) == dict(stakers=today.strftime('%Y-%m-%dT%H:%M:%SZ'))
+    resumed_exporter = HistoryExporter(storage=storage, output_dir=str(tmpdir), chunk='1d')
+    assert resumed_exporter.get_exported_until('stakers') == today
+    assert resumed_exporter.export_measurement('stakers') == 0
+
+    # once the day closes, it is exported
+    with patch('monitor.export.datetime') as mock_datetime:
+        mock_datetime.utcnow.return_value = today + timedelta(days=1, minutes=1)
+        mock_datetime.strptime = datetime.strptime
+        assert resumed_exporter.export_measurement('stakers') == 4 * 2
+    assert len(os.listdir(os.path.join(str(tmpdir), 'stakers'))) == 4
+
+    # nothing recorded
+    assert exporter.export_measurement('unknown') == 0
+    assert exporter.get_exported_until('unknown') is None
+
+
+def test_export_measurement_arrow(storage, tmpdir):
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    write_days(storage, begin=today - timedelta(days=2), days=2)
+
+    exporter = HistoryExporter(storage=storage, output_dir=str(tmpdir), file_format='arrow', chunk='12h')
+    assert exporter.export_measurement('stakers') == 2 * 4 * 2
+
+    files = sorted(os.listdir(os.path.join(str(tmpdir), 'stakers')))
+    assert len(files) == 4  # 12h chunks
+    assert all(file.endswith('.arrow') for file in files)
+    with pyarrow.OSFile(os.path.join(str(tmpdir), 'stakers', files[0]), 'rb') as source:
+        table = pyarrow.ipc.open_file(source).read_all()
+    assert table.num_rows == 2 * 2
+    assert table.column('staker_address').to_pylist() == ['0x0', '0x1', '0x0', '0x1']
+
+
+def test_export_table(tmpdir):
+    db_filepath = os.path.join(str(tmpdir), 'nodes.sqlite')
+    db_conn = sqlite3.connect(db_filepath)
+    with db_conn:
+        db_conn.execute('CREATE TABLE node_info (staker_address text primary key, timestamp text, '
+                        'last_seen integer, stake real)')
+        db_conn.executemany('INSERT INTO node_info VALUES (?,?,?,?)',
+                            [(f'0x{i}', '2020-01-01T00:00:00Z', i, i * 1.5) for i in range(25)])
+    db_conn.close()
+
+    output_dir = os.path.join(str(tmpdir), 'export')
+    exporter = HistoryExporter(storage=None, output_dir=output_dir)
+    with patch.object(HistoryExporter, 'TABLE_PAGE_SIZE', 10):
+        assert exporter.export_table(db_filepath, 'node_info') == 25
+    assert exporter.export_table(db_filepath, 'unknown') == 0
+
+    table = pyarrow.parquet.read_table(os.path.join(output_dir, 'node_info.parquet'))
+    assert table.schema.names == ['staker_address', 'timestamp', 'last_seen', 'stake']
+    assert table.schema.field('last_seen').type == pyarrow.int64()
+    assert table.column('staker_address').to_pylist() == [f'0x{i}' for i in range(25)]
+    assert table.column('stake').to_pylist() == [i * 1.5 for i in range(25)]
+    assert not [file for file in os.listdir(output_dir) if file.endswith('.tmp')]
+
+
+def test_exporter_invalid_format(tmpdir):
+    with pytest.raises(ValueError):
+        HistoryExporter(storage=None, output_dir=str(tmpdir), file_format='csv')
@@ -0,0 +1,225 @@
+import gc
+import os
+import tracemalloc
+from unittest.mock import patch
+
+import maya
+import pytest
+from constant_sorrow.constants import UNKNOWN_FLEET_STATE
+from nucypher.network.nicknames import nickname_from_seed
+from nucypher.network.nodes import FleetStateTracker
+
+from monitor.crawler import CrawlerNodeStorage
+from monitor.known_nodes import BoundedFleetStateTracker, NodeSummary, full_node
+from tests.utilities import create_eth_address, create_node_certificate
+
+METADATA_SIZE = 4096  # stands in for the keys, certificate and signatures of a full node
+
+
+class FakeNode:
+    TEACHER_VERSION = 1
+
+    def __init__(self, checksum_address: str, timestamp: int, certificate=None, payload: bytes = None):
+        self.checksum_address = checksum_address
+        self.worker_address = create_eth_address()
+        self.nickname = f'Node {checksum_address[2:8]}'
+        self.timestamp = maya.MayaDT(timestamp)
+        self.last_seen = maya.now()
+        self.fleet_state_nickname_metadata = UNKNOWN_FLEET_STATE
+        self.certificate = certificate
+        self.payload = payload or os.urandom(METADATA_SIZE)
+
+    def rest_url(self):
+        return f'127.0.0.1:{9151 + int(self.checksum_address[-2:], 16)}'
+
+    def nickname_icon_details(self):
+        _nickname, nickname_metadata = nickname_from_seed(self.checksum_address)
+        return dict(node_class=self.__class__.__name__,
+                    version=self.TEACHER_VERSION,
+                    first_color=nickname_metadata[0][0]['hex'],
+                    first_symbol=nickname_metadata[0][1],
+                    second_color=nickname_metadata[1][0]['hex'],
+                    second_symbol=nickname_metadata[1][1],
+                    address_first6=self.checksum_address[2:8])
+
+    def __bytes__(self):
+        return self.checksum_address.encode() + self.timestamp.epoch.to_bytes(4, byteorder='big') + self.payload
+
+    @classmethod
+    def from_bytes(cls, metadata: bytes, certificates: dict):
+        checksum_address = metadata[:42].decode()
+        timestamp = int.from_bytes(metadata[42:46], byteorder='big')
+        return cls(checksum_address, timestamp, certificate=certificates[checksum_address], payload=metadata[46:])
+
+
+def create_fake_node(timestamp: int = 1580000000, certificates: dict = None):
+    checksum_address = create_eth_address()
+    certificate = None
+    if certificates is not None:
+        certificate = certificates[checksum_address] = create_node_certificate(host='127.0.0.1',
+                                                                               checksum_address=checksum_address)
+    return FakeNode(checksum_address, timestamp=timestamp, certificate=certificate)
+
+
+@patch('nucypher.characters.lawful.Ursula.from_bytes')
+def test_bounded_tracker_hydrates_and_spills(from_bytes, tempfile_path):
+    certificates = dict()
+    from_bytes.side_effect = lambda metadata, federated_only: FakeNode.from_bytes(metadata, certificates)
+    node_storage = CrawlerNodeStorage(storage_filepath=tempfile_path, keep_nodes_in_memory=False)
+    tracker = BoundedFleetStateTracker(node_storage=node_storage, max_hydrated_nodes=2)
+    nodes = [create_fake_node(certificates=certificates) for _ in range(5)]
+    for node in nodes:
+        tracker[node.checksum_address] = node
+
+    # known nodes are summaries; only the nodes last used are kept in memory, the others spilled to storage
+    assert len(tracker) == len(nodes)
+    assert nodes[0].checksum_address in tracker
+    assert list(tracker._hydrated) == [nodes[3].checksum_address, nodes[4].checksum_address]
+    stored = dict(node_storage.iter_node_metadata())
+    assert set(stored) == {node.checksum_address for node in nodes[:3]}  # spilled when evicted
+    assert list(stored) == sorted(stored)
+    for node in nodes:
+        summary = tracker[node.checksum_address]
+        assert isinstance(summary, NodeSummary)
+        assert summary.checksum_address == node.checksum_address
+        assert summary.timestamp == node.timestamp
+        assert summary.rest_url() == node.rest_url()
+        assert FleetStateTracker.abridged_node_details(summary) == FleetStateTracker.abridged_node_details(node)
+    from_bytes.assert_not_called()
+
+    # other attributes are those of the full node, hydrated from storage when used
+    summary = tracker[nodes[0].checksum_address]
+    summary.last_seen = maya.MayaDT(1580000000)
+    assert summary.payload == nodes[0].payload
+    assert bytes(summary) == bytes(nodes[0])
+    from_bytes.assert_called_once()
+    hydrated_node = full_node(summary)
+    assert hydrated_node is not nodes[0]
+    assert hydrated_node.last_seen == maya.MayaDT(1580000000)
+    assert hydrated_node.certificate_filepath == node_storage.generate_certificate_filepath(nodes[0].checksum_address)
+    assert list(tracker._hydrated) == [nodes[4].checksum_address, nodes[0].checksum_address]
+
+    # attributes set on the full node last until evicted, except for the last seen time kept by the summary
+    hydrated_node.last_seen = maya.MayaDT(1590000000)
+    summary.verified_node = True
+    assert hydrated_node.verified_node
+    full_node(tracker[nodes[1].checksum_address])
+    full_node(tracker[nodes[2].checksum_address])
+    assert nodes[0].checksum_address not in tracker._hydrated
+    assert summary.last_seen == maya.MayaDT(1590000000)
+    assert not hasattr(full_node(summary), 'verified_node')
+    assert full_node(summary).last_seen == maya.MayaDT(1590000000)
+
+    # newer versions of known nodes replace them
+    newer_node = FakeNode(nodes[1].checksum_address, timestamp=1590000000, certificate=nodes[1].certificate)
+    tracker[newer_node.checksum_address] = newer_node
+    assert tracker[newer_node.checksum_address].timestamp == newer_node.timestamp
+    assert full_node(tracker[newer_node.checksum_address]) is newer_node
+
+    # forgotten nodes are neither hydrated nor spilled again
+    forgotten_summary = tracker[newer_node.checksum_address]
+    tracker.forget(newer_node.checksum_address)
+    node_storage.remove(checksum_address=newer_node.checksum_address)
+    assert newer_node.checksum_address not in tracker
+    assert newer_node.checksum_address not in tracker._hydrated
+    with pytest.raises(KeyError):
+        full_node(forgotten_summary)
+    assert node_storage.load_node(newer_node.checksum_address) is None
+
+
+@patch('nucypher.characters.lawful.Ursula.from_bytes')
+def test_bounded_tracker_updates_evicted_nodes(from_bytes, tempfile_path):
+    certificates = dict()
+    from_bytes.side_effect = lambda metadata, federated_only: FakeNode.from_bytes(metadata, certificates)
+    node_storage = CrawlerNodeStorage(storage_filepath=tempfile_path, keep_nodes_in_memory=False)
+    tracker = BoundedFleetStateTracker(node_storage=node_storage, max_hydrated_nodes=2)
+    nodes = [create_fake_node(certificates=certificates) for _ in range(4)]
+    for node in nodes:
+        tracker[node.checksum_address] = node
+
+    # a teacher requested in a thread, and evicted before its response is handled
+    teacher = full_node(tracker[nodes[0].checksum_address])
+    assert tracker.update_node(teacher) is False  # still in memory
+    full_node(tracker[nodes[1].checksum_address])
+    full_node(tracker[nodes[2].checksum_address])
+    assert teacher.checksum_address not in tracker._hydrated
+    teacher.last_seen = maya.MayaDT(1590000000)
+    teacher.fleet_state_nickname_metadata = nickname_from_seed(nodes[3].checksum_address, number_of_pairs=1)[1]
+
+    # the update is kept by its summary, and by its full node when hydrated again
+    assert tracker.update_node(teacher) is True
+    summary = tracker[teacher.checksum_address]
+    assert summary.last_seen == maya.MayaDT(1590000000)
+    assert full_node(summary) is not teacher
+    assert full_node(summary).last_seen == maya.MayaDT(1590000000)
+    assert full_node(summary).fleet_state_nickname_metadata == teacher.fleet_state_nickname_metadata
+
+    teacher.last_seen = maya.MayaDT(1600000000)
+    assert tracker.update_node(teacher) is True
+    assert full_node(summary).last_seen == maya.MayaDT(1600000000)
+
+    # summaries, and nodes no longer known, are left as they are
+    assert tracker.update_node(summary) is False
+    tracker.forget(teacher.checksum_address)
+    assert tracker.update_node(teacher) is False
+
+
+def test_bounded_tracker_fleet_state(tempfile_path):
+    node_storage = CrawlerNodeStorage(storage_filepath=tempfile_path, keep_nodes_in_memory=False)
+    tracker = BoundedFleetStateTracker(node_storage=node_storage, max_hydrated_nodes=3)
+    unbounded_tracker = FleetStateTracker()
+    assert tracker.record_fleet_state() is None  # no known nodes
+
+    # the same fleet state checksums as with every node in memory
+    nodes = [create_fake_node() for _ in range(10)]
+    for node in nodes:
+        tracker[node.checksum_address] = node
+        unbounded_tracker[node.checksum_address] = node
+    checksum, state = tracker.record_fleet_state()
+    unbounded_tracker.record_fleet_state()
+    assert checksum == tracker.checksum == unbounded_tracker.checksum
+    assert state.nickname == unbounded_tracker.nickname
+    assert state.nodes is None  # not kept
+    assert tracker.record_fleet_state() is None  # unchanged
+
+    # nodes stored but no longer known are not part of the fleet state
+    tracker.forget(nodes[0].checksum_address)
+    unbounded_tracker._nodes.pop(nodes[0].checksum_address)
+    checksum, _state = tracker.record_fleet_state()
+    unbounded_tracker.record_fleet_state()
+    assert checksum == unbounded_tracker.checksum
+
+    # only the most recent fleet states are kept
+    for _ in range(BoundedFleetStateTracker.MAX_STATES + 5):
+        node = create_fake_node()
+        tracker[node.checksum_address] = node
+        tracker.record_fleet_state()
+    assert len(tracker.states) == BoundedFleetStateTracker.MAX_STATES
+    assert list(tracker.states)[-1] == tracker.checksum
+
+
+@pytest.mark.parametrize('number_of_nodes', [10_000, 50_000])
+def test_bounded_tracker_memory(number_of_nodes, tempfile_path):
+    node_storage = CrawlerNodeStorage(storage_filepath=tempfile_path, keep_nodes_in_memory=False)
+    node_storage.db_conn.execute('PRAGMA synchronous = OFF')
+    max_hydrated_nodes = 100
+    tracker = BoundedFleetStateTracker(node_storage=node_storage, max_hydrated_nodes=max_hydrated_nodes)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        for _ in range(number_of_nodes):
+            node = create_fake_node()
+            tracker[node.checksum_address] = node
+        del node
+        tracker.record_fleet_state()
+        gc.collect()
+        memory, _peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    # summaries of the known nodes, and the few full nodes kept in memory
+    assert len(tracker) == number_of_nodes
+    max_summary_size = 1024
+    max_node_size = METADATA_SIZE + 2048
+    assert memory < number_of_nodes * max_summary_size + max_hydrated_nodes * max_node_size
@@ -0,0 +1,211 @@
+import asyncio
+import os
+import socket
+import ssl
+import threading
+import time
+
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from nucypher.crypto.api import generate_self_signed_certificate
+
+from monitor.prober import NodeProber, split_rest_url
+from monitor.timeseries import parse_line_protocol
+
+STATUS_RESPONSE = b'HTTP/1.1 200 OK\r\nContent-Length: 2\r\nConnection: close\r\n\r\nOK'
+
+
+class StubNodeServer:
+    """Local HTTP(S) server standing in for the REST endpoints of nodes, on its own event loop thread"""
+
+    def __init__(self, response: bytes = STATUS_RESPONSE, delay: float = 0, ssl_context: ssl.SSLContext = None):
+        self.response = response
+        self.delay = delay
+        self.ssl_context = ssl_context
+        self.requests = 0
+        self.request_times = []
+        self.connections = 0
+        self.max_connections = 0
+        self.port = None
+
+        self._loop = asyncio.new_event_loop()
+        self._server = None
+        self._started = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        self.max_connections = max(self.max_connections, self.connections)
+        try:
+            await reader.readuntil(b'\r\n\r\n')
+            self.requests += 1
+            self.request_times.append(time.monotonic())
+            await asyncio.sleep(self.delay)
+            writer.write(self.response)
+            await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, ssl.SSLError):
+            pass
+        finally:
+            self.connections -= 1
+            writer.close()
+
+    async def _shutdown(self):
+        self._server.close()
+        handlers = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for handler in handlers:
+            handler.cancel()
+        await asyncio.gather(*handlers, return_exceptions=True)
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+        self._server = self._loop.run_until_complete(asyncio.start_server(self._handle, host='127.0.0.1', port=0,
+                                                                          ssl=self.ssl_context, backlog=1024))
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._started.set()
+        self._loop.run_forever()
+
+    @property
+    def rest_url(self) -> str:
+        return f'127.0.0.1:{self.port}'
+
+    def __enter__(self):
+        self._thread.start()
+        self._started.wait()
+        return self
+
+    def __exit__(self, *args):
+        asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+
+def unused_rest_url() -> str:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return f'127.0.0.1:{sock.getsockname()[1]}'
+
+
+@pytest.fixture()
+def server_ssl_context(tmpdir):
+    certificate, private_key = generate_self_signed_certificate(host='127.0.0.1', curve=ec.SECP384R1())
+    certificate_filepath = os.path.join(str(tmpdir), 'node.pem')
+    with open(certificate_filepath, 'wb') as file:
+        file.write(certificate.public_bytes(serialization.Encoding.PEM))
+    key_filepath = os.path.join(str(tmpdir), 'node.key')
+    with open(key_filepath, 'wb') as file:
+        file.write(private_key.private_bytes(encoding=serialization.Encoding.PEM,
+                                             format=serialization.PrivateFormat.TraditionalOpenSSL,
+                                             encryption_algorithm=serialization.NoEncryption()))
+    ssl_context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    ssl_context.load_cert_chain(certificate_filepath, key_filepath)
+    return ssl_context
+
+
+def test_split_rest_url():
+    assert split_rest_url('127.0.0.1:9151') == ('127.0.0.1', 9151)
+    assert split_rest_url('https://discover.nucypher.network:9151') == ('discover.nucypher.network', 9151)
+    with pytest.raises(ValueError):
+        split_rest_url('127.0.0.1')
+
+
+def test_probe_reachable_node():
+    prober = NodeProber(use_tls=False)
+    with StubNodeServer() as server:
+        results = prober.run({'0xa': server.rest_url})
+
+    result = results['0xa']
+    assert result['reachable']
+    assert result['status'] == 200
+    assert result['error'] is None
+    assert 0 < result['connect_time'] <= result['latency'] < NodeProber.DEFAULT_TIMEOUT
+    assert result['tls_handshake_time'] is None
+    assert server.requests == 1
+
+
+def test_probe_error_status_is_reachable():
+    prober = NodeProber(use_tls=False)
+    with StubNodeServer(response=b'HTTP/1.1 500 Internal Server Error\r\nContent-Length: 0\r\n\r\n') as server:
+        result = prober.run({'0xa': server.rest_url})['0xa']
+    assert result['reachable']
+    assert result['status'] == 500
+
+
+def test_probe_unreachable_nodes():
+    prober = NodeProber(timeout=0.5, use_tls=False)
+    with StubNodeServer(delay=5) as slow_server, StubNodeServer(response=b'garbage\r\n') as invalid_server:
+        results = prober.run({'0xslow': slow_server.rest_url,
+                              '0xinvalid': invalid_server.rest_url,
+                              '0xrefused': unused_rest_url(),
+                              '0xmalformed': 'not a url'})
+
+    assert not any(result['reachable'] for result in results.values())
+    assert results['0xslow']['error'] == 'timeout'
+    assert results['0xslow']['connect_time'] is not None  # connected, but no response within the timeout
+    assert results['0xslow']['latency'] is None
+    assert results['0xinvalid']['error'] == 'ValueError'
+    assert results['0xrefused']['error'] == 'ConnectionRefusedError'
+    assert results['0xrefused']['connect_time'] is None
+    assert results['0xmalformed']['error'] == 'ValueError'
+
+
+def test_probe_tls_handshake(server_ssl_context):
+    prober = NodeProber()  # self-signed certificates are accepted
+    with StubNodeServer(ssl_context=server_ssl_context) as server:
+        result = prober.run({'0xa': server.rest_url})['0xa']
+    assert result['reachable']
+    assert result['status'] == 200
+    assert 0 < result['tls_handshake_time'] < result['latency']
+
+    # not a TLS endpoint
+    with StubNodeServer() as server:
+        result = NodeProber(timeout=1).run({'0xa': server.rest_url})['0xa']
+    assert not result['reachable']
+    assert result['error'] is not None
+
+
+def test_probe_bounded_connections():
+    prober = NodeProber(max_connections=5, use_tls=False)
+    with StubNodeServer(delay=0.05) as server:
+        results = prober.run({f'0x{i}': server.rest_url for i in range(50)})
+    assert all(result['reachable'] for result in results.values())
+    assert server.requests == 50
+    assert server.max_connections == 5
+
+
+def test_probe_spread():
+    prober = NodeProber(spread=0.5, use_tls=False)
+    with StubNodeServer() as server:
+        start = time.monotonic()
+        results = prober.run({f'0x{i}': server.rest_url for i in range(20)})
+        elapsed = time.monotonic() - start
+    assert all(result['reachable'] for result in results.values())
+    assert max(server.request_times) - min(server.request_times) > 0.1  # probes started at different times
+    assert elapsed < 0.5 + 1
+
+
+def test_probe_throughput():
+    # 5k nodes well within a minute, from a single process
+    num_nodes = 5000
+    prober = NodeProber(use_tls=False)
+    with StubNodeServer() as server:
+        start = time.monotonic()
+        results = prober.run({f'0x{i}': server.rest_url for i in range(num_nodes)})
+        elapsed = time.monotonic() - start
+    assert len(results) == num_nodes
+    assert all(result['reachable'] for result in results.values())
+    assert elapsed < 30
+
+
+def test_probe_results_line_protocol():
+    results = {'0xa': dict(reachable=True, status=200, latency=0.25, connect_time=0.05,
+                           tls_handshake_time=0.1, error=None),
+               '0xb': dict(reachable=False, status=None, latency=None, connect_time=None,
+                           tls_handshake_time=None, error='timeout')}
+    data = NodeProber.to_line_protocol(results, timestamp=1580000000)
+    assert [parse_line_protocol(point) for point in data] == [
+        (NodeProber.MEASUREMENT, {'staker_address': '0xa'},
+         dict(reachable=True, status=200, latency=0.25, connect_time=0.05, tls_handshake_time=0.1), 1580000000),
+        (NodeProber.MEASUREMENT, {'staker_address': '0xb'}, dict(reachable=False, error='timeout'), 1580000000)
+    ]
@@ -0,0 +1,123 @@
+import os
+import time
+from unittest.mock import patch
+
+import pytest
+
+from monitor.crawler import CrawlerNodeStorage
+from monitor.db import CrawlerNodeMetadataDBClient
+from monitor.snapshot import DashboardSnapshot, SnapshotReader, publish_snapshot
+from tests.utilities import create_random_mock_node, create_staker_table
+
+
+def create_snapshot(node_storage: CrawlerNodeStorage, staker_table=None) -> bytes:
+    node_columns, node_rows = node_storage.read_known_nodes()
+    return DashboardSnapshot.serialize(node_columns=node_columns,
+                                       node_rows=node_rows,
+                                       teacher_checksum=node_storage.get_current_teacher(),
+                                       staker_table=staker_table)
+
+
+def test_snapshot_serialization(tempfile_path):
+    node_storage = CrawlerNodeStorage(storage_filepath=tempfile_path)
+    nodes = [create_random_mock_node() for _ in range(5)]
+    for node in nodes:
+        node_storage.store_node_metadata(node=node)
+    node_storage.store_current_teacher(teacher_checksum=nodes[0].checksum_address)
+    staker_table = create_staker_table(staker_addresses=[node.checksum_address for node in nodes])
+
+    # the same known nodes as read from the db
+    snapshot = DashboardSnapshot.from_buffer(create_snapshot(node_storage, staker_table=staker_table))
+    node_db_client = CrawlerNodeMetadataDBClient(db_filepath=tempfile_path)
+    assert snapshot.known_nodes == node_db_client.get_known_nodes_metadata()
+    assert list(snapshot.known_nodes) == sorted(node.checksum_address for node in nodes)
+    assert snapshot.teacher_checksum == nodes[0].checksum_address
+    assert snapshot.staker_table.columns() == staker_table.columns()
+
+    # nothing known yet
+    node_storage.clear()
+    snapshot = DashboardSnapshot.from_buffer(create_snapshot(node_storage))
+    assert snapshot.known_nodes == dict()
+    assert snapshot.teacher_checksum is None
+    assert snapshot.staker_table is None
+
+    with pytest.raises(DashboardSnapshot.InvalidSnapshot):
+        DashboardSnapshot.from_buffer(b'NOPE' + bytes(16))
+
+
+def test_snapshot_reader(tempfile_path, tmpdir):
+    snapshot_filepath = os.path.join(str(tmpdir), DashboardSnapshot.FILE_NAME)
+    reader = SnapshotReader(snapshot_filepath)
+    assert reader.get() is None  # not published yet
+    assert reader.fingerprint() is None
+
+    node_storage = CrawlerNodeStorage(storage_filepath=tempfile_path)
+    node_storage.store_node_metadata(node=create_random_mock_node())
+    publish_snapshot(snapshot_filepath, create_snapshot(node_storage))
+    assert os.listdir(str(tmpdir)) == [DashboardSnapshot.FILE_NAME]  # no temporary file left behind
+
+    # parsed once per published snapshot
+    with patch.object(DashboardSnapshot, 'from_buffer', wraps=DashboardSnapshot.from_buffer) as from_buffer:
+        snapshot = reader.get()
+        assert len(snapshot.known_nodes) == 1
+        assert reader.get() is snapshot
+        assert from_buffer.call_count == 1
+        fingerprint = reader.fingerprint()
+
+        node_storage.store_node_metadata(node=create_random_mock_node())
+        publish_snapshot(snapshot_filepath, create_snapshot(node_storage))
+        assert reader.fingerprint() != fingerprint
+        new_snapshot = reader.get()
+        assert len(new_snapshot.known_nodes) == 2
+        assert reader.get() is new_snapshot
+        assert from_buffer.call_count == 2
+
+    # snapshots already read are unaffected by the next ones
+    assert len(snapshot.known_nodes) == 1
+
+    # no longer read once the crawler stopped publishing
+    stale_time = time.time() - DashboardSnapshot.DEFAULT_MAX_AGE.total_seconds() - 1
+    os.utime(snapshot_filepath, (stale_time, stale_time))
+    assert reader.get() is None
+    assert reader.fingerprint() is None
+    publish_snapshot(snapshot_filepath, create_snapshot(node_storage))
+    assert len(reader.get().known_nodes) == 2
+
+
+def test_node_client_reads_snapshot(tempfile_path, tmpdir):
+    snapshot_filepath = os.path.join(str(tmpdir), DashboardSnapshot.FILE_NAME)
+    node_storage = CrawlerNodeStorage(storage_filepath=tempfile_path)
+    nodes = [create_random_mock_node() for _ in range(3)]
+    for node in nodes[:2]:
+        node_storage.store_node_metadata(node=node)
+    node_storage.store_current_teacher(teacher_checksum=nodes[0].checksum_address)
+    node_db_client = CrawlerNodeMetadataDBClient(db_filepath=tempfile_path, snapshot_filepath=snapshot_filepath)
+
+    # read from the db until a snapshot is published
+    assert len(node_db_client.get_known_nodes_metadata()) == 2
+    db_fingerprint = node_db_client.get_nodes_fingerprint()
+
+    staker_table = create_staker_table(staker_addresses=[node.checksum_address for node in nodes[:2]])
+    publish_snapshot(snapshot_filepath, create_snapshot(node_storage, staker_table=staker_table))
+
+    # then from the snapshot, even as the db changes
+    node_storage.store_node_metadata(node=nodes[2])
+    node_storage.store_current_teacher(teacher_checksum=nodes[2].checksum_address)
+    assert list(node_db_client.get_known_nodes_metadata()) == sorted(node.checksum_address for node in nodes[:2])
+    assert node_db_client.get_current_teacher_checksum() == nodes[0].checksum_address
+    assert node_db_client.get_staker_table().staker_address == staker_table.staker_address
+    snapshot_fingerprint = node_db_client.get_nodes_fingerprint()
+    assert snapshot_fingerprint != db_fingerprint
+
+    publish_snapshot(snapshot_filepath, create_snapshot(node_storage))
+    assert len(node_db_client.get_known_nodes_metadata()) == 3
+    assert node_db_client.get_current_teacher_checksum() == nodes[2].checksum_address
+    assert node_db_client.get_staker_table() is None
+    assert node_db_client.get_nodes_fingerprint() != snapshot_fingerprint
+
+    # from the db again if the snapshot is stale
+    node_storage.remove(checksum_address=nodes[2].checksum_address, certificate=False)
+    stale_time = time.time() - DashboardSnapshot.DEFAULT_MAX_AGE.total_seconds() - 1
+    os.utime(snapshot_filepath, (stale_time, stale_time))
+    assert list(node_db_client.get_known_nodes_metadata()) == sorted(node.checksum_address for node in nodes[:2])
+    assert node_db_client.get_staker_table() is None
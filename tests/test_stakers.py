@@ -0,0 +1,102 @@
+from nucypher.blockchain.eth.interfaces import BlockchainInterface
+
+from monitor.crawler import Crawler
+from monitor.stakers import StakerTable
+from tests.utilities import create_eth_address, create_staker_table
+
+
+def test_staker_table_stable_ids():
+    staker_addresses = [create_eth_address() for _ in range(5)]
+    staker_table = create_staker_table(staker_addresses=staker_addresses)
+    assert len(staker_table) == 5
+    assert [staker_table.get_id(staker_address) for staker_address in staker_addresses] == list(range(5))
+    assert staker_table.get_id(create_eth_address()) is None
+
+    # rows of known stakers are updated in place, and new stakers added
+    new_staker_address = create_eth_address()
+    staker_table.start_cycle(current_period=18623, block_time=1580086400,
+                             staker_addresses=staker_addresses + [new_staker_address])
+    assert staker_table.update(staker_address=staker_addresses[2], worker_address=BlockchainInterface.NULL_ADDRESS,
+                               start_date=1.0, end_date=2.0, stake=3.0, locked_stake=4.0,
+                               last_confirmed_period=18623) == 2
+    assert staker_table.update(staker_address=new_staker_address, worker_address=create_eth_address(),
+                               start_date=1.0, end_date=2.0, stake=3.0, locked_stake=4.0,
+                               last_confirmed_period=18624) == 5
+    assert staker_table.worker_address[2] == BlockchainInterface.NULL_ADDRESS
+    assert staker_table.locked_stake[2] == 4.0
+    assert staker_table.current_period == 18623
+
+    # rows of stakers no longer known are dropped, and the others keep their order
+    staker_table.start_cycle(current_period=18623, block_time=1580086400,
+                             staker_addresses=staker_addresses[1:] + [new_staker_address])
+    assert staker_table.staker_address == staker_addresses[1:] + [new_staker_address]
+    assert staker_addresses[0] not in staker_table
+    assert staker_table.get_id(staker_addresses[2]) == 1
+    assert staker_table.locked_stake.tolist() == [10001.0, 4.0, 10003.0, 10004.0, 4.0]
+    assert staker_table.worker_address[1] == BlockchainInterface.NULL_ADDRESS
+
+
+def test_staker_table_aggregates():
+    current_period = 18622
+    staker_addresses = [create_eth_address() for _ in range(6)]
+    worker_addresses = [create_eth_address() for _ in range(5)] + [BlockchainInterface.NULL_ADDRESS]
+    last_confirmed_periods = [current_period + 1, current_period + 1, current_period, current_period - 3, 0, 0]
+    staker_table = create_staker_table(staker_addresses=staker_addresses,
+                                       current_period=current_period,
+                                       worker_addresses=worker_addresses,
+                                       last_confirmed_periods=last_confirmed_periods)
+
+    assert staker_table.partition() == (2, 1, 3)
+    assert staker_table.summary() == dict(total_locked=sum(10000.0 + index for index in range(6)),
+                                          total_staked=sum(15000.0 + index for index in range(6)),
+                                          num_stakers=6,
+                                          confirmed=2,
+                                          pending=1,
+                                          inactive=3,
+                                          headless=1)
+
+    # no stakers
+    assert StakerTable(current_period=current_period).summary() == dict(total_locked=0.0, total_staked=0.0,
+                                                                        num_stakers=0, confirmed=0, pending=0,
+                                                                        inactive=0, headless=0)
+
+
+def test_staker_table_line_protocol():
+    staker_addresses = [create_eth_address() for _ in range(3)]
+    staker_table = create_staker_table(staker_addresses=staker_addresses, current_period=18622)
+
+    # the same lines as formatting the template with the values of each staker
+    lines = staker_table.to_line_protocol(Crawler.BLOCKCHAIN_DB_LINE_PROTOCOL,
+                                          measurement=Crawler.BLOCKCHAIN_DB_MEASUREMENT,
+                                          current_period=18622,
+                                          timestamp=1580000000)
+    expected_lines = [Crawler.BLOCKCHAIN_DB_LINE_PROTOCOL.format(measurement=Crawler.BLOCKCHAIN_DB_MEASUREMENT,
+                                                                 staker_address=staker_address,
+                                                                 worker_address=staker_table.worker_address[index],
+                                                                 start_date=1580000000.0,
+                                                                 end_date=1590000000.0,
+                                                                 stake=15000.0 + index,
+                                                                 locked_stake=10000.0 + index,
+                                                                 current_period=18622,
+                                                                 last_confirmed_period=18623,
+                                                                 timestamp=1580000000)
+                      for index, staker_address in enumerate(staker_addresses)]
+    assert lines == expected_lines
+
+
+def test_staker_table_bytes():
+    staker_addresses = [create_eth_address() for _ in range(4)]
+    staker_table = create_staker_table(staker_addresses=staker_addresses,
+                                       current_period=18622,
+                                       worker_addresses=[create_eth_address() for _ in range(3)] +
+                                                        [BlockchainInterface.NULL_ADDRESS],
+                                       last_confirmed_periods=[18623, 18622, 1, 0])
+
+    restored_table = StakerTable.from_bytes(staker_table.to_bytes())
+    assert restored_table.current_period == staker_table.current_period
+    assert restored_table.block_time == staker_table.block_time
+    assert restored_table.columns() == staker_table.columns()
+    assert restored_table.get_id(staker_addresses[3]) == 3
+    assert restored_table.summary() == staker_table.summary()
+
+    assert len(StakerTable.from_bytes(StakerTable().to_bytes())) == 0
@@ -0,0 +1,74 @@
+from monitor.teachers import TeacherScheduler
+
+
+def test_teacher_scheduler_scores():
+    scheduler = TeacherScheduler(teachers_per_round=3)
+    teachers = {f'0x{i}': f'10.0.0.{i}' for i in range(10)}
+
+    # nothing scored yet
+    selected = scheduler.select(teachers)
+    assert len(selected) == 3
+    assert len(set(selected)) == 3
+    assert scheduler.score('0x0') == 0
+
+    # fast and productive teachers are preferred
+    scheduler.record_response('0x1', '10.0.0.1', latency=0.1, new_nodes=50)  # fast, productive
+    scheduler.record_response('0x2', '10.0.0.2', latency=0.1, new_nodes=0)  # fast
+    scheduler.record_response('0x3', '10.0.0.3', latency=2, new_nodes=50)  # slow, productive
+    scheduler.record_response('0x4', '10.0.0.4', latency=2, new_nodes=0)  # slow
+    assert scheduler.score('0x1') > scheduler.score('0x3') > scheduler.score('0x2') > scheduler.score('0x4')
+    for _ in range(20):
+        selected = scheduler.select(teachers)
+        assert selected[:2] == ['0x1', '0x3']
+        assert selected[2] not in ('0x1', '0x2', '0x3', '0x4')  # trying out a teacher not scored yet
+
+    # once all are scored, a random one of the others is tried out
+    for i in (0, 5, 6, 7, 8, 9):
+        scheduler.record_response(f'0x{i}', f'10.0.0.{i}', latency=5, new_nodes=0)
+    tried_out = set()
+    for _ in range(100):
+        selected = scheduler.select(teachers)
+        assert selected[:2] == ['0x1', '0x3']
+        tried_out.add(selected[2])
+    assert len(tried_out) > 1
+    assert not tried_out.intersection({'0x1', '0x3'})
+
+    # scores follow recent responses
+    for _ in range(10):
+        scheduler.record_response('0x1', '10.0.0.1', latency=3, new_nodes=0)
+    assert scheduler.score('0x1') < scheduler.score('0x2')
+    assert scheduler.select(teachers)[:2] == ['0x3', '0x2']
+
+    scheduler.forget('0x3')
+    assert scheduler.score('0x3') == 0
+
+    # fewer teachers than teachers per round
+    assert sorted(scheduler.select({'0x1': '10.0.0.1', '0x2': '10.0.0.2'})) == ['0x1', '0x2']
+    assert scheduler.select(dict()) == []
+
+
+def test_teacher_scheduler_backoff():
+    scheduler = TeacherScheduler(teachers_per_round=2)
+    now = 1580000000
+    teachers = {'0xa': '10.0.0.1', '0xb': '10.0.0.1', '0xc': '10.0.0.2'}  # 0xa and 0xb on the same host
+
+    scheduler.record_failure('0xa', '10.0.0.1', now=now)
+    assert scheduler.is_backed_off('10.0.0.1', now=now)
+    assert scheduler.select(teachers, now=now) == ['0xc']
+
+    # backed off for exponentially longer with every consecutive failure
+    assert not scheduler.is_backed_off('10.0.0.1', now=now + TeacherScheduler.BASE_BACKOFF)
+    scheduler.record_failure('0xb', '10.0.0.1', now=now + TeacherScheduler.BASE_BACKOFF)
+    assert scheduler.is_backed_off('10.0.0.1', now=now + 2 * TeacherScheduler.BASE_BACKOFF)
+    assert not scheduler.is_backed_off('10.0.0.1', now=now + 3 * TeacherScheduler.BASE_BACKOFF)
+    for _ in range(20):
+        scheduler.record_failure('0xa', '10.0.0.1', now=now)
+    assert scheduler.is_backed_off('10.0.0.1', now=now + TeacherScheduler.MAX_BACKOFF - 1)
+    assert not scheduler.is_backed_off('10.0.0.1', now=now + TeacherScheduler.MAX_BACKOFF)
+
+    # a response from the host ends its back off
+    scheduler.record_response('0xb', '10.0.0.1', latency=0.5, new_nodes=1)
+    assert not scheduler.is_backed_off('10.0.0.1', now=now)
+    selected = scheduler.select(teachers, now=now)
+    assert selected[0] == '0xb'
+    assert selected[1] in ('0xa', '0xc')
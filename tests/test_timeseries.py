@@ -0,0 +1,603 @@
+import sqlite3
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, patch
+
+import pytest
+from influxdb.resultset import ResultSet
+
+from monitor.timeseries import (
+    EPOCH,
+    InfluxDBTimeSeriesStorage,
+    SQLiteTimeSeriesStorage,
+    get_time_series_storage,
+    parse_duration,
+    parse_line_protocol
+)
+
+STAKER_LINE_PROTOCOL = 'stakers,staker_address={staker} locked_stake={locked_stake},worker_address="{worker}" {time}'
+SUMMARY_LINE_PROTOCOL = 'summary total_locked={total_locked},num_stakers={num_stakers}i {time}'
+
+
+def test_parse_duration():
+    assert parse_duration('30s') == timedelta(seconds=30)
+    assert parse_duration('1h') == timedelta(hours=1)
+    assert parse_duration('5w') == timedelta(weeks=5)
+    assert parse_duration('INF') is None
+
+
+def test_parse_line_protocol():
+    point = 'moe_network_info,staker_address=0xabc worker_address="0xdef",stake=1.5,current_period=18000i 1580000000'
+    assert parse_line_protocol(point) == ('moe_network_info',
+                                          {'staker_address': '0xabc'},
+                                          {'worker_address': '0xdef', 'stake': 1.5, 'current_period': 18000},
+                                          1580000000)
+
+    # escaped and quoted special characters
+    point = r'my\ measurement,tag\,key=tag\ value name="a, b=c",active=t 1'
+    assert parse_line_protocol(point) == ('my measurement',
+                                          {'tag,key': 'tag value'},
+                                          {'name': 'a, b=c', 'active': True},
+                                          1)
+
+    with pytest.raises(ValueError):
+        parse_line_protocol('measurement value=1')
+
+
+def test_get_time_series_storage(tempfile_path):
+    assert isinstance(get_time_series_storage(database='network', db_filepath=tempfile_path), SQLiteTimeSeriesStorage)
+    with patch('monitor.timeseries.InfluxDBClient', autospec=True) as new_influx_db:
+        storage = get_time_series_storage(database='network', host='localhost', port=8086)
+        assert isinstance(storage, InfluxDBTimeSeriesStorage)
+        new_influx_db.assert_called_once_with(host='localhost', port=8086, database='network')
+
+
+#
+# InfluxDB
+#
+
+@patch('monitor.timeseries.InfluxDBClient', autospec=True)
+def test_influxdb_storage_write_points(new_influx_db):
+    mock_influxdb_client = new_influx_db.return_value
+    mock_influxdb_client.write_points.return_value = True
+
+    storage = InfluxDBTimeSeriesStorage(host='localhost', port=8086, database='network')
+    points = [SUMMARY_LINE_PROTOCOL.format(total_locked=1.0, num_stakers=1, time=1580000000)]
+    assert storage.write_points(points)
+    mock_influxdb_client.write_points.assert_called_once_with(points,
+                                                              database='network',
+                                                              time_precision='s',
+                                                              batch_size=10000,
+                                                              protocol='line')
+
+    storage.close()
+    mock_influxdb_client.close.assert_called_once()
+
+
+@patch('monitor.timeseries.InfluxDBClient', autospec=True)
+def test_influxdb_storage_get_last_values(new_influx_db):
+    mock_influxdb_client = new_influx_db.return_value
+    mock_influxdb_client.get_list_retention_policies.return_value = []
+    mock_query_object = MagicMock(spec=ResultSet, autospec=True)
+    results = [dict(time='2020-01-01T00:00:00Z', locked_stake=10.0, num_stakers=2)]
+    mock_query_object.get_points.return_value = results
+    mock_influxdb_client.query.return_value = mock_query_object
+
+    storage = InfluxDBTimeSeriesStorage(host='localhost', port=8086, database='network')
+    now = datetime.utcnow()
+    rows = storage.get_last_values(measurement='summary',
+                                   fields={'locked_stake': 'total_locked', 'num_stakers': 'num_stakers'},
+                                   range_begin=now - timedelta(hours=6),
+                                   range_end=now,
+                                   granularity='1h')
+    assert rows == results
+    query = mock_influxdb_client.query.call_args[0][0]
+    assert query.startswith('SELECT LAST(total_locked) AS locked_stake, LAST(num_stakers) AS num_stakers '
+                            'FROM summary WHERE')
+    assert query.endswith('GROUP BY time(1h)')
+
+    # series selected by tag value
+    storage.get_last_values(measurement='stakers',
+                            fields={'locked_stake': 'locked_stake'},
+                            range_begin=now - timedelta(hours=6),
+                            range_end=now,
+                            granularity='1h',
+                            tags={'staker_address': '0xabc'})
+    query = mock_influxdb_client.query.call_args[0][0]
+    assert "FROM stakers WHERE \"staker_address\" = '0xabc' AND time >= " in query
+
+
+@patch('monitor.timeseries.InfluxDBClient', autospec=True)
+def test_influxdb_storage_get_last_values_by_tag(new_influx_db):
+    mock_influxdb_client = new_influx_db.return_value
+    mock_influxdb_client.get_list_retention_policies.return_value = []
+    mock_query_object = MagicMock(spec=ResultSet, autospec=True)
+    series = {'0xa': [dict(time='2020-01-01T00:00:00Z', locked_stake=10.0)],
+              '0xb': [dict(time='2020-01-01T00:00:00Z', locked_stake=20.0)]}
+    mock_query_object.items.return_value = [(('stakers', {'staker_address': staker}), iter(points))
+                                            for staker, points in series.items()]
+    mock_influxdb_client.query.return_value = mock_query_object
+
+    storage = InfluxDBTimeSeriesStorage(host='localhost', port=8086, database='network')
+    now = datetime.utcnow()
+    rows = storage.get_last_values_by_tag(measurement='stakers',
+                                          fields={'locked_stake': 'locked_stake'},
+                                          tag='staker_address',
+                                          tag_values=['0xa', '0xb'],
+                                          range_begin=now - timedelta(days=6),
+                                          range_end=now,
+                                          granularity='1d')
+    assert rows == series
+
+    # a single query grouped by the tag
+    mock_influxdb_client.query.assert_called_once()
+    query = mock_influxdb_client.query.call_args[0][0]
+    assert query.startswith('SELECT LAST(locked_stake) AS locked_stake FROM stakers WHERE '
+                            '("staker_address" = \'0xa\' OR "staker_address" = \'0xb\') AND time >= ')
+    assert query.endswith('GROUP BY time(1d), "staker_address"')
+
+    # nothing to query
+    mock_influxdb_client.query.reset_mock()
+    assert storage.get_last_values_by_tag(measurement='stakers',
+                                          fields={'locked_stake': 'locked_stake'},
+                                          tag='staker_address',
+                                          tag_values=[],
+                                          range_begin=now - timedelta(days=6),
+                                          range_end=now,
+                                          granularity='1d') == dict()
+    mock_influxdb_client.query.assert_not_called()
+
+
+@patch('monitor.timeseries.InfluxDBClient', autospec=True)
+def test_influxdb_storage_raw_points(new_influx_db):
+    mock_influxdb_client = new_influx_db.return_value
+    tag_keys = MagicMock(spec=ResultSet, autospec=True)
+    tag_keys.get_points.return_value = [dict(tagKey='staker_address')]
+    field_keys = MagicMock(spec=ResultSet, autospec=True)
+    field_keys.get_points.return_value = [dict(fieldKey='locked_stake', fieldType='float'),
+                                          dict(fieldKey='worker_address', fieldType='string')]
+    points = MagicMock(spec=ResultSet, autospec=True)
+    results = [dict(time=1577836800, staker_address='0xa', locked_stake=1.0, worker_address='0xb')]
+    points.get_points.return_value = results
+    mock_influxdb_client.query.side_effect = [tag_keys, field_keys, points, points]
+
+    storage = InfluxDBTimeSeriesStorage(host='localhost', port=8086, database='network')
+    assert storage.get_schema('stakers') == dict(staker_address='string', locked_stake='float', worker_address='string')
+    assert storage.get_first_time('stakers') == datetime(year=2020, month=1, day=1)
+    assert mock_influxdb_client.query.call_args == (('SELECT * FROM stakers ORDER BY time ASC LIMIT 1', ),
+                                                    dict(epoch='s'))
+
+    assert storage.get_points('stakers',
+                              range_begin=datetime(year=2020, month=1, day=1),
+                              range_end=datetime(year=2020, month=1, day=2)) == results
+    query = mock_influxdb_client.query.call_args[0][0]
+    assert query.startswith("SELECT * FROM stakers WHERE time >= '2020-01-01T00:00:00")
+    assert mock_influxdb_client.query.call_args[1] == dict(epoch='s')
+
+
+@patch('monitor.timeseries.InfluxDBClient', autospec=True)
+def test_influxdb_storage_refresh_rollups(new_influx_db):
+    mock_influxdb_client = new_influx_db.return_value
+
+    storage = InfluxDBTimeSeriesStorage(host='localhost', port=8086, database='network')
+    assert storage.get_retention() == parse_duration(InfluxDBTimeSeriesStorage.RETENTION_POLICY_PERIOD)
+
+    rollups = (('_summary', 'summary', ('total_locked', 'num_stakers'), None), )
+    storage.refresh_rollups(rollups,
+                            range_begin=datetime(year=2020, month=1, day=1, hour=6, minute=30),
+                            range_end=datetime(year=2020, month=1, day=3, hour=12))
+
+    # each tier recomputed from the preceding tier, over whole buckets
+    queries = [call[0][0] for call in mock_influxdb_client.query.call_args_list]
+    assert len(queries) == len(InfluxDBTimeSeriesStorage.ROLLUP_RETENTION_POLICIES)
+    hourly, daily = queries
+    assert '"network"."network_info_retention"."summary"' in hourly
+    assert "WHERE time >= '2020-01-01T06:00:00" in hourly and "time < '2020-01-03T12:00:00" in hourly
+    assert hourly.endswith('GROUP BY time(1h)')
+    assert '"network"."network_info_hourly"."summary"' in daily
+    assert "WHERE time >= '2020-01-01T00:00:00" in daily and "time < '2020-01-04T00:00:00" in daily
+    assert daily.endswith('GROUP BY time(1d)')
+
+
+@patch('monitor.timeseries.InfluxDBClient', autospec=True)
+def test_influxdb_storage_select_retention_policy(new_influx_db):
+    mock_influxdb_client = new_influx_db.return_value
+    hourly_policy, daily_policy = [policy for policy, _, _ in InfluxDBTimeSeriesStorage.ROLLUP_RETENTION_POLICIES]
+    mock_influxdb_client.get_list_retention_policies.return_value = [
+        {'name': InfluxDBTimeSeriesStorage.RETENTION_POLICY_NAME, 'duration': '840h0m0s', 'default': True},
+        {'name': hourly_policy, 'duration': '8736h0m0s', 'default': False},
+        {'name': daily_policy, 'duration': '0s', 'default': False}
+    ]
+
+    storage = InfluxDBTimeSeriesStorage(None, None, None)
+
+    now = datetime.utcnow()
+    one_day = timedelta(days=1)
+
+    # raw data needed for fine granularity
+    assert storage.select_retention_policy(now - timedelta(hours=6), now, timedelta(minutes=10)) is None
+
+    # daily granularity up to the present - latest daily rollup not written yet
+    assert storage.select_retention_policy(now - timedelta(days=30), now, one_day) == hourly_policy
+    assert storage.select_retention_policy(now - timedelta(days=90), now, one_day) == hourly_policy
+
+    # closed days only
+    closed_range_end = now - timedelta(days=2)
+    assert storage.select_retention_policy(now - timedelta(days=30), closed_range_end, one_day) == daily_policy
+
+    # beyond the retention of the raw data
+    assert storage.select_retention_policy(now - timedelta(days=60), now, timedelta(hours=2)) == hourly_policy
+
+    # beyond the retention of the hourly rollups
+    assert storage.select_retention_policy(now - timedelta(days=400), now, one_day) == daily_policy
+
+    # rollup tier used for query
+    mock_query_object = MagicMock(spec=ResultSet, autospec=True)
+    mock_query_object.get_points.return_value = []
+    mock_influxdb_client.query.return_value = mock_query_object
+    storage.get_tag_totals(measurement='moe_network_info',
+                           field='locked_stake',
+                           tag='staker_address',
+                           range_begin=now - timedelta(days=30),
+                           range_end=now,
+                           granularity='1d')
+    query = mock_influxdb_client.query.call_args[0][0]
+    assert f'FROM "{hourly_policy}".moe_network_info WHERE' in query
+
+    # available retention policies only retrieved once
+    mock_influxdb_client.get_list_retention_policies.assert_called_once()
+
+
+@patch('monitor.timeseries.InfluxDBClient', autospec=True)
+def test_influxdb_storage_select_retention_policy_without_rollups(new_influx_db):
+    mock_influxdb_client = new_influx_db.return_value
+    mock_influxdb_client.get_list_retention_policies.return_value = [
+        {'name': InfluxDBTimeSeriesStorage.RETENTION_POLICY_NAME, 'duration': '840h0m0s', 'default': True}
+    ]
+
+    storage = InfluxDBTimeSeriesStorage(None, None, None)
+
+    # raw data tier is all there is
+    now = datetime.utcnow()
+    assert storage.select_retention_policy(now - timedelta(days=30), now, timedelta(days=1)) is None
+    assert storage.select_retention_policy(now - timedelta(days=400), now, timedelta(days=1)) is None
+
+
+
+
+#
+# SQLite
+#
+
+def write_staker_data(storage: SQLiteTimeSeriesStorage, begin: int, days: int, stakers: int, samples_per_day: int = 4):
+    """Increasing locked stake per staker over the day, and a network summary of each sample"""
+    points = []
+    interval = 24 * 60 * 60 // samples_per_day
+    for timestamp in range(begin, begin + days * 24 * 60 * 60, interval):
+        for staker in range(stakers):
+            points.append(STAKER_LINE_PROTOCOL.format(staker=f'0x{staker:040x}',
+                                                      locked_stake=float(timestamp + staker),
+                                                      worker=f'0x{staker:040x}',
+                                                      time=timestamp))
+        points.append(SUMMARY_LINE_PROTOCOL.format(total_locked=float(timestamp * stakers),
+                                                   num_stakers=stakers,
+                                                   time=timestamp))
+    assert storage.write_points(points)
+
+
+def partition_tables(db_filepath: str) -> list:
+    db_conn = sqlite3.connect(db_filepath)
+    try:
+        return [row[0] for row in db_conn.execute(f"SELECT name FROM {SQLiteTimeSeriesStorage.PARTITION_TABLE_NAME} "
+                                                  f"ORDER BY measurement, begin")]
+    finally:
+        db_conn.close()
+
+
+def test_sqlite_storage_aggregates(tempfile_path):
+    storage = SQLiteTimeSeriesStorage(db_filepath=tempfile_path)
+    storage.ensure_exists()
+    storage.ensure_exists()  # idempotent
+
+    # 10 days of data spanning partitions
+    days, stakers, samples_per_day = 10, 3, 4
+    begin = int((datetime(year=2020, month=1, day=1) - EPOCH).total_seconds())
+    write_staker_data(storage, begin=begin, days=days, stakers=stakers, samples_per_day=samples_per_day)
+
+    tables = partition_tables(tempfile_path)
+    assert len(tables) == 2 * 3  # 2 measurements over 3 weekly partitions
+    assert tables[0] == 'stakers_20191226'  # partitions aligned to the epoch, like InfluxDB buckets
+
+    range_begin = datetime(year=2020, month=1, day=2)
+    range_end = datetime(year=2020, month=1, day=9)
+    last_sample = 24 * 60 * 60 * (samples_per_day - 1) // samples_per_day
+
+    # sum and count of the last value of each staker per day
+    totals = storage.get_tag_totals(measurement='stakers',
+                                    field='locked_stake',
+                                    tag='staker_address',
+                                    range_begin=range_begin,
+                                    range_end=range_end,
+                                    granularity='1d')
+    assert len(totals) == 7
+    for day, row in enumerate(totals):
+        bucket = range_begin + timedelta(days=day)
+        assert row['time'] == bucket.strftime('%Y-%m-%dT%H:%M:%SZ')
+        last_timestamp = int((bucket - EPOCH).total_seconds()) + last_sample
+        assert row['sum'] == sum(float(last_timestamp + staker) for staker in range(stakers))
+        assert row['count'] == stakers
+
+    # last values per hour, only for hours with data
+    summaries = storage.get_last_values(measurement='summary',
+                                        fields={'locked_stake': 'total_locked', 'num_stakers': 'num_stakers'},
+                                        range_begin=range_begin,
+                                        range_end=range_begin + timedelta(days=1),
+                                        granularity='1h')
+    assert len(summaries) == samples_per_day
+    timestamp = int((range_begin - EPOCH).total_seconds())
+    assert summaries[0] == dict(time=range_begin.strftime('%Y-%m-%dT%H:%M:%SZ'),
+                                locked_stake=float(timestamp * stakers),
+                                num_stakers=stakers)
+
+    # weekly buckets
+    weekly = storage.get_tag_totals(measurement='stakers',
+                                    field='locked_stake',
+                                    tag='staker_address',
+                                    range_begin=datetime(year=2019, month=12, day=26),
+                                    range_end=datetime(year=2020, month=1, day=16),
+                                    granularity='1w')
+    assert [row['time'] for row in weekly] == ['2019-12-26T00:00:00Z', '2020-01-02T00:00:00Z', '2020-01-09T00:00:00Z']
+
+    # no data
+    assert storage.get_last_values(measurement='summary',
+                                   fields={'locked_stake': 'total_locked'},
+                                   range_begin=datetime(year=2019, month=1, day=1),
+                                   range_end=datetime(year=2019, month=1, day=2),
+                                   granularity='1d') == []
+    assert storage.get_tag_totals(measurement='unknown',
+                                  field='locked_stake',
+                                  tag='staker_address',
+                                  range_begin=range_begin,
+                                  range_end=range_end,
+                                  granularity='1d') == []
+
+
+def test_sqlite_storage_tag_values(tempfile_path):
+    storage = SQLiteTimeSeriesStorage(db_filepath=tempfile_path)
+    storage.ensure_exists()
+
+    days, stakers, samples_per_day = 10, 3, 4
+    begin = int((datetime(year=2020, month=1, day=1) - EPOCH).total_seconds())
+    write_staker_data(storage, begin=begin, days=days, stakers=stakers, samples_per_day=samples_per_day)
+
+    # last values of a single staker per day
+    staker = f'0x{1:040x}'
+    range_begin = datetime(year=2020, month=1, day=2)
+    range_end = datetime(year=2020, month=1, day=9)
+    rows = storage.get_last_values(measurement='stakers',
+                                   fields={'locked_stake': 'locked_stake', 'worker_address': 'worker_address'},
+                                   range_begin=range_begin,
+                                   range_end=range_end,
+                                   granularity='1d',
+                                   tags={'staker_address': staker})
+    assert len(rows) == 7
+    last_sample = 24 * 60 * 60 * (samples_per_day - 1) // samples_per_day
+    for day, row in enumerate(rows):
+        bucket = range_begin + timedelta(days=day)
+        last_timestamp = int((bucket - EPOCH).total_seconds()) + last_sample
+        assert row == dict(time=bucket.strftime('%Y-%m-%dT%H:%M:%SZ'),
+                           locked_stake=float(last_timestamp + 1),
+                           worker_address=staker)
+
+    # the (tags, time) series index is used
+    db_conn = sqlite3.connect(tempfile_path)
+    plan = db_conn.execute('EXPLAIN QUERY PLAN SELECT time FROM "stakers_20200102" '
+                           'WHERE "staker_address" = \'0x1\' AND time >= 0 AND time < 1').fetchall()
+    db_conn.close()
+    assert 'stakers_20200102_series' in str(plan)
+
+    # unknown tag values
+    assert storage.get_last_values(measurement='stakers',
+                                   fields={'locked_stake': 'locked_stake'},
+                                   range_begin=range_begin,
+                                   range_end=range_end,
+                                   granularity='1d',
+                                   tags={'staker_address': "0x'unknown"}) == []
+    assert storage.get_last_values(measurement='summary',
+                                   fields={'locked_stake': 'total_locked'},
+                                   range_begin=range_begin,
+                                   range_end=range_end,
+                                   granularity='1d',
+                                   tags={'staker_address': staker}) == []
+
+
+def test_sqlite_storage_last_values_by_tag(tempfile_path):
+    storage = SQLiteTimeSeriesStorage(db_filepath=tempfile_path)
+    storage.ensure_exists()
+
+    days, stakers, samples_per_day = 10, 4, 4
+    begin = int((datetime(year=2020, month=1, day=1) - EPOCH).total_seconds())
+    write_staker_data(storage, begin=begin, days=days, stakers=stakers, samples_per_day=samples_per_day)
+
+    # last values of several stakers per day, spanning partitions
+    selected = [f'0x{staker:040x}' for staker in (0, 2)]
+    range_begin = datetime(year=2020, month=1, day=2)
+    range_end = datetime(year=2020, month=1, day=9)
+    values = storage.get_last_values_by_tag(measurement='stakers',
+                                            fields={'locked_stake': 'locked_stake'},
+                                            tag='staker_address',
+                                            tag_values=selected + ['0xunknown'],
+                                            range_begin=range_begin,
+                                            range_end=range_end,
+                                            granularity='1d')
+    assert list(values) == selected  # stakers without points are omitted
+    last_sample = 24 * 60 * 60 * (samples_per_day - 1) // samples_per_day
+    for staker_index, staker in zip((0, 2), selected):
+        assert len(values[staker]) == 7
+        for day, row in enumerate(values[staker]):
+            bucket = range_begin + timedelta(days=day)
+            last_timestamp = int((bucket - EPOCH).total_seconds()) + last_sample
+            assert row == dict(time=bucket.strftime('%Y-%m-%dT%H:%M:%SZ'),
+                               locked_stake=float(last_timestamp + staker_index))
+
+    assert storage.get_last_values_by_tag(measurement='stakers',
+                                          fields={'locked_stake': 'locked_stake'},
+                                          tag='staker_address',
+                                          tag_values=[],
+                                          range_begin=range_begin,
+                                          range_end=range_end,
+                                          granularity='1d') == dict()
+
+
+def test_sqlite_storage_points_replace_same_series_and_time(tempfile_path):
+    storage = SQLiteTimeSeriesStorage(db_filepath=tempfile_path)
+    storage.ensure_exists()
+
+    timestamp = int((datetime(year=2020, month=1, day=1) - EPOCH).total_seconds())
+    points = [STAKER_LINE_PROTOCOL.format(staker='0xa', locked_stake=1.0, worker='0xb', time=timestamp),
+              STAKER_LINE_PROTOCOL.format(staker='0xc', locked_stake=2.0, worker='0xd', time=timestamp)]
+    assert storage.write_points(points)
+
+    # rewritten point (eg. by a backfill) replaces the original
+    assert storage.write_points([STAKER_LINE_PROTOCOL.format(staker='0xa', locked_stake=5.0, worker='0xb',
+                                                             time=timestamp)])
+
+    # new fields are added to existing partitions
+    assert storage.write_points(['stakers,staker_address=0xc locked_stake=3.0,stake=4.0 ' + str(timestamp + 60)])
+
+    totals = storage.get_tag_totals(measurement='stakers',
+                                    field='locked_stake',
+                                    tag='staker_address',
+                                    range_begin=datetime(year=2020, month=1, day=1),
+                                    range_end=datetime(year=2020, month=1, day=2),
+                                    granularity='1d')
+    assert totals == [dict(time='2020-01-01T00:00:00Z', sum=8.0, count=2)]
+
+    last_values = storage.get_last_values(measurement='stakers',
+                                          fields={'stake': 'stake', 'worker': 'worker_address'},
+                                          range_begin=datetime(year=2020, month=1, day=1),
+                                          range_end=datetime(year=2020, month=1, day=2),
+                                          granularity='1d')
+    assert last_values == [dict(time='2020-01-01T00:00:00Z', stake=4.0, worker=None)]
+
+
+def test_sqlite_storage_tags_of_existing_partitions(tempfile_path):
+    storage = SQLiteTimeSeriesStorage(db_filepath=tempfile_path)
+    storage.ensure_exists()
+
+    timestamp = int((datetime(year=2020, month=1, day=1) - EPOCH).total_seconds())
+    assert storage.write_points([f'stakers,staker_address=0xa locked_stake=1.0 {timestamp}'])
+
+    # new tags are added to existing partitions, as part of the series
+    assert storage.write_points([f'stakers,staker_address=0xa,worker_address=0xb locked_stake=2.0 {timestamp}'])
+    assert storage.get_schema('stakers') == dict(staker_address='string', locked_stake='float',
+                                                 worker_address='string')
+
+    # points missing a tag are of a single series
+    assert storage.write_points([f'stakers,staker_address=0xa locked_stake=3.0 {timestamp}'])
+    points = storage.get_points('stakers',
+                                range_begin=datetime(year=2020, month=1, day=1),
+                                range_end=datetime(year=2020, month=1, day=2))
+    assert sorted(points, key=lambda point: point['locked_stake']) == [
+        dict(time=timestamp, staker_address='0xa', locked_stake=2.0, worker_address='0xb'),
+        dict(time=timestamp, staker_address='0xa', locked_stake=3.0, worker_address=None)
+    ]
+
+    last_values = storage.get_last_values(measurement='stakers',
+                                          fields={'locked_stake': 'locked_stake'},
+                                          range_begin=datetime(year=2020, month=1, day=1),
+                                          range_end=datetime(year=2020, month=1, day=2),
+                                          granularity='1d',
+                                          tags={'worker_address': '0xb'})
+    assert last_values == [dict(time='2020-01-01T00:00:00Z', locked_stake=2.0)]
+
+
+def test_sqlite_storage_columns_added_by_another_connection(tempfile_path):
+    crawler_storage = SQLiteTimeSeriesStorage(db_filepath=tempfile_path)
+    crawler_storage.ensure_exists()
+    dashboard_storage = SQLiteTimeSeriesStorage(db_filepath=tempfile_path)
+
+    timestamp = int((datetime(year=2020, month=1, day=1) - EPOCH).total_seconds())
+    assert crawler_storage.write_points([f'stakers,staker_address=0xa locked_stake=1.0 {timestamp}'])
+    range_begin, range_end = datetime(year=2020, month=1, day=1), datetime(year=2020, month=1, day=2)
+    points = dashboard_storage.get_points('stakers', range_begin=range_begin, range_end=range_end)
+    assert points == [dict(time=timestamp, staker_address='0xa', locked_stake=1.0)]
+
+    # columns of the partition are read again once the crawler adds to them
+    assert crawler_storage.write_points([f'stakers,staker_address=0xa,worker_address=0xb '
+                                         f'locked_stake=2.0,active=t {timestamp + 60}'])
+    points = dashboard_storage.get_points('stakers', range_begin=range_begin, range_end=range_end)
+    assert points == [dict(time=timestamp, staker_address='0xa', locked_stake=1.0, worker_address=None, active=None),
+                      dict(time=timestamp + 60, staker_address='0xa', locked_stake=2.0, worker_address='0xb',
+                           active=True)]
+
+
+def test_sqlite_storage_write_errors_logged(tempfile_path):
+    storage = SQLiteTimeSeriesStorage(db_filepath=tempfile_path)
+    storage.ensure_exists()
+    with patch.object(storage, '_ensure_partition', side_effect=sqlite3.OperationalError('database is locked')), \
+            patch.object(storage.log, 'warn') as warn:
+        assert not storage.write_points([SUMMARY_LINE_PROTOCOL.format(total_locked=1.0, num_stakers=1, time=0)])
+    warn.assert_called_once()
+    assert 'database is locked' in warn.call_args[0][0]
+
+
+def test_sqlite_storage_raw_points(tempfile_path):
+    storage = SQLiteTimeSeriesStorage(db_filepath=tempfile_path)
+    storage.ensure_exists()
+    assert storage.get_schema('stakers') == dict()
+    assert storage.get_first_time('stakers') is None
+
+    timestamp = int((datetime(year=2020, month=1, day=1) - EPOCH).total_seconds())
+    assert storage.write_points([STAKER_LINE_PROTOCOL.format(staker='0xa', locked_stake=1.0, worker='0xb',
+                                                             time=timestamp + 60),
+                                 STAKER_LINE_PROTOCOL.format(staker='0xc', locked_stake=2.0, worker='0xd',
+                                                             time=timestamp)])
+    # a field added in a later partition
+    next_week = timestamp + 7 * 24 * 60 * 60
+    assert storage.write_points([f'stakers,staker_address=0xa locked_stake=3.0,active=t {next_week}'])
+
+    assert storage.get_schema('stakers') == dict(staker_address='string',
+                                                 locked_stake='float',
+                                                 worker_address='string',
+                                                 active='boolean')
+    assert storage.get_first_time('stakers') == datetime(year=2020, month=1, day=1)
+
+    points = storage.get_points('stakers',
+                                range_begin=datetime(year=2020, month=1, day=1),
+                                range_end=datetime(year=2020, month=2, day=1))
+    assert points == [dict(time=timestamp, staker_address='0xc', locked_stake=2.0, worker_address='0xd', active=None),
+                      dict(time=timestamp + 60, staker_address='0xa', locked_stake=1.0, worker_address='0xb',
+                           active=None),
+                      dict(time=next_week, staker_address='0xa', locked_stake=3.0, worker_address=None, active=True)]
+    assert storage.get_points('stakers',
+                              range_begin=datetime(year=2019, month=1, day=1),
+                              range_end=datetime(year=2019, month=1, day=2)) == []
+
+
+def test_sqlite_storage_retention(tempfile_path):
+    storage = SQLiteTimeSeriesStorage(db_filepath=tempfile_path, retention='2w')
+    storage.ensure_exists()
+
+    now = datetime.utcnow()
+    recent = int((now - EPOCH).total_seconds())
+    expired = int((now - timedelta(weeks=4) - EPOCH).total_seconds())
+    assert storage.write_points([SUMMARY_LINE_PROTOCOL.format(total_locked=1.0, num_stakers=1, time=expired),
+                                 SUMMARY_LINE_PROTOCOL.format(total_locked=2.0, num_stakers=2, time=recent)])
+
+    # expired partitions are dropped entirely
+    tables = partition_tables(tempfile_path)
+    assert len(tables) == 1
+    rows = storage.get_last_values(measurement='summary',
+                                   fields={'num_stakers': 'num_stakers'},
+                                   range_begin=now - timedelta(weeks=5),
+                                   range_end=now + timedelta(days=1),
+                                   granularity='1d')
+    assert [row['num_stakers'] for row in rows] == [2]
+
+
+def test_sqlite_storage_invalid_points_not_written(tempfile_path):
+    storage = SQLiteTimeSeriesStorage(db_filepath=tempfile_path)
+    storage.ensure_exists()
+    with pytest.raises(ValueError):
+        storage.write_points(['summary total_locked=1.0'])
+    assert partition_tables(tempfile_path) == []
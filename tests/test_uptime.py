@@ -0,0 +1,125 @@
+import random
+
+import pytest
+
+from monitor.uptime import LatencySketch, NodeStatistics, RollingWindow
+
+HOUR = 60 * 60
+DAY = 24 * HOUR
+
+
+def exact_quantile(values, q):
+    return sorted(values)[int(q * (len(values) - 1))]
+
+
+def test_latency_sketch_relative_accuracy():
+    random.seed(42)
+    values = [random.lognormvariate(-3, 1) for _ in range(10000)]  # ~50ms median, long tail
+
+    sketch = LatencySketch()
+    for value in values:
+        sketch.add(value)
+    assert sketch.count == len(values)
+    for q in (0.5, 0.95, 0.99, 1):
+        expected = exact_quantile(values, q)
+        assert sketch.quantile(q) == pytest.approx(expected, rel=LatencySketch.RELATIVE_ACCURACY)
+
+    # number of bins is bounded, regardless of the number of values
+    assert len(sketch.bins) < 400
+
+    assert LatencySketch().quantile(0.5) is None
+
+
+def test_latency_sketch_merge():
+    random.seed(7)
+    first_values = [random.uniform(0.01, 0.1) for _ in range(1000)]
+    second_values = [random.uniform(0.5, 2) for _ in range(1000)]
+    first, second, combined = LatencySketch(), LatencySketch(), LatencySketch()
+    for value in first_values:
+        first.add(value)
+        combined.add(value)
+    for value in second_values:
+        second.add(value)
+        combined.add(value)
+
+    first.merge(second)
+    assert first.count == combined.count
+    assert first.bins == combined.bins
+    assert first.quantile(0.5) == pytest.approx(exact_quantile(first_values + second_values, 0.5),
+                                                rel=LatencySketch.RELATIVE_ACCURACY)
+
+
+def test_rolling_window():
+    window = RollingWindow(length=HOUR, num_buckets=12)  # 5 min buckets
+    assert window.bucket_length == 5 * 60
+    begin = 1580000000 - 1580000000 % HOUR
+
+    # a probe per minute for an hour; down for the last 15 minutes
+    for minute in range(60):
+        up = minute < 45
+        window.add(begin + minute * 60, up=up, latency=0.1 if up else None)
+
+    now = begin + HOUR - 1
+    summary = window.summary(now, percentiles=(50, 99))
+    assert summary['observations'] == 60
+    assert summary['uptime'] == 75.0
+    assert summary['p50'] == pytest.approx(0.1, rel=LatencySketch.RELATIVE_ACCURACY)
+
+    # buckets of the previous lap of the ring are reused; older observations are dropped
+    for minute in range(60, 75):
+        window.add(begin + minute * 60, up=True, latency=0.2)
+    window.add(begin, up=True, latency=0.1)  # outside the window
+    summary = window.summary(begin + 75 * 60 - 1, percentiles=(50, 99))
+    assert summary['observations'] == 60
+    assert summary['uptime'] == 100 * (30 + 15) / 60
+    assert summary['p99'] == pytest.approx(0.2, rel=LatencySketch.RELATIVE_ACCURACY)
+
+    # nothing within the window anymore
+    summary = window.summary(begin + 3 * HOUR, percentiles=(50,))
+    assert summary == dict(observations=0, uptime=None, p50=None)
+
+
+def test_node_statistics():
+    node_statistics = NodeStatistics()
+    now = 1580000000
+
+    # node 0xa probed every 10 minutes over 2 days, unreachable for the first day;
+    # node 0xb only probed over the last hour
+    points = []
+    for minutes in range(2 * 24 * 60 - 10, -1, -10):
+        time = now - minutes * 60
+        reachable = minutes < 24 * 60
+        points.append(dict(time=time, staker_address='0xa', reachable=reachable,
+                           latency=0.05 if reachable else None))
+        if minutes < 60:
+            points.append(dict(time=time, staker_address='0xb', reachable=True, latency=0.5))
+    node_statistics.add_probe_results(points)
+    assert node_statistics.last_observation_time == now
+
+    statistics = node_statistics.get_statistics(now=now)
+    assert list(statistics['0xa']) == list(NodeStatistics.WINDOWS)
+    assert statistics['0xa']['1h']['uptime'] == 100.0
+    assert statistics['0xa']['24h']['uptime'] == pytest.approx(100.0, abs=5)  # up to a bucket more than 24h
+    assert statistics['0xa']['7d']['uptime'] == pytest.approx(50.0, abs=1)
+    assert statistics['0xa']['7d']['observations'] == 2 * 24 * 6
+    for percentile in NodeStatistics.PERCENTILES:
+        assert statistics['0xa']['24h'][f'p{percentile}'] == pytest.approx(0.05, rel=LatencySketch.RELATIVE_ACCURACY)
+        assert statistics['0xb']['7d'][f'p{percentile}'] == pytest.approx(0.5, rel=LatencySketch.RELATIVE_ACCURACY)
+    assert statistics['0xb']['7d']['observations'] == 6
+
+    # incremental observations
+    node_statistics.add_observation('0xb', timestamp=now + 60, up=False)
+    assert node_statistics.last_observation_time == now + 60
+    statistics = node_statistics.get_statistics(now=now + 60)
+    assert statistics['0xb']['1h']['observations'] == 7
+    assert statistics['0xb']['1h']['uptime'] == pytest.approx(100 * 6 / 7)
+
+    # observations read again from the resume time are only counted once, but late ones are counted
+    assert node_statistics.resume_time() == now + 60 - NodeStatistics.LATE_OBSERVATION_WINDOW
+    node_statistics.add_probe_results([dict(time=now, staker_address='0xb', reachable=True, latency=0.5),
+                                       dict(time=now + 60, staker_address='0xb', reachable=False),
+                                       dict(time=now + 30, staker_address='0xb', reachable=False)])
+    assert node_statistics.last_observation_time == now + 60
+    statistics = node_statistics.get_statistics(now=now + 60)
+    assert statistics['0xb']['1h']['observations'] == 8
+    assert statistics['0xb']['1h']['uptime'] == pytest.approx(100 * 6 / 8)
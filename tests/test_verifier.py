@@ -0,0 +1,60 @@
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+
+from nucypher.blockchain.eth.registry import InMemoryContractRegistry
+from nucypher.network.exceptions import NodeSeemsToBeDown
+from nucypher.network.nodes import Teacher
+
+from monitor.verifier import NodeVerifier, is_unreachable
+from tests.utilities import create_random_mock_node
+
+
+def thread_pool_executor(mp_context, **kwargs):
+    # worker threads instead of processes, so that patches apply to the workers
+    return ThreadPoolExecutor(**kwargs)
+
+
+@patch('monitor.verifier.ProcessPoolExecutor', side_effect=thread_pool_executor)
+@patch('monitor.verifier._init_worker')
+@patch('nucypher.characters.lawful.Ursula.from_bytes')
+def test_node_verifier(from_bytes, init_worker, new_executor):
+    nodes = [create_random_mock_node() for _ in range(100)]
+    nodes_by_metadata = {f'metadata-{i}'.encode(): node for i, node in enumerate(nodes)}
+    from_bytes.side_effect = lambda node_metadata, registry: nodes_by_metadata[node_metadata]
+
+    invalid_node, unreachable_node = nodes[10], nodes[20]
+    invalid_node.verify_node.side_effect = Teacher.InvalidNode('invalid stamp')
+    unreachable_node.verify_node.side_effect = NodeSeemsToBeDown[0]('connection refused')
+
+    verifier = NodeVerifier(provider_uri='http://localhost:8545', registry=InMemoryContractRegistry(), workers=4)
+    assert verifier.run([]) == []
+    new_executor.assert_not_called()  # workers are only started when there are nodes to verify
+
+    try:
+        failure_reasons = verifier.run([(metadata, f'/certificates/{node.checksum_address}.pem')
+                                        for metadata, node in nodes_by_metadata.items()])
+        assert len(failure_reasons) == len(nodes)
+        for node, failure_reason in zip(nodes, failure_reasons):
+            node.verify_node.assert_called_once()
+            assert node.verify_node.call_args[1]['certificate_filepath'] == f'/certificates/{node.checksum_address}.pem'
+            if node is invalid_node:
+                assert failure_reason.startswith('InvalidNode')
+                assert not is_unreachable(failure_reason)
+            elif node is unreachable_node:
+                assert failure_reason.startswith(NodeSeemsToBeDown[0].__name__)
+                assert is_unreachable(failure_reason)
+            else:
+                assert failure_reason is None
+
+        # the pool is reused by later rounds
+        verifier.run([(b'metadata-0', '/certificates/0.pem')])
+        new_executor.assert_called_once()
+        assert new_executor.call_args[1]['max_workers'] == 4
+        assert init_worker.call_count <= 4
+    finally:
+        verifier.close()
+
+    # restarted on use after being closed
+    verifier.run([(b'metadata-0', '/certificates/0.pem')])
+    assert new_executor.call_count == 2
+    verifier.close()
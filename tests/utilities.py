@@ -12,6 +12,8 @@ from nucypher.blockchain.eth.interfaces import BlockchainInterface
 from nucypher.blockchain.eth.registry import BaseContractRegistry
 from nucypher.keystore.keypairs import HostingKeypair
 
+from monitor.stakers import StakerTable
+
 COLORS = ['red', 'green', 'yellow', 'blue', 'black', 'brown', 'purple']
 
 
@@ -92,6 +94,24 @@ def create_specific_mock_state(nickname: str = 'Blue Knight Teal Club',
     return state
 
 
+def create_staker_table(staker_addresses: list,
+                        current_period: int = 18622,
+                        worker_addresses: list = None,
+                        last_confirmed_periods: list = None) -> StakerTable:
+    staker_table = StakerTable()
+    staker_table.start_cycle(current_period=current_period, block_time=1580000000, staker_addresses=staker_addresses)
+    for index, staker_address in enumerate(staker_addresses):
+        staker_table.update(staker_address=staker_address,
+                            worker_address=worker_addresses[index] if worker_addresses else create_eth_address(),
+                            start_date=1580000000.0,
+                            end_date=1590000000.0,
+                            stake=15000.0 + index,
+                            locked_stake=10000.0 + index,
+                            last_confirmed_period=last_confirmed_periods[index] if last_confirmed_periods
+                            else current_period + 1)
+    return staker_table
+
+
 class MockContractAgency:
     def __init__(self, staking_agent=MagicMock(spec=StakingEscrowAgent)):
         self.staking_agent = staking_agent